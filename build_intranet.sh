@@ -120,6 +120,8 @@ PYI_MAKESPEC="$VENV_DIR/bin/pyi-makespec"
     --hidden-import llm.openai_client \
     --hidden-import openai \
     --hidden-import db \
+    --hidden-import metrics \
+    --hidden-import settings \
     --hidden-import auth \
     --hidden-import uvicorn \
     --hidden-import passlib.handlers.bcrypt \
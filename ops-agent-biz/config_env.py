@@ -0,0 +1,99 @@
+"""
+Applies config.yaml (in the working directory) to the environment, which
+every setting of ops-agent-core is read from. Imported first by the API
+(main.py) and by ingest_worker.py, before anything that reads settings.
+"""
+import json
+import os
+
+import yaml
+
+def _url_list(value) -> str:
+    items = value if isinstance(value, list) else str(value).split(",")
+    return ",".join(str(u).strip().strip('`').strip() for u in items)
+
+# Support for Intranet Binary: Load config.yaml if exists
+if os.path.exists("config.yaml"):
+    try:
+        with open("config.yaml", "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+            if config:
+                # Parse Database Config
+                if "database" in config:
+                    db = config["database"]
+                    if "host" in db: os.environ["DB_HOST"] = str(db["host"])
+                    if "port" in db: os.environ["DB_PORT"] = str(db["port"])
+                    if "user" in db: os.environ["DB_USER"] = str(db["user"])
+                    if "password" in db: os.environ["DB_PASSWORD"] = str(db["password"])
+                    if "dbname" in db: os.environ["DB_NAME"] = str(db["dbname"])
+
+                # Parse LLM Config
+                if "llm" in config:
+                    llm = config["llm"]
+                    if "provider" in llm: os.environ["LLM_PROVIDER"] = str(llm["provider"])
+                    if "api_key" in llm: os.environ["LLM_API_KEY"] = str(llm["api_key"])
+                    # Base URLs may be a list (or comma-separated) of replicas
+                    if "chat_base_url" in llm: os.environ["LLM_BASE_URL"] = _url_list(llm["chat_base_url"])
+                    if "model" in llm: os.environ["LLM_MODEL"] = str(llm["model"])
+                    if "embedding_base_url" in llm: os.environ["EMBEDDING_BASE_URL"] = _url_list(llm["embedding_base_url"])
+                    if "embedding_model" in llm: os.environ["EMBEDDING_MODEL"] = str(llm["embedding_model"])
+                    if "embedding_batch_size" in llm: os.environ["EMBEDDING_BATCH_SIZE"] = str(llm["embedding_batch_size"])
+                    if "pool_size" in llm: os.environ["LLM_POOL_SIZE"] = str(llm["pool_size"])
+                    if "timeout" in llm: os.environ["LLM_TIMEOUT"] = str(llm["timeout"])
+                    if "connect_timeout" in llm: os.environ["LLM_CONNECT_TIMEOUT"] = str(llm["connect_timeout"])
+                    if "http2" in llm: os.environ["LLM_HTTP2"] = str(llm["http2"]).lower()
+                    if "max_inflight" in llm: os.environ["LLM_MAX_INFLIGHT"] = str(llm["max_inflight"])
+                    if "queue_timeout" in llm: os.environ["LLM_QUEUE_TIMEOUT"] = str(llm["queue_timeout"])
+                    if "retries" in llm: os.environ["LLM_RETRIES"] = str(llm["retries"])
+                    if "retry_backoff" in llm: os.environ["LLM_RETRY_BACKOFF"] = str(llm["retry_backoff"])
+                    if "breaker_threshold" in llm: os.environ["LLM_BREAKER_THRESHOLD"] = str(llm["breaker_threshold"])
+                    if "breaker_cooldown" in llm: os.environ["LLM_BREAKER_COOLDOWN"] = str(llm["breaker_cooldown"])
+                    if "embedding_hedge_delay_ms" in llm: os.environ["EMBEDDING_HEDGE_DELAY_MS"] = str(llm["embedding_hedge_delay_ms"])
+                    if "stream_usage" in llm: os.environ["LLM_STREAM_USAGE"] = str(llm["stream_usage"]).lower()
+
+                # Parse RAG Config
+                if "rag" in config:
+                    rag_conf = config["rag"]
+                    if "context_tokens" in rag_conf: os.environ["RAG_CONTEXT_TOKENS"] = str(rag_conf["context_tokens"])
+                    if "rrf_k" in rag_conf: os.environ["RAG_RRF_K"] = str(rag_conf["rrf_k"])
+                    if "vector_weight" in rag_conf: os.environ["RAG_VECTOR_WEIGHT"] = str(rag_conf["vector_weight"])
+                    if "keyword_weight" in rag_conf: os.environ["RAG_KEYWORD_WEIGHT"] = str(rag_conf["keyword_weight"])
+                    if "candidates" in rag_conf: os.environ["RAG_CANDIDATES"] = str(rag_conf["candidates"])
+                    if "min_similarity" in rag_conf: os.environ["RAG_MIN_SIMILARITY"] = str(rag_conf["min_similarity"])
+                    if "min_keyword_score" in rag_conf: os.environ["RAG_MIN_KEYWORD_SCORE"] = str(rag_conf["min_keyword_score"])
+                    if "lexical_backend" in rag_conf: os.environ["RAG_LEXICAL_BACKEND"] = str(rag_conf["lexical_backend"])
+                    if "bm25_snapshot" in rag_conf: os.environ["RAG_BM25_SNAPSHOT"] = str(rag_conf["bm25_snapshot"])
+                    if "bm25_snapshot_interval" in rag_conf: os.environ["RAG_BM25_SNAPSHOT_INTERVAL"] = str(rag_conf["bm25_snapshot_interval"])
+                    if "vector_store" in rag_conf: os.environ["RAG_VECTOR_STORE"] = str(rag_conf["vector_store"])
+                    if "numpy_store_dir" in rag_conf: os.environ["RAG_NUMPY_STORE_DIR"] = str(rag_conf["numpy_store_dir"])
+                    if "numpy_store_dtype" in rag_conf: os.environ["RAG_NUMPY_STORE_DTYPE"] = str(rag_conf["numpy_store_dtype"])
+                    if "mmr" in rag_conf: os.environ["RAG_MMR"] = json.dumps(rag_conf["mmr"] or {})
+                    if "vector_index" in rag_conf: os.environ["RAG_VECTOR_INDEX"] = str(rag_conf["vector_index"])
+                    if "hnsw_m" in rag_conf: os.environ["RAG_HNSW_M"] = str(rag_conf["hnsw_m"])
+                    if "hnsw_ef_construction" in rag_conf: os.environ["RAG_HNSW_EF_CONSTRUCTION"] = str(rag_conf["hnsw_ef_construction"])
+                    if "hnsw_ef_search" in rag_conf: os.environ["RAG_HNSW_EF_SEARCH"] = str(rag_conf["hnsw_ef_search"])
+                    if "hnsw_iterative_scan" in rag_conf: os.environ["RAG_HNSW_ITERATIVE_SCAN"] = str(rag_conf["hnsw_iterative_scan"])
+                    if "ivfflat_lists" in rag_conf: os.environ["RAG_IVFFLAT_LISTS"] = str(rag_conf["ivfflat_lists"])
+                    if "ivfflat_probes" in rag_conf: os.environ["RAG_IVFFLAT_PROBES"] = str(rag_conf["ivfflat_probes"])
+                    if "vector_quantization" in rag_conf: os.environ["RAG_VECTOR_QUANTIZATION"] = str(rag_conf["vector_quantization"])
+                    if "quantized_rerank_factor" in rag_conf: os.environ["RAG_QUANTIZED_RERANK_FACTOR"] = str(rag_conf["quantized_rerank_factor"])
+                    if "index_maintenance_work_mem" in rag_conf: os.environ["RAG_INDEX_MAINTENANCE_WORK_MEM"] = str(rag_conf["index_maintenance_work_mem"])
+                    if "ingest_workers" in rag_conf: os.environ["RAG_INGEST_WORKERS"] = str(rag_conf["ingest_workers"])
+                    if "ingest_job_timeout" in rag_conf: os.environ["RAG_INGEST_JOB_TIMEOUT"] = str(rag_conf["ingest_job_timeout"])
+                    if "partial_index_kbs" in rag_conf:
+                        kbs = rag_conf["partial_index_kbs"]
+                        os.environ["RAG_PARTIAL_INDEX_KBS"] = ",".join(kbs) if isinstance(kbs, list) else str(kbs or "")
+
+                # Parse Server Config
+                if "server" in config:
+                    srv = config["server"]
+                    if "host" in srv: os.environ["HOST"] = str(srv["host"])
+                    if "port" in srv: os.environ["PORT"] = str(srv["port"])
+
+                # Parse flat keys (legacy support)
+                for key, value in config.items():
+                    if isinstance(value, (str, int, float, bool)):
+                         os.environ[str(key)] = str(value)
+                print("Loaded configuration from config.yaml")
+    except Exception as e:
+        print(f"Error loading config.yaml: {e}")
@@ -0,0 +1,46 @@
+"""
+Dedicated ingest worker process (rag/ingest_jobs.py), for running
+ingestion apart from the API, on as many nodes as needed:
+
+    python ingest_worker.py --threads 2
+
+Run it from the API's working directory (config.yaml, uploads/); set
+rag.ingest_workers: 0 in the API's config.yaml when workers run like this.
+SIGTERM / Ctrl-C stop taking new jobs and wait for the running ones.
+
+The in-process indexes (RAG_LEXICAL_BACKEND=bm25, RAG_VECTOR_STORE=numpy)
+belong to the API process and its files; the worker only writes Postgres
+and bumps the shared KB version, on which the API resyncs them and drops
+stale cached answers (rag/kb_version.py).
+"""
+import argparse
+import os
+import signal
+import threading
+
+# Applies config.yaml to the environment exactly as the API does
+import config_env  # noqa: F401
+
+# Never load or write the API's BM25 snapshot / numpy store files; set
+# before rag is imported
+os.environ["RAG_LEXICAL_BACKEND"] = "postgres"
+os.environ["RAG_VECTOR_STORE"] = "pgvector"
+
+from rag.ingest_jobs import start_workers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest job worker")
+    parser.add_argument("--threads", type=int, default=1, help="Jobs run in parallel by this process")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    threads = start_workers(max(1, args.threads), stop)
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        stop.set()
+    print("Stopping ingest workers after their current jobs")
+    for thread in threads:
+        thread.join()
@@ -1,51 +1,16 @@
 import os
 import sys
-import yaml
 import csv
 import io
+import json
 
-# Support for Intranet Binary: Load config.yaml if exists
-if os.path.exists("config.yaml"):
-    try:
-        with open("config.yaml", "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
-            if config:
-                # Parse Database Config
-                if "database" in config:
-                    db = config["database"]
-                    if "host" in db: os.environ["DB_HOST"] = str(db["host"])
-                    if "port" in db: os.environ["DB_PORT"] = str(db["port"])
-                    if "user" in db: os.environ["DB_USER"] = str(db["user"])
-                    if "password" in db: os.environ["DB_PASSWORD"] = str(db["password"])
-                    if "dbname" in db: os.environ["DB_NAME"] = str(db["dbname"])
-
-                # Parse LLM Config
-                if "llm" in config:
-                    llm = config["llm"]
-                    if "provider" in llm: os.environ["LLM_PROVIDER"] = str(llm["provider"])
-                    if "api_key" in llm: os.environ["LLM_API_KEY"] = str(llm["api_key"])
-                    if "chat_base_url" in llm: os.environ["LLM_BASE_URL"] = str(llm["chat_base_url"]).strip().strip('`').strip()
-                    if "model" in llm: os.environ["LLM_MODEL"] = str(llm["model"])
-                    if "embedding_base_url" in llm: os.environ["EMBEDDING_BASE_URL"] = str(llm["embedding_base_url"]).strip().strip('`').strip()
-                    if "embedding_model" in llm: os.environ["EMBEDDING_MODEL"] = str(llm["embedding_model"])
-
-                # Parse Server Config
-                if "server" in config:
-                    srv = config["server"]
-                    if "host" in srv: os.environ["HOST"] = str(srv["host"])
-                    if "port" in srv: os.environ["PORT"] = str(srv["port"])
-
-                # Parse flat keys (legacy support)
-                for key, value in config.items():
-                    if isinstance(value, (str, int, float, bool)):
-                         os.environ[str(key)] = str(value)
-                print("Loaded configuration from config.yaml")
-    except Exception as e:
-        print(f"Error loading config.yaml: {e}")
+# Support for Intranet Binary: applies config.yaml to the environment first
+import config_env  # noqa: F401
 
 from fastapi import FastAPI, Request, UploadFile, File, Depends, HTTPException, status, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
@@ -53,15 +18,30 @@ from pydantic import BaseModel
 import uuid
 import os
 import shutil
+import threading
 import jinja2 # Force import for PyInstaller
 import markupsafe # Force import for PyInstaller
 from collections import Counter, deque
 from llm.factory import get_llm_client
-from rag.qa import answer_question
-from rag.loader import load_document, load_text_content, delete_document_by_source
+from llm.endpoints import endpoint_health
+from llm.governor import LLMQueueTimeout, governor_stats, llm_slot
+from llm.embedding_cache import current_model_id, embedding_cache
+from rag.context import count_tokens
+from rag.qa import answer_question, answer_question_stream
+from rag.singleflight import singleflight
+from rag.loader import load_text_content, delete_document_by_source, delete_documents_by_qa, documents_deleted
+from rag.answer_cache import answer_cache
+from rag.kb_version import bump_kb_version, on_kb_change, start_kb_version_poller
+from rag.intent import intent_status, train_from_chat_logs
+from rag.bm25 import bm25_index
+from rag.fulltext import backfill_content_tsv, search_content
+from rag.vector_store import get_vector_store
+from rag.vector_index import analyze_documents, ensure_index, index_status, start_rebuild
+from rag.ingest_jobs import STATUSES as INGEST_JOB_STATUSES, enqueue as enqueue_ingest, get_job, list_jobs, start_workers
 from db import engine
+from metrics import CallbackMetric, MetricsMiddleware, render as render_metrics, request_timings, timed
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional
 from datetime import timedelta, datetime
 import io
 import base64
@@ -103,6 +83,19 @@ async def lifespan(app: FastAPI):
                     embedding vector(1024)
                 )
             """))
+            # Token count per chunk, filled at ingestion for context packing (rag/context.py)
+            conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS token_count INTEGER"))
+            # 创建 embedding_cache 表 (Embedding 持久缓存, 按 model + sha256(text) 寻址)
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model VARCHAR(255) NOT NULL,
+                    text_hash CHAR(64) NOT NULL,
+                    embedding REAL[] NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (model, text_hash)
+                )
+            """))
             # 创建 chat_logs 表 (用于记录完整问答和反馈)
             conn.execute(text("""
                 CREATE TABLE IF NOT EXISTS chat_logs (
@@ -119,6 +112,9 @@ async def lifespan(app: FastAPI):
                 conn.execute(text("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS image_path VARCHAR(512)"))
                 conn.execute(text("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'normal'"))
                 conn.execute(text("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS sources JSONB"))
+                # Intent label and who decided it (rule / centroid / llm / fallback), used to train rag/intent.py
+                conn.execute(text("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS intent VARCHAR(20)"))
+                conn.execute(text("ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS intent_source VARCHAR(20)"))
             except Exception as e:
                 print(f"Migration note: {e}")
 
@@ -174,6 +170,103 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 print(f"Migration note (uploaded_files): {e}")
             conn.commit()
+
+            # documents: kb_type / source / type promoted from metadata JSONB to
+            # indexed columns, chunks linked to their uploaded_files / learned_qa
+            # row. Backfill runs once: only rows from before the migration have
+            # kb_type NULL. NULL kb_type in metadata meant "all kbs" -> 'shared'.
+            try:
+                conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS kb_type VARCHAR(20) DEFAULT 'user'"))
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS kb_type VARCHAR(20)"))
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS source TEXT"))
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS doc_type VARCHAR(32)"))
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS file_id INTEGER REFERENCES uploaded_files(id) ON DELETE CASCADE"))
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS qa_id INTEGER REFERENCES learned_qa(id) ON DELETE CASCADE"))
+                backfilled = conn.execute(text("""
+                    UPDATE documents d SET
+                        kb_type = COALESCE(d.metadata->>'kb_type', 'shared'),
+                        source = d.metadata->>'source',
+                        doc_type = d.metadata->>'type',
+                        file_id = (SELECT MAX(f.id) FROM uploaded_files f WHERE f.file_path = d.metadata->>'source'),
+                        qa_id = CASE WHEN d.metadata->>'type' IN ('learned_qa', 'manual_qa') THEN
+                            (SELECT MAX(q.id) FROM learned_qa q WHERE q.question = d.metadata->>'question') END
+                    WHERE d.kb_type IS NULL
+                """)).rowcount
+                if backfilled:
+                    print(f"Migrated {backfilled} documents rows to kb_type/source/doc_type/file_id/qa_id columns")
+                conn.execute(text("ALTER TABLE documents ALTER COLUMN kb_type SET DEFAULT 'shared'"))
+                conn.execute(text("ALTER TABLE documents ALTER COLUMN kb_type SET NOT NULL"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS documents_source_idx ON documents (source)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS documents_file_id_idx ON documents (file_id)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS documents_qa_id_idx ON documents (qa_id)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS documents_kb_type_idx ON documents (kb_type)"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Migration note (documents columns): {e}")
+
+            # Full-text search column (rag/fulltext.py); existing rows are
+            # tokenized by backfill_content_tsv after startup
+            try:
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS documents_content_tsv_idx ON documents USING gin (content_tsv)"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Migration note (documents content_tsv): {e}")
+            
+            # Per-chunk sha256 (text + embedding model) for incremental re-ingestion
+            # (rag/loader.py); rows without one are re-embedded on their next upload
+            try:
+                conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash CHAR(64)"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Migration note (documents content_hash): {e}")
+
+            # Shared KB version (rag/kb_version.py), bumped by every process writing documents
+            try:
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS kb_version (
+                        id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                        version BIGINT NOT NULL DEFAULT 0
+                    )
+                """))
+                conn.execute(text("INSERT INTO kb_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Migration note (kb_version): {e}")
+
+            # Ingestion queue (rag/ingest_jobs.py)
+            try:
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS ingest_jobs (
+                        id SERIAL PRIMARY KEY,
+                        kind VARCHAR(20) NOT NULL DEFAULT 'document',
+                        file_id INTEGER REFERENCES uploaded_files(id) ON DELETE CASCADE,
+                        payload JSONB NOT NULL,
+                        status VARCHAR(20) NOT NULL DEFAULT 'queued', -- queued, running, done, failed
+                        stage VARCHAR(20),
+                        progress_done INTEGER DEFAULT 0,
+                        progress_total INTEGER DEFAULT 0,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        error TEXT,
+                        result JSONB,
+                        worker VARCHAR(255),
+                        created_by VARCHAR(50),
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        started_at TIMESTAMP,
+                        heartbeat_at TIMESTAMP,
+                        finished_at TIMESTAMP
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ingest_jobs_active_idx ON ingest_jobs (status, id) WHERE status IN ('queued', 'running')"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ingest_jobs_file_id_idx ON ingest_jobs (file_id)"))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Migration note (ingest_jobs): {e}")
             
             # Seed Default Users
             # Check if admin exists
@@ -194,10 +287,55 @@ async def lifespan(app: FastAPI):
         print("✅ Database initialized successfully")
     except Exception as e:
         print(f"⚠️ Database initialization failed: {e}")
+
+    # Drop cached embeddings of a previously configured EMBEDDING_MODEL
+    embedding_cache.purge_other_models(current_model_id())
+
+    # Build the ANN index on documents.embedding if missing (CONCURRENTLY, in the background)
+    threading.Thread(target=ensure_index, daemon=True).start()
+    # Tokenize chunks stored before documents.content_tsv existed
+    threading.Thread(target=backfill_content_tsv, daemon=True).start()
+    # RAG_LEXICAL_BACKEND=bm25: load the BM25 snapshot and catch up with documents
+    threading.Thread(target=bm25_index.start, daemon=True).start()
+    # RAG_VECTOR_STORE=numpy: open the memory-mapped replica and catch up with documents
+    threading.Thread(target=get_vector_store().start, daemon=True).start()
+    # Train the local intent classifier in the background (needs embeddings)
+    threading.Thread(target=train_intent_classifier, daemon=True).start()
+    # Load the tokenizer (may download its BPE file) before the first question needs it
+    threading.Thread(target=count_tokens, args=("warm up",), daemon=True).start()
+    # Ingest job workers (RAG_INGEST_WORKERS, 0 when run as ingest_worker.py processes)
+    ingest_stop = threading.Event()
+    start_workers(stop=ingest_stop)
+    # Chunks written by other processes: invalidates the answer cache and resyncs the in-process indexes
+    on_kb_change(resync_local_indexes)
+    start_kb_version_poller(ingest_stop)
     
     yield
     # Shutdown logic (if any)
     nacos_registry.stop()
+    ingest_stop.set()
+    if bm25_index.ready and bm25_index.dirty:
+        try:
+            bm25_index.save()
+        except Exception as e:
+            print(f"BM25 snapshot on shutdown failed: {e}")
+
+def resync_local_indexes():
+    # Another process (ingest_worker.py, another API node) changed documents
+    store = get_vector_store()
+    if not store.in_database and store.ready:
+        added, removed = store.sync()
+        print(f"Vector store resynced: +{added} / -{removed}")
+    if bm25_index.ready:
+        added, removed = bm25_index.sync()
+        print(f"BM25 index resynced: +{added} / -{removed}")
+        bm25_index.maybe_snapshot()
+
+def train_intent_classifier():
+    try:
+        train_from_chat_logs()
+    except Exception as e:
+        print(f"Intent classifier training failed: {e}")
 
 # 初始化 FastAPI
 app = FastAPI(lifespan=lifespan)
@@ -231,6 +369,9 @@ def save_question_history(buffer):
 
 question_buffer = load_question_history()
 
+# 请求计数 / 耗时，并在响应头 Server-Timing 中返回各阶段耗时
+app.add_middleware(MetricsMiddleware)
+
 # 允许跨域请求
 app.add_middleware(
     CORSMiddleware,
@@ -431,24 +572,25 @@ def upload_document(
                 
             # Record in uploaded_files table
             with engine.begin() as conn:
-                conn.execute(
-                    text("INSERT INTO uploaded_files (filename, file_path, uploader, status, file_size, kb_type) VALUES (:f, :p, :u, :s, :sz, :k)"),
+                file_id = conn.execute(
+                    text("INSERT INTO uploaded_files (filename, file_path, uploader, status, file_size, kb_type) VALUES (:f, :p, :u, :s, :sz, :k) RETURNING id"),
                     {"f": safe_filename, "p": file_path, "u": current_user.username, "s": status_code, "sz": size, "k": kb_type}
-                )
+                ).scalar()
+
+                if is_admin:
+                    # 入库: queued for an ingest worker, progress at /ingest_jobs/{job_id}
+                    metadata = {
+                        "source": file_path,
+                        "filename": safe_filename,
+                        "type": "user_upload",
+                        "uploader": current_user.username,
+                        "upload_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                    job_id = enqueue_ingest(conn, file_id, file_path, metadata, kb_type=kb_type, created_by=current_user.username)
 
             if is_admin:
-                # 入库
-                metadata = {
-                    "source": file_path,
-                    "filename": safe_filename,
-                    "type": "user_upload",
-                    "uploader": current_user.username,
-                    "upload_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-                # 调用 loader 进行入库，传入 kb_type
-                load_document(file_path, metadata, kb_type=kb_type)
-                results.append({"filename": file.filename, "status": "success", "message": f"上传并入库成功 ({kb_type} 库)"})
+                results.append({"filename": file.filename, "status": "queued", "job_id": job_id, "file_id": file_id,
+                                "message": f"上传成功，已加入入库队列 ({kb_type} 库)"})
             else:
                 results.append({"filename": file.filename, "status": "pending", "message": "上传成功，等待管理员审批"})
             
@@ -574,7 +716,7 @@ def download_source(doc_id: int, current_user: User = Depends(get_current_active
     with engine.connect() as conn:
         # Get source path from documents table metadata
         row = conn.execute(
-            text("SELECT metadata->>'source' as source, metadata->>'filename' as filename FROM documents WHERE id = :id"), 
+            text("SELECT source, metadata->>'filename' as filename FROM documents WHERE id = :id"), 
             {"id": doc_id}
         ).fetchone()
         
@@ -598,31 +740,27 @@ def approve_doc(doc_id: int, current_user: User = Depends(get_current_active_use
         raise HTTPException(status_code=403, detail="Permission denied")
     
     with engine.begin() as conn:
-        # Get file info
-        row = conn.execute(text("SELECT filename, file_path, uploader, created_at FROM uploaded_files WHERE id = :id AND status = 'pending'"), {"id": doc_id}).fetchone()
+        # 'ingesting' until the worker has stored the chunks ('approved'), back to 'pending' if it fails
+        row = conn.execute(text("""
+            UPDATE uploaded_files SET status = 'ingesting' WHERE id = :id AND status = 'pending'
+            RETURNING filename, file_path, uploader, created_at
+        """), {"id": doc_id}).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Document not found or not pending")
         
         filename, file_path, uploader, created_at = row
-        
-        # Ingest
-        try:
-            metadata = {
-                "source": file_path,
-                "filename": filename,
-                "type": "user_upload",
-                "uploader": uploader,
-                "upload_time": created_at.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            # Approve -> Ingest into 'user' KB (since uploader was likely 'user')
-            load_document(file_path, metadata, kb_type="user")
-            
-            # Update status
-            conn.execute(text("UPDATE uploaded_files SET status = 'approved' WHERE id = :id"), {"id": doc_id})
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
+        metadata = {
+            "source": file_path,
+            "filename": filename,
+            "type": "user_upload",
+            "uploader": uploader,
+            "upload_time": created_at.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        # Approve -> Ingest into 'user' KB (since uploader was likely 'user')
+        job_id = enqueue_ingest(conn, doc_id, file_path, metadata, kb_type="user", approve=True,
+                                created_by=current_user.username)
 
-    return {"message": "Document approved and ingested"}
+    return {"message": "Document approved, ingestion queued", "job_id": job_id}
 
 @app.post("/reject_doc/{doc_id}")
 def reject_doc(doc_id: int, current_user: User = Depends(get_current_active_user)):
@@ -815,7 +953,7 @@ def reprocess_docs(force: bool = False):
     db_files = set()
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("SELECT DISTINCT metadata->>'source' FROM documents")).fetchall()
+            result = conn.execute(text("SELECT DISTINCT source FROM documents WHERE source IS NOT NULL")).fetchall()
             # Only consider files that look like they are in 'uploads/' to avoid deleting other things
             for row in result:
                 source = row[0]
@@ -839,15 +977,19 @@ def reprocess_docs(force: bool = False):
     # 4. Handle Deletions
     if files_to_delete:
         try:
+            deleted_ids = []
             with engine.begin() as conn:
                 for source in files_to_delete:
                     # Delete from documents (vector store)
-                    conn.execute(text("DELETE FROM documents WHERE metadata->>'source' = :s"), {"s": source})
+                    deleted_ids.extend(delete_document_by_source(source, conn))
                     # Delete from uploaded_files table to sync UI status
                     conn.execute(text("DELETE FROM uploaded_files WHERE file_path = :s"), {"s": source})
                     deleted_count += 1
+            # In-process indexes follow once the deletes are committed
+            documents_deleted(deleted_ids)
         except Exception as e:
              errors.append(f"Deletion error: {str(e)}")
+        bump_kb_version()
 
     # 5. Handle Additions
     files_to_process = disk_files if force else files_to_add
@@ -855,6 +997,7 @@ def reprocess_docs(force: bool = False):
     if not force:
         skipped_count = len(disk_files) - len(files_to_add)
 
+    job_ids = []
     for file_path in files_to_process:
         try:
              filename = os.path.basename(file_path)
@@ -865,23 +1008,27 @@ def reprocess_docs(force: bool = False):
                  "type": "manual_reprocess",
                  "upload_time": upload_time
              }
-             # Default to user KB for auto-reprocess
-             load_document(file_path, metadata, kb_type="user")
-             processed_count += 1
-             
-             # Add to uploaded_files if not exists (to show in Admin UI)
+             # Add to uploaded_files if not exists (to show in Admin UI); the chunks link to it
              with engine.begin() as conn:
-                 res = conn.execute(text("SELECT id FROM uploaded_files WHERE file_path = :p"), {"p": file_path}).fetchone()
-                 if not res:
+                 res = conn.execute(text("SELECT MAX(id) FROM uploaded_files WHERE file_path = :p"), {"p": file_path}).scalar()
+                 if res is None:
                      file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                     conn.execute(
-                        text("INSERT INTO uploaded_files (filename, file_path, uploader, status, file_size, kb_type) VALUES (:f, :p, :u, :s, :sz, :k)"),
+                     res = conn.execute(
+                        text("INSERT INTO uploaded_files (filename, file_path, uploader, status, file_size, kb_type) VALUES (:f, :p, :u, :s, :sz, :k) RETURNING id"),
                         {"f": filename, "p": file_path, "u": "system_scan", "s": "approved", "sz": file_size, "k": "user"}
-                    )
+                    ).scalar()
+
+                 # Default to user KB for auto-reprocess; ingested by the job workers
+                 job_ids.append(enqueue_ingest(conn, res, file_path, metadata, kb_type="user", created_by="system_scan"))
+             processed_count += 1
         except Exception as e:
              errors.append(f"{os.path.basename(file_path)}: {str(e)}")
              
-    msg = f"已同步：新增 {processed_count} 个，剔除 {deleted_count} 个"
+    if deleted_count:
+        # Bulk change: refresh planner statistics for the vector / keyword search
+        analyze_documents()
+
+    msg = f"已同步：新增 {processed_count} 个 (已加入入库队列)，剔除 {deleted_count} 个"
     if skipped_count > 0:
         msg += f"，跳过 {skipped_count} 个现有文件"
     if errors:
@@ -892,6 +1039,7 @@ def reprocess_docs(force: bool = False):
         "processed": processed_count,
         "deleted": deleted_count,
         "skipped": skipped_count,
+        "job_ids": job_ids,
         "errors": errors
     }
 
@@ -990,10 +1138,10 @@ def learn_question(req: LearnRequest, current_user: User = Depends(get_current_a
             conn.execute(text("UPDATE chat_logs SET status = 'learned' WHERE id = :id"), {"id": req.question_id})
             
             # 2. Insert into learned_qa
-            conn.execute(
-                text("INSERT INTO learned_qa (question, answer, status, username) VALUES (:q, :a, 'approved', :u)"),
+            qa_id = conn.execute(
+                text("INSERT INTO learned_qa (question, answer, status, username) VALUES (:q, :a, 'approved', :u) RETURNING id"),
                 {"q": question, "a": req.answer, "u": current_user.username}
-            )
+            ).scalar()
             
             # 3. Ingest into Vector DB
             metadata = {
@@ -1025,7 +1173,7 @@ def learn_question(req: LearnRequest, current_user: User = Depends(get_current_a
 
     if do_ingest:
         try:
-            load_text_content(ingest_content, ingest_metadata)
+            load_text_content(ingest_content, ingest_metadata, qa_id=qa_id)
         except Exception as e:
             print(f"Error ingesting learned QA: {e}")
             return {"status": "partial_success", "message": "Learned but vector ingestion failed"}
@@ -1033,7 +1181,7 @@ def learn_question(req: LearnRequest, current_user: User = Depends(get_current_a
     return {"status": "success", "message": "Question learned and ingested" if is_admin else "Question submitted for approval"}
 
 @app.post("/admin/polish_answer")
-def polish_answer(req: PolishRequest, current_user: User = Depends(get_current_active_user)):
+async def polish_answer(req: PolishRequest, current_user: User = Depends(get_current_active_user)):
     try:
         llm = get_llm_client()
         prompt = f"""
@@ -1050,8 +1198,11 @@ def polish_answer(req: PolishRequest, current_user: User = Depends(get_current_a
 """
         # llm.chat expects a list of messages
         messages = [{"role": "user", "content": prompt}]
-        polished_answer = llm.chat(messages)
+        async with llm_slot(llm, current_user.role):
+            polished_answer = await llm.achat(messages)
         return {"status": "success", "polished_answer": polished_answer.strip()}
+    except LLMQueueTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error polishing answer: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1071,10 +1222,10 @@ def add_qa(req: ManualQARequest, current_user: User = Depends(get_current_active
     status = 'approved' if current_user.role == 'admin' else 'pending'
 
     with engine.begin() as conn:
-        conn.execute(
-            text("INSERT INTO learned_qa (question, answer, status, username) VALUES (:q, :a, :s, :u)"),
+        qa_id = conn.execute(
+            text("INSERT INTO learned_qa (question, answer, status, username) VALUES (:q, :a, :s, :u) RETURNING id"),
             {"q": question, "a": answer, "s": status, "u": current_user.username}
-        )
+        ).scalar()
         
         # Only ingest if approved immediately (Admin)
         if status == 'approved':
@@ -1088,7 +1239,7 @@ def add_qa(req: ManualQARequest, current_user: User = Depends(get_current_active
                 "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
              }
              try:
-                 load_text_content(content, metadata)
+                 load_text_content(content, metadata, qa_id=qa_id)
              except Exception as e:
                  print(f"Error ingesting manual QA: {e}")
 
@@ -1100,22 +1251,17 @@ def delete_qa(qa_id: int, current_user: User = Depends(get_current_active_user))
         raise HTTPException(status_code=403, detail="Permission denied")
         
     with engine.begin() as conn:
-        # 1. Get question to delete from vector db
-        row = conn.execute(text("SELECT question FROM learned_qa WHERE id = :id"), {"id": qa_id}).fetchone()
+        row = conn.execute(text("SELECT id FROM learned_qa WHERE id = :id"), {"id": qa_id}).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="QA not found")
-        question = row[0]
-        
+
+        # 1. Delete from Vector DB (chunks linked by documents.qa_id)
+        deleted_ids = delete_documents_by_qa(qa_id, conn)
+
         # 2. Delete from SQL
         conn.execute(text("DELETE FROM learned_qa WHERE id = :id"), {"id": qa_id})
-        
-        # 3. Delete from Vector DB
-        # We delete where metadata->>'question' matches the question
-        # Safe to assume question is unique enough for this context, and we restrict by type just in case
-        conn.execute(
-            text("DELETE FROM documents WHERE metadata->>'question' = :q AND (metadata->>'type' = 'manual_qa' OR metadata->>'type' = 'learned_qa')"),
-            {"q": question}
-        )
+    bump_kb_version()
+    documents_deleted(deleted_ids)
         
     return {"message": "QA deleted successfully"}
 
@@ -1271,7 +1417,7 @@ def approve_qa(qa_id: int, current_user: User = Depends(get_current_active_user)
         content = f"问题：{question}\n答案：{answer}"
         
     try:
-        load_text_content(content, metadata)
+        load_text_content(content, metadata, qa_id=qa_id)
     except Exception as e:
         print(f"Error ingesting approved QA: {e}")
         return {"status": "partial_success", "message": "Approved but vector ingestion failed"}
@@ -1303,23 +1449,18 @@ def discard_unknown_question(id: int, current_user: User = Depends(get_current_a
             
     return {"status": "success", "message": "Question discarded"}
 
-# 接受用户问题并返回答案
-@app.post("/get_answer")
-def get_answer(req: QuestionRequest, current_user: User = Depends(get_current_active_user)):
-    question = req.question
-    image_data = req.image
-    
-    # Guest Limit Check
-    if current_user.role == 'guest':
-        with engine.connect() as conn:
-            count = conn.execute(text("SELECT COUNT(*) FROM chat_logs WHERE username = :u"), {"u": current_user.username}).scalar()
-            if count >= 5:
-                return {
-                    "answer": "您是访客用户，提问次数已达上限 (5次)。请注册或登录以继续使用。",
-                    "sources": [],
-                    "images": []
-                }
-    
+GUEST_QUESTION_LIMIT = 5
+GUEST_LIMIT_ANSWER = "您是访客用户，提问次数已达上限 (5次)。请注册或登录以继续使用。"
+UNKNOWN_ANSWER_KEYWORDS = ["未在现有运维知识库中找到", "我不知道", "无法回答"]
+
+def guest_limit_reached(current_user: User) -> bool:
+    if current_user.role != 'guest':
+        return False
+    with engine.connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM chat_logs WHERE username = :u"), {"u": current_user.username}).scalar()
+    return count >= GUEST_QUESTION_LIMIT
+
+def record_question(question: str):
     # 记录问题历史 (Legacy file)
     question_buffer.appendleft(question)
     save_question_history(question_buffer)
@@ -1328,25 +1469,87 @@ def get_answer(req: QuestionRequest, current_user: User = Depends(get_current_ac
     with engine.begin() as conn:
         conn.execute(text("INSERT INTO question_history (question) VALUES (:q)"), {"q": question})
 
-    # Save user image if present
-    saved_image_path = None
-    if image_data:
+def save_user_image(image_data: str | None) -> str | None:
+    if not image_data:
+        return None
+    try:
+        # image_data is base64 string
+        if "," in image_data:
+            header, encoded = image_data.split(",", 1)
+        else:
+            encoded = image_data
+        
+        data = base64.b64decode(encoded)
+        # Simple unique filename
+        filename = f"{uuid.uuid4()}.png"
+        save_path = os.path.join("user_images", filename)
+        with open(save_path, "wb") as f:
+            f.write(data)
+        return filename
+    except Exception as e:
+        print(f"Error saving user image: {e}")
+        return None
+
+def find_learned_answer(question: str) -> str | None:
+    with engine.connect() as conn:
+        # Try exact match first
         try:
-            # image_data is base64 string
-            if "," in image_data:
-                header, encoded = image_data.split(",", 1)
-            else:
-                encoded = image_data
-            
-            data = base64.b64decode(encoded)
-            # Simple unique filename
-            filename = f"{uuid.uuid4()}.png"
-            save_path = os.path.join("user_images", filename)
-            with open(save_path, "wb") as f:
-                f.write(data)
-            saved_image_path = filename
+            # Check if learned_qa table exists to avoid errors during initial migration
+            learned = conn.execute(text("SELECT answer FROM learned_qa WHERE question = :q ORDER BY created_at DESC LIMIT 1"), {"q": question}).fetchone()
+            if learned:
+                return learned[0]
         except Exception as e:
-            print(f"Error saving user image: {e}")
+            # Table might not exist yet if startup hasn't run fully or connection issue
+            print(f"Error checking learned_qa: {e}")
+    return None
+
+def kb_type_for_role(role: str) -> str:
+    # Map guest to user KB, admin to all
+    if role == 'guest':
+        return 'user'
+    elif role == 'admin':
+        return 'all'
+    return role
+
+def answer_status(answer: str, is_learned: bool) -> str:
+    if is_learned:
+        return "learned"
+    # Check for unknown keywords
+    for kw in UNKNOWN_ANSWER_KEYWORDS:
+        if kw in answer:
+            return "unknown"
+    return "normal"
+
+def log_chat(question: str, answer: str, username: str, image_path: str | None, status_code: str, sources: list,
+             intent: str | None = None, intent_source: str | None = None) -> int:
+    with engine.begin() as conn:
+        result = conn.execute(
+            text("INSERT INTO chat_logs (question, answer, username, image_path, status, sources, intent, intent_source) VALUES (:q, :a, :u, :i, :s, :src, :it, :its) RETURNING id"),
+            {"q": question, "a": answer, "u": username, "i": image_path, "s": status_code, "src": json.dumps(sources),
+             "it": intent, "its": intent_source}
+        )
+        return result.scalar()
+
+# 接受用户问题并返回答案
+# async: the LLM/embedding calls are awaited on the event loop, only the short
+# DB steps are handed to the threadpool
+@app.post("/get_answer")
+async def get_answer(req: QuestionRequest, current_user: User = Depends(get_current_active_user)):
+    question = req.question
+    image_data = req.image
+    
+    # Guest Limit Check
+    if await run_in_threadpool(guest_limit_reached, current_user):
+        return {
+            "answer": GUEST_LIMIT_ANSWER,
+            "sources": [],
+            "images": []
+        }
+    
+    await run_in_threadpool(record_question, question)
+
+    # Save user image if present
+    saved_image_path = await run_in_threadpool(save_user_image, image_data)
 
     # Step 1: Check learned_qa (Direct Answer)
     # Only do this if no image is present (assuming learned QA is text-based)
@@ -1355,64 +1558,111 @@ def get_answer(req: QuestionRequest, current_user: User = Depends(get_current_ac
     sources = []
     images = []
     is_learned = False
+    intent_info = {}
     
     if not image_data:
-        with engine.connect() as conn:
-            # Try exact match first
-            try:
-                # Check if learned_qa table exists to avoid errors during initial migration
-                learned = conn.execute(text("SELECT answer FROM learned_qa WHERE question = :q ORDER BY created_at DESC LIMIT 1"), {"q": question}).fetchone()
-                if learned:
-                    answer = learned[0]
-                    is_learned = True
-            except Exception as e:
-                # Table might not exist yet if startup hasn't run fully or connection issue
-                print(f"Error checking learned_qa: {e}")
+        with timed("learned_lookup"):
+            answer = await run_in_threadpool(find_learned_answer, question)
+        is_learned = bool(answer)
     
     if not answer:
         # Step 2: Call RAG logic
         # Pass user role to answer_question to filter KB
-        # Map guest to user KB, admin to all
-        kb_type = current_user.role
-        if kb_type == 'guest':
-            kb_type = 'user'
-        elif kb_type == 'admin':
-            kb_type = 'all'
+        kb_type = kb_type_for_role(current_user.role)
             
-        rag_result = answer_question(question, image_data, kb_type=kb_type)
+        rag_result = await answer_question(question, image_data, kb_type=kb_type, role=current_user.role)
         if isinstance(rag_result, dict):
             answer = rag_result.get("answer")
             sources = rag_result.get("sources", [])
+            intent_info = {"intent": rag_result.get("intent"), "intent_source": rag_result.get("intent_source")}
         else:
             answer = rag_result
             sources = []
 
     # Step 3: Determine Status
-    # Default status
-    status_code = "normal"
-    if is_learned:
-        status_code = "learned"
-    else:
-        # Check for unknown keywords
-        unknown_keywords = ["未在现有运维知识库中找到", "我不知道", "无法回答"]
-        for kw in unknown_keywords:
-            if kw in answer:
-                status_code = "unknown"
-                # If unknown, clear sources to avoid confusion
-                sources = []
-                break
-
-        # Log chat to DB (with username, image_path, status, sources)
-    question_id = None
-    with engine.begin() as conn:
-        result = conn.execute(
-            text("INSERT INTO chat_logs (question, answer, username, image_path, status, sources) VALUES (:q, :a, :u, :i, :s, :src) RETURNING id"),
-            {"q": question, "a": answer, "u": current_user.username, "i": saved_image_path, "s": status_code, "src": json.dumps(sources)}
+    status_code = answer_status(answer, is_learned)
+    if status_code == "unknown":
+        # If unknown, clear sources to avoid confusion
+        sources = []
+
+    # Log chat to DB (with username, image_path, status, sources)
+    with timed("chat_log"):
+        question_id = await run_in_threadpool(
+            log_chat, question, answer, current_user.username, saved_image_path, status_code, sources, **intent_info
         )
-        question_id = result.scalar()
 
     return {"answer": answer, "sources": sources, "images": images, "question_id": question_id}
 
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# 流式返回答案 (Server-Sent Events)
+# 事件顺序: sources -> token (多次) -> done (含 question_id / status / 最终 sources)
+@app.post("/get_answer_stream")
+async def get_answer_stream(req: QuestionRequest, current_user: User = Depends(get_current_active_user)):
+    question = req.question
+    image_data = req.image
+
+    async def limit_stream():
+        yield sse_event("sources", [])
+        yield sse_event("token", GUEST_LIMIT_ANSWER)
+        yield sse_event("done", {"question_id": None, "status": "limited", "sources": []})
+
+    async def answer_stream():
+        await run_in_threadpool(record_question, question)
+        saved_image_path = await run_in_threadpool(save_user_image, image_data)
+
+        learned_answer = None
+        if not image_data:
+            with timed("learned_lookup"):
+                learned_answer = await run_in_threadpool(find_learned_answer, question)
+        intent_info = {}
+        if learned_answer:
+            sources = []
+            parts = [learned_answer]
+            yield sse_event("sources", sources)
+            yield sse_event("token", learned_answer)
+        else:
+            kb_type = kb_type_for_role(current_user.role)
+            sources = []
+            parts = []
+            try:
+                async for event in answer_question_stream(question, image_data, kb_type=kb_type, role=current_user.role):
+                    if event["type"] == "sources":
+                        sources = event["sources"]
+                        yield sse_event("sources", sources)
+                    elif event["type"] == "intent":
+                        intent_info = {"intent": event["intent"], "intent_source": event["intent_source"]}
+                    else:
+                        parts.append(event["content"])
+                        yield sse_event("token", event["content"])
+            except Exception as e:
+                print(f"Error streaming answer: {e}")
+                yield sse_event("error", {"message": str(e)})
+                return
+
+        # Write chat_logs only once the full answer is known
+        answer = "".join(parts)
+        status_code = answer_status(answer, learned_answer is not None)
+        if status_code == "unknown":
+            sources = []
+        with timed("chat_log"):
+            question_id = await run_in_threadpool(
+                log_chat, question, answer, current_user.username, saved_image_path, status_code, sources, **intent_info
+            )
+        # The Server-Timing header went out with the first byte; the stage
+        # timings of a stream are sent here instead
+        yield sse_event("done", {"question_id": question_id, "status": status_code, "sources": sources,
+                                 "timings": {stage: round(ms, 1) for stage, ms in request_timings().items()}})
+
+    limited = await run_in_threadpool(guest_limit_reached, current_user)
+    stream = limit_stream() if limited else answer_stream()
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/feedback")
 def submit_feedback(request: FeedbackRequest):
     try:
@@ -1427,6 +1677,97 @@ def submit_feedback(request: FeedbackRequest):
         return {"error": str(e)}
 
 
+@app.get("/admin/cache_stats")
+def get_cache_stats(current_user: User = Depends(get_current_active_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "singleflight": singleflight.stats()
+    }
+
+@app.get("/admin/llm_stats")
+async def get_llm_stats(current_user: User = Depends(get_current_active_user)):
+    # Read on the event loop, where the governor state lives
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return governor_stats()
+
+@app.get("/admin/llm_health")
+def get_llm_health(current_user: User = Depends(get_current_active_user)):
+    # Per model endpoint replica: circuit state, outstanding requests, failures, latency
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return endpoint_health()
+
+def _cache_samples():
+    embedding, answer = embedding_cache.stats(), answer_cache.stats()
+    return [
+        ({"cache": "embedding", "result": "hit_memory"}, embedding["hits_memory"]),
+        ({"cache": "embedding", "result": "hit_db"}, embedding["hits_db"]),
+        ({"cache": "embedding", "result": "miss"}, embedding["misses"]),
+        ({"cache": "answer", "result": "hit_exact"}, answer["hits_exact"]),
+        ({"cache": "answer", "result": "hit_semantic"}, answer["hits_semantic"]),
+        ({"cache": "answer", "result": "miss"}, answer["misses"]),
+    ]
+
+CallbackMetric("cache_lookups_total", "Embedding / answer cache lookups", ["cache", "result"], _cache_samples, kind="counter")
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus scrape endpoint (text format 0.0.4); rendered on the event
+    # loop, where the governor state lives
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/vector_index")
+def get_vector_index(current_user: User = Depends(get_current_active_user)):
+    # Configured vs. built ANN index, row count and the last rebuild
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return index_status()
+
+@app.post("/admin/vector_index/rebuild")
+def rebuild_vector_index(current_user: User = Depends(get_current_active_user)):
+    # Builds next to the old index and swaps; progress via GET /admin/vector_index
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    if not start_rebuild():
+        raise HTTPException(status_code=409, detail="Index build already running")
+    return {"message": "Vector index rebuild started"}
+
+@app.get("/ingest_jobs")
+def get_ingest_jobs(status: Optional[str] = None, file_id: Optional[int] = None, limit: int = 50,
+                    current_user: User = Depends(get_current_active_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    if status and status not in INGEST_JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(INGEST_JOB_STATUSES)}")
+    return {"jobs": list_jobs(status=status, file_id=file_id, limit=max(1, min(limit, 500)))}
+
+@app.get("/ingest_jobs/{job_id}")
+def get_ingest_job(job_id: int, current_user: User = Depends(get_current_active_user)):
+    # Status, stage and progress (chunks embedded / total) of one job
+    job = get_job(job_id)
+    if not job or (current_user.role != 'admin' and job["created_by"] != current_user.username):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/admin/intent_stats")
+def get_intent_stats(current_user: User = Depends(get_current_active_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return intent_status()
+
+@app.post("/admin/intent/retrain")
+def retrain_intent_classifier(current_user: User = Depends(get_current_active_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Permission denied")
+    try:
+        return train_from_chat_logs()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+
 @app.get("/debug/db_status")
 def debug_db_status():
     info = {"buffer_len": len(question_buffer)}
@@ -1458,11 +1799,30 @@ def search_documents(
     q: str = "", 
     page: int = 1, 
     limit: int = 20, 
+    mode: str = "filename",
+    kb_type: Optional[str] = None,
     current_user: User = Depends(get_current_active_user)
 ):
+    """
+    mode=filename: approved files whose name contains q (default).
+    mode=content: approved files whose chunks match q in full-text search,
+    best match first, each with a snippet and score (share of q's terms found),
+    limited to the caller's kb (kb_type only applies to admins).
+    """
+    if mode not in ("filename", "content"):
+        raise HTTPException(status_code=400, detail="mode must be 'filename' or 'content'")
     try:
         # Allow all users to search approved documents
         offset = (page - 1) * limit
+
+        if mode == "content" and q:
+            # Snippets expose chunk text: same kb visibility as retrieval,
+            # only admins may narrow it to a kb of their choice
+            visible_kb = kb_type_for_role(current_user.role)
+            if current_user.role == 'admin' and kb_type:
+                visible_kb = kb_type
+            total, docs = search_content(q, kb_type=visible_kb, limit=limit, offset=offset)
+            return {"total": total, "docs": docs, "page": page, "limit": limit}
         
         with engine.connect() as conn:
             # Build query
@@ -1574,12 +1934,16 @@ def delete_document(doc_id: int, current_user: User = Depends(get_current_active
             
         filename, file_path = row
         
-        # 1. Delete from uploaded_files
+        # 1. Delete from Vector DB (documents table) first: the ON DELETE CASCADE
+        # of uploaded_files would remove the chunks without reporting their ids
+        deleted_ids = delete_document_by_source(file_path, conn)
+        
+        # 2. Delete from uploaded_files
         conn.execute(text("DELETE FROM uploaded_files WHERE id = :id"), {"id": doc_id})
         
-    # 2. Delete from Vector DB (documents table) using helper
-    # This ensures consistency using the 'source' (file_path) metadata
-    delete_document_by_source(file_path)
+    # In-process indexes follow once the deletes are committed
+    bump_kb_version()
+    documents_deleted(deleted_ids)
         
     # 3. Delete physical file
     if os.path.exists(file_path):
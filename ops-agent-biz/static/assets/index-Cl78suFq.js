@@ -326,4 +326,4 @@ section.${t}>footer { z-index: 1; }
 删除后将无法恢复，且知识库将同步更新。`))try{await he.delete(`/documents/${_}`),a(i.filter(V=>V.id!==_)),l(s.filter(V=>V.id!==_)),alert("删除成功"),p(),y()}catch(V){alert("删除失败: "+(((A=(X=V.response)==null?void 0:X.data)==null?void 0:A.detail)||V.message))}},E=_=>{m(_),setTimeout(()=>{y(),p()},1e3)},C=()=>{m(null)},R=_=>{if(_===0)return"0 B";const L=1024,X=["B","KB","MB","GB"],A=Math.floor(Math.log(_)/Math.log(L));return parseFloat((_/Math.pow(L,A)).toFixed(2))+" "+X[A]},z=({doc:_})=>{const L=j.useRef(null),[X,A]=j.useState(null),V=_.filename.split(".").pop().toLowerCase(),S=`/documents/${_.id}?preview=true&token=${e==null?void 0:e.token}`;return j.useEffect(()=>{V==="docx"&&he.get(`/documents/${_.id}`,{responseType:"blob"}).then(F=>{L.current&&BL(F.data,L.current,L.current,{className:"docx-viewer",inWrapper:!0,ignoreWidth:!1}).catch($=>A("DOCX 解析失败: "+$.message))}).catch(F=>A("加载失败: "+F.message))},[_]),X?v.jsx("div",{className:"flex items-center justify-center h-full text-red-500",children:X}):V==="docx"?v.jsx("div",{ref:L,className:"w-full h-full overflow-auto bg-gray-100 p-8"}):["pdf","txt","png","jpg","jpeg","gif"].includes(V)?v.jsx("iframe",{src:S,className:"w-full h-full bg-white border-0",title:"preview"}):v.jsxs("div",{className:"flex flex-col items-center justify-center h-full text-gray-500",children:[v.jsx(ka,{size:48,className:"mb-4 text-gray-300"}),v.jsxs("p",{children:["该文件格式 (",V,") 暂不支持在线预览"]}),(e==null?void 0:e.role)!=="guest"&&v.jsx("button",{onClick:()=>x(_.id,_.filename),className:"mt-4 px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700",children:"下载查看"})]})};return v.jsxs("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:[v.jsxs("div",{className:"max-w-7xl mx-auto w-full h-full flex gap-6",children:[v.jsxs("div",{className:"flex-1 flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800 mb-4",children:[v.jsx(ka,{className:"mr-2 text-blue-600"}),"知识文档库",v.jsxs("button",{onClick:t,className:"ml-4 flex items-center space-x-1 px-3 py-1.5 bg-blue-600 text-white rounded-md hover:bg-blue-700 transition-colors text-sm shadow-sm",children:[v.jsx(_p,{size:16}),v.jsx("span",{children:"上传知识库"})]})]}),v.jsxs("div",{className:"relative",children:[v.jsx("input",{type:"text",value:n,onChange:_=>{r(_.target.value),f(1)},placeholder:"搜索文档名称...",className:"w-full pl-10 pr-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"}),v.jsx(Q6,{className:"absolute left-3 top-2.5 text-gray-400",size:20})]})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6",children:o?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):i.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"未找到相关文档"}):v.jsx("div",{className:"space-y-3",children:i.map(_=>v.jsxs("div",{className:"flex items-center justify-between bg-gray-50 p-4 rounded-lg border border-gray-100 hover:border-blue-200 transition-colors",children:[v.jsxs("div",{className:"flex items-center space-x-4",children:[v.jsx("div",{className:"p-2 bg-white rounded-lg border border-gray-200",children:v.jsx(U6,{size:24,className:"text-blue-500"})}),v.jsxs("div",{children:[v.jsxs("div",{className:"font-medium text-gray-800 flex items-center flex-wrap",children:[v.jsx("span",{className:"mr-2",children:_.filename}),v.jsx("span",{className:`text-xs px-2 py-0.5 rounded border whitespace-nowrap ${_.kb_type==="admin"?"bg-purple-50 text-purple-600 border-purple-200":"bg-green-50 text-green-600 border-green-200"}`,children:_.kb_type==="admin"?"运维知识库":"用户知识库"})]}),v.jsxs("div",{className:"text-xs text-gray-500 flex items-center space-x-3 mt-1",children:[v.jsx("span",{children:R(_.file_size)}),v.jsx("span",{children:"•"}),v.jsxs("span",{children:["上传者: ",_.uploader]}),v.jsx("span",{children:"•"}),v.jsx("span",{children:new Date(_.created_at).toLocaleDateString()}),v.jsx("span",{children:"•"}),v.jsxs("span",{className:"flex items-center",title:"下载次数",children:[v.jsx(vi,{size:10,className:"mr-1"}),_.download_count]})]})]})]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsxs("button",{onClick:()=>E(_),className:"px-3 py-2 text-gray-600 hover:text-blue-600 hover:bg-blue-50 rounded-lg transition-colors flex items-center text-sm",title:"在线浏览",children:[v.jsx(ok,{size:16,className:"mr-1.5"}),"在线浏览"]}),(e==null?void 0:e.role)!=="guest"&&v.jsx("button",{onClick:()=>x(_.id,_.filename),className:"p-2 text-gray-600 hover:text-blue-600 hover:bg-blue-50 rounded-lg transition-colors",title:"下载",children:v.jsx(vi,{size:18})}),(e==null?void 0:e.role)==="admin"&&v.jsx("button",{onClick:()=>k(_.id,_.filename),className:"p-2 text-gray-600 hover:text-red-600 hover:bg-red-50 rounded-lg transition-colors",title:"删除文档",children:v.jsx(hk,{size:18})})]})]},_.id))})}),d>b&&v.jsxs("div",{className:"p-4 border-t border-gray-200 flex justify-between items-center text-sm text-gray-500",children:[v.jsxs("span",{children:["共 ",d," 个文档"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{disabled:c===1,onClick:()=>f(_=>Math.max(1,_-1)),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-2 py-1",children:["第 ",c," 页"]}),v.jsx("button",{disabled:c*b>=d,onClick:()=>f(_=>_+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})]}),v.jsxs("div",{className:"w-80 bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden flex flex-col hidden lg:flex",children:[v.jsx("div",{className:"p-4 border-b border-gray-200 bg-orange-50/50",children:v.jsxs("h3",{className:"font-bold text-gray-800 flex items-center",children:[v.jsx(c8,{className:"mr-2 text-orange-500"}),"热门下载 TOP 10"]})}),v.jsx("div",{className:"flex-1 overflow-y-auto p-4",children:s.length===0?v.jsx("div",{className:"text-center text-gray-500 text-sm py-4",children:"暂无数据"}):v.jsx("div",{className:"space-y-4",children:s.map((_,L)=>v.jsxs("div",{className:"flex items-start space-x-3 group cursor-pointer",onClick:()=>E(_),children:[v.jsx("div",{className:`
                                             w-6 h-6 rounded flex items-center justify-center text-xs font-bold flex-shrink-0 mt-0.5
                                             ${L<3?"bg-orange-100 text-orange-600":"bg-gray-100 text-gray-500"}
-                                        `,children:L+1}),v.jsxs("div",{className:"flex-1 min-w-0",children:[v.jsx("div",{className:"text-sm font-medium text-gray-700 group-hover:text-blue-600 truncate transition-colors",title:_.filename,children:_.filename}),v.jsxs("div",{className:"text-xs text-gray-400 mt-1 flex items-center",children:[v.jsx(vi,{size:10,className:"mr-1"}),_.download_count," 次下载"]})]})]},_.id))})})]})]}),g&&v.jsx("div",{className:"fixed inset-0 z-50 bg-black/60 backdrop-blur-sm flex items-center justify-center p-2 sm:p-4",children:v.jsxs("div",{className:"bg-white rounded-xl w-full max-w-7xl h-[95vh] flex flex-col shadow-2xl overflow-hidden animate-in fade-in zoom-in duration-200",children:[v.jsxs("div",{className:"p-4 border-b flex justify-between items-center bg-gray-50",children:[v.jsxs("div",{className:"flex items-center space-x-3",children:[v.jsx(ka,{className:"text-blue-600"}),v.jsx("h3",{className:"font-bold text-gray-800 truncate max-w-md",title:g.filename,children:g.filename})]}),v.jsxs("div",{className:"flex items-center space-x-2",children:[(e==null?void 0:e.role)!=="guest"&&v.jsx("button",{onClick:()=>x(g.id,g.filename),className:"p-2 text-gray-500 hover:text-blue-600 hover:bg-blue-50 rounded-lg transition-colors",title:"下载",children:v.jsx(vi,{size:20})}),v.jsx("button",{onClick:C,className:"p-2 text-gray-500 hover:text-red-600 hover:bg-red-50 rounded-lg transition-colors",title:"关闭",children:v.jsx(es,{size:24})})]})]}),v.jsx("div",{className:"flex-1 overflow-hidden relative bg-gray-100",children:v.jsx(z,{doc:g})})]})})]})}function Tk(e){var t,n,r="";if(typeof e=="string"||typeof e=="number")r+=e;else if(typeof e=="object")if(Array.isArray(e)){var i=e.length;for(t=0;t<i;t++)e[t]&&(n=Tk(e[t]))&&(r&&(r+=" "),r+=n)}else for(n in e)e[n]&&(r&&(r+=" "),r+=n);return r}function UL(){for(var e,t,n=0,r="",i=arguments.length;n<i;n++)(e=arguments[n])&&(t=Tk(e))&&(r&&(r+=" "),r+=t);return r}const VL=(e,t)=>{const n=new Array(e.length+t.length);for(let r=0;r<e.length;r++)n[r]=e[r];for(let r=0;r<t.length;r++)n[e.length+r]=t[r];return n},FL=(e,t)=>({classGroupId:e,validator:t}),Nk=(e=new Map,t=null,n)=>({nextPart:e,validators:t,classGroupId:n}),Du="-",Xb=[],HL="arbitrary..",IL=e=>{const t=GL(e),{conflictingClassGroups:n,conflictingClassGroupModifiers:r}=e;return{getClassGroupId:s=>{if(s.startsWith("[")&&s.endsWith("]"))return qL(s);const l=s.split(Du),o=l[0]===""&&l.length>1?1:0;return Rk(l,o,t)},getConflictingClassGroupIds:(s,l)=>{if(l){const o=r[s],u=n[s];return o?u?VL(u,o):o:u||Xb}return n[s]||Xb}}},Rk=(e,t,n)=>{if(e.length-t===0)return n.classGroupId;const i=e[t],a=n.nextPart.get(i);if(a){const u=Rk(e,t+1,a);if(u)return u}const s=n.validators;if(s===null)return;const l=t===0?e.join(Du):e.slice(t).join(Du),o=s.length;for(let u=0;u<o;u++){const c=s[u];if(c.validator(l))return c.classGroupId}},qL=e=>e.slice(1,-1).indexOf(":")===-1?void 0:(()=>{const t=e.slice(1,-1),n=t.indexOf(":"),r=t.slice(0,n);return r?HL+r:void 0})(),GL=e=>{const{theme:t,classGroups:n}=e;return $L(n,t)},$L=(e,t)=>{const n=Nk();for(const r in e){const i=e[r];Mp(i,n,r,t)}return n},Mp=(e,t,n,r)=>{const i=e.length;for(let a=0;a<i;a++){const s=e[a];YL(s,t,n,r)}},YL=(e,t,n,r)=>{if(typeof e=="string"){XL(e,t,n);return}if(typeof e=="function"){ZL(e,t,n,r);return}KL(e,t,n,r)},XL=(e,t,n)=>{const r=e===""?t:Mk(t,e);r.classGroupId=n},ZL=(e,t,n,r)=>{if(QL(e)){Mp(e(r),t,n,r);return}t.validators===null&&(t.validators=[]),t.validators.push(FL(n,e))},KL=(e,t,n,r)=>{const i=Object.entries(e),a=i.length;for(let s=0;s<a;s++){const[l,o]=i[s];Mp(o,Mk(t,l),n,r)}},Mk=(e,t)=>{let n=e;const r=t.split(Du),i=r.length;for(let a=0;a<i;a++){const s=r[a];let l=n.nextPart.get(s);l||(l=Nk(),n.nextPart.set(s,l)),n=l}return n},QL=e=>"isThemeGetter"in e&&e.isThemeGetter===!0,WL=e=>{if(e<1)return{get:()=>{},set:()=>{}};let t=0,n=Object.create(null),r=Object.create(null);const i=(a,s)=>{n[a]=s,t++,t>e&&(t=0,r=n,n=Object.create(null))};return{get(a){let s=n[a];if(s!==void 0)return s;if((s=r[a])!==void 0)return i(a,s),s},set(a,s){a in n?n[a]=s:i(a,s)}}},wh="!",Zb=":",JL=[],Kb=(e,t,n,r,i)=>({modifiers:e,hasImportantModifier:t,baseClassName:n,maybePostfixModifierPosition:r,isExternal:i}),eB=e=>{const{prefix:t,experimentalParseClassName:n}=e;let r=i=>{const a=[];let s=0,l=0,o=0,u;const c=i.length;for(let m=0;m<c;m++){const b=i[m];if(s===0&&l===0){if(b===Zb){a.push(i.slice(o,m)),o=m+1;continue}if(b==="/"){u=m;continue}}b==="["?s++:b==="]"?s--:b==="("?l++:b===")"&&l--}const f=a.length===0?i:i.slice(o);let d=f,h=!1;f.endsWith(wh)?(d=f.slice(0,-1),h=!0):f.startsWith(wh)&&(d=f.slice(1),h=!0);const g=u&&u>o?u-o:void 0;return Kb(a,h,d,g)};if(t){const i=t+Zb,a=r;r=s=>s.startsWith(i)?a(s.slice(i.length)):Kb(JL,!1,s,void 0,!0)}if(n){const i=r;r=a=>n({className:a,parseClassName:i})}return r},tB=e=>{const t=new Map;return e.orderSensitiveModifiers.forEach((n,r)=>{t.set(n,1e6+r)}),n=>{const r=[];let i=[];for(let a=0;a<n.length;a++){const s=n[a],l=s[0]==="[",o=t.has(s);l||o?(i.length>0&&(i.sort(),r.push(...i),i=[]),r.push(s)):i.push(s)}return i.length>0&&(i.sort(),r.push(...i)),r}},nB=e=>({cache:WL(e.cacheSize),parseClassName:eB(e),sortModifiers:tB(e),...IL(e)}),rB=/\s+/,iB=(e,t)=>{const{parseClassName:n,getClassGroupId:r,getConflictingClassGroupIds:i,sortModifiers:a}=t,s=[],l=e.trim().split(rB);let o="";for(let u=l.length-1;u>=0;u-=1){const c=l[u],{isExternal:f,modifiers:d,hasImportantModifier:h,baseClassName:g,maybePostfixModifierPosition:m}=n(c);if(f){o=c+(o.length>0?" "+o:o);continue}let b=!!m,p=r(b?g.substring(0,m):g);if(!p){if(!b){o=c+(o.length>0?" "+o:o);continue}if(p=r(g),!p){o=c+(o.length>0?" "+o:o);continue}b=!1}const y=d.length===0?"":d.length===1?d[0]:a(d).join(":"),x=h?y+wh:y,k=x+p;if(s.indexOf(k)>-1)continue;s.push(k);const E=i(p,b);for(let C=0;C<E.length;++C){const R=E[C];s.push(x+R)}o=c+(o.length>0?" "+o:o)}return o},aB=(...e)=>{let t=0,n,r,i="";for(;t<e.length;)(n=e[t++])&&(r=jk(n))&&(i&&(i+=" "),i+=r);return i},jk=e=>{if(typeof e=="string")return e;let t,n="";for(let r=0;r<e.length;r++)e[r]&&(t=jk(e[r]))&&(n&&(n+=" "),n+=t);return n},sB=(e,...t)=>{let n,r,i,a;const s=o=>{const u=t.reduce((c,f)=>f(c),e());return n=nB(u),r=n.cache.get,i=n.cache.set,a=l,l(o)},l=o=>{const u=r(o);if(u)return u;const c=iB(o,n);return i(o,c),c};return a=s,(...o)=>a(aB(...o))},lB=[],bt=e=>{const t=n=>n[e]||lB;return t.isThemeGetter=!0,t},zk=/^\[(?:(\w[\w-]*):)?(.+)\]$/i,Dk=/^\((?:(\w[\w-]*):)?(.+)\)$/i,oB=/^\d+\/\d+$/,uB=/^(\d+(\.\d+)?)?(xs|sm|md|lg|xl)$/,cB=/\d+(%|px|r?em|[sdl]?v([hwib]|min|max)|pt|pc|in|cm|mm|cap|ch|ex|r?lh|cq(w|h|i|b|min|max))|\b(calc|min|max|clamp)\(.+\)|^0$/,fB=/^(rgba?|hsla?|hwb|(ok)?(lab|lch)|color-mix)\(.+\)$/,dB=/^(inset_)?-?((\d+)?\.?(\d+)[a-z]+|0)_-?((\d+)?\.?(\d+)[a-z]+|0)/,hB=/^(url|image|image-set|cross-fade|element|(repeating-)?(linear|radial|conic)-gradient)\(.+\)$/,Gi=e=>oB.test(e),Ce=e=>!!e&&!Number.isNaN(Number(e)),Cr=e=>!!e&&Number.isInteger(Number(e)),Df=e=>e.endsWith("%")&&Ce(e.slice(0,-1)),rr=e=>uB.test(e),mB=()=>!0,pB=e=>cB.test(e)&&!fB.test(e),Ok=()=>!1,gB=e=>dB.test(e),yB=e=>hB.test(e),bB=e=>!ce(e)&&!fe(e),xB=e=>ts(e,Pk,Ok),ce=e=>zk.test(e),ui=e=>ts(e,Uk,pB),Of=e=>ts(e,EB,Ce),Qb=e=>ts(e,Lk,Ok),vB=e=>ts(e,Bk,yB),go=e=>ts(e,Vk,gB),fe=e=>Dk.test(e),bs=e=>ns(e,Uk),wB=e=>ns(e,CB),Wb=e=>ns(e,Lk),SB=e=>ns(e,Pk),kB=e=>ns(e,Bk),yo=e=>ns(e,Vk,!0),ts=(e,t,n)=>{const r=zk.exec(e);return r?r[1]?t(r[1]):n(r[2]):!1},ns=(e,t,n=!1)=>{const r=Dk.exec(e);return r?r[1]?t(r[1]):n:!1},Lk=e=>e==="position"||e==="percentage",Bk=e=>e==="image"||e==="url",Pk=e=>e==="length"||e==="size"||e==="bg-size",Uk=e=>e==="length",EB=e=>e==="number",CB=e=>e==="family-name",Vk=e=>e==="shadow",_B=()=>{const e=bt("color"),t=bt("font"),n=bt("text"),r=bt("font-weight"),i=bt("tracking"),a=bt("leading"),s=bt("breakpoint"),l=bt("container"),o=bt("spacing"),u=bt("radius"),c=bt("shadow"),f=bt("inset-shadow"),d=bt("text-shadow"),h=bt("drop-shadow"),g=bt("blur"),m=bt("perspective"),b=bt("aspect"),p=bt("ease"),y=bt("animate"),x=()=>["auto","avoid","all","avoid-page","page","left","right","column"],k=()=>["center","top","bottom","left","right","top-left","left-top","top-right","right-top","bottom-right","right-bottom","bottom-left","left-bottom"],E=()=>[...k(),fe,ce],C=()=>["auto","hidden","clip","visible","scroll"],R=()=>["auto","contain","none"],z=()=>[fe,ce,o],_=()=>[Gi,"full","auto",...z()],L=()=>[Cr,"none","subgrid",fe,ce],X=()=>["auto",{span:["full",Cr,fe,ce]},Cr,fe,ce],A=()=>[Cr,"auto",fe,ce],V=()=>["auto","min","max","fr",fe,ce],S=()=>["start","end","center","between","around","evenly","stretch","baseline","center-safe","end-safe"],F=()=>["start","end","center","stretch","center-safe","end-safe"],$=()=>["auto",...z()],O=()=>[Gi,"auto","full","dvw","dvh","lvw","lvh","svw","svh","min","max","fit",...z()],B=()=>[e,fe,ce],G=()=>[...k(),Wb,Qb,{position:[fe,ce]}],T=()=>["no-repeat",{repeat:["","x","y","space","round"]}],U=()=>["auto","cover","contain",SB,xB,{size:[fe,ce]}],H=()=>[Df,bs,ui],N=()=>["","none","full",u,fe,ce],ee=()=>["",Ce,bs,ui],re=()=>["solid","dashed","dotted","double"],xe=()=>["normal","multiply","screen","overlay","darken","lighten","color-dodge","color-burn","hard-light","soft-light","difference","exclusion","hue","saturation","color","luminosity"],ke=()=>[Ce,Df,Wb,Qb],be=()=>["","none",g,fe,ce],we=()=>["none",Ce,fe,ce],Be=()=>["none",Ce,fe,ce],Pe=()=>[Ce,fe,ce],Ct=()=>[Gi,"full",...z()];return{cacheSize:500,theme:{animate:["spin","ping","pulse","bounce"],aspect:["video"],blur:[rr],breakpoint:[rr],color:[mB],container:[rr],"drop-shadow":[rr],ease:["in","out","in-out"],font:[bB],"font-weight":["thin","extralight","light","normal","medium","semibold","bold","extrabold","black"],"inset-shadow":[rr],leading:["none","tight","snug","normal","relaxed","loose"],perspective:["dramatic","near","normal","midrange","distant","none"],radius:[rr],shadow:[rr],spacing:["px",Ce],text:[rr],"text-shadow":[rr],tracking:["tighter","tight","normal","wide","wider","widest"]},classGroups:{aspect:[{aspect:["auto","square",Gi,ce,fe,b]}],container:["container"],columns:[{columns:[Ce,ce,fe,l]}],"break-after":[{"break-after":x()}],"break-before":[{"break-before":x()}],"break-inside":[{"break-inside":["auto","avoid","avoid-page","avoid-column"]}],"box-decoration":[{"box-decoration":["slice","clone"]}],box:[{box:["border","content"]}],display:["block","inline-block","inline","flex","inline-flex","table","inline-table","table-caption","table-cell","table-column","table-column-group","table-footer-group","table-header-group","table-row-group","table-row","flow-root","grid","inline-grid","contents","list-item","hidden"],sr:["sr-only","not-sr-only"],float:[{float:["right","left","none","start","end"]}],clear:[{clear:["left","right","both","none","start","end"]}],isolation:["isolate","isolation-auto"],"object-fit":[{object:["contain","cover","fill","none","scale-down"]}],"object-position":[{object:E()}],overflow:[{overflow:C()}],"overflow-x":[{"overflow-x":C()}],"overflow-y":[{"overflow-y":C()}],overscroll:[{overscroll:R()}],"overscroll-x":[{"overscroll-x":R()}],"overscroll-y":[{"overscroll-y":R()}],position:["static","fixed","absolute","relative","sticky"],inset:[{inset:_()}],"inset-x":[{"inset-x":_()}],"inset-y":[{"inset-y":_()}],start:[{start:_()}],end:[{end:_()}],top:[{top:_()}],right:[{right:_()}],bottom:[{bottom:_()}],left:[{left:_()}],visibility:["visible","invisible","collapse"],z:[{z:[Cr,"auto",fe,ce]}],basis:[{basis:[Gi,"full","auto",l,...z()]}],"flex-direction":[{flex:["row","row-reverse","col","col-reverse"]}],"flex-wrap":[{flex:["nowrap","wrap","wrap-reverse"]}],flex:[{flex:[Ce,Gi,"auto","initial","none",ce]}],grow:[{grow:["",Ce,fe,ce]}],shrink:[{shrink:["",Ce,fe,ce]}],order:[{order:[Cr,"first","last","none",fe,ce]}],"grid-cols":[{"grid-cols":L()}],"col-start-end":[{col:X()}],"col-start":[{"col-start":A()}],"col-end":[{"col-end":A()}],"grid-rows":[{"grid-rows":L()}],"row-start-end":[{row:X()}],"row-start":[{"row-start":A()}],"row-end":[{"row-end":A()}],"grid-flow":[{"grid-flow":["row","col","dense","row-dense","col-dense"]}],"auto-cols":[{"auto-cols":V()}],"auto-rows":[{"auto-rows":V()}],gap:[{gap:z()}],"gap-x":[{"gap-x":z()}],"gap-y":[{"gap-y":z()}],"justify-content":[{justify:[...S(),"normal"]}],"justify-items":[{"justify-items":[...F(),"normal"]}],"justify-self":[{"justify-self":["auto",...F()]}],"align-content":[{content:["normal",...S()]}],"align-items":[{items:[...F(),{baseline:["","last"]}]}],"align-self":[{self:["auto",...F(),{baseline:["","last"]}]}],"place-content":[{"place-content":S()}],"place-items":[{"place-items":[...F(),"baseline"]}],"place-self":[{"place-self":["auto",...F()]}],p:[{p:z()}],px:[{px:z()}],py:[{py:z()}],ps:[{ps:z()}],pe:[{pe:z()}],pt:[{pt:z()}],pr:[{pr:z()}],pb:[{pb:z()}],pl:[{pl:z()}],m:[{m:$()}],mx:[{mx:$()}],my:[{my:$()}],ms:[{ms:$()}],me:[{me:$()}],mt:[{mt:$()}],mr:[{mr:$()}],mb:[{mb:$()}],ml:[{ml:$()}],"space-x":[{"space-x":z()}],"space-x-reverse":["space-x-reverse"],"space-y":[{"space-y":z()}],"space-y-reverse":["space-y-reverse"],size:[{size:O()}],w:[{w:[l,"screen",...O()]}],"min-w":[{"min-w":[l,"screen","none",...O()]}],"max-w":[{"max-w":[l,"screen","none","prose",{screen:[s]},...O()]}],h:[{h:["screen","lh",...O()]}],"min-h":[{"min-h":["screen","lh","none",...O()]}],"max-h":[{"max-h":["screen","lh",...O()]}],"font-size":[{text:["base",n,bs,ui]}],"font-smoothing":["antialiased","subpixel-antialiased"],"font-style":["italic","not-italic"],"font-weight":[{font:[r,fe,Of]}],"font-stretch":[{"font-stretch":["ultra-condensed","extra-condensed","condensed","semi-condensed","normal","semi-expanded","expanded","extra-expanded","ultra-expanded",Df,ce]}],"font-family":[{font:[wB,ce,t]}],"fvn-normal":["normal-nums"],"fvn-ordinal":["ordinal"],"fvn-slashed-zero":["slashed-zero"],"fvn-figure":["lining-nums","oldstyle-nums"],"fvn-spacing":["proportional-nums","tabular-nums"],"fvn-fraction":["diagonal-fractions","stacked-fractions"],tracking:[{tracking:[i,fe,ce]}],"line-clamp":[{"line-clamp":[Ce,"none",fe,Of]}],leading:[{leading:[a,...z()]}],"list-image":[{"list-image":["none",fe,ce]}],"list-style-position":[{list:["inside","outside"]}],"list-style-type":[{list:["disc","decimal","none",fe,ce]}],"text-alignment":[{text:["left","center","right","justify","start","end"]}],"placeholder-color":[{placeholder:B()}],"text-color":[{text:B()}],"text-decoration":["underline","overline","line-through","no-underline"],"text-decoration-style":[{decoration:[...re(),"wavy"]}],"text-decoration-thickness":[{decoration:[Ce,"from-font","auto",fe,ui]}],"text-decoration-color":[{decoration:B()}],"underline-offset":[{"underline-offset":[Ce,"auto",fe,ce]}],"text-transform":["uppercase","lowercase","capitalize","normal-case"],"text-overflow":["truncate","text-ellipsis","text-clip"],"text-wrap":[{text:["wrap","nowrap","balance","pretty"]}],indent:[{indent:z()}],"vertical-align":[{align:["baseline","top","middle","bottom","text-top","text-bottom","sub","super",fe,ce]}],whitespace:[{whitespace:["normal","nowrap","pre","pre-line","pre-wrap","break-spaces"]}],break:[{break:["normal","words","all","keep"]}],wrap:[{wrap:["break-word","anywhere","normal"]}],hyphens:[{hyphens:["none","manual","auto"]}],content:[{content:["none",fe,ce]}],"bg-attachment":[{bg:["fixed","local","scroll"]}],"bg-clip":[{"bg-clip":["border","padding","content","text"]}],"bg-origin":[{"bg-origin":["border","padding","content"]}],"bg-position":[{bg:G()}],"bg-repeat":[{bg:T()}],"bg-size":[{bg:U()}],"bg-image":[{bg:["none",{linear:[{to:["t","tr","r","br","b","bl","l","tl"]},Cr,fe,ce],radial:["",fe,ce],conic:[Cr,fe,ce]},kB,vB]}],"bg-color":[{bg:B()}],"gradient-from-pos":[{from:H()}],"gradient-via-pos":[{via:H()}],"gradient-to-pos":[{to:H()}],"gradient-from":[{from:B()}],"gradient-via":[{via:B()}],"gradient-to":[{to:B()}],rounded:[{rounded:N()}],"rounded-s":[{"rounded-s":N()}],"rounded-e":[{"rounded-e":N()}],"rounded-t":[{"rounded-t":N()}],"rounded-r":[{"rounded-r":N()}],"rounded-b":[{"rounded-b":N()}],"rounded-l":[{"rounded-l":N()}],"rounded-ss":[{"rounded-ss":N()}],"rounded-se":[{"rounded-se":N()}],"rounded-ee":[{"rounded-ee":N()}],"rounded-es":[{"rounded-es":N()}],"rounded-tl":[{"rounded-tl":N()}],"rounded-tr":[{"rounded-tr":N()}],"rounded-br":[{"rounded-br":N()}],"rounded-bl":[{"rounded-bl":N()}],"border-w":[{border:ee()}],"border-w-x":[{"border-x":ee()}],"border-w-y":[{"border-y":ee()}],"border-w-s":[{"border-s":ee()}],"border-w-e":[{"border-e":ee()}],"border-w-t":[{"border-t":ee()}],"border-w-r":[{"border-r":ee()}],"border-w-b":[{"border-b":ee()}],"border-w-l":[{"border-l":ee()}],"divide-x":[{"divide-x":ee()}],"divide-x-reverse":["divide-x-reverse"],"divide-y":[{"divide-y":ee()}],"divide-y-reverse":["divide-y-reverse"],"border-style":[{border:[...re(),"hidden","none"]}],"divide-style":[{divide:[...re(),"hidden","none"]}],"border-color":[{border:B()}],"border-color-x":[{"border-x":B()}],"border-color-y":[{"border-y":B()}],"border-color-s":[{"border-s":B()}],"border-color-e":[{"border-e":B()}],"border-color-t":[{"border-t":B()}],"border-color-r":[{"border-r":B()}],"border-color-b":[{"border-b":B()}],"border-color-l":[{"border-l":B()}],"divide-color":[{divide:B()}],"outline-style":[{outline:[...re(),"none","hidden"]}],"outline-offset":[{"outline-offset":[Ce,fe,ce]}],"outline-w":[{outline:["",Ce,bs,ui]}],"outline-color":[{outline:B()}],shadow:[{shadow:["","none",c,yo,go]}],"shadow-color":[{shadow:B()}],"inset-shadow":[{"inset-shadow":["none",f,yo,go]}],"inset-shadow-color":[{"inset-shadow":B()}],"ring-w":[{ring:ee()}],"ring-w-inset":["ring-inset"],"ring-color":[{ring:B()}],"ring-offset-w":[{"ring-offset":[Ce,ui]}],"ring-offset-color":[{"ring-offset":B()}],"inset-ring-w":[{"inset-ring":ee()}],"inset-ring-color":[{"inset-ring":B()}],"text-shadow":[{"text-shadow":["none",d,yo,go]}],"text-shadow-color":[{"text-shadow":B()}],opacity:[{opacity:[Ce,fe,ce]}],"mix-blend":[{"mix-blend":[...xe(),"plus-darker","plus-lighter"]}],"bg-blend":[{"bg-blend":xe()}],"mask-clip":[{"mask-clip":["border","padding","content","fill","stroke","view"]},"mask-no-clip"],"mask-composite":[{mask:["add","subtract","intersect","exclude"]}],"mask-image-linear-pos":[{"mask-linear":[Ce]}],"mask-image-linear-from-pos":[{"mask-linear-from":ke()}],"mask-image-linear-to-pos":[{"mask-linear-to":ke()}],"mask-image-linear-from-color":[{"mask-linear-from":B()}],"mask-image-linear-to-color":[{"mask-linear-to":B()}],"mask-image-t-from-pos":[{"mask-t-from":ke()}],"mask-image-t-to-pos":[{"mask-t-to":ke()}],"mask-image-t-from-color":[{"mask-t-from":B()}],"mask-image-t-to-color":[{"mask-t-to":B()}],"mask-image-r-from-pos":[{"mask-r-from":ke()}],"mask-image-r-to-pos":[{"mask-r-to":ke()}],"mask-image-r-from-color":[{"mask-r-from":B()}],"mask-image-r-to-color":[{"mask-r-to":B()}],"mask-image-b-from-pos":[{"mask-b-from":ke()}],"mask-image-b-to-pos":[{"mask-b-to":ke()}],"mask-image-b-from-color":[{"mask-b-from":B()}],"mask-image-b-to-color":[{"mask-b-to":B()}],"mask-image-l-from-pos":[{"mask-l-from":ke()}],"mask-image-l-to-pos":[{"mask-l-to":ke()}],"mask-image-l-from-color":[{"mask-l-from":B()}],"mask-image-l-to-color":[{"mask-l-to":B()}],"mask-image-x-from-pos":[{"mask-x-from":ke()}],"mask-image-x-to-pos":[{"mask-x-to":ke()}],"mask-image-x-from-color":[{"mask-x-from":B()}],"mask-image-x-to-color":[{"mask-x-to":B()}],"mask-image-y-from-pos":[{"mask-y-from":ke()}],"mask-image-y-to-pos":[{"mask-y-to":ke()}],"mask-image-y-from-color":[{"mask-y-from":B()}],"mask-image-y-to-color":[{"mask-y-to":B()}],"mask-image-radial":[{"mask-radial":[fe,ce]}],"mask-image-radial-from-pos":[{"mask-radial-from":ke()}],"mask-image-radial-to-pos":[{"mask-radial-to":ke()}],"mask-image-radial-from-color":[{"mask-radial-from":B()}],"mask-image-radial-to-color":[{"mask-radial-to":B()}],"mask-image-radial-shape":[{"mask-radial":["circle","ellipse"]}],"mask-image-radial-size":[{"mask-radial":[{closest:["side","corner"],farthest:["side","corner"]}]}],"mask-image-radial-pos":[{"mask-radial-at":k()}],"mask-image-conic-pos":[{"mask-conic":[Ce]}],"mask-image-conic-from-pos":[{"mask-conic-from":ke()}],"mask-image-conic-to-pos":[{"mask-conic-to":ke()}],"mask-image-conic-from-color":[{"mask-conic-from":B()}],"mask-image-conic-to-color":[{"mask-conic-to":B()}],"mask-mode":[{mask:["alpha","luminance","match"]}],"mask-origin":[{"mask-origin":["border","padding","content","fill","stroke","view"]}],"mask-position":[{mask:G()}],"mask-repeat":[{mask:T()}],"mask-size":[{mask:U()}],"mask-type":[{"mask-type":["alpha","luminance"]}],"mask-image":[{mask:["none",fe,ce]}],filter:[{filter:["","none",fe,ce]}],blur:[{blur:be()}],brightness:[{brightness:[Ce,fe,ce]}],contrast:[{contrast:[Ce,fe,ce]}],"drop-shadow":[{"drop-shadow":["","none",h,yo,go]}],"drop-shadow-color":[{"drop-shadow":B()}],grayscale:[{grayscale:["",Ce,fe,ce]}],"hue-rotate":[{"hue-rotate":[Ce,fe,ce]}],invert:[{invert:["",Ce,fe,ce]}],saturate:[{saturate:[Ce,fe,ce]}],sepia:[{sepia:["",Ce,fe,ce]}],"backdrop-filter":[{"backdrop-filter":["","none",fe,ce]}],"backdrop-blur":[{"backdrop-blur":be()}],"backdrop-brightness":[{"backdrop-brightness":[Ce,fe,ce]}],"backdrop-contrast":[{"backdrop-contrast":[Ce,fe,ce]}],"backdrop-grayscale":[{"backdrop-grayscale":["",Ce,fe,ce]}],"backdrop-hue-rotate":[{"backdrop-hue-rotate":[Ce,fe,ce]}],"backdrop-invert":[{"backdrop-invert":["",Ce,fe,ce]}],"backdrop-opacity":[{"backdrop-opacity":[Ce,fe,ce]}],"backdrop-saturate":[{"backdrop-saturate":[Ce,fe,ce]}],"backdrop-sepia":[{"backdrop-sepia":["",Ce,fe,ce]}],"border-collapse":[{border:["collapse","separate"]}],"border-spacing":[{"border-spacing":z()}],"border-spacing-x":[{"border-spacing-x":z()}],"border-spacing-y":[{"border-spacing-y":z()}],"table-layout":[{table:["auto","fixed"]}],caption:[{caption:["top","bottom"]}],transition:[{transition:["","all","colors","opacity","shadow","transform","none",fe,ce]}],"transition-behavior":[{transition:["normal","discrete"]}],duration:[{duration:[Ce,"initial",fe,ce]}],ease:[{ease:["linear","initial",p,fe,ce]}],delay:[{delay:[Ce,fe,ce]}],animate:[{animate:["none",y,fe,ce]}],backface:[{backface:["hidden","visible"]}],perspective:[{perspective:[m,fe,ce]}],"perspective-origin":[{"perspective-origin":E()}],rotate:[{rotate:we()}],"rotate-x":[{"rotate-x":we()}],"rotate-y":[{"rotate-y":we()}],"rotate-z":[{"rotate-z":we()}],scale:[{scale:Be()}],"scale-x":[{"scale-x":Be()}],"scale-y":[{"scale-y":Be()}],"scale-z":[{"scale-z":Be()}],"scale-3d":["scale-3d"],skew:[{skew:Pe()}],"skew-x":[{"skew-x":Pe()}],"skew-y":[{"skew-y":Pe()}],transform:[{transform:[fe,ce,"","none","gpu","cpu"]}],"transform-origin":[{origin:E()}],"transform-style":[{transform:["3d","flat"]}],translate:[{translate:Ct()}],"translate-x":[{"translate-x":Ct()}],"translate-y":[{"translate-y":Ct()}],"translate-z":[{"translate-z":Ct()}],"translate-none":["translate-none"],accent:[{accent:B()}],appearance:[{appearance:["none","auto"]}],"caret-color":[{caret:B()}],"color-scheme":[{scheme:["normal","dark","light","light-dark","only-dark","only-light"]}],cursor:[{cursor:["auto","default","pointer","wait","text","move","help","not-allowed","none","context-menu","progress","cell","crosshair","vertical-text","alias","copy","no-drop","grab","grabbing","all-scroll","col-resize","row-resize","n-resize","e-resize","s-resize","w-resize","ne-resize","nw-resize","se-resize","sw-resize","ew-resize","ns-resize","nesw-resize","nwse-resize","zoom-in","zoom-out",fe,ce]}],"field-sizing":[{"field-sizing":["fixed","content"]}],"pointer-events":[{"pointer-events":["auto","none"]}],resize:[{resize:["none","","y","x"]}],"scroll-behavior":[{scroll:["auto","smooth"]}],"scroll-m":[{"scroll-m":z()}],"scroll-mx":[{"scroll-mx":z()}],"scroll-my":[{"scroll-my":z()}],"scroll-ms":[{"scroll-ms":z()}],"scroll-me":[{"scroll-me":z()}],"scroll-mt":[{"scroll-mt":z()}],"scroll-mr":[{"scroll-mr":z()}],"scroll-mb":[{"scroll-mb":z()}],"scroll-ml":[{"scroll-ml":z()}],"scroll-p":[{"scroll-p":z()}],"scroll-px":[{"scroll-px":z()}],"scroll-py":[{"scroll-py":z()}],"scroll-ps":[{"scroll-ps":z()}],"scroll-pe":[{"scroll-pe":z()}],"scroll-pt":[{"scroll-pt":z()}],"scroll-pr":[{"scroll-pr":z()}],"scroll-pb":[{"scroll-pb":z()}],"scroll-pl":[{"scroll-pl":z()}],"snap-align":[{snap:["start","end","center","align-none"]}],"snap-stop":[{snap:["normal","always"]}],"snap-type":[{snap:["none","x","y","both"]}],"snap-strictness":[{snap:["mandatory","proximity"]}],touch:[{touch:["auto","none","manipulation"]}],"touch-x":[{"touch-pan":["x","left","right"]}],"touch-y":[{"touch-pan":["y","up","down"]}],"touch-pz":["touch-pinch-zoom"],select:[{select:["none","text","all","auto"]}],"will-change":[{"will-change":["auto","scroll","contents","transform",fe,ce]}],fill:[{fill:["none",...B()]}],"stroke-w":[{stroke:[Ce,bs,ui,Of]}],stroke:[{stroke:["none",...B()]}],"forced-color-adjust":[{"forced-color-adjust":["auto","none"]}]},conflictingClassGroups:{overflow:["overflow-x","overflow-y"],overscroll:["overscroll-x","overscroll-y"],inset:["inset-x","inset-y","start","end","top","right","bottom","left"],"inset-x":["right","left"],"inset-y":["top","bottom"],flex:["basis","grow","shrink"],gap:["gap-x","gap-y"],p:["px","py","ps","pe","pt","pr","pb","pl"],px:["pr","pl"],py:["pt","pb"],m:["mx","my","ms","me","mt","mr","mb","ml"],mx:["mr","ml"],my:["mt","mb"],size:["w","h"],"font-size":["leading"],"fvn-normal":["fvn-ordinal","fvn-slashed-zero","fvn-figure","fvn-spacing","fvn-fraction"],"fvn-ordinal":["fvn-normal"],"fvn-slashed-zero":["fvn-normal"],"fvn-figure":["fvn-normal"],"fvn-spacing":["fvn-normal"],"fvn-fraction":["fvn-normal"],"line-clamp":["display","overflow"],rounded:["rounded-s","rounded-e","rounded-t","rounded-r","rounded-b","rounded-l","rounded-ss","rounded-se","rounded-ee","rounded-es","rounded-tl","rounded-tr","rounded-br","rounded-bl"],"rounded-s":["rounded-ss","rounded-es"],"rounded-e":["rounded-se","rounded-ee"],"rounded-t":["rounded-tl","rounded-tr"],"rounded-r":["rounded-tr","rounded-br"],"rounded-b":["rounded-br","rounded-bl"],"rounded-l":["rounded-tl","rounded-bl"],"border-spacing":["border-spacing-x","border-spacing-y"],"border-w":["border-w-x","border-w-y","border-w-s","border-w-e","border-w-t","border-w-r","border-w-b","border-w-l"],"border-w-x":["border-w-r","border-w-l"],"border-w-y":["border-w-t","border-w-b"],"border-color":["border-color-x","border-color-y","border-color-s","border-color-e","border-color-t","border-color-r","border-color-b","border-color-l"],"border-color-x":["border-color-r","border-color-l"],"border-color-y":["border-color-t","border-color-b"],translate:["translate-x","translate-y","translate-none"],"translate-none":["translate","translate-x","translate-y","translate-z"],"scroll-m":["scroll-mx","scroll-my","scroll-ms","scroll-me","scroll-mt","scroll-mr","scroll-mb","scroll-ml"],"scroll-mx":["scroll-mr","scroll-ml"],"scroll-my":["scroll-mt","scroll-mb"],"scroll-p":["scroll-px","scroll-py","scroll-ps","scroll-pe","scroll-pt","scroll-pr","scroll-pb","scroll-pl"],"scroll-px":["scroll-pr","scroll-pl"],"scroll-py":["scroll-pt","scroll-pb"],touch:["touch-x","touch-y","touch-pz"],"touch-x":["touch"],"touch-y":["touch"],"touch-pz":["touch"]},conflictingClassGroupModifiers:{"font-size":["leading"]},orderSensitiveModifiers:["*","**","after","backdrop","before","details-content","file","first-letter","first-line","marker","placeholder","selection"]}},AB=sB(_B);function nt(...e){return AB(UL(e))}he.interceptors.request.use(e=>{const t=JSON.parse(localStorage.getItem("auth"));return t!=null&&t.token&&(e.headers.Authorization=`Bearer ${t.token}`),e},e=>Promise.reject(e));function TB({imageSrc:e,onConfirm:t,onCancel:n}){const[r,i]=j.useState(null),[a,s]=j.useState(!1),[l,o]=j.useState({x:0,y:0}),u=j.useRef(null),c=j.useRef(null),f=b=>{const{left:p,top:y}=c.current.getBoundingClientRect();return{x:b.clientX-p,y:b.clientY-y}},d=b=>{b.preventDefault();const p=f(b);s(!0),o(p),i({x:p.x,y:p.y,width:0,height:0})},h=b=>{if(!a)return;const p=f(b),y=Math.min(p.x,l.x),x=Math.min(p.y,l.y),k=Math.abs(p.x-l.x),E=Math.abs(p.y-l.y);i({x:y,y:x,width:k,height:E})},g=()=>{s(!1)},m=()=>{if(!r||r.width===0||r.height===0){t(e);return}const b=document.createElement("canvas"),p=u.current,y=p.naturalWidth/p.width,x=p.naturalHeight/p.height;b.width=r.width*y,b.height=r.height*x,b.getContext("2d").drawImage(p,r.x*y,r.y*x,r.width*y,r.height*x,0,0,b.width,b.height),t(b.toDataURL("image/png"))};return v.jsxs("div",{className:"fixed inset-0 z-[100] bg-black/90 flex flex-col items-center justify-center select-none animate-in fade-in duration-200",children:[v.jsx("div",{className:"relative mb-4",children:v.jsxs("div",{ref:c,className:"relative cursor-crosshair overflow-hidden border border-gray-700 shadow-2xl",onMouseDown:d,onMouseMove:h,onMouseUp:g,onMouseLeave:g,children:[v.jsx("img",{ref:u,src:e,alt:"Original",className:"max-h-[80vh] max-w-[90vw] object-contain block select-none pointer-events-none",draggable:!1}),r&&v.jsx("div",{style:{left:r.x,top:r.y,width:r.width,height:r.height,boxShadow:"0 0 0 9999px rgba(0, 0, 0, 0.6)"},className:"absolute border-2 border-blue-500 z-10",children:v.jsxs("div",{className:"absolute -top-6 left-0 bg-blue-600 text-white text-xs px-1 rounded",children:[Math.round(r.width)," x ",Math.round(r.height)]})})]})}),v.jsxs("div",{className:"flex space-x-4",children:[v.jsxs("button",{onClick:n,className:"flex items-center px-6 py-2 bg-gray-700 hover:bg-gray-600 text-white rounded-full transition-colors",children:[v.jsx(es,{size:18,className:"mr-2"})," 取消"]}),v.jsxs("button",{onClick:()=>i(null),className:"flex items-center px-6 py-2 bg-gray-700 hover:bg-gray-600 text-white rounded-full transition-colors",children:[v.jsx(Z6,{size:18,className:"mr-2"})," 重选"]}),v.jsxs("button",{onClick:m,className:"flex items-center px-6 py-2 bg-blue-600 hover:bg-blue-500 text-white rounded-full transition-colors font-medium shadow-lg shadow-blue-900/50",children:[v.jsx(lk,{size:18,className:"mr-2"}),!r||r.width===0?"发送全屏":"确认裁剪"]})]}),v.jsx("div",{className:"mt-4 text-gray-400 text-sm",children:"拖拽框选区域，或直接点击确认发送全屏"})]})}function NB({userRole:e}){const[t,n]=j.useState(null),[r,i]=j.useState(!0),[a,s]=j.useState("today_questions");j.useEffect(()=>{l()},[]);const l=async()=>{try{const o=await he.get("/api/dashboard/stats");console.log("Fetched stats:",o.data),n(o.data),e!=="admin"&&s("my_questions")}catch(o){console.error("Error fetching stats:",o)}finally{i(!1)}};return r?v.jsx("div",{className:"h-full flex items-center justify-center text-gray-500",children:"加载中..."}):t?v.jsxs("div",{className:"h-full bg-gray-50 p-6 flex flex-col overflow-hidden",children:[v.jsx("h1",{className:"text-2xl font-bold mb-6 text-gray-800 flex-shrink-0",children:"数据看板"}),v.jsx("div",{className:"grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mb-8 flex-shrink-0",children:e==="admin"?v.jsxs(v.Fragment,{children:[v.jsx($i,{title:"今日提问",value:t.today_questions,icon:ho,color:"blue",isActive:a==="today_questions",onClick:()=>s("today_questions")}),v.jsx($i,{title:"本月提问",value:t.month_questions,icon:Ob,color:"indigo",isActive:a==="month_questions",onClick:()=>s("month_questions")}),v.jsx($i,{title:"待解问题",value:t.pending_questions,icon:Bb,color:"orange",isActive:a==="pending_questions",onClick:()=>s("pending_questions")}),v.jsx($i,{title:"本月习得知识",value:t.month_learned,icon:Db,color:"green",isActive:a==="month_learned",onClick:()=>s("month_learned")})]}):v.jsxs(v.Fragment,{children:[v.jsx($i,{title:"我的提问",value:t.my_questions,icon:ho,color:"blue",isActive:a==="my_questions",onClick:()=>s("my_questions")}),v.jsx($i,{title:"我的贡献",value:t.my_contributions,icon:zb,color:"purple",isActive:a==="my_contributions",onClick:()=>s("my_contributions")})]})}),v.jsxs("div",{className:"flex-1 bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden flex flex-col",children:[v.jsxs("div",{className:"p-4 border-b border-gray-200 bg-gray-50 font-medium text-gray-700 flex items-center",children:[a==="today_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(ho,{size:18,className:"mr-2"})," 今日提问详情"]}),a==="month_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(Ob,{size:18,className:"mr-2"})," 本月提问详情"]}),a==="pending_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(Bb,{size:18,className:"mr-2"})," 待解问题详情"]}),a==="month_learned"&&v.jsxs(v.Fragment,{children:[v.jsx(Db,{size:18,className:"mr-2"})," 本月习得知识详情"]}),a==="my_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(ho,{size:18,className:"mr-2"})," 我的提问记录"]}),a==="my_contributions"&&v.jsxs(v.Fragment,{children:[v.jsx(zb,{size:18,className:"mr-2"})," 我的贡献记录"]})]}),v.jsxs("div",{className:"flex-1 overflow-hidden relative",children:[(a==="today_questions"||a==="month_questions"||a==="my_questions")&&v.jsx(RB,{filterDate:a==="today_questions"?"today":a==="month_questions"?"month":null,scope:a==="my_questions"?"me":"all"}),a==="pending_questions"&&v.jsx(Hk,{userRole:e,embed:!0}),(a==="month_learned"||a==="my_contributions")&&v.jsx(Fk,{userRole:e,embed:!0,filterScope:a==="my_contributions"?"me":"all",filterDate:a==="month_learned"?"month":null})]})]})]}):v.jsx("div",{className:"h-full flex items-center justify-center text-red-500",children:"加载失败"})}function $i({title:e,value:t,icon:n,color:r,isActive:i,onClick:a}){const s={blue:"bg-blue-50 text-blue-600 border-blue-200",indigo:"bg-indigo-50 text-indigo-600 border-indigo-200",orange:"bg-orange-50 text-orange-600 border-orange-200",green:"bg-green-50 text-green-600 border-green-200",purple:"bg-purple-50 text-purple-600 border-purple-200"};return v.jsxs("div",{onClick:a,className:nt("bg-white p-6 rounded-xl shadow-sm border flex items-center space-x-4 cursor-pointer transition-all",i?"ring-2 ring-blue-500 border-transparent shadow-md transform scale-[1.02]":"border-gray-100 hover:shadow-md hover:border-blue-200"),children:[v.jsx("div",{className:`p-4 rounded-full ${s[r]||s.blue}`,children:v.jsx(n,{size:24})}),v.jsx("div",{children:v.jsxs("div",{className:"flex items-baseline gap-2",children:[v.jsx("p",{className:"text-gray-500 text-sm font-medium",children:e}),v.jsx("p",{className:"text-xl font-bold text-gray-800",children:t??"-"})]})})]})}function RB({filterDate:e,scope:t}){const[n,r]=j.useState([]),[i,a]=j.useState(!1),[s,l]=j.useState(1),[o,u]=j.useState(0),c=10;j.useEffect(()=>{f()},[s,e,t]);const f=async()=>{a(!0);try{let d=`/admin/chat_logs?page=${s}&limit=${c}&scope=${t}`;e&&(d+=`&filter_date=${e}`);const h=await he.get(d);r(h.data.logs||[]),u(h.data.total||0)}catch(d){console.error(d)}finally{a(!1)}};return v.jsxs("div",{className:"h-full flex flex-col",children:[v.jsx("div",{className:"flex-1 overflow-y-auto p-4",children:v.jsxs("table",{className:"w-full text-left border-collapse",children:[v.jsx("thead",{children:v.jsxs("tr",{className:"border-b border-gray-200 text-gray-500 text-sm",children:[v.jsx("th",{className:"p-3 font-medium",children:"提问时间"}),v.jsx("th",{className:"p-3 font-medium",children:"用户"}),v.jsx("th",{className:"p-3 font-medium",children:"问题"}),v.jsx("th",{className:"p-3 font-medium",children:"回答预览"})]})}),v.jsx("tbody",{className:"divide-y divide-gray-100",children:i?v.jsx("tr",{children:v.jsx("td",{colSpan:"4",className:"p-8 text-center text-gray-400",children:"加载中..."})}):n.length===0?v.jsx("tr",{children:v.jsx("td",{colSpan:"4",className:"p-8 text-center text-gray-400",children:"暂无数据"})}):n.map(d=>v.jsxs("tr",{className:"hover:bg-gray-50 transition-colors text-sm",children:[v.jsx("td",{className:"p-3 text-gray-500 w-40",children:d.created_at}),v.jsx("td",{className:"p-3 font-medium text-gray-700 w-32 truncate",children:d.username}),v.jsx("td",{className:"p-3 text-gray-800 max-w-xs truncate",title:d.question,children:d.question}),v.jsx("td",{className:"p-3 text-gray-600 max-w-sm truncate",title:d.answer,children:d.answer})]},d.id))})]})}),o>c&&v.jsxs("div",{className:"p-4 border-t border-gray-200 flex justify-center space-x-2 bg-white",children:[v.jsx("button",{disabled:s===1,onClick:()=>l(d=>d-1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50 text-sm",children:"上一页"}),v.jsxs("span",{className:"px-3 py-1 text-gray-600 text-sm",children:[s," / ",Math.ceil(o/c)]}),v.jsx("button",{disabled:s*c>=o,onClick:()=>l(d=>d+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50 text-sm",children:"下一页"})]})]})}function MB({activeView:e,onViewChange:t,userRole:n,username:r,onLogout:i,onUpload:a}){const s=[{title:"智能助手",items:[{id:"chat",label:"智能问答",icon:bh},{id:"knowledge",label:"文档资源",icon:ka}]},{title:"知识共建",items:[{id:"unknown",label:"待解问题",icon:Ti},{id:"training",label:"知识录入",icon:dk}]},...n!=="admin"?[{title:"运行简报",items:[{id:"learning",label:"进化历程",icon:xh},{id:"dashboard",label:"数据看板",icon:Lb}]}]:[],{title:"运维管理",adminOnly:!0,items:[{id:"approval",label:"审批中心",icon:fk},{id:"global_logs",label:"全局日志",icon:uk},{id:"dashboard",label:"数据看板",icon:Lb},{id:"learning",label:"进化历程",icon:xh}]}];return v.jsxs("div",{className:"w-64 bg-white border-r border-gray-200 flex flex-col h-full shadow-lg md:shadow-none",children:[v.jsxs("div",{className:"p-4 border-b border-gray-200 flex items-center space-x-2",children:[v.jsx("div",{className:"w-8 h-8 bg-blue-600 rounded-lg flex items-center justify-center text-white font-bold text-xs",children:"综资"}),v.jsx("span",{className:"font-bold text-gray-800 text-lg",children:"Ops Agent"})]}),v.jsx("div",{className:"flex-1 overflow-y-auto py-4 space-y-6",children:s.map((l,o)=>l.adminOnly&&n!=="admin"?null:v.jsxs("div",{children:[v.jsxs("div",{className:"px-4 mb-2 text-xs font-semibold text-gray-400 uppercase tracking-wider",children:["[",l.title,"]"]}),v.jsx("div",{className:"space-y-1",children:l.items.map(u=>v.jsxs("button",{onClick:()=>t(u.id),className:nt("w-full flex items-center space-x-3 px-4 py-2 text-sm font-medium transition-colors",e===u.id?"bg-blue-50 text-blue-600 border-r-4 border-blue-600":"text-gray-600 hover:bg-gray-50 hover:text-gray-900"),children:[v.jsx(u.icon,{size:18}),v.jsx("span",{children:u.label})]},u.id))})]},o))}),v.jsxs("div",{className:"p-4 border-t border-gray-200 space-y-4",children:[(n==="admin"||n==="user")&&v.jsxs("button",{onClick:a,className:"w-full flex items-center justify-center space-x-2 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm text-sm font-medium",children:[v.jsx(_p,{size:16}),v.jsx("span",{children:"上传知识库"})]}),v.jsxs("div",{className:"bg-gray-50 rounded-lg p-3",children:[v.jsxs("div",{className:"flex items-center justify-between mb-2",children:[v.jsx("span",{className:"font-bold text-gray-700 truncate max-w-[120px]",title:r,children:r}),n==="admin"&&v.jsx("span",{className:"text-[10px] bg-blue-100 text-blue-700 px-2 py-0.5 rounded-full font-medium",children:"管理员"})]}),v.jsxs("button",{onClick:i,className:"w-full flex items-center space-x-2 text-sm font-medium text-red-600 hover:text-red-700 transition-colors",children:[v.jsx(ck,{size:16}),v.jsx("span",{children:"退出登录"})]})]})]})]})}function jB(){const[e,t]=j.useState(""),[n,r]=j.useState(""),[i,a]=j.useState(!1),[s,l]=j.useState(!1),[o,u]=j.useState(""),c=async()=>{var h,g;if(!e.trim()||!n.trim()){alert("请填写完整的问题和答案");return}a(!0);try{const m=await he.post("/admin/add_qa",{question:e,answer:n});alert(m.data.message||"操作成功！"),t(""),r(""),u("")}catch(m){alert("操作失败: "+(((g=(h=m.response)==null?void 0:h.data)==null?void 0:g.detail)||m.message))}finally{a(!1)}},f=async()=>{var h,g;if(!e.trim()||!n.trim()){alert("请先填写问题和草稿答案，AI才能帮您润色");return}u(n),l(!0);try{const m=await he.post("/admin/polish_answer",{question:e,draft_answer:n});m.data.status==="success"&&r(m.data.polished_answer)}catch(m){alert("润色失败: "+(((g=(h=m.response)==null?void 0:h.data)==null?void 0:g.detail)||m.message))}finally{l(!1)}},d=h=>{(h.ctrlKey||h.metaKey)&&h.key==="z"&&o&&(h.preventDefault(),r(o),u(""))};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-y-auto",children:v.jsxs("div",{className:"max-w-4xl mx-auto w-full",children:[v.jsxs("h2",{className:"text-2xl font-bold text-gray-800 mb-6 flex items-center",children:[v.jsx(dk,{className:"mr-3 text-blue-600"}),"问答补全"]}),v.jsxs("div",{className:"bg-white rounded-xl shadow-sm border border-gray-200 p-6 space-y-6",children:[v.jsxs("div",{className:"bg-blue-50 text-blue-800 p-4 rounded-lg text-sm mb-6",children:["在此模式下，您可以手动录入标准问答对。 系统将直接学习这些内容，当用户提出相同或相似问题时，直接返回您设定的答案。",v.jsx("br",{}),v.jsx("span",{className:"text-xs opacity-75 mt-1 block",children:"* 管理员提交直接生效，普通用户提交需管理员审批。"})]}),v.jsxs("div",{children:[v.jsx("label",{className:"block text-sm font-medium text-gray-700 mb-2",children:"预期问题 (Question)"}),v.jsx("input",{type:"text",value:e,onChange:h=>t(h.target.value),className:"w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-all",placeholder:"例如：如何重置路由器密码？"})]}),v.jsxs("div",{children:[v.jsxs("div",{className:"flex justify-between items-center mb-2",children:[v.jsx("label",{className:"block text-sm font-medium text-gray-700",children:"标准答案 (Answer)"}),v.jsxs("div",{className:"flex items-center space-x-2",children:[o&&v.jsx("span",{className:"text-xs text-gray-400 mr-2",children:"按 Ctrl+Z 撤销润色"}),v.jsxs("button",{onClick:f,disabled:s||!e.trim()||!n.trim(),className:"flex items-center text-xs text-purple-600 hover:text-purple-700 bg-purple-50 hover:bg-purple-100 px-3 py-1 rounded-full transition-colors disabled:opacity-50",children:[v.jsx(Ti,{size:14,className:nt("mr-1",s?"animate-spin":"")}),s?"AI 正在润色...":"AI 润色优化"]})]})]}),v.jsx("textarea",{value:n,onChange:h=>r(h.target.value),onKeyDown:d,rows:6,className:"w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-all resize-none",placeholder:"输入标准的回答内容..."})]}),v.jsx("div",{className:"flex justify-end pt-4",children:v.jsx("button",{onClick:c,disabled:i,className:"px-6 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-lg font-medium transition-colors shadow-sm disabled:opacity-50 disabled:cursor-not-allowed flex items-center",children:i?v.jsxs(v.Fragment,{children:[v.jsx(Vl,{className:"animate-spin mr-2",size:18}),"提交中..."]}):v.jsxs(v.Fragment,{children:[v.jsx(lk,{className:"mr-2",size:18}),"提交并学习"]})})})]})]})})}function zB({imageSrc:e,onClose:t}){return e?v.jsxs("div",{className:"fixed inset-0 z-[110] bg-black/95 flex items-center justify-center animate-in fade-in duration-200 cursor-zoom-out",onClick:t,children:[v.jsx("button",{onClick:t,className:"absolute top-4 right-4 text-white/70 hover:text-white bg-white/10 hover:bg-white/20 rounded-full p-2 transition-colors z-50",children:v.jsx(es,{size:24})}),v.jsx("img",{src:e,alt:"Zoomed",className:"max-h-screen max-w-screen object-contain p-4",onClick:n=>n.stopPropagation()})]}):null}function DB(){const[e,t]=j.useState("docs"),[n,r]=j.useState([]),[i,a]=j.useState([]),[s,l]=j.useState(!1);j.useEffect(()=>{e==="docs"?o():u()},[e]);const o=async()=>{l(!0);try{const m=await he.get("/pending_docs");r(m.data.docs)}catch(m){console.error(m)}finally{l(!1)}},u=async()=>{l(!0);try{const m=await he.get("/admin/pending_qa");a(m.data.items||[])}catch(m){console.error(m)}finally{l(!1)}},c=async m=>{try{await he.post(`/approve_doc/${m}`),o()}catch(b){alert("操作失败: "+b.message)}},f=async m=>{if(window.confirm("确定要拒绝该文档吗？"))try{await he.post(`/reject_doc/${m}`),o()}catch(b){alert("操作失败: "+b.message)}},d=async m=>{try{await he.post(`/admin/approve_qa/${m}`),u()}catch(b){alert("操作失败: "+b.message)}},h=async m=>{if(window.confirm("确定要拒绝该问答吗？"))try{await he.post(`/admin/reject_qa/${m}`),u()}catch(b){alert("操作失败: "+b.message)}},g=async(m,b)=>{var p,y;try{const x=await he.get(`/download_doc/${m}`,{responseType:"blob"}),k=window.URL.createObjectURL(new Blob([x.data])),E=document.createElement("a");E.href=k,E.setAttribute("download",b),document.body.appendChild(E),E.click(),E.remove()}catch(x){alert("下载失败: "+(((y=(p=x.response)==null?void 0:p.data)==null?void 0:y.detail)||x.message))}};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:v.jsxs("div",{className:"max-w-6xl mx-auto w-full h-full flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200 flex justify-between items-center bg-white",children:[v.jsxs("div",{className:"flex items-center space-x-4",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800 mr-4",children:[v.jsx(fk,{className:"mr-2 text-blue-600"}),"审批中心"]}),v.jsxs("div",{className:"flex space-x-1 bg-gray-100 p-1 rounded-lg",children:[v.jsx("button",{onClick:()=>t("docs"),className:nt("px-4 py-1.5 rounded-md text-sm font-medium transition-all",e==="docs"?"bg-white text-blue-600 shadow-sm":"text-gray-500 hover:text-gray-700"),children:"文档审批"}),v.jsx("button",{onClick:()=>t("qa"),className:nt("px-4 py-1.5 rounded-md text-sm font-medium transition-all",e==="qa"?"bg-white text-blue-600 shadow-sm":"text-gray-500 hover:text-gray-700"),children:"问答审批"})]})]}),v.jsx("button",{onClick:e==="docs"?o:u,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"刷新",children:v.jsx(Vl,{size:20,className:s?"animate-spin":""})})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6",children:e==="docs"?s?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):n.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无待审批文档"}):v.jsx("div",{className:"space-y-3",children:n.map(m=>v.jsxs("div",{className:"flex items-center justify-between bg-gray-50 p-4 rounded-lg border border-gray-100",children:[v.jsxs("div",{className:"flex flex-col",children:[v.jsx("span",{className:"font-medium text-gray-800",children:m.filename}),v.jsxs("div",{className:"text-xs text-gray-500 flex space-x-2 mt-1",children:[v.jsxs("span",{children:["上传者: ",m.uploader]}),v.jsxs("span",{children:["时间: ",m.created_at]})]})]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{onClick:()=>g(m.id,m.filename),className:"p-2 text-gray-500 hover:text-blue-600 hover:bg-blue-50 rounded-lg transition-colors",title:"下载文档",children:v.jsx(vi,{size:18})}),v.jsx("button",{onClick:()=>f(m.id),className:"px-3 py-1.5 bg-red-50 text-red-600 hover:bg-red-100 rounded-md text-sm font-medium transition-colors",children:"拒绝"}),v.jsx("button",{onClick:()=>c(m.id),className:"px-3 py-1.5 bg-green-50 text-green-600 hover:bg-green-100 rounded-md text-sm font-medium transition-colors",children:"通过"})]})]},m.id))}):s?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):i.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无待审批问答"}):v.jsx("div",{className:"space-y-4",children:i.map(m=>v.jsxs("div",{className:"bg-gray-50 p-4 rounded-lg border border-gray-100",children:[v.jsxs("div",{className:"flex justify-between items-start mb-2 border-b border-gray-200 pb-2",children:[v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"font-bold text-gray-700",children:m.username}),v.jsx("span",{className:"text-gray-400 text-xs",children:m.created_at})]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{onClick:()=>h(m.id),className:"px-3 py-1.5 bg-red-50 text-red-600 hover:bg-red-100 rounded-md text-sm font-medium transition-colors",children:"拒绝"}),v.jsx("button",{onClick:()=>d(m.id),className:"px-3 py-1.5 bg-green-50 text-green-600 hover:bg-green-100 rounded-md text-sm font-medium transition-colors",children:"通过"})]})]}),v.jsxs("div",{className:"mb-2",children:[v.jsx("div",{className:"font-semibold text-gray-600 mb-1",children:"问题："}),v.jsx("div",{className:"text-gray-800 bg-white p-2 rounded border border-gray-100 whitespace-pre-wrap",children:m.question})]}),v.jsxs("div",{children:[v.jsx("div",{className:"font-semibold text-gray-600 mb-1",children:"答案："}),v.jsx("div",{className:"text-gray-600 bg-blue-50/50 p-2 rounded border border-blue-100/50 whitespace-pre-wrap max-h-32 overflow-y-auto",children:m.answer})]})]},m.id))})})]})})}function Fk({userRole:e,filterScope:t,filterDate:n,embed:r}){const[i,a]=j.useState([]),[s,l]=j.useState(!1),[o,u]=j.useState(1),[c,f]=j.useState(0),d=10;j.useEffect(()=>{h()},[o,t,n]);const h=async()=>{l(!0);try{let m=`/admin/learning_records?page=${o}&limit=${d}`;t&&(m+=`&scope=${t}`),n&&(m+=`&filter_date=${n}`);const b=await he.get(m);a(b.data.records||[]),f(b.data.total||0)}catch(m){console.error(m),a([])}finally{l(!1)}},g=async m=>{var b,p;if(window.confirm("确定要删除这条学习记录吗？删除后将同时从知识库中移除。"))try{await he.delete(`/admin/delete_qa/${m}`),alert("删除成功"),h()}catch(y){alert("删除失败: "+(((p=(b=y.response)==null?void 0:b.data)==null?void 0:p.detail)||y.message))}};return v.jsxs("div",{className:`h-full flex flex-col ${r?"":"bg-gray-50 p-6"} overflow-hidden`,children:[!r&&v.jsxs("h2",{className:"text-xl font-bold mb-4 text-green-700 flex items-center",children:[v.jsx(xh,{size:24,className:"mr-2"}),"进化历程"]}),v.jsx("div",{className:`flex-1 overflow-auto ${r?"":"bg-white rounded-lg shadow"}`,children:v.jsxs("table",{className:"w-full text-left border-collapse",children:[v.jsx("thead",{children:v.jsxs("tr",{className:"bg-gray-100 border-b border-gray-200",children:[v.jsx("th",{className:"p-3 font-medium text-gray-600 w-24",children:"ID"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-1/4",children:"问题"}),v.jsx("th",{className:"p-3 font-medium text-gray-600",children:"答案"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-32",children:"贡献者"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-24",children:"状态"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-40",children:"时间"}),e==="admin"&&v.jsx("th",{className:"p-3 font-medium text-gray-600 w-24 text-center",children:"操作"})]})}),v.jsx("tbody",{children:i.length===0?v.jsx("tr",{children:v.jsx("td",{colSpan:e==="admin"?7:6,className:"p-8 text-center text-gray-500",children:"暂无学习记录"})}):i.map(m=>v.jsxs("tr",{className:"border-b border-gray-100 hover:bg-gray-50 transition-colors",children:[v.jsxs("td",{className:"p-3 text-gray-500 text-sm",children:["#",m.id]}),v.jsx("td",{className:"p-3 font-medium text-gray-800",children:m.question}),v.jsx("td",{className:"p-3 text-gray-600 text-sm line-clamp-2 max-w-md",title:m.answer,children:m.answer.length>100?m.answer.substring(0,100)+"...":m.answer}),v.jsx("td",{className:"p-3",children:v.jsxs("span",{className:"inline-flex items-center px-2 py-0.5 rounded text-xs font-medium bg-blue-100 text-blue-800",children:[v.jsx(Ap,{size:10,className:"mr-1"}),m.username||"未知"]})}),v.jsx("td",{className:"p-3",children:v.jsx("span",{className:`inline-flex items-center px-2 py-0.5 rounded text-xs font-medium ${m.status==="approved"?"bg-green-100 text-green-800":"bg-yellow-100 text-yellow-800"}`,children:m.status==="approved"?"已生效":"待审核"})}),v.jsx("td",{className:"p-3 text-gray-500 text-sm",children:m.created_at}),e==="admin"&&v.jsx("td",{className:"p-3 text-center",children:v.jsx("button",{onClick:()=>g(m.id),className:"text-red-500 hover:text-red-700 hover:bg-red-50 p-1.5 rounded transition-colors",title:"删除",children:v.jsx(hk,{size:16})})})]},m.id))})]})}),c>d&&v.jsxs("div",{className:"flex justify-center mt-4 space-x-2",children:[v.jsx("button",{disabled:o===1,onClick:()=>u(m=>m-1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-3 py-1 text-gray-600",children:["第 ",o," 页 / 共 ",Math.ceil(c/d)," 页"]}),v.jsx("button",{disabled:o*d>=c,onClick:()=>u(m=>m+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})}const ci=()=>new Date().toLocaleTimeString([],{hour:"2-digit",minute:"2-digit"});function OB(){const[e,t]=j.useState([]),[n,r]=j.useState(!1),[i,a]=j.useState(1),[s,l]=j.useState(0),o=20;j.useEffect(()=>{u()},[i]);const u=async()=>{r(!0);try{const d=await he.get(`/admin/global_logs?page=${i}&limit=${o}`);t(d.data.logs||[]),l(d.data.total||0)}catch(d){console.error(d),t([])}finally{r(!1)}},c=async()=>{var d,h;try{const g=await he.get("/admin/export_global_logs",{responseType:"blob"}),m=window.URL.createObjectURL(new Blob([g.data])),b=document.createElement("a");b.href=m,b.setAttribute("download","global_logs.csv"),document.body.appendChild(b),b.click(),b.remove()}catch(g){alert("导出失败: "+(((h=(d=g.response)==null?void 0:d.data)==null?void 0:h.detail)||g.message))}},f=d=>{const g={pending:"bg-yellow-100 text-yellow-800",approved:"bg-green-100 text-green-800",rejected:"bg-red-100 text-red-800",completed:"bg-blue-100 text-blue-800",normal:"bg-gray-100 text-gray-800"}[d.status]||"bg-gray-100 text-gray-800";let m="未知";switch(d.type){case"chat":m="智能问答";break;case"doc_upload":m="文档上传";break;case"qa_submission":m="知识录入";break}return v.jsxs("div",{className:"bg-white p-4 rounded-lg border border-gray-200 hover:shadow-sm transition-shadow",children:[v.jsxs("div",{className:"flex justify-between items-start mb-2",children:[v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"px-2 py-0.5 rounded text-xs font-medium bg-gray-100 text-gray-600",children:m}),v.jsx("span",{className:"font-bold text-gray-700",children:d.username}),v.jsx("span",{className:"text-gray-400 text-xs",children:d.created_at})]}),v.jsx("span",{className:`px-2 py-0.5 rounded text-xs font-medium ${g}`,children:d.status})]}),v.jsx("div",{className:"mb-1",children:v.jsx("div",{className:"font-medium text-gray-800",children:d.content})}),d.details&&v.jsx("div",{className:"text-sm text-gray-500 bg-gray-50 p-2 rounded mt-2 truncate",children:d.type==="doc_upload"?`路径: ${d.details}`:`回复/详情: ${d.details}`})]},`${d.type}-${d.id}`)};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:v.jsxs("div",{className:"max-w-6xl mx-auto w-full h-full flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200 flex justify-between items-center bg-white",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800",children:[v.jsx(uk,{className:"mr-2 text-blue-600"}),"全局日志"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{onClick:c,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"导出全部",children:v.jsx(vi,{size:20,className:"text-gray-600"})}),v.jsx("button",{onClick:u,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"刷新",children:v.jsx(Vl,{size:20,className:n?"animate-spin":""})})]})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6 bg-gray-50",children:n?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):e.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无记录"}):v.jsx("div",{className:"space-y-3",children:e.map(f)})}),v.jsxs("div",{className:"p-4 border-t border-gray-200 bg-white flex justify-between items-center text-sm text-gray-500",children:[v.jsxs("span",{children:["共 ",s," 条记录"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{disabled:i===1,onClick:()=>a(d=>Math.max(1,d-1)),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-2 py-1",children:["第 ",i," 页"]}),v.jsx("button",{disabled:i*o>=s,onClick:()=>a(d=>d+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})]})})}function Hk({userRole:e}){const[t,n]=j.useState([]),[r,i]=j.useState(!1),[a,s]=j.useState(1),[l,o]=j.useState(0),u=10,[c,f]=j.useState(null),[d,h]=j.useState(""),[g,m]=j.useState(!1),[b,p]=j.useState(!1),[y,x]=j.useState("");j.useEffect(()=>{k()},[a]);const k=async()=>{i(!0);try{const L=await he.get(`/admin/unknown_questions?page=${a}&limit=${u}`);n(L.data.logs||[]),o(L.data.total||0)}catch(L){console.error(L),n([])}finally{i(!1)}},E=L=>{f(L.id),h("")},C=async()=>{if(d.trim()){m(!0);try{await he.post("/admin/learn",{question_id:c,answer:d}),k(),f(null),h("")}catch(L){alert("学习失败: "+L.message)}finally{m(!1)}}},R=async L=>{if(window.confirm("确定要丢弃该问题吗？丢弃后将不再出现在此处。"))try{await he.post(`/admin/discard_unknown/${L}`),k()}catch(X){alert("操作失败: "+X.message)}},z=async L=>{var X,A;if(!d.trim()){alert("请先填写草稿答案，AI才能帮您润色");return}x(d),p(!0);try{const V=await he.post("/admin/polish_answer",{question:L,draft_answer:d});V.data.status==="success"&&h(V.data.polished_answer)}catch(V){alert("润色失败: "+(((A=(X=V.response)==null?void 0:X.data)==null?void 0:A.detail)||V.message))}finally{p(!1)}},_=L=>{(L.ctrlKey||L.metaKey)&&L.key==="z"&&y&&(L.preventDefault(),h(y),x(""))};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:v.jsxs("div",{className:"max-w-6xl mx-auto w-full h-full flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200 flex justify-between items-center bg-white",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800",children:[v.jsx(Ti,{className:"mr-2 text-purple-600"}),"未知问题"]}),v.jsx("button",{onClick:k,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"刷新",children:v.jsx(Vl,{size:20,className:r?"animate-spin":""})})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6",children:r?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):t.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无未知问题"}):v.jsx("div",{className:"space-y-4",children:t.map(L=>v.jsxs("div",{className:"bg-gray-50 p-4 rounded-lg border border-gray-100 text-sm",children:[v.jsx("div",{className:"flex justify-between items-start mb-2 border-b border-gray-200 pb-2",children:v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"font-bold text-gray-700",children:L.username}),v.jsx("span",{className:"text-gray-400 text-xs",children:L.created_at})]})}),v.jsxs("div",{className:"mb-2",children:[v.jsx("div",{className:"font-semibold text-gray-600 mb-1",children:"提问："}),v.jsx("div",{className:"text-gray-800 bg-white p-2 rounded border border-gray-100 whitespace-pre-wrap",children:L.question})]}),c===L.id?v.jsxs("div",{className:"mt-3 bg-purple-50 p-3 rounded border border-purple-100 animate-in fade-in slide-in-from-top-2",children:[v.jsxs("div",{className:"flex justify-between items-center mb-1",children:[v.jsxs("div",{className:"flex items-center",children:[v.jsx("label",{className:"block text-purple-800 font-medium mr-2",children:"请输入标准答案："}),y&&v.jsx("span",{className:"text-xs text-gray-400",children:"按 Ctrl+Z 撤销润色"})]}),v.jsxs("button",{onClick:()=>z(L.question),disabled:b||!d.trim(),className:"flex items-center text-xs text-purple-600 hover:text-purple-700 bg-white border border-purple-200 hover:border-purple-300 px-3 py-1 rounded-full transition-colors disabled:opacity-50",children:[v.jsx(Ti,{size:14,className:nt("mr-1",b?"animate-spin":"")}),b?"AI 正在润色...":"AI 润色优化"]})]}),v.jsx("textarea",{className:"w-full p-2 border border-purple-200 rounded focus:ring-2 focus:ring-purple-500 focus:border-transparent outline-none min-h-[100px]",placeholder:"在此输入答案，提交后系统将自动学习...",value:d,onChange:X=>h(X.target.value),onKeyDown:_}),v.jsxs("div",{className:"flex justify-end space-x-2 mt-2",children:[v.jsx("button",{onClick:()=>f(null),className:"px-3 py-1.5 bg-gray-200 text-gray-700 rounded hover:bg-gray-300 transition-colors",children:"取消"}),v.jsx("button",{onClick:C,disabled:g||!d.trim(),className:"px-3 py-1.5 bg-purple-600 text-white rounded hover:bg-purple-700 disabled:opacity-50 transition-colors flex items-center",children:g?"提交中...":"确认学习"})]})]}):v.jsxs("div",{className:"flex justify-end mt-2 space-x-2",children:[e==="admin"&&v.jsxs("button",{onClick:()=>R(L.id),className:"flex items-center px-3 py-1.5 bg-gray-100 text-gray-600 hover:bg-gray-200 rounded-md text-sm font-medium transition-colors",children:[v.jsx(es,{size:14,className:"mr-1.5"}),"丢弃"]}),v.jsxs("button",{onClick:()=>E(L),className:"flex items-center px-3 py-1.5 bg-purple-100 text-purple-700 hover:bg-purple-200 rounded-md text-sm font-medium transition-colors",children:[v.jsx(Ti,{size:14,className:"mr-1.5"}),"去教学"]})]})]},L.id))})}),v.jsxs("div",{className:"p-4 border-t border-gray-200 bg-white flex justify-between items-center text-sm text-gray-500",children:[v.jsxs("span",{children:["共 ",l," 条记录"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{disabled:a===1,onClick:()=>s(L=>Math.max(1,L-1)),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-2 py-1",children:["第 ",a," 页"]}),v.jsx("button",{disabled:a*u>=l,onClick:()=>s(L=>L+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})]})})}function Ik({isOpen:e,onClose:t,onUpload:n,userRole:r}){const[i,a]=j.useState([]),[s,l]=j.useState(!1),[o,u]=j.useState(""),[c,f]=j.useState(!1),d=j.useRef(null);if(!e)return null;const h=b=>{if(b.target.files&&b.target.files.length>0){const p=Array.from(b.target.files),y=p.filter(x=>x.size>100*1024*1024);if(y.length>0){u(`❌ 以下文件超过100MB限制: ${y.map(x=>x.name).join(", ")}`),d.current&&(d.current.value="");return}a(p),u("")}},g=async(b="admin")=>{if(i.length===0)return;l(!0),u("");const p=new FormData;i.forEach(y=>{p.append("files",y)}),p.append("target_kb",b);try{const x=(await he.post("/upload_doc",p,{headers:{"Content-Type":"multipart/form-data"}})).data.results,k=x.filter(C=>C.status==="error"),E=x.filter(C=>C.status==="pending");k.length>0?u(`❌ 部分文件上传失败: ${k.map(C=>C.filename).join(", ")}`):E.length>0?(u(`⏳ ${E.length} 个文件已提交，等待管理员审批`),setTimeout(()=>{n(x.map(C=>C.filename).join(", "),!0),t(),a([]),u("")},2e3)):(u(`✅ ${x.length} 个文件全部上传成功！`),setTimeout(()=>{n(x.map(C=>C.filename).join(", "),!1),t(),a([]),u("")},1500))}catch(y){u(`❌ 上传请求失败: ${y.message}`)}finally{l(!1)}},m=async()=>{f(!0),u("正在同步知识库（新增/剔除），请稍候...");try{const b=await he.post("/reprocess_docs");u(`✅ ${b.data.message}`)}catch(b){u(`❌ 更新失败: ${b.message}`)}finally{f(!1)}};return v.jsx("div",{className:"fixed inset-0 z-50 flex items-center justify-center bg-black/50 backdrop-blur-sm animate-in fade-in duration-200",children:v.jsxs(qo.div,{initial:{scale:.9,opacity:0},animate:{scale:1,opacity:1},className:"bg-white rounded-2xl p-6 w-full max-w-md shadow-2xl relative",children:[v.jsx("button",{onClick:t,className:"absolute top-4 right-4 text-gray-400 hover:text-gray-600",children:v.jsx(es,{size:20})}),v.jsxs("h2",{className:"text-xl font-bold mb-4 flex items-center",children:[v.jsx(_p,{className:"mr-2 text-blue-600"}),"批量上传文档"]}),v.jsxs("div",{className:"border-2 border-dashed border-gray-300 rounded-xl p-8 flex flex-col items-center justify-center bg-gray-50 hover:bg-gray-100 transition-colors cursor-pointer",onClick:()=>{var b;return(b=d.current)==null?void 0:b.click()},children:[v.jsx("input",{type:"file",ref:d,onChange:h,className:"hidden",multiple:!0,accept:".txt,.md,.docx,.pdf,.xlsx,.xls,.csv"}),v.jsx(ka,{size:48,className:"text-gray-400 mb-2"}),v.jsx("div",{className:"text-sm text-gray-500 text-center",children:i.length>0?v.jsxs("div",{className:"text-blue-600 font-medium max-h-32 overflow-y-auto",children:[i.map((b,p)=>v.jsx("div",{children:b.name},p)),v.jsxs("div",{className:"text-gray-400 mt-1",children:["共 ",i.length," 个文件"]})]}):"点击选择多个文件或拖拽至此"}),v.jsx("p",{className:"text-xs text-gray-400 mt-1",children:"支持 .txt, .md, .docx, .pdf, .xlsx, .csv"})]}),r==="guest"&&v.jsxs("div",{className:"mt-3 text-xs text-red-600 bg-red-50 p-2 rounded border border-red-100 flex items-start",children:[v.jsx(Pb,{size:14,className:"mr-1 mt-0.5 flex-shrink-0"}),v.jsx("span",{children:"注意：临时用户仅可体验问答功能，暂不支持上传知识库文件。"})]}),r==="user"&&v.jsxs("div",{className:"mt-3 text-xs text-amber-600 bg-amber-50 p-2 rounded border border-amber-100 flex items-start",children:[v.jsx(Pb,{size:14,className:"mr-1 mt-0.5 flex-shrink-0"}),v.jsx("span",{children:"注意：您上传的文档需要经过管理员审批，审批通过后才会正式存入知识库。"})]}),o&&v.jsx("div",{className:nt("mt-4 text-sm p-2 rounded",o.startsWith("✅")?"bg-green-50 text-green-700":"bg-red-50 text-red-700"),children:o}),v.jsxs("div",{className:"mt-6 flex justify-between items-center",children:[r==="admin"&&v.jsxs("button",{onClick:m,disabled:c||s,className:"text-xs text-gray-500 hover:text-blue-600 flex items-center transition-colors",title:"扫描并同步文件：入库新增文件，剔除已删除文件",children:[v.jsx(Vl,{size:14,className:nt("mr-1",c&&"animate-spin")}),c?"同步中...":"扫描增量文件"]}),v.jsxs("div",{className:"flex space-x-3",children:[v.jsx("button",{onClick:t,className:"px-4 py-2 text-gray-600 hover:bg-gray-100 rounded-lg transition-colors",children:"取消"}),r==="admin"?v.jsxs(v.Fragment,{children:[v.jsx("button",{onClick:()=>g("admin"),disabled:i.length===0||s,className:nt("px-4 py-2 rounded-lg text-white transition-colors flex items-center text-sm",i.length===0||s?"bg-blue-300 cursor-not-allowed":"bg-blue-600 hover:bg-blue-700"),children:s?"...":"运维知识库"}),v.jsx("button",{onClick:()=>g("user"),disabled:i.length===0||s,className:nt("px-4 py-2 rounded-lg text-white transition-colors flex items-center text-sm",i.length===0||s?"bg-green-300 cursor-not-allowed":"bg-green-600 hover:bg-green-700"),children:s?"...":"用户知识库"})]}):v.jsx("button",{onClick:()=>g("user"),disabled:i.length===0||s||r==="guest",className:nt("px-4 py-2 rounded-lg text-white transition-colors flex items-center",i.length===0||s||r==="guest"?"bg-blue-300 cursor-not-allowed":"bg-blue-600 hover:bg-blue-700"),children:s?v.jsxs(v.Fragment,{children:[v.jsx("div",{className:"w-4 h-4 border-2 border-white/30 border-t-white rounded-full animate-spin mr-2"}),"上传中..."]}):`开始上传 (${i.length})`})]})]})]})})}function LB({auth:e,onLogout:t,isUserMode:n}){const[r,i]=j.useState([{id:"welcome",role:"assistant",content:"你好！我是 Ops Agent 助手。有什么我可以帮你的吗？",timestamp:ci()}]),[a,s]=j.useState(""),[l,o]=j.useState(null),[u,c]=j.useState(!1),[f,d]=j.useState(!1),[h,g]=j.useState([]),[m,b]=j.useState(!1),[p,y]=j.useState(null),[x,k]=j.useState(null),E=j.useRef(null),C=j.useRef(null),R=j.useRef(null),z=j.useRef(null);j.useEffect(()=>{(async()=>{try{const B=await he.get("/hot_questions");B.data.questions&&g(B.data.questions)}catch(B){console.error("Failed to fetch hot questions:",B)}})()},[]);const _=()=>{var O;(O=E.current)==null||O.scrollIntoView({behavior:"smooth"})};j.useEffect(()=>{_()},[r,u,l]);const L=O=>{const B=O.target.files[0];if(B){const G=new FileReader;G.onloadend=()=>{o(G.result)},G.readAsDataURL(B)}O.target.value=""},X=async O=>{const B=O.target.files[0];if(!B)return;const G=new FormData;G.append("file",B);const T=Date.now().toString();i(U=>[...U,{id:T,role:"assistant",content:`📄 正在上传并解析文档：${B.name}...`,timestamp:ci()}]);try{const U=await he.post("/upload_doc",G,{headers:{"Content-Type":"multipart/form-data"}});if(U.data.error)throw new Error(U.data.error);i(H=>H.map(N=>N.id===T?{...N,content:`✅ 文档 **${B.name}** 已成功上传并加入知识库！`}:N))}catch(U){console.error("Upload Error:",U),i(H=>H.map(N=>N.id===T?{...N,content:`❌ 文档上传失败：${U.message||"未知错误"}`}:N))}O.target.value=""},A=O=>{const B=O.clipboardData.items;for(let G=0;G<B.length;G++)if(B[G].type.indexOf("image")!==-1){const T=B[G].getAsFile(),U=new FileReader;U.onloadend=()=>{o(U.result)},U.readAsDataURL(T),O.preventDefault();return}},V=async()=>{var T,U,H;if(!a.trim()&&!l||u)return;const O=a,B=l;s(""),o(null);const G={id:Date.now().toString(),role:"user",content:O,image:B,timestamp:ci()};i(N=>[...N,G]),c(!0);try{const N=await he.post("/get_answer",{question:O||"请分析这张图片",image:B}),ee={id:(Date.now()+1).toString(),role:"assistant",content:N.data.answer,question_id:N.data.question_id,sources:N.data.sources,timestamp:ci()};i(re=>[...re,ee])}catch(N){console.error("API Error:",N);const ee=((U=(T=N.response)==null?void 0:T.data)==null?void 0:U.detail)||N.message||"无法连接到服务器",re={id:(Date.now()+1).toString(),role:"assistant",content:`**错误**：${ee}。请稍后再试。`,timestamp:ci()};i(xe=>[...xe,re])}finally{c(!1),window.innerWidth>768&&((H=C.current)==null||H.focus())}},S=O=>{O.key==="Enter"&&!O.shiftKey&&(O.preventDefault(),V())},F=async(O,B)=>{const G=r.find(T=>T.id===O);if(G&&(i(T=>T.map(U=>U.id===O?{...U,feedback:B}:U)),G.question_id))try{await he.post("/feedback",{question_id:G.question_id,status:B})}catch(T){console.error("Error sending feedback:",T)}},$=async(O,B)=>{var G,T;try{const U=await he.get(`/download_source/${O}`,{responseType:"blob"}),H=window.URL.createObjectURL(new Blob([U.data])),N=document.createElement("a");N.href=H,N.setAttribute("download",B),document.body.appendChild(N),N.click(),N.remove()}catch(U){alert("下载失败: "+(((T=(G=U.response)==null?void 0:G.data)==null?void 0:T.detail)||U.message))}};return v.jsxs("div",{className:"flex flex-col h-full bg-white text-gray-900 font-sans relative",children:[n&&v.jsxs("div",{className:"h-16 border-b border-gray-100 flex items-center justify-between px-4 md:px-6 bg-white shadow-sm z-10 flex-shrink-0",children:[v.jsxs("div",{className:"flex items-center space-x-3",children:[v.jsx("div",{className:"w-8 h-8 bg-blue-600 rounded-lg flex items-center justify-center text-white font-bold shadow-sm text-xs",children:"综资"}),v.jsx("span",{className:"font-bold text-gray-800 text-lg tracking-tight",children:"Ops Agent"})]}),v.jsxs("div",{className:"flex items-center space-x-2 md:space-x-4",children:[(e==null?void 0:e.role)==="guest"&&v.jsx("span",{className:"px-2 py-1 bg-yellow-100 text-yellow-700 text-xs font-medium rounded-full",children:"临时用户（受限权限）"}),(e==null?void 0:e.role)==="user"&&v.jsx("span",{className:"px-2 py-1 bg-green-100 text-green-700 text-xs font-medium rounded-full",children:"正式用户"}),v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"text-xs text-gray-500 hidden md:inline",children:e.username}),v.jsxs("button",{onClick:t,className:"text-gray-500 hover:text-red-600 transition-colors flex items-center space-x-1 p-1",title:"退出登录",children:[v.jsx(ck,{size:18}),v.jsx("span",{className:"text-sm hidden md:inline",children:"退出"})]})]})]})]}),m&&p&&v.jsx(TB,{imageSrc:p,onConfirm:O=>{o(O),b(!1),y(null)},onCancel:()=>{b(!1),y(null)}}),v.jsx(zB,{imageSrc:x,onClose:()=>k(null)}),v.jsx(Ik,{isOpen:f,onClose:()=>d(!1),onUpload:(O,B)=>{i(B?G=>[...G,{id:Date.now().toString(),role:"assistant",content:`✅ 文件 **${O}** 已上传，等待管理员审批通过后生效。`,timestamp:ci()}]:G=>[...G,{id:Date.now().toString(),role:"assistant",content:`✅ 文件 **${O}** 已成功上传并加入知识库！`,timestamp:ci()}])},userRole:e==null?void 0:e.role}),v.jsx("input",{type:"file",ref:R,onChange:L,accept:"image/*",className:"hidden"}),v.jsx("input",{type:"file",ref:z,onChange:X,accept:".txt,.md,.docx,.pdf,.xlsx,.xls,.csv",className:"hidden"}),v.jsx("div",{className:"flex-1 overflow-y-auto p-4 md:p-8",children:v.jsxs("div",{className:"max-w-3xl mx-auto space-y-6",children:[r.length<=1&&v.jsxs("div",{className:"flex flex-col items-center justify-center h-full text-center space-y-8 mt-20",children:[v.jsx(qo.div,{initial:{opacity:0,y:20},animate:{opacity:1,y:0},className:"bg-blue-50 p-6 rounded-full",children:v.jsx(Ti,{size:48,className:"text-blue-600"})}),v.jsxs("div",{children:[v.jsx("h2",{className:"text-2xl font-bold text-gray-800",children:"我是您的运维智能助手"}),v.jsx("p",{className:"text-gray-500 mt-2",children:"您可以询问故障排查、系统状态或上传截图进行分析"})]}),h.length>0&&v.jsxs("div",{className:"w-full max-w-2xl mt-8",children:[v.jsx("div",{className:"flex items-center justify-center gap-2 mb-4 text-gray-500",children:v.jsx("span",{className:"text-sm font-medium",children:"🔥 热门提问 Top 10"})}),v.jsx("div",{className:"flex flex-wrap justify-center gap-3",children:h.map((O,B)=>v.jsx(qo.button,{initial:{opacity:0,scale:.9},animate:{opacity:1,scale:1},transition:{delay:B*.05},onClick:()=>s(O),className:"px-4 py-2 bg-white border border-gray-200 hover:border-blue-400 hover:text-blue-600 hover:bg-blue-50 rounded-full text-sm text-gray-600 transition-all shadow-sm",children:O},B))})]})]}),r.map(O=>v.jsx(qo.div,{initial:{opacity:0,y:10},animate:{opacity:1,y:0},className:nt("flex w-full mb-6",O.role==="user"?"justify-end":"justify-start"),children:v.jsxs("div",{className:nt("flex max-w-[90%] md:max-w-[80%] gap-4",O.role==="user"?"flex-row-reverse":"flex-row"),children:[v.jsx("div",{className:nt("flex-shrink-0 w-8 h-8 rounded-full flex items-center justify-center mt-1",O.role==="user"?"bg-blue-600 text-white":"bg-white border border-gray-200"),children:O.role==="user"?v.jsx(Ap,{size:18}):v.jsx(bh,{size:18,className:"text-purple-600"})}),v.jsxs("div",{className:nt("flex flex-col space-y-2",O.role==="user"?"items-end":"items-start"),children:[v.jsxs("div",{className:nt("relative px-5 py-3 rounded-2xl text-base leading-relaxed",O.role==="user"?"bg-blue-600 text-white rounded-tr-sm":"bg-transparent text-gray-800 p-0"),children:[O.image&&v.jsx("div",{className:"mb-2",children:v.jsx("img",{src:O.image,alt:"User Upload",className:"max-w-full max-h-64 rounded-lg border border-gray-200/20 cursor-zoom-in hover:opacity-95 transition-opacity",onClick:()=>k(O.image),title:"点击放大查看"})}),O.role==="assistant"?v.jsx("div",{className:"prose prose-slate max-w-none prose-p:my-1 prose-headings:my-2 prose-code:bg-gray-100 prose-code:px-1 prose-code:py-0.5 prose-code:rounded prose-code:before:content-none prose-code:after:content-none prose-pre:bg-gray-50 prose-pre:border prose-pre:border-gray-200 prose-pre:text-gray-800",children:v.jsx(z4,{children:O.content})}):v.jsx("div",{className:"whitespace-pre-wrap",children:O.content}),O.sources&&O.sources.length>0&&v.jsxs("div",{className:"mt-3 pt-2 border-t border-gray-200/50",children:[v.jsxs("div",{className:"text-xs font-semibold text-gray-500 mb-2 flex items-center",children:[v.jsx(ka,{size:12,className:"mr-1"}),"参考文档"]}),v.jsx("div",{className:"flex flex-wrap gap-2",children:O.sources.map((B,G)=>v.jsxs("div",{className:"flex items-center bg-gray-50 text-xs text-gray-600 px-2 py-1.5 rounded-md border border-gray-200 hover:bg-gray-100 transition-colors",children:[v.jsx("span",{className:"max-w-[180px] truncate mr-2",title:B.filename,children:B.filename}),B.id?(e==null?void 0:e.role)!=="guest"&&v.jsx("button",{onClick:()=>$(B.id,B.filename),className:"text-blue-600 hover:text-blue-800 p-0.5 rounded hover:bg-blue-50",title:"下载",children:v.jsx(vi,{size:14})}):v.jsx("span",{className:"text-gray-400 text-[10px]",children:"(未索引ID)"})]},G))})]})]}),O.role==="assistant"&&O.id!=="welcome"&&v.jsxs("div",{className:"flex items-center space-x-3 px-2 pt-1",children:[v.jsx("span",{className:"text-xs text-gray-400",children:"是否解决了您的问题？"}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsxs("button",{onClick:()=>F(O.id,"solved"),className:nt("flex items-center space-x-1 px-2 py-0.5 rounded-full transition-colors text-xs border",O.feedback==="solved"?"bg-green-100 text-green-700 border-green-200":"text-gray-500 hover:bg-gray-100 border-transparent bg-gray-50"),children:[v.jsx(l8,{size:12,className:nt(O.feedback==="solved"&&"fill-current")}),v.jsx("span",{children:"已解决"})]}),v.jsxs("button",{onClick:()=>F(O.id,"unsolved"),className:nt("flex items-center space-x-1 px-2 py-0.5 rounded-full transition-colors text-xs border",O.feedback==="unsolved"?"bg-red-100 text-red-700 border-red-200":"text-gray-500 hover:bg-gray-100 border-transparent bg-gray-50"),children:[v.jsx(a8,{size:12,className:nt(O.feedback==="unsolved"&&"fill-current")}),v.jsx("span",{children:"未解决"})]})]})]})]})]})},O.id)),u&&v.jsx("div",{className:"flex w-full justify-start mb-6",children:v.jsxs("div",{className:"flex max-w-[80%] gap-4",children:[v.jsx("div",{className:"flex-shrink-0 w-8 h-8 rounded-full flex items-center justify-center mt-1 bg-white border border-gray-200",children:v.jsx(bh,{size:18,className:"text-purple-600"})}),v.jsx("div",{className:"flex items-center h-10 px-4 bg-gray-50 rounded-2xl rounded-tl-none border border-gray-100",children:v.jsx("span",{className:"text-sm text-purple-600 font-medium animate-pulse",children:"大模型分析中..."})})]})}),v.jsx("div",{ref:E})]})}),v.jsx("div",{className:"p-4 bg-white border-t border-gray-100",children:v.jsxs("div",{className:"max-w-3xl mx-auto",children:[v.jsxs("div",{className:"bg-gray-100 rounded-[2rem] p-2 shadow-inner border border-gray-200 transition-all",children:[l&&v.jsxs("div",{className:"relative inline-block m-2",children:[v.jsx("img",{src:l,alt:"Preview",className:"h-16 w-16 object-cover rounded-lg border border-gray-300 cursor-zoom-in",onDoubleClick:()=>k(l),title:"双击放大查看"}),v.jsx("button",{onClick:()=>o(null),className:"absolute -top-2 -right-2 bg-gray-500 text-white rounded-full p-0.5 hover:bg-gray-700",children:v.jsx(es,{size:12})})]}),v.jsx("textarea",{ref:C,value:a,onChange:O=>s(O.target.value),onKeyDown:S,onPaste:A,placeholder:"向我提问...",rows:1,className:"w-full bg-transparent border-none focus:ring-0 focus:outline-none resize-none px-4 py-3 text-gray-700 placeholder-gray-400 min-h-[48px] max-h-32 overflow-y-auto",style:{height:a.trim()?"auto":"48px"}}),v.jsxs("div",{className:"flex items-center justify-between px-2 pb-1 pt-1",children:[v.jsxs("div",{className:"flex items-center space-x-1",children:[v.jsx(BB,{icon:H6,label:"图片",onClick:()=>{var O;return(O=R.current)==null?void 0:O.click()},active:!!l}),!1]}),v.jsx("button",{onClick:V,disabled:!a.trim()&&!l||u,className:nt("p-2 rounded-full transition-colors",!a.trim()&&!l||u?"bg-gray-200 text-gray-400 cursor-not-allowed":"bg-black text-white hover:bg-gray-800"),children:v.jsx(J6,{size:18})})]})]}),v.jsxs("div",{className:"text-center mt-2 text-xs text-gray-400 space-y-1",children:[v.jsx("p",{children:"问答将被记录 请勿询问和上传敏感信息"}),v.jsx("p",{children:"AI 生成的内容可能不准确，请核实重要信息。"})]})]})})]})}function BB({icon:e,label:t,onClick:n,active:r}){return v.jsxs("button",{onClick:n,className:nt("p-2 rounded-full hover:bg-gray-200 text-gray-500 transition-colors relative group",r&&"bg-blue-100 text-blue-600"),title:t,children:[v.jsx(e,{size:20,strokeWidth:1.5}),v.jsx("span",{className:"absolute -top-8 left-1/2 transform -translate-x-1/2 bg-gray-800 text-white text-xs py-1 px-2 rounded opacity-0 group-hover:opacity-100 transition-opacity pointer-events-none whitespace-nowrap z-10",children:t})]})}function PB(){const[e,t]=j.useState(JSON.parse(localStorage.getItem("auth"))||null),[n,r]=j.useState("chat"),[i,a]=j.useState(!1),[s,l]=j.useState(window.innerWidth<768),[o,u]=j.useState(!1);j.useEffect(()=>{const d=()=>{l(window.innerWidth<768),window.innerWidth>=768?a(!0):a(!1)};return window.addEventListener("resize",d),d(),()=>window.removeEventListener("resize",d)},[]);const c=()=>{localStorage.removeItem("auth"),t(null)},f=d=>{r(d),s&&a(!1)};return e?v.jsxs("div",{className:"flex h-screen bg-gray-50 overflow-hidden",children:[s&&i&&v.jsx("div",{className:"fixed inset-0 bg-black/50 z-40 animate-in fade-in",onClick:()=>a(!1)}),v.jsx("div",{className:nt("fixed md:relative z-50 h-full transition-transform duration-300 ease-in-out",i?"translate-x-0":"-translate-x-full","md:translate-x-0"),children:v.jsx(MB,{activeView:n,onViewChange:f,userRole:e.role,username:e.username,onLogout:c,onUpload:()=>u(!0)})}),v.jsxs("div",{className:"flex-1 flex flex-col h-full w-full relative bg-white md:bg-gray-50",children:[v.jsxs("div",{className:"md:hidden p-4 bg-white border-b border-gray-200 flex items-center justify-between sticky top-0 z-30",children:[v.jsxs("div",{className:"flex items-center space-x-3",children:[v.jsx("button",{onClick:()=>a(!0),className:"p-2 hover:bg-gray-100 rounded-lg",children:v.jsx(G6,{size:24,className:"text-gray-700"})}),v.jsx("span",{className:"font-bold text-gray-800 text-lg",children:"Ops Agent"})]}),v.jsx("div",{className:"text-xs text-gray-500 bg-gray-100 px-2 py-1 rounded-full",children:e.username})]}),v.jsxs("div",{className:"flex-1 overflow-hidden relative",children:[n==="chat"&&v.jsx(LB,{auth:e,onLogout:c}),n==="training"&&v.jsx(jB,{}),n==="approval"&&v.jsx(DB,{}),n==="global_logs"&&v.jsx(OB,{}),n==="unknown"&&v.jsx(Hk,{userRole:e.role}),n==="learning"&&v.jsx(Fk,{userRole:e.role}),n==="knowledge"&&v.jsx(PL,{auth:e,onUpload:()=>u(!0)}),n==="dashboard"&&v.jsx(NB,{userRole:e.role})]})]}),v.jsx(Ik,{isOpen:o,onClose:()=>u(!1),onUpload:d=>{u(!1)},userRole:e==null?void 0:e.role})]}):v.jsxs(HA,{children:[v.jsx(zd,{path:"/login",element:v.jsx(h8,{setAuth:t})}),v.jsx(zd,{path:"*",element:v.jsx(VA,{to:"/login"})})]})}q_.createRoot(document.getElementById("root")).render(v.jsx(cE.StrictMode,{children:v.jsx(dT,{children:v.jsx(PB,{})})}));
+                                        `,children:L+1}),v.jsxs("div",{className:"flex-1 min-w-0",children:[v.jsx("div",{className:"text-sm font-medium text-gray-700 group-hover:text-blue-600 truncate transition-colors",title:_.filename,children:_.filename}),v.jsxs("div",{className:"text-xs text-gray-400 mt-1 flex items-center",children:[v.jsx(vi,{size:10,className:"mr-1"}),_.download_count," 次下载"]})]})]},_.id))})})]})]}),g&&v.jsx("div",{className:"fixed inset-0 z-50 bg-black/60 backdrop-blur-sm flex items-center justify-center p-2 sm:p-4",children:v.jsxs("div",{className:"bg-white rounded-xl w-full max-w-7xl h-[95vh] flex flex-col shadow-2xl overflow-hidden animate-in fade-in zoom-in duration-200",children:[v.jsxs("div",{className:"p-4 border-b flex justify-between items-center bg-gray-50",children:[v.jsxs("div",{className:"flex items-center space-x-3",children:[v.jsx(ka,{className:"text-blue-600"}),v.jsx("h3",{className:"font-bold text-gray-800 truncate max-w-md",title:g.filename,children:g.filename})]}),v.jsxs("div",{className:"flex items-center space-x-2",children:[(e==null?void 0:e.role)!=="guest"&&v.jsx("button",{onClick:()=>x(g.id,g.filename),className:"p-2 text-gray-500 hover:text-blue-600 hover:bg-blue-50 rounded-lg transition-colors",title:"下载",children:v.jsx(vi,{size:20})}),v.jsx("button",{onClick:C,className:"p-2 text-gray-500 hover:text-red-600 hover:bg-red-50 rounded-lg transition-colors",title:"关闭",children:v.jsx(es,{size:24})})]})]}),v.jsx("div",{className:"flex-1 overflow-hidden relative bg-gray-100",children:v.jsx(z,{doc:g})})]})})]})}function Tk(e){var t,n,r="";if(typeof e=="string"||typeof e=="number")r+=e;else if(typeof e=="object")if(Array.isArray(e)){var i=e.length;for(t=0;t<i;t++)e[t]&&(n=Tk(e[t]))&&(r&&(r+=" "),r+=n)}else for(n in e)e[n]&&(r&&(r+=" "),r+=n);return r}function UL(){for(var e,t,n=0,r="",i=arguments.length;n<i;n++)(e=arguments[n])&&(t=Tk(e))&&(r&&(r+=" "),r+=t);return r}const VL=(e,t)=>{const n=new Array(e.length+t.length);for(let r=0;r<e.length;r++)n[r]=e[r];for(let r=0;r<t.length;r++)n[e.length+r]=t[r];return n},FL=(e,t)=>({classGroupId:e,validator:t}),Nk=(e=new Map,t=null,n)=>({nextPart:e,validators:t,classGroupId:n}),Du="-",Xb=[],HL="arbitrary..",IL=e=>{const t=GL(e),{conflictingClassGroups:n,conflictingClassGroupModifiers:r}=e;return{getClassGroupId:s=>{if(s.startsWith("[")&&s.endsWith("]"))return qL(s);const l=s.split(Du),o=l[0]===""&&l.length>1?1:0;return Rk(l,o,t)},getConflictingClassGroupIds:(s,l)=>{if(l){const o=r[s],u=n[s];return o?u?VL(u,o):o:u||Xb}return n[s]||Xb}}},Rk=(e,t,n)=>{if(e.length-t===0)return n.classGroupId;const i=e[t],a=n.nextPart.get(i);if(a){const u=Rk(e,t+1,a);if(u)return u}const s=n.validators;if(s===null)return;const l=t===0?e.join(Du):e.slice(t).join(Du),o=s.length;for(let u=0;u<o;u++){const c=s[u];if(c.validator(l))return c.classGroupId}},qL=e=>e.slice(1,-1).indexOf(":")===-1?void 0:(()=>{const t=e.slice(1,-1),n=t.indexOf(":"),r=t.slice(0,n);return r?HL+r:void 0})(),GL=e=>{const{theme:t,classGroups:n}=e;return $L(n,t)},$L=(e,t)=>{const n=Nk();for(const r in e){const i=e[r];Mp(i,n,r,t)}return n},Mp=(e,t,n,r)=>{const i=e.length;for(let a=0;a<i;a++){const s=e[a];YL(s,t,n,r)}},YL=(e,t,n,r)=>{if(typeof e=="string"){XL(e,t,n);return}if(typeof e=="function"){ZL(e,t,n,r);return}KL(e,t,n,r)},XL=(e,t,n)=>{const r=e===""?t:Mk(t,e);r.classGroupId=n},ZL=(e,t,n,r)=>{if(QL(e)){Mp(e(r),t,n,r);return}t.validators===null&&(t.validators=[]),t.validators.push(FL(n,e))},KL=(e,t,n,r)=>{const i=Object.entries(e),a=i.length;for(let s=0;s<a;s++){const[l,o]=i[s];Mp(o,Mk(t,l),n,r)}},Mk=(e,t)=>{let n=e;const r=t.split(Du),i=r.length;for(let a=0;a<i;a++){const s=r[a];let l=n.nextPart.get(s);l||(l=Nk(),n.nextPart.set(s,l)),n=l}return n},QL=e=>"isThemeGetter"in e&&e.isThemeGetter===!0,WL=e=>{if(e<1)return{get:()=>{},set:()=>{}};let t=0,n=Object.create(null),r=Object.create(null);const i=(a,s)=>{n[a]=s,t++,t>e&&(t=0,r=n,n=Object.create(null))};return{get(a){let s=n[a];if(s!==void 0)return s;if((s=r[a])!==void 0)return i(a,s),s},set(a,s){a in n?n[a]=s:i(a,s)}}},wh="!",Zb=":",JL=[],Kb=(e,t,n,r,i)=>({modifiers:e,hasImportantModifier:t,baseClassName:n,maybePostfixModifierPosition:r,isExternal:i}),eB=e=>{const{prefix:t,experimentalParseClassName:n}=e;let r=i=>{const a=[];let s=0,l=0,o=0,u;const c=i.length;for(let m=0;m<c;m++){const b=i[m];if(s===0&&l===0){if(b===Zb){a.push(i.slice(o,m)),o=m+1;continue}if(b==="/"){u=m;continue}}b==="["?s++:b==="]"?s--:b==="("?l++:b===")"&&l--}const f=a.length===0?i:i.slice(o);let d=f,h=!1;f.endsWith(wh)?(d=f.slice(0,-1),h=!0):f.startsWith(wh)&&(d=f.slice(1),h=!0);const g=u&&u>o?u-o:void 0;return Kb(a,h,d,g)};if(t){const i=t+Zb,a=r;r=s=>s.startsWith(i)?a(s.slice(i.length)):Kb(JL,!1,s,void 0,!0)}if(n){const i=r;r=a=>n({className:a,parseClassName:i})}return r},tB=e=>{const t=new Map;return e.orderSensitiveModifiers.forEach((n,r)=>{t.set(n,1e6+r)}),n=>{const r=[];let i=[];for(let a=0;a<n.length;a++){const s=n[a],l=s[0]==="[",o=t.has(s);l||o?(i.length>0&&(i.sort(),r.push(...i),i=[]),r.push(s)):i.push(s)}return i.length>0&&(i.sort(),r.push(...i)),r}},nB=e=>({cache:WL(e.cacheSize),parseClassName:eB(e),sortModifiers:tB(e),...IL(e)}),rB=/\s+/,iB=(e,t)=>{const{parseClassName:n,getClassGroupId:r,getConflictingClassGroupIds:i,sortModifiers:a}=t,s=[],l=e.trim().split(rB);let o="";for(let u=l.length-1;u>=0;u-=1){const c=l[u],{isExternal:f,modifiers:d,hasImportantModifier:h,baseClassName:g,maybePostfixModifierPosition:m}=n(c);if(f){o=c+(o.length>0?" "+o:o);continue}let b=!!m,p=r(b?g.substring(0,m):g);if(!p){if(!b){o=c+(o.length>0?" "+o:o);continue}if(p=r(g),!p){o=c+(o.length>0?" "+o:o);continue}b=!1}const y=d.length===0?"":d.length===1?d[0]:a(d).join(":"),x=h?y+wh:y,k=x+p;if(s.indexOf(k)>-1)continue;s.push(k);const E=i(p,b);for(let C=0;C<E.length;++C){const R=E[C];s.push(x+R)}o=c+(o.length>0?" "+o:o)}return o},aB=(...e)=>{let t=0,n,r,i="";for(;t<e.length;)(n=e[t++])&&(r=jk(n))&&(i&&(i+=" "),i+=r);return i},jk=e=>{if(typeof e=="string")return e;let t,n="";for(let r=0;r<e.length;r++)e[r]&&(t=jk(e[r]))&&(n&&(n+=" "),n+=t);return n},sB=(e,...t)=>{let n,r,i,a;const s=o=>{const u=t.reduce((c,f)=>f(c),e());return n=nB(u),r=n.cache.get,i=n.cache.set,a=l,l(o)},l=o=>{const u=r(o);if(u)return u;const c=iB(o,n);return i(o,c),c};return a=s,(...o)=>a(aB(...o))},lB=[],bt=e=>{const t=n=>n[e]||lB;return t.isThemeGetter=!0,t},zk=/^\[(?:(\w[\w-]*):)?(.+)\]$/i,Dk=/^\((?:(\w[\w-]*):)?(.+)\)$/i,oB=/^\d+\/\d+$/,uB=/^(\d+(\.\d+)?)?(xs|sm|md|lg|xl)$/,cB=/\d+(%|px|r?em|[sdl]?v([hwib]|min|max)|pt|pc|in|cm|mm|cap|ch|ex|r?lh|cq(w|h|i|b|min|max))|\b(calc|min|max|clamp)\(.+\)|^0$/,fB=/^(rgba?|hsla?|hwb|(ok)?(lab|lch)|color-mix)\(.+\)$/,dB=/^(inset_)?-?((\d+)?\.?(\d+)[a-z]+|0)_-?((\d+)?\.?(\d+)[a-z]+|0)/,hB=/^(url|image|image-set|cross-fade|element|(repeating-)?(linear|radial|conic)-gradient)\(.+\)$/,Gi=e=>oB.test(e),Ce=e=>!!e&&!Number.isNaN(Number(e)),Cr=e=>!!e&&Number.isInteger(Number(e)),Df=e=>e.endsWith("%")&&Ce(e.slice(0,-1)),rr=e=>uB.test(e),mB=()=>!0,pB=e=>cB.test(e)&&!fB.test(e),Ok=()=>!1,gB=e=>dB.test(e),yB=e=>hB.test(e),bB=e=>!ce(e)&&!fe(e),xB=e=>ts(e,Pk,Ok),ce=e=>zk.test(e),ui=e=>ts(e,Uk,pB),Of=e=>ts(e,EB,Ce),Qb=e=>ts(e,Lk,Ok),vB=e=>ts(e,Bk,yB),go=e=>ts(e,Vk,gB),fe=e=>Dk.test(e),bs=e=>ns(e,Uk),wB=e=>ns(e,CB),Wb=e=>ns(e,Lk),SB=e=>ns(e,Pk),kB=e=>ns(e,Bk),yo=e=>ns(e,Vk,!0),ts=(e,t,n)=>{const r=zk.exec(e);return r?r[1]?t(r[1]):n(r[2]):!1},ns=(e,t,n=!1)=>{const r=Dk.exec(e);return r?r[1]?t(r[1]):n:!1},Lk=e=>e==="position"||e==="percentage",Bk=e=>e==="image"||e==="url",Pk=e=>e==="length"||e==="size"||e==="bg-size",Uk=e=>e==="length",EB=e=>e==="number",CB=e=>e==="family-name",Vk=e=>e==="shadow",_B=()=>{const e=bt("color"),t=bt("font"),n=bt("text"),r=bt("font-weight"),i=bt("tracking"),a=bt("leading"),s=bt("breakpoint"),l=bt("container"),o=bt("spacing"),u=bt("radius"),c=bt("shadow"),f=bt("inset-shadow"),d=bt("text-shadow"),h=bt("drop-shadow"),g=bt("blur"),m=bt("perspective"),b=bt("aspect"),p=bt("ease"),y=bt("animate"),x=()=>["auto","avoid","all","avoid-page","page","left","right","column"],k=()=>["center","top","bottom","left","right","top-left","left-top","top-right","right-top","bottom-right","right-bottom","bottom-left","left-bottom"],E=()=>[...k(),fe,ce],C=()=>["auto","hidden","clip","visible","scroll"],R=()=>["auto","contain","none"],z=()=>[fe,ce,o],_=()=>[Gi,"full","auto",...z()],L=()=>[Cr,"none","subgrid",fe,ce],X=()=>["auto",{span:["full",Cr,fe,ce]},Cr,fe,ce],A=()=>[Cr,"auto",fe,ce],V=()=>["auto","min","max","fr",fe,ce],S=()=>["start","end","center","between","around","evenly","stretch","baseline","center-safe","end-safe"],F=()=>["start","end","center","stretch","center-safe","end-safe"],$=()=>["auto",...z()],O=()=>[Gi,"auto","full","dvw","dvh","lvw","lvh","svw","svh","min","max","fit",...z()],B=()=>[e,fe,ce],G=()=>[...k(),Wb,Qb,{position:[fe,ce]}],T=()=>["no-repeat",{repeat:["","x","y","space","round"]}],U=()=>["auto","cover","contain",SB,xB,{size:[fe,ce]}],H=()=>[Df,bs,ui],N=()=>["","none","full",u,fe,ce],ee=()=>["",Ce,bs,ui],re=()=>["solid","dashed","dotted","double"],xe=()=>["normal","multiply","screen","overlay","darken","lighten","color-dodge","color-burn","hard-light","soft-light","difference","exclusion","hue","saturation","color","luminosity"],ke=()=>[Ce,Df,Wb,Qb],be=()=>["","none",g,fe,ce],we=()=>["none",Ce,fe,ce],Be=()=>["none",Ce,fe,ce],Pe=()=>[Ce,fe,ce],Ct=()=>[Gi,"full",...z()];return{cacheSize:500,theme:{animate:["spin","ping","pulse","bounce"],aspect:["video"],blur:[rr],breakpoint:[rr],color:[mB],container:[rr],"drop-shadow":[rr],ease:["in","out","in-out"],font:[bB],"font-weight":["thin","extralight","light","normal","medium","semibold","bold","extrabold","black"],"inset-shadow":[rr],leading:["none","tight","snug","normal","relaxed","loose"],perspective:["dramatic","near","normal","midrange","distant","none"],radius:[rr],shadow:[rr],spacing:["px",Ce],text:[rr],"text-shadow":[rr],tracking:["tighter","tight","normal","wide","wider","widest"]},classGroups:{aspect:[{aspect:["auto","square",Gi,ce,fe,b]}],container:["container"],columns:[{columns:[Ce,ce,fe,l]}],"break-after":[{"break-after":x()}],"break-before":[{"break-before":x()}],"break-inside":[{"break-inside":["auto","avoid","avoid-page","avoid-column"]}],"box-decoration":[{"box-decoration":["slice","clone"]}],box:[{box:["border","content"]}],display:["block","inline-block","inline","flex","inline-flex","table","inline-table","table-caption","table-cell","table-column","table-column-group","table-footer-group","table-header-group","table-row-group","table-row","flow-root","grid","inline-grid","contents","list-item","hidden"],sr:["sr-only","not-sr-only"],float:[{float:["right","left","none","start","end"]}],clear:[{clear:["left","right","both","none","start","end"]}],isolation:["isolate","isolation-auto"],"object-fit":[{object:["contain","cover","fill","none","scale-down"]}],"object-position":[{object:E()}],overflow:[{overflow:C()}],"overflow-x":[{"overflow-x":C()}],"overflow-y":[{"overflow-y":C()}],overscroll:[{overscroll:R()}],"overscroll-x":[{"overscroll-x":R()}],"overscroll-y":[{"overscroll-y":R()}],position:["static","fixed","absolute","relative","sticky"],inset:[{inset:_()}],"inset-x":[{"inset-x":_()}],"inset-y":[{"inset-y":_()}],start:[{start:_()}],end:[{end:_()}],top:[{top:_()}],right:[{right:_()}],bottom:[{bottom:_()}],left:[{left:_()}],visibility:["visible","invisible","collapse"],z:[{z:[Cr,"auto",fe,ce]}],basis:[{basis:[Gi,"full","auto",l,...z()]}],"flex-direction":[{flex:["row","row-reverse","col","col-reverse"]}],"flex-wrap":[{flex:["nowrap","wrap","wrap-reverse"]}],flex:[{flex:[Ce,Gi,"auto","initial","none",ce]}],grow:[{grow:["",Ce,fe,ce]}],shrink:[{shrink:["",Ce,fe,ce]}],order:[{order:[Cr,"first","last","none",fe,ce]}],"grid-cols":[{"grid-cols":L()}],"col-start-end":[{col:X()}],"col-start":[{"col-start":A()}],"col-end":[{"col-end":A()}],"grid-rows":[{"grid-rows":L()}],"row-start-end":[{row:X()}],"row-start":[{"row-start":A()}],"row-end":[{"row-end":A()}],"grid-flow":[{"grid-flow":["row","col","dense","row-dense","col-dense"]}],"auto-cols":[{"auto-cols":V()}],"auto-rows":[{"auto-rows":V()}],gap:[{gap:z()}],"gap-x":[{"gap-x":z()}],"gap-y":[{"gap-y":z()}],"justify-content":[{justify:[...S(),"normal"]}],"justify-items":[{"justify-items":[...F(),"normal"]}],"justify-self":[{"justify-self":["auto",...F()]}],"align-content":[{content:["normal",...S()]}],"align-items":[{items:[...F(),{baseline:["","last"]}]}],"align-self":[{self:["auto",...F(),{baseline:["","last"]}]}],"place-content":[{"place-content":S()}],"place-items":[{"place-items":[...F(),"baseline"]}],"place-self":[{"place-self":["auto",...F()]}],p:[{p:z()}],px:[{px:z()}],py:[{py:z()}],ps:[{ps:z()}],pe:[{pe:z()}],pt:[{pt:z()}],pr:[{pr:z()}],pb:[{pb:z()}],pl:[{pl:z()}],m:[{m:$()}],mx:[{mx:$()}],my:[{my:$()}],ms:[{ms:$()}],me:[{me:$()}],mt:[{mt:$()}],mr:[{mr:$()}],mb:[{mb:$()}],ml:[{ml:$()}],"space-x":[{"space-x":z()}],"space-x-reverse":["space-x-reverse"],"space-y":[{"space-y":z()}],"space-y-reverse":["space-y-reverse"],size:[{size:O()}],w:[{w:[l,"screen",...O()]}],"min-w":[{"min-w":[l,"screen","none",...O()]}],"max-w":[{"max-w":[l,"screen","none","prose",{screen:[s]},...O()]}],h:[{h:["screen","lh",...O()]}],"min-h":[{"min-h":["screen","lh","none",...O()]}],"max-h":[{"max-h":["screen","lh",...O()]}],"font-size":[{text:["base",n,bs,ui]}],"font-smoothing":["antialiased","subpixel-antialiased"],"font-style":["italic","not-italic"],"font-weight":[{font:[r,fe,Of]}],"font-stretch":[{"font-stretch":["ultra-condensed","extra-condensed","condensed","semi-condensed","normal","semi-expanded","expanded","extra-expanded","ultra-expanded",Df,ce]}],"font-family":[{font:[wB,ce,t]}],"fvn-normal":["normal-nums"],"fvn-ordinal":["ordinal"],"fvn-slashed-zero":["slashed-zero"],"fvn-figure":["lining-nums","oldstyle-nums"],"fvn-spacing":["proportional-nums","tabular-nums"],"fvn-fraction":["diagonal-fractions","stacked-fractions"],tracking:[{tracking:[i,fe,ce]}],"line-clamp":[{"line-clamp":[Ce,"none",fe,Of]}],leading:[{leading:[a,...z()]}],"list-image":[{"list-image":["none",fe,ce]}],"list-style-position":[{list:["inside","outside"]}],"list-style-type":[{list:["disc","decimal","none",fe,ce]}],"text-alignment":[{text:["left","center","right","justify","start","end"]}],"placeholder-color":[{placeholder:B()}],"text-color":[{text:B()}],"text-decoration":["underline","overline","line-through","no-underline"],"text-decoration-style":[{decoration:[...re(),"wavy"]}],"text-decoration-thickness":[{decoration:[Ce,"from-font","auto",fe,ui]}],"text-decoration-color":[{decoration:B()}],"underline-offset":[{"underline-offset":[Ce,"auto",fe,ce]}],"text-transform":["uppercase","lowercase","capitalize","normal-case"],"text-overflow":["truncate","text-ellipsis","text-clip"],"text-wrap":[{text:["wrap","nowrap","balance","pretty"]}],indent:[{indent:z()}],"vertical-align":[{align:["baseline","top","middle","bottom","text-top","text-bottom","sub","super",fe,ce]}],whitespace:[{whitespace:["normal","nowrap","pre","pre-line","pre-wrap","break-spaces"]}],break:[{break:["normal","words","all","keep"]}],wrap:[{wrap:["break-word","anywhere","normal"]}],hyphens:[{hyphens:["none","manual","auto"]}],content:[{content:["none",fe,ce]}],"bg-attachment":[{bg:["fixed","local","scroll"]}],"bg-clip":[{"bg-clip":["border","padding","content","text"]}],"bg-origin":[{"bg-origin":["border","padding","content"]}],"bg-position":[{bg:G()}],"bg-repeat":[{bg:T()}],"bg-size":[{bg:U()}],"bg-image":[{bg:["none",{linear:[{to:["t","tr","r","br","b","bl","l","tl"]},Cr,fe,ce],radial:["",fe,ce],conic:[Cr,fe,ce]},kB,vB]}],"bg-color":[{bg:B()}],"gradient-from-pos":[{from:H()}],"gradient-via-pos":[{via:H()}],"gradient-to-pos":[{to:H()}],"gradient-from":[{from:B()}],"gradient-via":[{via:B()}],"gradient-to":[{to:B()}],rounded:[{rounded:N()}],"rounded-s":[{"rounded-s":N()}],"rounded-e":[{"rounded-e":N()}],"rounded-t":[{"rounded-t":N()}],"rounded-r":[{"rounded-r":N()}],"rounded-b":[{"rounded-b":N()}],"rounded-l":[{"rounded-l":N()}],"rounded-ss":[{"rounded-ss":N()}],"rounded-se":[{"rounded-se":N()}],"rounded-ee":[{"rounded-ee":N()}],"rounded-es":[{"rounded-es":N()}],"rounded-tl":[{"rounded-tl":N()}],"rounded-tr":[{"rounded-tr":N()}],"rounded-br":[{"rounded-br":N()}],"rounded-bl":[{"rounded-bl":N()}],"border-w":[{border:ee()}],"border-w-x":[{"border-x":ee()}],"border-w-y":[{"border-y":ee()}],"border-w-s":[{"border-s":ee()}],"border-w-e":[{"border-e":ee()}],"border-w-t":[{"border-t":ee()}],"border-w-r":[{"border-r":ee()}],"border-w-b":[{"border-b":ee()}],"border-w-l":[{"border-l":ee()}],"divide-x":[{"divide-x":ee()}],"divide-x-reverse":["divide-x-reverse"],"divide-y":[{"divide-y":ee()}],"divide-y-reverse":["divide-y-reverse"],"border-style":[{border:[...re(),"hidden","none"]}],"divide-style":[{divide:[...re(),"hidden","none"]}],"border-color":[{border:B()}],"border-color-x":[{"border-x":B()}],"border-color-y":[{"border-y":B()}],"border-color-s":[{"border-s":B()}],"border-color-e":[{"border-e":B()}],"border-color-t":[{"border-t":B()}],"border-color-r":[{"border-r":B()}],"border-color-b":[{"border-b":B()}],"border-color-l":[{"border-l":B()}],"divide-color":[{divide:B()}],"outline-style":[{outline:[...re(),"none","hidden"]}],"outline-offset":[{"outline-offset":[Ce,fe,ce]}],"outline-w":[{outline:["",Ce,bs,ui]}],"outline-color":[{outline:B()}],shadow:[{shadow:["","none",c,yo,go]}],"shadow-color":[{shadow:B()}],"inset-shadow":[{"inset-shadow":["none",f,yo,go]}],"inset-shadow-color":[{"inset-shadow":B()}],"ring-w":[{ring:ee()}],"ring-w-inset":["ring-inset"],"ring-color":[{ring:B()}],"ring-offset-w":[{"ring-offset":[Ce,ui]}],"ring-offset-color":[{"ring-offset":B()}],"inset-ring-w":[{"inset-ring":ee()}],"inset-ring-color":[{"inset-ring":B()}],"text-shadow":[{"text-shadow":["none",d,yo,go]}],"text-shadow-color":[{"text-shadow":B()}],opacity:[{opacity:[Ce,fe,ce]}],"mix-blend":[{"mix-blend":[...xe(),"plus-darker","plus-lighter"]}],"bg-blend":[{"bg-blend":xe()}],"mask-clip":[{"mask-clip":["border","padding","content","fill","stroke","view"]},"mask-no-clip"],"mask-composite":[{mask:["add","subtract","intersect","exclude"]}],"mask-image-linear-pos":[{"mask-linear":[Ce]}],"mask-image-linear-from-pos":[{"mask-linear-from":ke()}],"mask-image-linear-to-pos":[{"mask-linear-to":ke()}],"mask-image-linear-from-color":[{"mask-linear-from":B()}],"mask-image-linear-to-color":[{"mask-linear-to":B()}],"mask-image-t-from-pos":[{"mask-t-from":ke()}],"mask-image-t-to-pos":[{"mask-t-to":ke()}],"mask-image-t-from-color":[{"mask-t-from":B()}],"mask-image-t-to-color":[{"mask-t-to":B()}],"mask-image-r-from-pos":[{"mask-r-from":ke()}],"mask-image-r-to-pos":[{"mask-r-to":ke()}],"mask-image-r-from-color":[{"mask-r-from":B()}],"mask-image-r-to-color":[{"mask-r-to":B()}],"mask-image-b-from-pos":[{"mask-b-from":ke()}],"mask-image-b-to-pos":[{"mask-b-to":ke()}],"mask-image-b-from-color":[{"mask-b-from":B()}],"mask-image-b-to-color":[{"mask-b-to":B()}],"mask-image-l-from-pos":[{"mask-l-from":ke()}],"mask-image-l-to-pos":[{"mask-l-to":ke()}],"mask-image-l-from-color":[{"mask-l-from":B()}],"mask-image-l-to-color":[{"mask-l-to":B()}],"mask-image-x-from-pos":[{"mask-x-from":ke()}],"mask-image-x-to-pos":[{"mask-x-to":ke()}],"mask-image-x-from-color":[{"mask-x-from":B()}],"mask-image-x-to-color":[{"mask-x-to":B()}],"mask-image-y-from-pos":[{"mask-y-from":ke()}],"mask-image-y-to-pos":[{"mask-y-to":ke()}],"mask-image-y-from-color":[{"mask-y-from":B()}],"mask-image-y-to-color":[{"mask-y-to":B()}],"mask-image-radial":[{"mask-radial":[fe,ce]}],"mask-image-radial-from-pos":[{"mask-radial-from":ke()}],"mask-image-radial-to-pos":[{"mask-radial-to":ke()}],"mask-image-radial-from-color":[{"mask-radial-from":B()}],"mask-image-radial-to-color":[{"mask-radial-to":B()}],"mask-image-radial-shape":[{"mask-radial":["circle","ellipse"]}],"mask-image-radial-size":[{"mask-radial":[{closest:["side","corner"],farthest:["side","corner"]}]}],"mask-image-radial-pos":[{"mask-radial-at":k()}],"mask-image-conic-pos":[{"mask-conic":[Ce]}],"mask-image-conic-from-pos":[{"mask-conic-from":ke()}],"mask-image-conic-to-pos":[{"mask-conic-to":ke()}],"mask-image-conic-from-color":[{"mask-conic-from":B()}],"mask-image-conic-to-color":[{"mask-conic-to":B()}],"mask-mode":[{mask:["alpha","luminance","match"]}],"mask-origin":[{"mask-origin":["border","padding","content","fill","stroke","view"]}],"mask-position":[{mask:G()}],"mask-repeat":[{mask:T()}],"mask-size":[{mask:U()}],"mask-type":[{"mask-type":["alpha","luminance"]}],"mask-image":[{mask:["none",fe,ce]}],filter:[{filter:["","none",fe,ce]}],blur:[{blur:be()}],brightness:[{brightness:[Ce,fe,ce]}],contrast:[{contrast:[Ce,fe,ce]}],"drop-shadow":[{"drop-shadow":["","none",h,yo,go]}],"drop-shadow-color":[{"drop-shadow":B()}],grayscale:[{grayscale:["",Ce,fe,ce]}],"hue-rotate":[{"hue-rotate":[Ce,fe,ce]}],invert:[{invert:["",Ce,fe,ce]}],saturate:[{saturate:[Ce,fe,ce]}],sepia:[{sepia:["",Ce,fe,ce]}],"backdrop-filter":[{"backdrop-filter":["","none",fe,ce]}],"backdrop-blur":[{"backdrop-blur":be()}],"backdrop-brightness":[{"backdrop-brightness":[Ce,fe,ce]}],"backdrop-contrast":[{"backdrop-contrast":[Ce,fe,ce]}],"backdrop-grayscale":[{"backdrop-grayscale":["",Ce,fe,ce]}],"backdrop-hue-rotate":[{"backdrop-hue-rotate":[Ce,fe,ce]}],"backdrop-invert":[{"backdrop-invert":["",Ce,fe,ce]}],"backdrop-opacity":[{"backdrop-opacity":[Ce,fe,ce]}],"backdrop-saturate":[{"backdrop-saturate":[Ce,fe,ce]}],"backdrop-sepia":[{"backdrop-sepia":["",Ce,fe,ce]}],"border-collapse":[{border:["collapse","separate"]}],"border-spacing":[{"border-spacing":z()}],"border-spacing-x":[{"border-spacing-x":z()}],"border-spacing-y":[{"border-spacing-y":z()}],"table-layout":[{table:["auto","fixed"]}],caption:[{caption:["top","bottom"]}],transition:[{transition:["","all","colors","opacity","shadow","transform","none",fe,ce]}],"transition-behavior":[{transition:["normal","discrete"]}],duration:[{duration:[Ce,"initial",fe,ce]}],ease:[{ease:["linear","initial",p,fe,ce]}],delay:[{delay:[Ce,fe,ce]}],animate:[{animate:["none",y,fe,ce]}],backface:[{backface:["hidden","visible"]}],perspective:[{perspective:[m,fe,ce]}],"perspective-origin":[{"perspective-origin":E()}],rotate:[{rotate:we()}],"rotate-x":[{"rotate-x":we()}],"rotate-y":[{"rotate-y":we()}],"rotate-z":[{"rotate-z":we()}],scale:[{scale:Be()}],"scale-x":[{"scale-x":Be()}],"scale-y":[{"scale-y":Be()}],"scale-z":[{"scale-z":Be()}],"scale-3d":["scale-3d"],skew:[{skew:Pe()}],"skew-x":[{"skew-x":Pe()}],"skew-y":[{"skew-y":Pe()}],transform:[{transform:[fe,ce,"","none","gpu","cpu"]}],"transform-origin":[{origin:E()}],"transform-style":[{transform:["3d","flat"]}],translate:[{translate:Ct()}],"translate-x":[{"translate-x":Ct()}],"translate-y":[{"translate-y":Ct()}],"translate-z":[{"translate-z":Ct()}],"translate-none":["translate-none"],accent:[{accent:B()}],appearance:[{appearance:["none","auto"]}],"caret-color":[{caret:B()}],"color-scheme":[{scheme:["normal","dark","light","light-dark","only-dark","only-light"]}],cursor:[{cursor:["auto","default","pointer","wait","text","move","help","not-allowed","none","context-menu","progress","cell","crosshair","vertical-text","alias","copy","no-drop","grab","grabbing","all-scroll","col-resize","row-resize","n-resize","e-resize","s-resize","w-resize","ne-resize","nw-resize","se-resize","sw-resize","ew-resize","ns-resize","nesw-resize","nwse-resize","zoom-in","zoom-out",fe,ce]}],"field-sizing":[{"field-sizing":["fixed","content"]}],"pointer-events":[{"pointer-events":["auto","none"]}],resize:[{resize:["none","","y","x"]}],"scroll-behavior":[{scroll:["auto","smooth"]}],"scroll-m":[{"scroll-m":z()}],"scroll-mx":[{"scroll-mx":z()}],"scroll-my":[{"scroll-my":z()}],"scroll-ms":[{"scroll-ms":z()}],"scroll-me":[{"scroll-me":z()}],"scroll-mt":[{"scroll-mt":z()}],"scroll-mr":[{"scroll-mr":z()}],"scroll-mb":[{"scroll-mb":z()}],"scroll-ml":[{"scroll-ml":z()}],"scroll-p":[{"scroll-p":z()}],"scroll-px":[{"scroll-px":z()}],"scroll-py":[{"scroll-py":z()}],"scroll-ps":[{"scroll-ps":z()}],"scroll-pe":[{"scroll-pe":z()}],"scroll-pt":[{"scroll-pt":z()}],"scroll-pr":[{"scroll-pr":z()}],"scroll-pb":[{"scroll-pb":z()}],"scroll-pl":[{"scroll-pl":z()}],"snap-align":[{snap:["start","end","center","align-none"]}],"snap-stop":[{snap:["normal","always"]}],"snap-type":[{snap:["none","x","y","both"]}],"snap-strictness":[{snap:["mandatory","proximity"]}],touch:[{touch:["auto","none","manipulation"]}],"touch-x":[{"touch-pan":["x","left","right"]}],"touch-y":[{"touch-pan":["y","up","down"]}],"touch-pz":["touch-pinch-zoom"],select:[{select:["none","text","all","auto"]}],"will-change":[{"will-change":["auto","scroll","contents","transform",fe,ce]}],fill:[{fill:["none",...B()]}],"stroke-w":[{stroke:[Ce,bs,ui,Of]}],stroke:[{stroke:["none",...B()]}],"forced-color-adjust":[{"forced-color-adjust":["auto","none"]}]},conflictingClassGroups:{overflow:["overflow-x","overflow-y"],overscroll:["overscroll-x","overscroll-y"],inset:["inset-x","inset-y","start","end","top","right","bottom","left"],"inset-x":["right","left"],"inset-y":["top","bottom"],flex:["basis","grow","shrink"],gap:["gap-x","gap-y"],p:["px","py","ps","pe","pt","pr","pb","pl"],px:["pr","pl"],py:["pt","pb"],m:["mx","my","ms","me","mt","mr","mb","ml"],mx:["mr","ml"],my:["mt","mb"],size:["w","h"],"font-size":["leading"],"fvn-normal":["fvn-ordinal","fvn-slashed-zero","fvn-figure","fvn-spacing","fvn-fraction"],"fvn-ordinal":["fvn-normal"],"fvn-slashed-zero":["fvn-normal"],"fvn-figure":["fvn-normal"],"fvn-spacing":["fvn-normal"],"fvn-fraction":["fvn-normal"],"line-clamp":["display","overflow"],rounded:["rounded-s","rounded-e","rounded-t","rounded-r","rounded-b","rounded-l","rounded-ss","rounded-se","rounded-ee","rounded-es","rounded-tl","rounded-tr","rounded-br","rounded-bl"],"rounded-s":["rounded-ss","rounded-es"],"rounded-e":["rounded-se","rounded-ee"],"rounded-t":["rounded-tl","rounded-tr"],"rounded-r":["rounded-tr","rounded-br"],"rounded-b":["rounded-br","rounded-bl"],"rounded-l":["rounded-tl","rounded-bl"],"border-spacing":["border-spacing-x","border-spacing-y"],"border-w":["border-w-x","border-w-y","border-w-s","border-w-e","border-w-t","border-w-r","border-w-b","border-w-l"],"border-w-x":["border-w-r","border-w-l"],"border-w-y":["border-w-t","border-w-b"],"border-color":["border-color-x","border-color-y","border-color-s","border-color-e","border-color-t","border-color-r","border-color-b","border-color-l"],"border-color-x":["border-color-r","border-color-l"],"border-color-y":["border-color-t","border-color-b"],translate:["translate-x","translate-y","translate-none"],"translate-none":["translate","translate-x","translate-y","translate-z"],"scroll-m":["scroll-mx","scroll-my","scroll-ms","scroll-me","scroll-mt","scroll-mr","scroll-mb","scroll-ml"],"scroll-mx":["scroll-mr","scroll-ml"],"scroll-my":["scroll-mt","scroll-mb"],"scroll-p":["scroll-px","scroll-py","scroll-ps","scroll-pe","scroll-pt","scroll-pr","scroll-pb","scroll-pl"],"scroll-px":["scroll-pr","scroll-pl"],"scroll-py":["scroll-pt","scroll-pb"],touch:["touch-x","touch-y","touch-pz"],"touch-x":["touch"],"touch-y":["touch"],"touch-pz":["touch"]},conflictingClassGroupModifiers:{"font-size":["leading"]},orderSensitiveModifiers:["*","**","after","backdrop","before","details-content","file","first-letter","first-line","marker","placeholder","selection"]}},AB=sB(_B);function nt(...e){return AB(UL(e))}he.interceptors.request.use(e=>{const t=JSON.parse(localStorage.getItem("auth"));return t!=null&&t.token&&(e.headers.Authorization=`Bearer ${t.token}`),e},e=>Promise.reject(e));function TB({imageSrc:e,onConfirm:t,onCancel:n}){const[r,i]=j.useState(null),[a,s]=j.useState(!1),[l,o]=j.useState({x:0,y:0}),u=j.useRef(null),c=j.useRef(null),f=b=>{const{left:p,top:y}=c.current.getBoundingClientRect();return{x:b.clientX-p,y:b.clientY-y}},d=b=>{b.preventDefault();const p=f(b);s(!0),o(p),i({x:p.x,y:p.y,width:0,height:0})},h=b=>{if(!a)return;const p=f(b),y=Math.min(p.x,l.x),x=Math.min(p.y,l.y),k=Math.abs(p.x-l.x),E=Math.abs(p.y-l.y);i({x:y,y:x,width:k,height:E})},g=()=>{s(!1)},m=()=>{if(!r||r.width===0||r.height===0){t(e);return}const b=document.createElement("canvas"),p=u.current,y=p.naturalWidth/p.width,x=p.naturalHeight/p.height;b.width=r.width*y,b.height=r.height*x,b.getContext("2d").drawImage(p,r.x*y,r.y*x,r.width*y,r.height*x,0,0,b.width,b.height),t(b.toDataURL("image/png"))};return v.jsxs("div",{className:"fixed inset-0 z-[100] bg-black/90 flex flex-col items-center justify-center select-none animate-in fade-in duration-200",children:[v.jsx("div",{className:"relative mb-4",children:v.jsxs("div",{ref:c,className:"relative cursor-crosshair overflow-hidden border border-gray-700 shadow-2xl",onMouseDown:d,onMouseMove:h,onMouseUp:g,onMouseLeave:g,children:[v.jsx("img",{ref:u,src:e,alt:"Original",className:"max-h-[80vh] max-w-[90vw] object-contain block select-none pointer-events-none",draggable:!1}),r&&v.jsx("div",{style:{left:r.x,top:r.y,width:r.width,height:r.height,boxShadow:"0 0 0 9999px rgba(0, 0, 0, 0.6)"},className:"absolute border-2 border-blue-500 z-10",children:v.jsxs("div",{className:"absolute -top-6 left-0 bg-blue-600 text-white text-xs px-1 rounded",children:[Math.round(r.width)," x ",Math.round(r.height)]})})]})}),v.jsxs("div",{className:"flex space-x-4",children:[v.jsxs("button",{onClick:n,className:"flex items-center px-6 py-2 bg-gray-700 hover:bg-gray-600 text-white rounded-full transition-colors",children:[v.jsx(es,{size:18,className:"mr-2"})," 取消"]}),v.jsxs("button",{onClick:()=>i(null),className:"flex items-center px-6 py-2 bg-gray-700 hover:bg-gray-600 text-white rounded-full transition-colors",children:[v.jsx(Z6,{size:18,className:"mr-2"})," 重选"]}),v.jsxs("button",{onClick:m,className:"flex items-center px-6 py-2 bg-blue-600 hover:bg-blue-500 text-white rounded-full transition-colors font-medium shadow-lg shadow-blue-900/50",children:[v.jsx(lk,{size:18,className:"mr-2"}),!r||r.width===0?"发送全屏":"确认裁剪"]})]}),v.jsx("div",{className:"mt-4 text-gray-400 text-sm",children:"拖拽框选区域，或直接点击确认发送全屏"})]})}function NB({userRole:e}){const[t,n]=j.useState(null),[r,i]=j.useState(!0),[a,s]=j.useState("today_questions");j.useEffect(()=>{l()},[]);const l=async()=>{try{const o=await he.get("/api/dashboard/stats");console.log("Fetched stats:",o.data),n(o.data),e!=="admin"&&s("my_questions")}catch(o){console.error("Error fetching stats:",o)}finally{i(!1)}};return r?v.jsx("div",{className:"h-full flex items-center justify-center text-gray-500",children:"加载中..."}):t?v.jsxs("div",{className:"h-full bg-gray-50 p-6 flex flex-col overflow-hidden",children:[v.jsx("h1",{className:"text-2xl font-bold mb-6 text-gray-800 flex-shrink-0",children:"数据看板"}),v.jsx("div",{className:"grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mb-8 flex-shrink-0",children:e==="admin"?v.jsxs(v.Fragment,{children:[v.jsx($i,{title:"今日提问",value:t.today_questions,icon:ho,color:"blue",isActive:a==="today_questions",onClick:()=>s("today_questions")}),v.jsx($i,{title:"本月提问",value:t.month_questions,icon:Ob,color:"indigo",isActive:a==="month_questions",onClick:()=>s("month_questions")}),v.jsx($i,{title:"待解问题",value:t.pending_questions,icon:Bb,color:"orange",isActive:a==="pending_questions",onClick:()=>s("pending_questions")}),v.jsx($i,{title:"本月习得知识",value:t.month_learned,icon:Db,color:"green",isActive:a==="month_learned",onClick:()=>s("month_learned")})]}):v.jsxs(v.Fragment,{children:[v.jsx($i,{title:"我的提问",value:t.my_questions,icon:ho,color:"blue",isActive:a==="my_questions",onClick:()=>s("my_questions")}),v.jsx($i,{title:"我的贡献",value:t.my_contributions,icon:zb,color:"purple",isActive:a==="my_contributions",onClick:()=>s("my_contributions")})]})}),v.jsxs("div",{className:"flex-1 bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden flex flex-col",children:[v.jsxs("div",{className:"p-4 border-b border-gray-200 bg-gray-50 font-medium text-gray-700 flex items-center",children:[a==="today_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(ho,{size:18,className:"mr-2"})," 今日提问详情"]}),a==="month_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(Ob,{size:18,className:"mr-2"})," 本月提问详情"]}),a==="pending_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(Bb,{size:18,className:"mr-2"})," 待解问题详情"]}),a==="month_learned"&&v.jsxs(v.Fragment,{children:[v.jsx(Db,{size:18,className:"mr-2"})," 本月习得知识详情"]}),a==="my_questions"&&v.jsxs(v.Fragment,{children:[v.jsx(ho,{size:18,className:"mr-2"})," 我的提问记录"]}),a==="my_contributions"&&v.jsxs(v.Fragment,{children:[v.jsx(zb,{size:18,className:"mr-2"})," 我的贡献记录"]})]}),v.jsxs("div",{className:"flex-1 overflow-hidden relative",children:[(a==="today_questions"||a==="month_questions"||a==="my_questions")&&v.jsx(RB,{filterDate:a==="today_questions"?"today":a==="month_questions"?"month":null,scope:a==="my_questions"?"me":"all"}),a==="pending_questions"&&v.jsx(Hk,{userRole:e,embed:!0}),(a==="month_learned"||a==="my_contributions")&&v.jsx(Fk,{userRole:e,embed:!0,filterScope:a==="my_contributions"?"me":"all",filterDate:a==="month_learned"?"month":null})]})]})]}):v.jsx("div",{className:"h-full flex items-center justify-center text-red-500",children:"加载失败"})}function $i({title:e,value:t,icon:n,color:r,isActive:i,onClick:a}){const s={blue:"bg-blue-50 text-blue-600 border-blue-200",indigo:"bg-indigo-50 text-indigo-600 border-indigo-200",orange:"bg-orange-50 text-orange-600 border-orange-200",green:"bg-green-50 text-green-600 border-green-200",purple:"bg-purple-50 text-purple-600 border-purple-200"};return v.jsxs("div",{onClick:a,className:nt("bg-white p-6 rounded-xl shadow-sm border flex items-center space-x-4 cursor-pointer transition-all",i?"ring-2 ring-blue-500 border-transparent shadow-md transform scale-[1.02]":"border-gray-100 hover:shadow-md hover:border-blue-200"),children:[v.jsx("div",{className:`p-4 rounded-full ${s[r]||s.blue}`,children:v.jsx(n,{size:24})}),v.jsx("div",{children:v.jsxs("div",{className:"flex items-baseline gap-2",children:[v.jsx("p",{className:"text-gray-500 text-sm font-medium",children:e}),v.jsx("p",{className:"text-xl font-bold text-gray-800",children:t??"-"})]})})]})}function RB({filterDate:e,scope:t}){const[n,r]=j.useState([]),[i,a]=j.useState(!1),[s,l]=j.useState(1),[o,u]=j.useState(0),c=10;j.useEffect(()=>{f()},[s,e,t]);const f=async()=>{a(!0);try{let d=`/admin/chat_logs?page=${s}&limit=${c}&scope=${t}`;e&&(d+=`&filter_date=${e}`);const h=await he.get(d);r(h.data.logs||[]),u(h.data.total||0)}catch(d){console.error(d)}finally{a(!1)}};return v.jsxs("div",{className:"h-full flex flex-col",children:[v.jsx("div",{className:"flex-1 overflow-y-auto p-4",children:v.jsxs("table",{className:"w-full text-left border-collapse",children:[v.jsx("thead",{children:v.jsxs("tr",{className:"border-b border-gray-200 text-gray-500 text-sm",children:[v.jsx("th",{className:"p-3 font-medium",children:"提问时间"}),v.jsx("th",{className:"p-3 font-medium",children:"用户"}),v.jsx("th",{className:"p-3 font-medium",children:"问题"}),v.jsx("th",{className:"p-3 font-medium",children:"回答预览"})]})}),v.jsx("tbody",{className:"divide-y divide-gray-100",children:i?v.jsx("tr",{children:v.jsx("td",{colSpan:"4",className:"p-8 text-center text-gray-400",children:"加载中..."})}):n.length===0?v.jsx("tr",{children:v.jsx("td",{colSpan:"4",className:"p-8 text-center text-gray-400",children:"暂无数据"})}):n.map(d=>v.jsxs("tr",{className:"hover:bg-gray-50 transition-colors text-sm",children:[v.jsx("td",{className:"p-3 text-gray-500 w-40",children:d.created_at}),v.jsx("td",{className:"p-3 font-medium text-gray-700 w-32 truncate",children:d.username}),v.jsx("td",{className:"p-3 text-gray-800 max-w-xs truncate",title:d.question,children:d.question}),v.jsx("td",{className:"p-3 text-gray-600 max-w-sm truncate",title:d.answer,children:d.answer})]},d.id))})]})}),o>c&&v.jsxs("div",{className:"p-4 border-t border-gray-200 flex justify-center space-x-2 bg-white",children:[v.jsx("button",{disabled:s===1,onClick:()=>l(d=>d-1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50 text-sm",children:"上一页"}),v.jsxs("span",{className:"px-3 py-1 text-gray-600 text-sm",children:[s," / ",Math.ceil(o/c)]}),v.jsx("button",{disabled:s*c>=o,onClick:()=>l(d=>d+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50 text-sm",children:"下一页"})]})]})}function MB({activeView:e,onViewChange:t,userRole:n,username:r,onLogout:i,onUpload:a}){const s=[{title:"智能助手",items:[{id:"chat",label:"智能问答",icon:bh},{id:"knowledge",label:"文档资源",icon:ka}]},{title:"知识共建",items:[{id:"unknown",label:"待解问题",icon:Ti},{id:"training",label:"知识录入",icon:dk}]},...n!=="admin"?[{title:"运行简报",items:[{id:"learning",label:"进化历程",icon:xh},{id:"dashboard",label:"数据看板",icon:Lb}]}]:[],{title:"运维管理",adminOnly:!0,items:[{id:"approval",label:"审批中心",icon:fk},{id:"global_logs",label:"全局日志",icon:uk},{id:"dashboard",label:"数据看板",icon:Lb},{id:"learning",label:"进化历程",icon:xh}]}];return v.jsxs("div",{className:"w-64 bg-white border-r border-gray-200 flex flex-col h-full shadow-lg md:shadow-none",children:[v.jsxs("div",{className:"p-4 border-b border-gray-200 flex items-center space-x-2",children:[v.jsx("div",{className:"w-8 h-8 bg-blue-600 rounded-lg flex items-center justify-center text-white font-bold text-xs",children:"综资"}),v.jsx("span",{className:"font-bold text-gray-800 text-lg",children:"Ops Agent"})]}),v.jsx("div",{className:"flex-1 overflow-y-auto py-4 space-y-6",children:s.map((l,o)=>l.adminOnly&&n!=="admin"?null:v.jsxs("div",{children:[v.jsxs("div",{className:"px-4 mb-2 text-xs font-semibold text-gray-400 uppercase tracking-wider",children:["[",l.title,"]"]}),v.jsx("div",{className:"space-y-1",children:l.items.map(u=>v.jsxs("button",{onClick:()=>t(u.id),className:nt("w-full flex items-center space-x-3 px-4 py-2 text-sm font-medium transition-colors",e===u.id?"bg-blue-50 text-blue-600 border-r-4 border-blue-600":"text-gray-600 hover:bg-gray-50 hover:text-gray-900"),children:[v.jsx(u.icon,{size:18}),v.jsx("span",{children:u.label})]},u.id))})]},o))}),v.jsxs("div",{className:"p-4 border-t border-gray-200 space-y-4",children:[(n==="admin"||n==="user")&&v.jsxs("button",{onClick:a,className:"w-full flex items-center justify-center space-x-2 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm text-sm font-medium",children:[v.jsx(_p,{size:16}),v.jsx("span",{children:"上传知识库"})]}),v.jsxs("div",{className:"bg-gray-50 rounded-lg p-3",children:[v.jsxs("div",{className:"flex items-center justify-between mb-2",children:[v.jsx("span",{className:"font-bold text-gray-700 truncate max-w-[120px]",title:r,children:r}),n==="admin"&&v.jsx("span",{className:"text-[10px] bg-blue-100 text-blue-700 px-2 py-0.5 rounded-full font-medium",children:"管理员"})]}),v.jsxs("button",{onClick:i,className:"w-full flex items-center space-x-2 text-sm font-medium text-red-600 hover:text-red-700 transition-colors",children:[v.jsx(ck,{size:16}),v.jsx("span",{children:"退出登录"})]})]})]})]})}function jB(){const[e,t]=j.useState(""),[n,r]=j.useState(""),[i,a]=j.useState(!1),[s,l]=j.useState(!1),[o,u]=j.useState(""),c=async()=>{var h,g;if(!e.trim()||!n.trim()){alert("请填写完整的问题和答案");return}a(!0);try{const m=await he.post("/admin/add_qa",{question:e,answer:n});alert(m.data.message||"操作成功！"),t(""),r(""),u("")}catch(m){alert("操作失败: "+(((g=(h=m.response)==null?void 0:h.data)==null?void 0:g.detail)||m.message))}finally{a(!1)}},f=async()=>{var h,g;if(!e.trim()||!n.trim()){alert("请先填写问题和草稿答案，AI才能帮您润色");return}u(n),l(!0);try{const m=await he.post("/admin/polish_answer",{question:e,draft_answer:n});m.data.status==="success"&&r(m.data.polished_answer)}catch(m){alert("润色失败: "+(((g=(h=m.response)==null?void 0:h.data)==null?void 0:g.detail)||m.message))}finally{l(!1)}},d=h=>{(h.ctrlKey||h.metaKey)&&h.key==="z"&&o&&(h.preventDefault(),r(o),u(""))};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-y-auto",children:v.jsxs("div",{className:"max-w-4xl mx-auto w-full",children:[v.jsxs("h2",{className:"text-2xl font-bold text-gray-800 mb-6 flex items-center",children:[v.jsx(dk,{className:"mr-3 text-blue-600"}),"问答补全"]}),v.jsxs("div",{className:"bg-white rounded-xl shadow-sm border border-gray-200 p-6 space-y-6",children:[v.jsxs("div",{className:"bg-blue-50 text-blue-800 p-4 rounded-lg text-sm mb-6",children:["在此模式下，您可以手动录入标准问答对。 系统将直接学习这些内容，当用户提出相同或相似问题时，直接返回您设定的答案。",v.jsx("br",{}),v.jsx("span",{className:"text-xs opacity-75 mt-1 block",children:"* 管理员提交直接生效，普通用户提交需管理员审批。"})]}),v.jsxs("div",{children:[v.jsx("label",{className:"block text-sm font-medium text-gray-700 mb-2",children:"预期问题 (Question)"}),v.jsx("input",{type:"text",value:e,onChange:h=>t(h.target.value),className:"w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-all",placeholder:"例如：如何重置路由器密码？"})]}),v.jsxs("div",{children:[v.jsxs("div",{className:"flex justify-between items-center mb-2",children:[v.jsx("label",{className:"block text-sm font-medium text-gray-700",children:"标准答案 (Answer)"}),v.jsxs("div",{className:"flex items-center space-x-2",children:[o&&v.jsx("span",{className:"text-xs text-gray-400 mr-2",children:"按 Ctrl+Z 撤销润色"}),v.jsxs("button",{onClick:f,disabled:s||!e.trim()||!n.trim(),className:"flex items-center text-xs text-purple-600 hover:text-purple-700 bg-purple-50 hover:bg-purple-100 px-3 py-1 rounded-full transition-colors disabled:opacity-50",children:[v.jsx(Ti,{size:14,className:nt("mr-1",s?"animate-spin":"")}),s?"AI 正在润色...":"AI 润色优化"]})]})]}),v.jsx("textarea",{value:n,onChange:h=>r(h.target.value),onKeyDown:d,rows:6,className:"w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-all resize-none",placeholder:"输入标准的回答内容..."})]}),v.jsx("div",{className:"flex justify-end pt-4",children:v.jsx("button",{onClick:c,disabled:i,className:"px-6 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-lg font-medium transition-colors shadow-sm disabled:opacity-50 disabled:cursor-not-allowed flex items-center",children:i?v.jsxs(v.Fragment,{children:[v.jsx(Vl,{className:"animate-spin mr-2",size:18}),"提交中..."]}):v.jsxs(v.Fragment,{children:[v.jsx(lk,{className:"mr-2",size:18}),"提交并学习"]})})})]})]})})}function zB({imageSrc:e,onClose:t}){return e?v.jsxs("div",{className:"fixed inset-0 z-[110] bg-black/95 flex items-center justify-center animate-in fade-in duration-200 cursor-zoom-out",onClick:t,children:[v.jsx("button",{onClick:t,className:"absolute top-4 right-4 text-white/70 hover:text-white bg-white/10 hover:bg-white/20 rounded-full p-2 transition-colors z-50",children:v.jsx(es,{size:24})}),v.jsx("img",{src:e,alt:"Zoomed",className:"max-h-screen max-w-screen object-contain p-4",onClick:n=>n.stopPropagation()})]}):null}function DB(){const[e,t]=j.useState("docs"),[n,r]=j.useState([]),[i,a]=j.useState([]),[s,l]=j.useState(!1);j.useEffect(()=>{e==="docs"?o():u()},[e]);const o=async()=>{l(!0);try{const m=await he.get("/pending_docs");r(m.data.docs)}catch(m){console.error(m)}finally{l(!1)}},u=async()=>{l(!0);try{const m=await he.get("/admin/pending_qa");a(m.data.items||[])}catch(m){console.error(m)}finally{l(!1)}},c=async m=>{try{await he.post(`/approve_doc/${m}`),o()}catch(b){alert("操作失败: "+b.message)}},f=async m=>{if(window.confirm("确定要拒绝该文档吗？"))try{await he.post(`/reject_doc/${m}`),o()}catch(b){alert("操作失败: "+b.message)}},d=async m=>{try{await he.post(`/admin/approve_qa/${m}`),u()}catch(b){alert("操作失败: "+b.message)}},h=async m=>{if(window.confirm("确定要拒绝该问答吗？"))try{await he.post(`/admin/reject_qa/${m}`),u()}catch(b){alert("操作失败: "+b.message)}},g=async(m,b)=>{var p,y;try{const x=await he.get(`/download_doc/${m}`,{responseType:"blob"}),k=window.URL.createObjectURL(new Blob([x.data])),E=document.createElement("a");E.href=k,E.setAttribute("download",b),document.body.appendChild(E),E.click(),E.remove()}catch(x){alert("下载失败: "+(((y=(p=x.response)==null?void 0:p.data)==null?void 0:y.detail)||x.message))}};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:v.jsxs("div",{className:"max-w-6xl mx-auto w-full h-full flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200 flex justify-between items-center bg-white",children:[v.jsxs("div",{className:"flex items-center space-x-4",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800 mr-4",children:[v.jsx(fk,{className:"mr-2 text-blue-600"}),"审批中心"]}),v.jsxs("div",{className:"flex space-x-1 bg-gray-100 p-1 rounded-lg",children:[v.jsx("button",{onClick:()=>t("docs"),className:nt("px-4 py-1.5 rounded-md text-sm font-medium transition-all",e==="docs"?"bg-white text-blue-600 shadow-sm":"text-gray-500 hover:text-gray-700"),children:"文档审批"}),v.jsx("button",{onClick:()=>t("qa"),className:nt("px-4 py-1.5 rounded-md text-sm font-medium transition-all",e==="qa"?"bg-white text-blue-600 shadow-sm":"text-gray-500 hover:text-gray-700"),children:"问答审批"})]})]}),v.jsx("button",{onClick:e==="docs"?o:u,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"刷新",children:v.jsx(Vl,{size:20,className:s?"animate-spin":""})})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6",children:e==="docs"?s?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):n.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无待审批文档"}):v.jsx("div",{className:"space-y-3",children:n.map(m=>v.jsxs("div",{className:"flex items-center justify-between bg-gray-50 p-4 rounded-lg border border-gray-100",children:[v.jsxs("div",{className:"flex flex-col",children:[v.jsx("span",{className:"font-medium text-gray-800",children:m.filename}),v.jsxs("div",{className:"text-xs text-gray-500 flex space-x-2 mt-1",children:[v.jsxs("span",{children:["上传者: ",m.uploader]}),v.jsxs("span",{children:["时间: ",m.created_at]})]})]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{onClick:()=>g(m.id,m.filename),className:"p-2 text-gray-500 hover:text-blue-600 hover:bg-blue-50 rounded-lg transition-colors",title:"下载文档",children:v.jsx(vi,{size:18})}),v.jsx("button",{onClick:()=>f(m.id),className:"px-3 py-1.5 bg-red-50 text-red-600 hover:bg-red-100 rounded-md text-sm font-medium transition-colors",children:"拒绝"}),v.jsx("button",{onClick:()=>c(m.id),className:"px-3 py-1.5 bg-green-50 text-green-600 hover:bg-green-100 rounded-md text-sm font-medium transition-colors",children:"通过"})]})]},m.id))}):s?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):i.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无待审批问答"}):v.jsx("div",{className:"space-y-4",children:i.map(m=>v.jsxs("div",{className:"bg-gray-50 p-4 rounded-lg border border-gray-100",children:[v.jsxs("div",{className:"flex justify-between items-start mb-2 border-b border-gray-200 pb-2",children:[v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"font-bold text-gray-700",children:m.username}),v.jsx("span",{className:"text-gray-400 text-xs",children:m.created_at})]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{onClick:()=>h(m.id),className:"px-3 py-1.5 bg-red-50 text-red-600 hover:bg-red-100 rounded-md text-sm font-medium transition-colors",children:"拒绝"}),v.jsx("button",{onClick:()=>d(m.id),className:"px-3 py-1.5 bg-green-50 text-green-600 hover:bg-green-100 rounded-md text-sm font-medium transition-colors",children:"通过"})]})]}),v.jsxs("div",{className:"mb-2",children:[v.jsx("div",{className:"font-semibold text-gray-600 mb-1",children:"问题："}),v.jsx("div",{className:"text-gray-800 bg-white p-2 rounded border border-gray-100 whitespace-pre-wrap",children:m.question})]}),v.jsxs("div",{children:[v.jsx("div",{className:"font-semibold text-gray-600 mb-1",children:"答案："}),v.jsx("div",{className:"text-gray-600 bg-blue-50/50 p-2 rounded border border-blue-100/50 whitespace-pre-wrap max-h-32 overflow-y-auto",children:m.answer})]})]},m.id))})})]})})}function Fk({userRole:e,filterScope:t,filterDate:n,embed:r}){const[i,a]=j.useState([]),[s,l]=j.useState(!1),[o,u]=j.useState(1),[c,f]=j.useState(0),d=10;j.useEffect(()=>{h()},[o,t,n]);const h=async()=>{l(!0);try{let m=`/admin/learning_records?page=${o}&limit=${d}`;t&&(m+=`&scope=${t}`),n&&(m+=`&filter_date=${n}`);const b=await he.get(m);a(b.data.records||[]),f(b.data.total||0)}catch(m){console.error(m),a([])}finally{l(!1)}},g=async m=>{var b,p;if(window.confirm("确定要删除这条学习记录吗？删除后将同时从知识库中移除。"))try{await he.delete(`/admin/delete_qa/${m}`),alert("删除成功"),h()}catch(y){alert("删除失败: "+(((p=(b=y.response)==null?void 0:b.data)==null?void 0:p.detail)||y.message))}};return v.jsxs("div",{className:`h-full flex flex-col ${r?"":"bg-gray-50 p-6"} overflow-hidden`,children:[!r&&v.jsxs("h2",{className:"text-xl font-bold mb-4 text-green-700 flex items-center",children:[v.jsx(xh,{size:24,className:"mr-2"}),"进化历程"]}),v.jsx("div",{className:`flex-1 overflow-auto ${r?"":"bg-white rounded-lg shadow"}`,children:v.jsxs("table",{className:"w-full text-left border-collapse",children:[v.jsx("thead",{children:v.jsxs("tr",{className:"bg-gray-100 border-b border-gray-200",children:[v.jsx("th",{className:"p-3 font-medium text-gray-600 w-24",children:"ID"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-1/4",children:"问题"}),v.jsx("th",{className:"p-3 font-medium text-gray-600",children:"答案"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-32",children:"贡献者"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-24",children:"状态"}),v.jsx("th",{className:"p-3 font-medium text-gray-600 w-40",children:"时间"}),e==="admin"&&v.jsx("th",{className:"p-3 font-medium text-gray-600 w-24 text-center",children:"操作"})]})}),v.jsx("tbody",{children:i.length===0?v.jsx("tr",{children:v.jsx("td",{colSpan:e==="admin"?7:6,className:"p-8 text-center text-gray-500",children:"暂无学习记录"})}):i.map(m=>v.jsxs("tr",{className:"border-b border-gray-100 hover:bg-gray-50 transition-colors",children:[v.jsxs("td",{className:"p-3 text-gray-500 text-sm",children:["#",m.id]}),v.jsx("td",{className:"p-3 font-medium text-gray-800",children:m.question}),v.jsx("td",{className:"p-3 text-gray-600 text-sm line-clamp-2 max-w-md",title:m.answer,children:m.answer.length>100?m.answer.substring(0,100)+"...":m.answer}),v.jsx("td",{className:"p-3",children:v.jsxs("span",{className:"inline-flex items-center px-2 py-0.5 rounded text-xs font-medium bg-blue-100 text-blue-800",children:[v.jsx(Ap,{size:10,className:"mr-1"}),m.username||"未知"]})}),v.jsx("td",{className:"p-3",children:v.jsx("span",{className:`inline-flex items-center px-2 py-0.5 rounded text-xs font-medium ${m.status==="approved"?"bg-green-100 text-green-800":"bg-yellow-100 text-yellow-800"}`,children:m.status==="approved"?"已生效":"待审核"})}),v.jsx("td",{className:"p-3 text-gray-500 text-sm",children:m.created_at}),e==="admin"&&v.jsx("td",{className:"p-3 text-center",children:v.jsx("button",{onClick:()=>g(m.id),className:"text-red-500 hover:text-red-700 hover:bg-red-50 p-1.5 rounded transition-colors",title:"删除",children:v.jsx(hk,{size:16})})})]},m.id))})]})}),c>d&&v.jsxs("div",{className:"flex justify-center mt-4 space-x-2",children:[v.jsx("button",{disabled:o===1,onClick:()=>u(m=>m-1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-3 py-1 text-gray-600",children:["第 ",o," 页 / 共 ",Math.ceil(c/d)," 页"]}),v.jsx("button",{disabled:o*d>=c,onClick:()=>u(m=>m+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})}const ci=()=>new Date().toLocaleTimeString([],{hour:"2-digit",minute:"2-digit"});function OB(){const[e,t]=j.useState([]),[n,r]=j.useState(!1),[i,a]=j.useState(1),[s,l]=j.useState(0),o=20;j.useEffect(()=>{u()},[i]);const u=async()=>{r(!0);try{const d=await he.get(`/admin/global_logs?page=${i}&limit=${o}`);t(d.data.logs||[]),l(d.data.total||0)}catch(d){console.error(d),t([])}finally{r(!1)}},c=async()=>{var d,h;try{const g=await he.get("/admin/export_global_logs",{responseType:"blob"}),m=window.URL.createObjectURL(new Blob([g.data])),b=document.createElement("a");b.href=m,b.setAttribute("download","global_logs.csv"),document.body.appendChild(b),b.click(),b.remove()}catch(g){alert("导出失败: "+(((h=(d=g.response)==null?void 0:d.data)==null?void 0:h.detail)||g.message))}},f=d=>{const g={pending:"bg-yellow-100 text-yellow-800",approved:"bg-green-100 text-green-800",rejected:"bg-red-100 text-red-800",completed:"bg-blue-100 text-blue-800",normal:"bg-gray-100 text-gray-800"}[d.status]||"bg-gray-100 text-gray-800";let m="未知";switch(d.type){case"chat":m="智能问答";break;case"doc_upload":m="文档上传";break;case"qa_submission":m="知识录入";break}return v.jsxs("div",{className:"bg-white p-4 rounded-lg border border-gray-200 hover:shadow-sm transition-shadow",children:[v.jsxs("div",{className:"flex justify-between items-start mb-2",children:[v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"px-2 py-0.5 rounded text-xs font-medium bg-gray-100 text-gray-600",children:m}),v.jsx("span",{className:"font-bold text-gray-700",children:d.username}),v.jsx("span",{className:"text-gray-400 text-xs",children:d.created_at})]}),v.jsx("span",{className:`px-2 py-0.5 rounded text-xs font-medium ${g}`,children:d.status})]}),v.jsx("div",{className:"mb-1",children:v.jsx("div",{className:"font-medium text-gray-800",children:d.content})}),d.details&&v.jsx("div",{className:"text-sm text-gray-500 bg-gray-50 p-2 rounded mt-2 truncate",children:d.type==="doc_upload"?`路径: ${d.details}`:`回复/详情: ${d.details}`})]},`${d.type}-${d.id}`)};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:v.jsxs("div",{className:"max-w-6xl mx-auto w-full h-full flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200 flex justify-between items-center bg-white",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800",children:[v.jsx(uk,{className:"mr-2 text-blue-600"}),"全局日志"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{onClick:c,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"导出全部",children:v.jsx(vi,{size:20,className:"text-gray-600"})}),v.jsx("button",{onClick:u,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"刷新",children:v.jsx(Vl,{size:20,className:n?"animate-spin":""})})]})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6 bg-gray-50",children:n?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):e.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无记录"}):v.jsx("div",{className:"space-y-3",children:e.map(f)})}),v.jsxs("div",{className:"p-4 border-t border-gray-200 bg-white flex justify-between items-center text-sm text-gray-500",children:[v.jsxs("span",{children:["共 ",s," 条记录"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{disabled:i===1,onClick:()=>a(d=>Math.max(1,d-1)),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-2 py-1",children:["第 ",i," 页"]}),v.jsx("button",{disabled:i*o>=s,onClick:()=>a(d=>d+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})]})})}function Hk({userRole:e}){const[t,n]=j.useState([]),[r,i]=j.useState(!1),[a,s]=j.useState(1),[l,o]=j.useState(0),u=10,[c,f]=j.useState(null),[d,h]=j.useState(""),[g,m]=j.useState(!1),[b,p]=j.useState(!1),[y,x]=j.useState("");j.useEffect(()=>{k()},[a]);const k=async()=>{i(!0);try{const L=await he.get(`/admin/unknown_questions?page=${a}&limit=${u}`);n(L.data.logs||[]),o(L.data.total||0)}catch(L){console.error(L),n([])}finally{i(!1)}},E=L=>{f(L.id),h("")},C=async()=>{if(d.trim()){m(!0);try{await he.post("/admin/learn",{question_id:c,answer:d}),k(),f(null),h("")}catch(L){alert("学习失败: "+L.message)}finally{m(!1)}}},R=async L=>{if(window.confirm("确定要丢弃该问题吗？丢弃后将不再出现在此处。"))try{await he.post(`/admin/discard_unknown/${L}`),k()}catch(X){alert("操作失败: "+X.message)}},z=async L=>{var X,A;if(!d.trim()){alert("请先填写草稿答案，AI才能帮您润色");return}x(d),p(!0);try{const V=await he.post("/admin/polish_answer",{question:L,draft_answer:d});V.data.status==="success"&&h(V.data.polished_answer)}catch(V){alert("润色失败: "+(((A=(X=V.response)==null?void 0:X.data)==null?void 0:A.detail)||V.message))}finally{p(!1)}},_=L=>{(L.ctrlKey||L.metaKey)&&L.key==="z"&&y&&(L.preventDefault(),h(y),x(""))};return v.jsx("div",{className:"h-full flex flex-col bg-gray-50 p-6 overflow-hidden",children:v.jsxs("div",{className:"max-w-6xl mx-auto w-full h-full flex flex-col bg-white rounded-xl shadow-sm border border-gray-200 overflow-hidden",children:[v.jsxs("div",{className:"p-6 border-b border-gray-200 flex justify-between items-center bg-white",children:[v.jsxs("h2",{className:"text-xl font-bold flex items-center text-gray-800",children:[v.jsx(Ti,{className:"mr-2 text-purple-600"}),"未知问题"]}),v.jsx("button",{onClick:k,className:"p-2 hover:bg-gray-100 rounded-full transition-colors",title:"刷新",children:v.jsx(Vl,{size:20,className:r?"animate-spin":""})})]}),v.jsx("div",{className:"flex-1 overflow-y-auto p-6",children:r?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"加载中..."}):t.length===0?v.jsx("div",{className:"text-center py-8 text-gray-500",children:"暂无未知问题"}):v.jsx("div",{className:"space-y-4",children:t.map(L=>v.jsxs("div",{className:"bg-gray-50 p-4 rounded-lg border border-gray-100 text-sm",children:[v.jsx("div",{className:"flex justify-between items-start mb-2 border-b border-gray-200 pb-2",children:v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"font-bold text-gray-700",children:L.username}),v.jsx("span",{className:"text-gray-400 text-xs",children:L.created_at})]})}),v.jsxs("div",{className:"mb-2",children:[v.jsx("div",{className:"font-semibold text-gray-600 mb-1",children:"提问："}),v.jsx("div",{className:"text-gray-800 bg-white p-2 rounded border border-gray-100 whitespace-pre-wrap",children:L.question})]}),c===L.id?v.jsxs("div",{className:"mt-3 bg-purple-50 p-3 rounded border border-purple-100 animate-in fade-in slide-in-from-top-2",children:[v.jsxs("div",{className:"flex justify-between items-center mb-1",children:[v.jsxs("div",{className:"flex items-center",children:[v.jsx("label",{className:"block text-purple-800 font-medium mr-2",children:"请输入标准答案："}),y&&v.jsx("span",{className:"text-xs text-gray-400",children:"按 Ctrl+Z 撤销润色"})]}),v.jsxs("button",{onClick:()=>z(L.question),disabled:b||!d.trim(),className:"flex items-center text-xs text-purple-600 hover:text-purple-700 bg-white border border-purple-200 hover:border-purple-300 px-3 py-1 rounded-full transition-colors disabled:opacity-50",children:[v.jsx(Ti,{size:14,className:nt("mr-1",b?"animate-spin":"")}),b?"AI 正在润色...":"AI 润色优化"]})]}),v.jsx("textarea",{className:"w-full p-2 border border-purple-200 rounded focus:ring-2 focus:ring-purple-500 focus:border-transparent outline-none min-h-[100px]",placeholder:"在此输入答案，提交后系统将自动学习...",value:d,onChange:X=>h(X.target.value),onKeyDown:_}),v.jsxs("div",{className:"flex justify-end space-x-2 mt-2",children:[v.jsx("button",{onClick:()=>f(null),className:"px-3 py-1.5 bg-gray-200 text-gray-700 rounded hover:bg-gray-300 transition-colors",children:"取消"}),v.jsx("button",{onClick:C,disabled:g||!d.trim(),className:"px-3 py-1.5 bg-purple-600 text-white rounded hover:bg-purple-700 disabled:opacity-50 transition-colors flex items-center",children:g?"提交中...":"确认学习"})]})]}):v.jsxs("div",{className:"flex justify-end mt-2 space-x-2",children:[e==="admin"&&v.jsxs("button",{onClick:()=>R(L.id),className:"flex items-center px-3 py-1.5 bg-gray-100 text-gray-600 hover:bg-gray-200 rounded-md text-sm font-medium transition-colors",children:[v.jsx(es,{size:14,className:"mr-1.5"}),"丢弃"]}),v.jsxs("button",{onClick:()=>E(L),className:"flex items-center px-3 py-1.5 bg-purple-100 text-purple-700 hover:bg-purple-200 rounded-md text-sm font-medium transition-colors",children:[v.jsx(Ti,{size:14,className:"mr-1.5"}),"去教学"]})]})]},L.id))})}),v.jsxs("div",{className:"p-4 border-t border-gray-200 bg-white flex justify-between items-center text-sm text-gray-500",children:[v.jsxs("span",{children:["共 ",l," 条记录"]}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsx("button",{disabled:a===1,onClick:()=>s(L=>Math.max(1,L-1)),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"上一页"}),v.jsxs("span",{className:"px-2 py-1",children:["第 ",a," 页"]}),v.jsx("button",{disabled:a*u>=l,onClick:()=>s(L=>L+1),className:"px-3 py-1 border rounded hover:bg-gray-100 disabled:opacity-50",children:"下一页"})]})]})]})})}const jI=async(e,t)=>{for(;;){const{data:n}=await he.get(`/ingest_jobs/${e}`);if(n.status==="done"||n.status==="failed")return n;t&&t(n),await new Promise(r=>setTimeout(r,2e3))}};function Ik({isOpen:e,onClose:t,onUpload:n,userRole:r}){const[i,a]=j.useState([]),[s,l]=j.useState(!1),[o,u]=j.useState(""),[c,f]=j.useState(!1),d=j.useRef(null);if(!e)return null;const h=b=>{if(b.target.files&&b.target.files.length>0){const p=Array.from(b.target.files),y=p.filter(x=>x.size>100*1024*1024);if(y.length>0){u(`❌ 以下文件超过100MB限制: ${y.map(x=>x.name).join(", ")}`),d.current&&(d.current.value="");return}a(p),u("")}},g=async(b="admin")=>{if(i.length===0)return;l(!0),u("");const p=new FormData;i.forEach(y=>{p.append("files",y)}),p.append("target_kb",b);try{const x=(await he.post("/upload_doc",p,{headers:{"Content-Type":"multipart/form-data"}})).data.results,k=x.filter(C=>C.status==="error"),E=x.filter(C=>C.status==="pending"),S=x.filter(C=>C.status==="queued");if(k.length===0&&S.length>0){const C={};u(`⏳ ${S.length} 个文件已加入入库队列，正在解析...`);const M=await Promise.all(S.map(D=>jI(D.job_id,N=>{C[D.job_id]=N.progress.percent;const P=S.reduce((F,W)=>F+(C[W.job_id]||0),0);u(`⏳ 正在解析入库 ${S.length} 个文件：${Math.round(P/S.length)}%`)})));S.forEach((D,N)=>{M[N].status==="failed"&&k.push({...D,message:M[N].error})})}k.length>0?u(`❌ 部分文件上传失败: ${k.map(C=>C.message?`${C.filename} (${C.message})`:C.filename).join(", ")}`):E.length>0?(u(`⏳ ${E.length} 个文件已提交，等待管理员审批`),setTimeout(()=>{n(x.map(C=>C.filename).join(", "),!0),t(),a([]),u("")},2e3)):(u(`✅ ${x.length} 个文件全部上传成功！`),setTimeout(()=>{n(x.map(C=>C.filename).join(", "),!1),t(),a([]),u("")},1500))}catch(y){u(`❌ 上传请求失败: ${y.message}`)}finally{l(!1)}},m=async()=>{f(!0),u("正在同步知识库（新增/剔除），请稍候...");try{const b=await he.post("/reprocess_docs");u(`✅ ${b.data.message}`)}catch(b){u(`❌ 更新失败: ${b.message}`)}finally{f(!1)}};return v.jsx("div",{className:"fixed inset-0 z-50 flex items-center justify-center bg-black/50 backdrop-blur-sm animate-in fade-in duration-200",children:v.jsxs(qo.div,{initial:{scale:.9,opacity:0},animate:{scale:1,opacity:1},className:"bg-white rounded-2xl p-6 w-full max-w-md shadow-2xl relative",children:[v.jsx("button",{onClick:t,className:"absolute top-4 right-4 text-gray-400 hover:text-gray-600",children:v.jsx(es,{size:20})}),v.jsxs("h2",{className:"text-xl font-bold mb-4 flex items-center",children:[v.jsx(_p,{className:"mr-2 text-blue-600"}),"批量上传文档"]}),v.jsxs("div",{className:"border-2 border-dashed border-gray-300 rounded-xl p-8 flex flex-col items-center justify-center bg-gray-50 hover:bg-gray-100 transition-colors cursor-pointer",onClick:()=>{var b;return(b=d.current)==null?void 0:b.click()},children:[v.jsx("input",{type:"file",ref:d,onChange:h,className:"hidden",multiple:!0,accept:".txt,.md,.docx,.pdf,.xlsx,.xls,.csv"}),v.jsx(ka,{size:48,className:"text-gray-400 mb-2"}),v.jsx("div",{className:"text-sm text-gray-500 text-center",children:i.length>0?v.jsxs("div",{className:"text-blue-600 font-medium max-h-32 overflow-y-auto",children:[i.map((b,p)=>v.jsx("div",{children:b.name},p)),v.jsxs("div",{className:"text-gray-400 mt-1",children:["共 ",i.length," 个文件"]})]}):"点击选择多个文件或拖拽至此"}),v.jsx("p",{className:"text-xs text-gray-400 mt-1",children:"支持 .txt, .md, .docx, .pdf, .xlsx, .csv"})]}),r==="guest"&&v.jsxs("div",{className:"mt-3 text-xs text-red-600 bg-red-50 p-2 rounded border border-red-100 flex items-start",children:[v.jsx(Pb,{size:14,className:"mr-1 mt-0.5 flex-shrink-0"}),v.jsx("span",{children:"注意：临时用户仅可体验问答功能，暂不支持上传知识库文件。"})]}),r==="user"&&v.jsxs("div",{className:"mt-3 text-xs text-amber-600 bg-amber-50 p-2 rounded border border-amber-100 flex items-start",children:[v.jsx(Pb,{size:14,className:"mr-1 mt-0.5 flex-shrink-0"}),v.jsx("span",{children:"注意：您上传的文档需要经过管理员审批，审批通过后才会正式存入知识库。"})]}),o&&v.jsx("div",{className:nt("mt-4 text-sm p-2 rounded",o.startsWith("✅")?"bg-green-50 text-green-700":"bg-red-50 text-red-700"),children:o}),v.jsxs("div",{className:"mt-6 flex justify-between items-center",children:[r==="admin"&&v.jsxs("button",{onClick:m,disabled:c||s,className:"text-xs text-gray-500 hover:text-blue-600 flex items-center transition-colors",title:"扫描并同步文件：入库新增文件，剔除已删除文件",children:[v.jsx(Vl,{size:14,className:nt("mr-1",c&&"animate-spin")}),c?"同步中...":"扫描增量文件"]}),v.jsxs("div",{className:"flex space-x-3",children:[v.jsx("button",{onClick:t,className:"px-4 py-2 text-gray-600 hover:bg-gray-100 rounded-lg transition-colors",children:"取消"}),r==="admin"?v.jsxs(v.Fragment,{children:[v.jsx("button",{onClick:()=>g("admin"),disabled:i.length===0||s,className:nt("px-4 py-2 rounded-lg text-white transition-colors flex items-center text-sm",i.length===0||s?"bg-blue-300 cursor-not-allowed":"bg-blue-600 hover:bg-blue-700"),children:s?"...":"运维知识库"}),v.jsx("button",{onClick:()=>g("user"),disabled:i.length===0||s,className:nt("px-4 py-2 rounded-lg text-white transition-colors flex items-center text-sm",i.length===0||s?"bg-green-300 cursor-not-allowed":"bg-green-600 hover:bg-green-700"),children:s?"...":"用户知识库"})]}):v.jsx("button",{onClick:()=>g("user"),disabled:i.length===0||s||r==="guest",className:nt("px-4 py-2 rounded-lg text-white transition-colors flex items-center",i.length===0||s||r==="guest"?"bg-blue-300 cursor-not-allowed":"bg-blue-600 hover:bg-blue-700"),children:s?v.jsxs(v.Fragment,{children:[v.jsx("div",{className:"w-4 h-4 border-2 border-white/30 border-t-white rounded-full animate-spin mr-2"}),"上传中..."]}):`开始上传 (${i.length})`})]})]})]})})}function LB({auth:e,onLogout:t,isUserMode:n}){const[r,i]=j.useState([{id:"welcome",role:"assistant",content:"你好！我是 Ops Agent 助手。有什么我可以帮你的吗？",timestamp:ci()}]),[a,s]=j.useState(""),[l,o]=j.useState(null),[u,c]=j.useState(!1),[f,d]=j.useState(!1),[h,g]=j.useState([]),[m,b]=j.useState(!1),[p,y]=j.useState(null),[x,k]=j.useState(null),E=j.useRef(null),C=j.useRef(null),R=j.useRef(null),z=j.useRef(null);j.useEffect(()=>{(async()=>{try{const B=await he.get("/hot_questions");B.data.questions&&g(B.data.questions)}catch(B){console.error("Failed to fetch hot questions:",B)}})()},[]);const _=()=>{var O;(O=E.current)==null||O.scrollIntoView({behavior:"smooth"})};j.useEffect(()=>{_()},[r,u,l]);const L=O=>{const B=O.target.files[0];if(B){const G=new FileReader;G.onloadend=()=>{o(G.result)},G.readAsDataURL(B)}O.target.value=""},X=async O=>{const B=O.target.files[0];if(!B)return;const G=new FormData;G.append("files",B);const T=Date.now().toString();i(U=>[...U,{id:T,role:"assistant",content:`📄 正在上传并解析文档：${B.name}...`,timestamp:ci()}]);try{const U=await he.post("/upload_doc",G,{headers:{"Content-Type":"multipart/form-data"}});if(U.data.error)throw new Error(U.data.error);const H=U.data.results[0];if(H.status==="error")throw new Error(H.message);const N=Z=>i(q=>q.map(V=>V.id===T?{...V,content:Z}:V));if(H.status==="pending")N(`✅ 文件 **${B.name}** 已上传，等待管理员审批通过后生效。`);else{if(H.status==="queued"){N(`📄 文档 **${B.name}** 已加入入库队列，正在解析...`);const Z=await jI(H.job_id,q=>{N(`📄 正在解析入库文档：${B.name}（${q.progress.percent}%）`)});if(Z.status==="failed")throw new Error(`入库失败：${Z.error||"未知错误"}`)}N(`✅ 文档 **${B.name}** 已成功上传并加入知识库！`)}}catch(U){console.error("Upload Error:",U),i(H=>H.map(N=>N.id===T?{...N,content:`❌ 文档上传失败：${U.message||"未知错误"}`}:N))}O.target.value=""},A=O=>{const B=O.clipboardData.items;for(let G=0;G<B.length;G++)if(B[G].type.indexOf("image")!==-1){const T=B[G].getAsFile(),U=new FileReader;U.onloadend=()=>{o(U.result)},U.readAsDataURL(T),O.preventDefault();return}},V=async()=>{var T,U,H;if(!a.trim()&&!l||u)return;const O=a,B=l;s(""),o(null);const G={id:Date.now().toString(),role:"user",content:O,image:B,timestamp:ci()};i(N=>[...N,G]),c(!0);try{const N=await he.post("/get_answer",{question:O||"请分析这张图片",image:B}),ee={id:(Date.now()+1).toString(),role:"assistant",content:N.data.answer,question_id:N.data.question_id,sources:N.data.sources,timestamp:ci()};i(re=>[...re,ee])}catch(N){console.error("API Error:",N);const ee=((U=(T=N.response)==null?void 0:T.data)==null?void 0:U.detail)||N.message||"无法连接到服务器",re={id:(Date.now()+1).toString(),role:"assistant",content:`**错误**：${ee}。请稍后再试。`,timestamp:ci()};i(xe=>[...xe,re])}finally{c(!1),window.innerWidth>768&&((H=C.current)==null||H.focus())}},S=O=>{O.key==="Enter"&&!O.shiftKey&&(O.preventDefault(),V())},F=async(O,B)=>{const G=r.find(T=>T.id===O);if(G&&(i(T=>T.map(U=>U.id===O?{...U,feedback:B}:U)),G.question_id))try{await he.post("/feedback",{question_id:G.question_id,status:B})}catch(T){console.error("Error sending feedback:",T)}},$=async(O,B)=>{var G,T;try{const U=await he.get(`/download_source/${O}`,{responseType:"blob"}),H=window.URL.createObjectURL(new Blob([U.data])),N=document.createElement("a");N.href=H,N.setAttribute("download",B),document.body.appendChild(N),N.click(),N.remove()}catch(U){alert("下载失败: "+(((T=(G=U.response)==null?void 0:G.data)==null?void 0:T.detail)||U.message))}};return v.jsxs("div",{className:"flex flex-col h-full bg-white text-gray-900 font-sans relative",children:[n&&v.jsxs("div",{className:"h-16 border-b border-gray-100 flex items-center justify-between px-4 md:px-6 bg-white shadow-sm z-10 flex-shrink-0",children:[v.jsxs("div",{className:"flex items-center space-x-3",children:[v.jsx("div",{className:"w-8 h-8 bg-blue-600 rounded-lg flex items-center justify-center text-white font-bold shadow-sm text-xs",children:"综资"}),v.jsx("span",{className:"font-bold text-gray-800 text-lg tracking-tight",children:"Ops Agent"})]}),v.jsxs("div",{className:"flex items-center space-x-2 md:space-x-4",children:[(e==null?void 0:e.role)==="guest"&&v.jsx("span",{className:"px-2 py-1 bg-yellow-100 text-yellow-700 text-xs font-medium rounded-full",children:"临时用户（受限权限）"}),(e==null?void 0:e.role)==="user"&&v.jsx("span",{className:"px-2 py-1 bg-green-100 text-green-700 text-xs font-medium rounded-full",children:"正式用户"}),v.jsxs("div",{className:"flex items-center space-x-2",children:[v.jsx("span",{className:"text-xs text-gray-500 hidden md:inline",children:e.username}),v.jsxs("button",{onClick:t,className:"text-gray-500 hover:text-red-600 transition-colors flex items-center space-x-1 p-1",title:"退出登录",children:[v.jsx(ck,{size:18}),v.jsx("span",{className:"text-sm hidden md:inline",children:"退出"})]})]})]})]}),m&&p&&v.jsx(TB,{imageSrc:p,onConfirm:O=>{o(O),b(!1),y(null)},onCancel:()=>{b(!1),y(null)}}),v.jsx(zB,{imageSrc:x,onClose:()=>k(null)}),v.jsx(Ik,{isOpen:f,onClose:()=>d(!1),onUpload:(O,B)=>{i(B?G=>[...G,{id:Date.now().toString(),role:"assistant",content:`✅ 文件 **${O}** 已上传，等待管理员审批通过后生效。`,timestamp:ci()}]:G=>[...G,{id:Date.now().toString(),role:"assistant",content:`✅ 文件 **${O}** 已成功上传并加入知识库！`,timestamp:ci()}])},userRole:e==null?void 0:e.role}),v.jsx("input",{type:"file",ref:R,onChange:L,accept:"image/*",className:"hidden"}),v.jsx("input",{type:"file",ref:z,onChange:X,accept:".txt,.md,.docx,.pdf,.xlsx,.xls,.csv",className:"hidden"}),v.jsx("div",{className:"flex-1 overflow-y-auto p-4 md:p-8",children:v.jsxs("div",{className:"max-w-3xl mx-auto space-y-6",children:[r.length<=1&&v.jsxs("div",{className:"flex flex-col items-center justify-center h-full text-center space-y-8 mt-20",children:[v.jsx(qo.div,{initial:{opacity:0,y:20},animate:{opacity:1,y:0},className:"bg-blue-50 p-6 rounded-full",children:v.jsx(Ti,{size:48,className:"text-blue-600"})}),v.jsxs("div",{children:[v.jsx("h2",{className:"text-2xl font-bold text-gray-800",children:"我是您的运维智能助手"}),v.jsx("p",{className:"text-gray-500 mt-2",children:"您可以询问故障排查、系统状态或上传截图进行分析"})]}),h.length>0&&v.jsxs("div",{className:"w-full max-w-2xl mt-8",children:[v.jsx("div",{className:"flex items-center justify-center gap-2 mb-4 text-gray-500",children:v.jsx("span",{className:"text-sm font-medium",children:"🔥 热门提问 Top 10"})}),v.jsx("div",{className:"flex flex-wrap justify-center gap-3",children:h.map((O,B)=>v.jsx(qo.button,{initial:{opacity:0,scale:.9},animate:{opacity:1,scale:1},transition:{delay:B*.05},onClick:()=>s(O),className:"px-4 py-2 bg-white border border-gray-200 hover:border-blue-400 hover:text-blue-600 hover:bg-blue-50 rounded-full text-sm text-gray-600 transition-all shadow-sm",children:O},B))})]})]}),r.map(O=>v.jsx(qo.div,{initial:{opacity:0,y:10},animate:{opacity:1,y:0},className:nt("flex w-full mb-6",O.role==="user"?"justify-end":"justify-start"),children:v.jsxs("div",{className:nt("flex max-w-[90%] md:max-w-[80%] gap-4",O.role==="user"?"flex-row-reverse":"flex-row"),children:[v.jsx("div",{className:nt("flex-shrink-0 w-8 h-8 rounded-full flex items-center justify-center mt-1",O.role==="user"?"bg-blue-600 text-white":"bg-white border border-gray-200"),children:O.role==="user"?v.jsx(Ap,{size:18}):v.jsx(bh,{size:18,className:"text-purple-600"})}),v.jsxs("div",{className:nt("flex flex-col space-y-2",O.role==="user"?"items-end":"items-start"),children:[v.jsxs("div",{className:nt("relative px-5 py-3 rounded-2xl text-base leading-relaxed",O.role==="user"?"bg-blue-600 text-white rounded-tr-sm":"bg-transparent text-gray-800 p-0"),children:[O.image&&v.jsx("div",{className:"mb-2",children:v.jsx("img",{src:O.image,alt:"User Upload",className:"max-w-full max-h-64 rounded-lg border border-gray-200/20 cursor-zoom-in hover:opacity-95 transition-opacity",onClick:()=>k(O.image),title:"点击放大查看"})}),O.role==="assistant"?v.jsx("div",{className:"prose prose-slate max-w-none prose-p:my-1 prose-headings:my-2 prose-code:bg-gray-100 prose-code:px-1 prose-code:py-0.5 prose-code:rounded prose-code:before:content-none prose-code:after:content-none prose-pre:bg-gray-50 prose-pre:border prose-pre:border-gray-200 prose-pre:text-gray-800",children:v.jsx(z4,{children:O.content})}):v.jsx("div",{className:"whitespace-pre-wrap",children:O.content}),O.sources&&O.sources.length>0&&v.jsxs("div",{className:"mt-3 pt-2 border-t border-gray-200/50",children:[v.jsxs("div",{className:"text-xs font-semibold text-gray-500 mb-2 flex items-center",children:[v.jsx(ka,{size:12,className:"mr-1"}),"参考文档"]}),v.jsx("div",{className:"flex flex-wrap gap-2",children:O.sources.map((B,G)=>v.jsxs("div",{className:"flex items-center bg-gray-50 text-xs text-gray-600 px-2 py-1.5 rounded-md border border-gray-200 hover:bg-gray-100 transition-colors",children:[v.jsx("span",{className:"max-w-[180px] truncate mr-2",title:B.filename,children:B.filename}),B.id?(e==null?void 0:e.role)!=="guest"&&v.jsx("button",{onClick:()=>$(B.id,B.filename),className:"text-blue-600 hover:text-blue-800 p-0.5 rounded hover:bg-blue-50",title:"下载",children:v.jsx(vi,{size:14})}):v.jsx("span",{className:"text-gray-400 text-[10px]",children:"(未索引ID)"})]},G))})]})]}),O.role==="assistant"&&O.id!=="welcome"&&v.jsxs("div",{className:"flex items-center space-x-3 px-2 pt-1",children:[v.jsx("span",{className:"text-xs text-gray-400",children:"是否解决了您的问题？"}),v.jsxs("div",{className:"flex space-x-2",children:[v.jsxs("button",{onClick:()=>F(O.id,"solved"),className:nt("flex items-center space-x-1 px-2 py-0.5 rounded-full transition-colors text-xs border",O.feedback==="solved"?"bg-green-100 text-green-700 border-green-200":"text-gray-500 hover:bg-gray-100 border-transparent bg-gray-50"),children:[v.jsx(l8,{size:12,className:nt(O.feedback==="solved"&&"fill-current")}),v.jsx("span",{children:"已解决"})]}),v.jsxs("button",{onClick:()=>F(O.id,"unsolved"),className:nt("flex items-center space-x-1 px-2 py-0.5 rounded-full transition-colors text-xs border",O.feedback==="unsolved"?"bg-red-100 text-red-700 border-red-200":"text-gray-500 hover:bg-gray-100 border-transparent bg-gray-50"),children:[v.jsx(a8,{size:12,className:nt(O.feedback==="unsolved"&&"fill-current")}),v.jsx("span",{children:"未解决"})]})]})]})]})]})},O.id)),u&&v.jsx("div",{className:"flex w-full justify-start mb-6",children:v.jsxs("div",{className:"flex max-w-[80%] gap-4",children:[v.jsx("div",{className:"flex-shrink-0 w-8 h-8 rounded-full flex items-center justify-center mt-1 bg-white border border-gray-200",children:v.jsx(bh,{size:18,className:"text-purple-600"})}),v.jsx("div",{className:"flex items-center h-10 px-4 bg-gray-50 rounded-2xl rounded-tl-none border border-gray-100",children:v.jsx("span",{className:"text-sm text-purple-600 font-medium animate-pulse",children:"大模型分析中..."})})]})}),v.jsx("div",{ref:E})]})}),v.jsx("div",{className:"p-4 bg-white border-t border-gray-100",children:v.jsxs("div",{className:"max-w-3xl mx-auto",children:[v.jsxs("div",{className:"bg-gray-100 rounded-[2rem] p-2 shadow-inner border border-gray-200 transition-all",children:[l&&v.jsxs("div",{className:"relative inline-block m-2",children:[v.jsx("img",{src:l,alt:"Preview",className:"h-16 w-16 object-cover rounded-lg border border-gray-300 cursor-zoom-in",onDoubleClick:()=>k(l),title:"双击放大查看"}),v.jsx("button",{onClick:()=>o(null),className:"absolute -top-2 -right-2 bg-gray-500 text-white rounded-full p-0.5 hover:bg-gray-700",children:v.jsx(es,{size:12})})]}),v.jsx("textarea",{ref:C,value:a,onChange:O=>s(O.target.value),onKeyDown:S,onPaste:A,placeholder:"向我提问...",rows:1,className:"w-full bg-transparent border-none focus:ring-0 focus:outline-none resize-none px-4 py-3 text-gray-700 placeholder-gray-400 min-h-[48px] max-h-32 overflow-y-auto",style:{height:a.trim()?"auto":"48px"}}),v.jsxs("div",{className:"flex items-center justify-between px-2 pb-1 pt-1",children:[v.jsxs("div",{className:"flex items-center space-x-1",children:[v.jsx(BB,{icon:H6,label:"图片",onClick:()=>{var O;return(O=R.current)==null?void 0:O.click()},active:!!l}),!1]}),v.jsx("button",{onClick:V,disabled:!a.trim()&&!l||u,className:nt("p-2 rounded-full transition-colors",!a.trim()&&!l||u?"bg-gray-200 text-gray-400 cursor-not-allowed":"bg-black text-white hover:bg-gray-800"),children:v.jsx(J6,{size:18})})]})]}),v.jsxs("div",{className:"text-center mt-2 text-xs text-gray-400 space-y-1",children:[v.jsx("p",{children:"问答将被记录 请勿询问和上传敏感信息"}),v.jsx("p",{children:"AI 生成的内容可能不准确，请核实重要信息。"})]})]})})]})}function BB({icon:e,label:t,onClick:n,active:r}){return v.jsxs("button",{onClick:n,className:nt("p-2 rounded-full hover:bg-gray-200 text-gray-500 transition-colors relative group",r&&"bg-blue-100 text-blue-600"),title:t,children:[v.jsx(e,{size:20,strokeWidth:1.5}),v.jsx("span",{className:"absolute -top-8 left-1/2 transform -translate-x-1/2 bg-gray-800 text-white text-xs py-1 px-2 rounded opacity-0 group-hover:opacity-100 transition-opacity pointer-events-none whitespace-nowrap z-10",children:t})]})}function PB(){const[e,t]=j.useState(JSON.parse(localStorage.getItem("auth"))||null),[n,r]=j.useState("chat"),[i,a]=j.useState(!1),[s,l]=j.useState(window.innerWidth<768),[o,u]=j.useState(!1);j.useEffect(()=>{const d=()=>{l(window.innerWidth<768),window.innerWidth>=768?a(!0):a(!1)};return window.addEventListener("resize",d),d(),()=>window.removeEventListener("resize",d)},[]);const c=()=>{localStorage.removeItem("auth"),t(null)},f=d=>{r(d),s&&a(!1)};return e?v.jsxs("div",{className:"flex h-screen bg-gray-50 overflow-hidden",children:[s&&i&&v.jsx("div",{className:"fixed inset-0 bg-black/50 z-40 animate-in fade-in",onClick:()=>a(!1)}),v.jsx("div",{className:nt("fixed md:relative z-50 h-full transition-transform duration-300 ease-in-out",i?"translate-x-0":"-translate-x-full","md:translate-x-0"),children:v.jsx(MB,{activeView:n,onViewChange:f,userRole:e.role,username:e.username,onLogout:c,onUpload:()=>u(!0)})}),v.jsxs("div",{className:"flex-1 flex flex-col h-full w-full relative bg-white md:bg-gray-50",children:[v.jsxs("div",{className:"md:hidden p-4 bg-white border-b border-gray-200 flex items-center justify-between sticky top-0 z-30",children:[v.jsxs("div",{className:"flex items-center space-x-3",children:[v.jsx("button",{onClick:()=>a(!0),className:"p-2 hover:bg-gray-100 rounded-lg",children:v.jsx(G6,{size:24,className:"text-gray-700"})}),v.jsx("span",{className:"font-bold text-gray-800 text-lg",children:"Ops Agent"})]}),v.jsx("div",{className:"text-xs text-gray-500 bg-gray-100 px-2 py-1 rounded-full",children:e.username})]}),v.jsxs("div",{className:"flex-1 overflow-hidden relative",children:[n==="chat"&&v.jsx(LB,{auth:e,onLogout:c}),n==="training"&&v.jsx(jB,{}),n==="approval"&&v.jsx(DB,{}),n==="global_logs"&&v.jsx(OB,{}),n==="unknown"&&v.jsx(Hk,{userRole:e.role}),n==="learning"&&v.jsx(Fk,{userRole:e.role}),n==="knowledge"&&v.jsx(PL,{auth:e,onUpload:()=>u(!0)}),n==="dashboard"&&v.jsx(NB,{userRole:e.role})]})]}),v.jsx(Ik,{isOpen:o,onClose:()=>u(!1),onUpload:d=>{u(!1)},userRole:e==null?void 0:e.role})]}):v.jsxs(HA,{children:[v.jsx(zd,{path:"/login",element:v.jsx(h8,{setAuth:t})}),v.jsx(zd,{path:"*",element:v.jsx(VA,{to:"/login"})})]})}q_.createRoot(document.getElementById("root")).render(v.jsx(cE.StrictMode,{children:v.jsx(dT,{children:v.jsx(PB,{})})}));
@@ -2,6 +2,7 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -100,7 +101,8 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user(token_data.username)
+    # DB lookup off the event loop so async endpoints are not blocked
+    user = await run_in_threadpool(get_user, token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -1,5 +1,50 @@
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional
+from metrics import Counter
+
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used, as reported by the provider", ["model", "kind"])
+
+
+def get_embedding_batch_size() -> int:
+    """
+    Number of texts sent per embedding request (EMBEDDING_BATCH_SIZE, default 32).
+    """
+    try:
+        return max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "32")))
+    except ValueError:
+        return 32
+
+
+def stream_usage_enabled() -> bool:
+    """
+    Ask OpenAI-compatible servers for a usage chunk at the end of streams
+    (LLM_STREAM_USAGE, default true). Turn off for servers that reject
+    stream_options.
+    """
+    return os.getenv("LLM_STREAM_USAGE", "true").lower() in ("1", "true", "yes")
+
+
+def record_usage(model: str, usage=None, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+    """
+    Count token usage; usage is the provider's usage object or dict
+    (prompt_tokens / completion_tokens), explicit counts take precedence.
+    """
+    if usage is not None:
+        get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+        prompt_tokens = prompt_tokens if prompt_tokens is not None else get("prompt_tokens")
+        completion_tokens = completion_tokens if completion_tokens is not None else get("completion_tokens")
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+
+def iter_batches(texts: List[str], batch_size: int) -> Iterator[List[str]]:
+    for i in range(0, len(texts), batch_size):
+        yield texts[i:i + batch_size]
+
 
 class BaseLLM(ABC):
     @abstractmethod
@@ -10,6 +55,48 @@ class BaseLLM(ABC):
         """
         pass
 
+    def chat_stream(self, messages: List[dict], temperature: float = 0.7) -> Iterator[str]:
+        """
+        Chat with the LLM, yielding the answer in pieces as they are generated.
+        The default yields the whole chat() answer at once.
+        """
+        yield self.chat(messages, temperature=temperature)
+
+    async def achat(self, messages: List[dict], temperature: float = 0.7) -> str:
+        """
+        Async chat. Providers with an async HTTP client override this; the
+        default runs chat() in a worker thread.
+        """
+        return await asyncio.to_thread(self.chat, messages, temperature)
+
+    async def achat_stream(self, messages: List[dict], temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Async chat_stream. The default drives chat_stream() in a worker thread
+        and hands each piece over to the event loop as it arrives.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for token in self.chat_stream(messages, temperature=temperature):
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+
 class BaseEmbedding(ABC):
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
@@ -17,3 +104,23 @@ class BaseEmbedding(ABC):
         Get embedding for a single text string.
         """
         pass
+
+    def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Get embeddings for a list of texts, in input order.
+        Providers that accept list input override this to send batch_size
+        texts per request; the default makes one embed_text call per text.
+        """
+        return [self.embed_text(text) for text in texts]
+
+    async def aembed_text(self, text: str) -> List[float]:
+        """
+        Async embed_text. The default runs embed_text() in a worker thread.
+        """
+        return await asyncio.to_thread(self.embed_text, text)
+
+    async def aembed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Async embed_batch. The default runs embed_batch() in a worker thread.
+        """
+        return await asyncio.to_thread(self.embed_batch, texts, batch_size)
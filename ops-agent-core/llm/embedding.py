@@ -1,9 +1,79 @@
+import asyncio
+from typing import List, Optional
+from llm.embedding_cache import current_model_id, embedding_cache, text_hash
 from llm.factory import get_embedding_client
 
+def _lookup(texts: List[str]):
+    """
+    查询缓存，返回 (model, hashes, vectors, missing)，missing 为未命中的 hash 列表 (去重)
+    """
+    model = current_model_id()
+    hashes = [text_hash(t) for t in texts]
+    vectors = embedding_cache.get_memory(model, hashes)
+    missing = list(dict.fromkeys(h for h, v in zip(hashes, vectors) if v is None))
+    return model, hashes, vectors, missing
+
+def _fill(hashes: List[str], vectors: List, found: dict) -> List[list[float]]:
+    return [v if v is not None else found.get(h, []) for h, v in zip(hashes, vectors)]
+
 def embed_text(text: str) -> list[float]:
     """
     调用统一 Embedding 接口，返回向量 list[float]
     支持 ZhipuAI 和 Ollama (通过 LLM_PROVIDER 环境变量切换)
     """
+    return embed_batch([text])[0]
+
+def embed_batch(texts: List[str], batch_size: Optional[int] = None) -> List[list[float]]:
+    """
+    批量获取向量，按 batch_size (默认 EMBEDDING_BATCH_SIZE) 分批请求，返回顺序与输入一致
+    已缓存的文本 (model + sha256) 不会再请求模型
+    """
+    if not texts:
+        return []
+    client = get_embedding_client()
+    if not embedding_cache.enabled:
+        return client.embed_batch(texts, batch_size=batch_size) if len(texts) > 1 else [client.embed_text(texts[0])]
+
+    model, hashes, vectors, missing = _lookup(texts)
+    if not missing:
+        return vectors
+    found = embedding_cache.get_persistent(model, missing)
+    missing = [h for h in missing if h not in found]
+    if missing:
+        embedding_cache.record_misses(len(missing))
+        text_by_hash = dict(zip(hashes, texts))
+        missing_texts = [text_by_hash[h] for h in missing]
+        new_vectors = client.embed_batch(missing_texts, batch_size=batch_size) if len(missing_texts) > 1 else [client.embed_text(missing_texts[0])]
+        embedding_cache.put(model, missing, new_vectors)
+        found.update(zip(missing, new_vectors))
+    return _fill(hashes, vectors, found)
+
+async def aembed_text(text: str) -> list[float]:
+    """
+    embed_text 的异步版本
+    """
+    return (await aembed_batch([text]))[0]
+
+async def aembed_batch(texts: List[str], batch_size: Optional[int] = None) -> List[list[float]]:
+    """
+    embed_batch 的异步版本 (缓存的数据库查询在工作线程中执行)
+    """
+    if not texts:
+        return []
     client = get_embedding_client()
-    return client.embed_text(text)
+    if not embedding_cache.enabled:
+        return await client.aembed_batch(texts, batch_size=batch_size) if len(texts) > 1 else [await client.aembed_text(texts[0])]
+
+    model, hashes, vectors, missing = _lookup(texts)
+    if not missing:
+        return vectors
+    found = await asyncio.to_thread(embedding_cache.get_persistent, model, missing)
+    missing = [h for h in missing if h not in found]
+    if missing:
+        embedding_cache.record_misses(len(missing))
+        text_by_hash = dict(zip(hashes, texts))
+        missing_texts = [text_by_hash[h] for h in missing]
+        new_vectors = await client.aembed_batch(missing_texts, batch_size=batch_size) if len(missing_texts) > 1 else [await client.aembed_text(missing_texts[0])]
+        await asyncio.to_thread(embedding_cache.put, model, missing, new_vectors)
+        found.update(zip(missing, new_vectors))
+    return _fill(hashes, vectors, found)
@@ -0,0 +1,236 @@
+"""
+Content-addressed embedding cache in front of llm.embedding.
+
+Entries are keyed by (model, sha256(text)). Tier 1 is an in-process LRU,
+tier 2 the Postgres table embedding_cache, so re-ingesting unchanged
+content or re-asking a question never re-embeds it, even after a restart.
+When EMBEDDING_MODEL (or the provider) changes, the in-memory tier is
+dropped and rows of other models are purged from the table.
+
+Settings (env):
+    EMBEDDING_CACHE_ENABLED   "false" to bypass the cache (default true)
+    EMBEDDING_CACHE_SIZE      in-memory entries (default 10000)
+    EMBEDDING_CACHE_PERSIST   "false" to keep the cache in memory only
+    EMBEDDING_CACHE_MAX_ROWS  rows kept per model in Postgres (default 500000)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from settings import env_int
+
+PRUNE_EVERY = 1000
+
+
+def _enabled(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def text_hash(text_value: str) -> str:
+    return hashlib.sha256(text_value.encode("utf-8")).hexdigest()
+
+
+def current_model_id() -> str:
+    """
+    Identity of the configured embedding model; vectors of different
+    models never mix.
+    """
+    provider = os.getenv("LLM_PROVIDER", "zhipu").lower()
+    if provider == "mock":
+        # Mock vectors are sized by config, not by a model name
+        return f"mock:{os.getenv('MOCK_EMBEDDING_DIM', '1024')}"
+    return f"{provider}:{os.getenv('EMBEDDING_MODEL', 'default')}"
+
+
+class EmbeddingCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._model = None
+        self._persist_failed = False
+        self._inserted_since_prune = 0
+        self.hits_memory = 0
+        self.hits_db = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return _enabled("EMBEDDING_CACHE_ENABLED")
+
+    @property
+    def persistent(self) -> bool:
+        return _enabled("EMBEDDING_CACHE_PERSIST") and not self._persist_failed
+
+    def _check_model(self, model: str):
+        if self._model == model:
+            return
+        with self._lock:
+            if self._model == model:
+                return
+            previous, self._model = self._model, model
+            self._memory.clear()
+        if previous is not None:
+            print(f"Embedding model changed ({previous} -> {model}), invalidating embedding cache")
+            self.purge_other_models(model)
+
+    def get_memory(self, model: str, hashes: List[str]) -> List[Optional[list]]:
+        self._check_model(model)
+        result = []
+        with self._lock:
+            for h in hashes:
+                vector = self._memory.get(h)
+                if vector is not None:
+                    self._memory.move_to_end(h)
+                    self.hits_memory += 1
+                result.append(vector)
+        return result
+
+    def get_persistent(self, model: str, hashes: List[str]) -> dict:
+        """
+        Look up hashes in Postgres; found vectors are promoted to memory.
+        """
+        if not hashes or not self.persistent:
+            return {}
+        try:
+            from db import engine
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    text("""
+                        UPDATE embedding_cache SET last_used_at = CURRENT_TIMESTAMP
+                        WHERE model = :model AND text_hash = ANY(:hashes)
+                        RETURNING text_hash, embedding
+                    """),
+                    {"model": model, "hashes": list(hashes)}
+                ).fetchall()
+        except Exception as e:
+            self._disable_persistence(e)
+            return {}
+        found = {row[0]: list(row[1]) for row in rows}
+        with self._lock:
+            self.hits_db += len(found)
+        self._remember(found)
+        return found
+
+    def put(self, model: str, hashes: List[str], vectors: List[list]):
+        entries = {h: v for h, v in zip(hashes, vectors) if v}
+        if not entries:
+            return
+        self._remember(entries)
+        if not self.persistent:
+            return
+        try:
+            from db import engine
+            with engine.begin() as conn:
+                conn.execute(
+                    text("""
+                        INSERT INTO embedding_cache (model, text_hash, embedding)
+                        VALUES (:model, :text_hash, :embedding)
+                        ON CONFLICT (model, text_hash) DO NOTHING
+                    """),
+                    [{"model": model, "text_hash": h, "embedding": v} for h, v in entries.items()]
+                )
+        except Exception as e:
+            self._disable_persistence(e)
+            return
+        with self._lock:
+            self._inserted_since_prune += len(entries)
+            prune = self._inserted_since_prune >= PRUNE_EVERY
+            if prune:
+                self._inserted_since_prune = 0
+        if prune:
+            self.prune(model)
+
+    def record_misses(self, count: int):
+        with self._lock:
+            self.misses += count
+
+    def _remember(self, entries: dict):
+        size = max(0, env_int("EMBEDDING_CACHE_SIZE", 10000))
+        with self._lock:
+            for h, vector in entries.items():
+                self._memory[h] = vector
+                self._memory.move_to_end(h)
+            while len(self._memory) > size:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def _disable_persistence(self, error: Exception):
+        # A missing table (scripts run without the app's startup migrations)
+        # disables the tier for good; anything else (DB briefly unreachable)
+        # only skips this lookup. The in-memory tier keeps working either way.
+        if isinstance(error, ProgrammingError):
+            print(f"Embedding cache: persistent tier disabled: {error}")
+            self._persist_failed = True
+        else:
+            print(f"Embedding cache: persistent tier unavailable: {error}")
+
+    def prune(self, model: str):
+        """
+        Keep only the EMBEDDING_CACHE_MAX_ROWS most recently used rows of model.
+        """
+        try:
+            from db import engine
+            with engine.begin() as conn:
+                result = conn.execute(
+                    text("""
+                        DELETE FROM embedding_cache
+                        WHERE model = :model AND text_hash IN (
+                            SELECT text_hash FROM embedding_cache
+                            WHERE model = :model
+                            ORDER BY last_used_at DESC
+                            OFFSET :max_rows
+                        )
+                    """),
+                    {"model": model, "max_rows": env_int("EMBEDDING_CACHE_MAX_ROWS", 500000)}
+                )
+                with self._lock:
+                    self.evictions += result.rowcount or 0
+        except Exception as e:
+            print(f"Embedding cache prune failed: {e}")
+
+    def purge_other_models(self, model: str):
+        if not self.persistent:
+            return
+        try:
+            from db import engine
+            with engine.begin() as conn:
+                result = conn.execute(text("DELETE FROM embedding_cache WHERE model <> :model"), {"model": model})
+                if result.rowcount:
+                    print(f"Embedding cache: purged {result.rowcount} rows of previous models")
+        except Exception as e:
+            self._disable_persistence(e)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.persistent and self._model:
+            try:
+                from db import engine
+                with engine.begin() as conn:
+                    conn.execute(text("DELETE FROM embedding_cache WHERE model = :model"), {"model": self._model})
+            except Exception as e:
+                print(f"Embedding cache clear failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_db + self.misses
+            return {
+                "model": self._model,
+                "memory_entries": len(self._memory),
+                "memory_capacity": env_int("EMBEDDING_CACHE_SIZE", 10000),
+                "persistent": self.persistent,
+                "hits_memory": self.hits_memory,
+                "hits_db": self.hits_db,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits_memory + self.hits_db) / lookups, 4) if lookups else 0.0,
+            }
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,414 @@
+"""
+Replicated model endpoints: load balancing, retries, circuit breaking and
+hedged requests.
+
+A service (chat or embedding) may be configured with several base URLs,
+comma-separated or as a YAML list. Each request goes to the available
+replica with the fewest outstanding requests. Transient failures
+(connection errors, timeouts, HTTP 429/5xx) are retried on another replica
+with exponential backoff and jitter. Client errors (other 4xx) are not
+retried. A replica that fails LLM_BREAKER_THRESHOLD times in a row is taken
+out of rotation for LLM_BREAKER_COOLDOWN seconds. After that a single probe
+request decides whether it comes back.
+
+Async embedding requests can be hedged: if the first replica has not
+answered after EMBEDDING_HEDGE_DELAY_MS, the same request is sent to a
+second replica and whichever answers first wins. Streams are only retried
+until their first token.
+
+Endpoint state is shared per URL across clients and visible through
+endpoint_health().
+
+Settings (env, or llm.* in config.yaml):
+    LLM_RETRIES               retries after the first attempt (default 2)
+    LLM_RETRY_BACKOFF         base backoff in seconds, doubled per retry (default 0.5)
+    LLM_BREAKER_THRESHOLD     consecutive failures that open the circuit (default 5)
+    LLM_BREAKER_COOLDOWN      seconds before an open circuit is probed (default 30)
+    EMBEDDING_HEDGE_DELAY_MS  hedge async embeddings after this delay, 0 = off (default 0)
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, TypeVar, Union
+
+import httpx
+import requests
+from metrics import CallbackMetric, Counter, Histogram
+from settings import env_float
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+MAX_BACKOFF = 10.0
+
+_TRANSIENT_ERRORS = [httpx.TransportError, requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError]
+try:
+    from openai import APIConnectionError as _OpenAIConnectionError
+    _TRANSIENT_ERRORS.append(_OpenAIConnectionError)
+except ImportError:
+    pass
+try:
+    from zhipuai.core._errors import APIConnectionError as _ZhipuConnectionError
+    _TRANSIENT_ERRORS.append(_ZhipuConnectionError)
+except ImportError:
+    pass
+_TRANSIENT_ERRORS = tuple(_TRANSIENT_ERRORS)
+
+_lock = threading.Lock()
+_endpoints = {}
+_pools = {}
+
+
+UPSTREAM_SECONDS = Histogram("llm_upstream_request_seconds", "Model endpoint requests (streams until the last token)",
+                             ["endpoint", "outcome"])
+UPSTREAM_RETRIES = Counter("llm_upstream_retries_total", "Requests retried after a transient failure", ["endpoint"])
+UPSTREAM_HEDGES = Counter("llm_upstream_hedges_total", "Hedged second requests sent", ["endpoint"])
+
+
+class EndpointUnavailable(Exception):
+    """
+    Every replica of the service has an open circuit.
+    """
+
+
+def get_retries() -> int:
+    return max(0, int(env_float("LLM_RETRIES", 2)))
+
+
+def get_hedge_delay() -> float:
+    """
+    Hedge delay in seconds; 0 disables hedging.
+    """
+    return max(0.0, env_float("EMBEDDING_HEDGE_DELAY_MS", 0)) / 1000
+
+
+def parse_urls(value: Union[str, List[str], None]) -> List[str]:
+    """
+    "http://a/v1, http://b/v1" or a list -> ["http://a/v1", "http://b/v1"]
+    """
+    if not value:
+        return []
+    items = value if isinstance(value, (list, tuple)) else str(value).split(",")
+    return [u for u in (str(item).strip().strip("`").strip().rstrip("/") for item in items) if u]
+
+
+def http_status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = http_status(error)
+    if status is not None:
+        return status >= 500 or status in (408, 429)
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.state = CLOSED
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.latency = None  # EWMA of successful requests, seconds
+        self.last_error = None
+
+    def available(self, now: float) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now - self.opened_at >= env_float("LLM_BREAKER_COOLDOWN", 30.0)
+        # HALF_OPEN: the probe is still in flight
+        return False
+
+    def health(self) -> dict:
+        return {
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED else None,
+            "last_error": self.last_error,
+        }
+
+
+class EndpointPool:
+    def __init__(self, urls: List[str]):
+        if not urls:
+            raise ValueError("no endpoint configured")
+        with _lock:
+            self.endpoints = [_endpoints.setdefault(url, Endpoint(url)) for url in urls]
+
+    @property
+    def urls(self) -> List[str]:
+        return [e.url for e in self.endpoints]
+
+    @property
+    def size(self) -> int:
+        return len(self.endpoints)
+
+    def pick(self, exclude=(), allow_repeat: bool = True) -> Optional[Endpoint]:
+        """
+        Reserve the available replica with the fewest outstanding requests,
+        preferring replicas not in exclude. Returns None when allow_repeat is
+        false and no untried replica is left.
+        """
+        now = time.monotonic()
+        with _lock:
+            candidates = [e for e in self.endpoints if e.url not in exclude and e.available(now)]
+            if not candidates:
+                if not allow_repeat:
+                    return None
+                candidates = [e for e in self.endpoints if e.available(now)]
+            if not candidates:
+                raise EndpointUnavailable(f"all endpoints unavailable (circuit open): {', '.join(self.urls)}")
+            least = min(e.outstanding for e in candidates)
+            endpoint = random.choice([e for e in candidates if e.outstanding == least])
+            if endpoint.state == OPEN:
+                # Cooldown is over: this request is the probe
+                endpoint.state = HALF_OPEN
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _done(self, endpoint: Endpoint, started: float, error: Optional[BaseException] = None, finished: bool = True):
+        outcome = "cancelled" if not finished else "ok" if error is None else "error"
+        UPSTREAM_SECONDS.observe(time.monotonic() - started, endpoint=endpoint.url, outcome=outcome)
+        with _lock:
+            endpoint.outstanding -= 1
+            if not finished:
+                # Cancelled (hedge lost, client went away): no verdict on the replica
+                if endpoint.state == HALF_OPEN:
+                    endpoint.state = OPEN
+                return
+            if error is None:
+                elapsed = time.monotonic() - started
+                endpoint.latency = elapsed if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * elapsed
+                endpoint.consecutive_failures = 0
+                if endpoint.state != CLOSED:
+                    print(f"Endpoint {endpoint.url} recovered, closing circuit")
+                endpoint.state = CLOSED
+            elif is_retryable(error):
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                endpoint.last_error = str(error)[:200]
+                threshold = max(1, int(env_float("LLM_BREAKER_THRESHOLD", 5)))
+                if endpoint.state == HALF_OPEN or endpoint.consecutive_failures >= threshold:
+                    if endpoint.state != OPEN:
+                        print(f"Endpoint {endpoint.url} failing ({endpoint.consecutive_failures} in a row), opening circuit")
+                    endpoint.state = OPEN
+                    endpoint.opened_at = time.monotonic()
+            elif endpoint.state == HALF_OPEN:
+                # The replica answered; the request itself was rejected
+                endpoint.state = CLOSED
+
+    def _next(self, tried: set, error: Optional[Exception]) -> Endpoint:
+        # On a retry with every circuit open, the failure that got us here is
+        # more telling than EndpointUnavailable
+        try:
+            endpoint = self.pick(tried)
+        except EndpointUnavailable:
+            if error is not None:
+                raise error
+            raise
+        tried.add(endpoint.url)
+        return endpoint
+
+    def _backoff(self, retry: int) -> float:
+        base = env_float("LLM_RETRY_BACKOFF", 0.5)
+        return random.uniform(0, min(MAX_BACKOFF, base * 2 ** (retry - 1)))
+
+    def _should_retry(self, error: Exception, endpoint: Endpoint, retry: int, retries: int) -> bool:
+        if retry >= retries or not is_retryable(error):
+            return False
+        print(f"Request to {endpoint.url} failed ({error}), retry {retry + 1}/{retries}")
+        UPSTREAM_RETRIES.inc(endpoint=endpoint.url)
+        return True
+
+    def call(self, fn: Callable[[str], T]) -> T:
+        """
+        Run fn(base_url) on a replica, retrying transient failures elsewhere.
+        """
+        retries = get_retries()
+        tried = set()
+        error = None
+        for retry in range(retries + 1):
+            if retry:
+                time.sleep(self._backoff(retry))
+            endpoint = self._next(tried, error)
+            started = time.monotonic()
+            try:
+                result = fn(endpoint.url)
+            except Exception as e:
+                self._done(endpoint, started, e)
+                if not self._should_retry(e, endpoint, retry, retries):
+                    raise
+                error = e
+                continue
+            except BaseException:
+                self._done(endpoint, started, finished=False)
+                raise
+            self._done(endpoint, started)
+            return result
+
+    async def _arun(self, endpoint: Endpoint, fn: Callable[[str], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        try:
+            result = await fn(endpoint.url)
+        except Exception as e:
+            self._done(endpoint, started, e)
+            raise
+        except BaseException:
+            self._done(endpoint, started, finished=False)
+            raise
+        self._done(endpoint, started)
+        return result
+
+    async def _ahedged(self, fn: Callable[[str], Awaitable[T]], delay: float, tried: set,
+                       error: Optional[Exception] = None) -> T:
+        first = self._next(tried, error)
+        pending = {asyncio.ensure_future(self._arun(first, fn))}
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            second = self.pick(tried, allow_repeat=False)
+            if second is not None:
+                tried.add(second.url)
+                UPSTREAM_HEDGES.inc(endpoint=second.url)
+                pending.add(asyncio.ensure_future(self._arun(second, fn)))
+        try:
+            while done or pending:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def acall(self, fn: Callable[[str], Awaitable[T]], hedge_delay: float = 0) -> T:
+        """
+        Async call(); with hedge_delay > 0 a slow attempt is duplicated on a
+        second replica.
+        """
+        retries = get_retries()
+        tried = set()
+        error = None
+        for retry in range(retries + 1):
+            if retry:
+                await asyncio.sleep(self._backoff(retry))
+            if hedge_delay > 0 and self.size > 1:
+                try:
+                    return await self._ahedged(fn, hedge_delay, tried, error)
+                except Exception as e:
+                    if e is error or retry >= retries or not is_retryable(e):
+                        raise
+                    print(f"Hedged request failed ({e}), retry {retry + 1}/{retries}")
+                    error = e
+                    continue
+            endpoint = self._next(tried, error)
+            try:
+                return await self._arun(endpoint, fn)
+            except Exception as e:
+                if not self._should_retry(e, endpoint, retry, retries):
+                    raise
+                error = e
+
+    def stream(self, fn: Callable[[str], Iterator[T]]) -> Iterator[T]:
+        """
+        call() for streams: retried only while nothing has been yielded.
+        """
+        retries = get_retries()
+        tried = set()
+        error = None
+        for retry in range(retries + 1):
+            if retry:
+                time.sleep(self._backoff(retry))
+            endpoint = self._next(tried, error)
+            started = time.monotonic()
+            yielded = False
+            try:
+                for item in fn(endpoint.url):
+                    yielded = True
+                    yield item
+            except Exception as e:
+                self._done(endpoint, started, e)
+                if yielded or not self._should_retry(e, endpoint, retry, retries):
+                    raise
+                error = e
+                continue
+            except BaseException:
+                self._done(endpoint, started, finished=False)
+                raise
+            self._done(endpoint, started)
+            return
+
+    async def astream(self, fn: Callable[[str], AsyncIterator[T]]) -> AsyncIterator[T]:
+        retries = get_retries()
+        tried = set()
+        error = None
+        for retry in range(retries + 1):
+            if retry:
+                await asyncio.sleep(self._backoff(retry))
+            endpoint = self._next(tried, error)
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for item in fn(endpoint.url):
+                    yielded = True
+                    yield item
+            except Exception as e:
+                self._done(endpoint, started, e)
+                if yielded or not self._should_retry(e, endpoint, retry, retries):
+                    raise
+                error = e
+                continue
+            except BaseException:
+                self._done(endpoint, started, finished=False)
+                raise
+            self._done(endpoint, started)
+            return
+
+
+def get_pool(urls: Union[str, List[str]]) -> EndpointPool:
+    """
+    Shared EndpointPool for a base URL setting (see parse_urls).
+    """
+    key = tuple(parse_urls(urls))
+    with _lock:
+        pool = _pools.get(key)
+    if pool is None:
+        pool = EndpointPool(list(key))
+        with _lock:
+            pool = _pools.setdefault(key, pool)
+    return pool
+
+
+def endpoint_health() -> dict:
+    with _lock:
+        return {url: endpoint.health() for url, endpoint in _endpoints.items()}
+
+
+def _endpoint_samples(value: Callable[[Endpoint], float]):
+    with _lock:
+        return [({"endpoint": url}, value(endpoint)) for url, endpoint in _endpoints.items()]
+
+
+CallbackMetric("llm_endpoint_outstanding", "Requests outstanding per model endpoint replica", ["endpoint"],
+               lambda: _endpoint_samples(lambda e: e.outstanding))
+CallbackMetric("llm_endpoint_circuit_open", "1 while the replica's circuit breaker is open or half-open", ["endpoint"],
+               lambda: _endpoint_samples(lambda e: 0 if e.state == CLOSED else 1))
@@ -1,40 +1,60 @@
 import os
 from .base import BaseLLM, BaseEmbedding
+from .registry import get_client
 
 def get_llm_client(model: str = None) -> BaseLLM:
+    """
+    Shared LLM client for the current provider config (see llm/registry.py).
+    """
     provider = os.getenv("LLM_PROVIDER", "zhipu").lower()
     if provider == "ollama":
         from .ollama_client import OllamaLLM
-        return OllamaLLM(model=model or os.getenv("LLM_MODEL", "qwen:7b"))
+        model = model or os.getenv("LLM_MODEL", "qwen:7b")
+        base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        return get_client(("llm", provider, model, base_url),
+                          lambda: OllamaLLM(base_url=base_url, model=model))
     elif provider == "mock":
         from .mock_client import MockLLM
-        return MockLLM(model=model or "mock")
+        model = model or "mock"
+        return get_client(("llm", provider, model), lambda: MockLLM(model=model))
     elif provider in ["deepseek-v3", "openai"]:
         from .openai_client import OpenAICompatibleLLM
-        return OpenAICompatibleLLM(
-            model=model or os.getenv("LLM_MODEL", "DeepSeek-V3"),
-            base_url=os.getenv("LLM_BASE_URL"),
-            api_key=os.getenv("LLM_API_KEY")
-        )
+        model = model or os.getenv("LLM_MODEL", "DeepSeek-V3")
+        base_url = os.getenv("LLM_BASE_URL")
+        api_key = os.getenv("LLM_API_KEY")
+        return get_client(("llm", provider, model, base_url, api_key),
+                          lambda: OpenAICompatibleLLM(model=model, base_url=base_url, api_key=api_key))
     else:
         from .zhipu_client import ZhipuLLM
-        return ZhipuLLM(model=model or os.getenv("LLM_MODEL", "glm-4"))
+        model = model or os.getenv("LLM_MODEL", "glm-4")
+        api_key = os.getenv("ZHIPUAI_API_KEY")
+        return get_client(("llm", provider, model, api_key),
+                          lambda: ZhipuLLM(api_key=api_key, model=model))
 
 def get_embedding_client() -> BaseEmbedding:
+    """
+    Shared embedding client for the current provider config (see llm/registry.py).
+    """
     provider = os.getenv("LLM_PROVIDER", "zhipu").lower()
     if provider == "ollama":
         from .ollama_client import OllamaEmbedding
-        return OllamaEmbedding(model=os.getenv("EMBEDDING_MODEL", "nomic-embed-text"))
+        model = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+        base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        return get_client(("embedding", provider, model, base_url),
+                          lambda: OllamaEmbedding(base_url=base_url, model=model))
     elif provider == "mock":
         from .mock_client import MockEmbedding
-        return MockEmbedding(model="mock")
+        return get_client(("embedding", provider, "mock"), lambda: MockEmbedding(model="mock"))
     elif provider in ["deepseek-v3", "openai"]:
         from .openai_client import OpenAICompatibleEmbedding
-        return OpenAICompatibleEmbedding(
-            model=os.getenv("EMBEDDING_MODEL", "BAAI_bge-m3"),
-            base_url=os.getenv("EMBEDDING_BASE_URL") or os.getenv("LLM_BASE_URL"),
-            api_key=os.getenv("LLM_API_KEY")
-        )
+        model = os.getenv("EMBEDDING_MODEL", "BAAI_bge-m3")
+        base_url = os.getenv("EMBEDDING_BASE_URL") or os.getenv("LLM_BASE_URL")
+        api_key = os.getenv("LLM_API_KEY")
+        return get_client(("embedding", provider, model, base_url, api_key),
+                          lambda: OpenAICompatibleEmbedding(model=model, base_url=base_url, api_key=api_key))
     else:
         from .zhipu_client import ZhipuEmbedding
-        return ZhipuEmbedding(model=os.getenv("EMBEDDING_MODEL", "embedding-2"))
+        model = os.getenv("EMBEDDING_MODEL", "embedding-2")
+        api_key = os.getenv("ZHIPUAI_API_KEY")
+        return get_client(("embedding", provider, model, api_key),
+                          lambda: ZhipuEmbedding(api_key=api_key, model=model))
@@ -0,0 +1,192 @@
+"""
+Concurrency governor for calls to the chat models.
+
+Every LLM endpoint gets at most LLM_MAX_INFLIGHT concurrent requests per
+replica (see llm/endpoints.py) from this process; further callers wait in
+a priority queue ordered by role (admin > user > guest) and, within a
+role, first come first served. A
+caller that waits longer than LLM_QUEUE_TIMEOUT gives up with
+LLMQueueTimeout instead of piling onto an overloaded endpoint, where it
+would time out anyway. Streaming calls hold their slot until the stream
+ends.
+
+Settings (env, or llm.* in config.yaml):
+    LLM_MAX_INFLIGHT   concurrent requests per endpoint replica (default 8)
+    LLM_QUEUE_TIMEOUT  max. seconds a request waits for a slot (default 30)
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from metrics import CallbackMetric, Counter, Histogram, record_stage
+from settings import env_float
+
+ROLE_PRIORITY = {"admin": 0, "user": 1, "guest": 2}
+DEFAULT_ROLE = "user"
+
+# Wait times kept per endpoint for the percentiles in stats()
+WAIT_SAMPLES = 1000
+
+
+QUEUE_WAIT = Histogram("llm_queue_wait_seconds", "Time spent waiting for an LLM slot", ["endpoint", "role"])
+QUEUE_TIMEOUTS = Counter("llm_queue_timeouts_total", "Requests that gave up waiting for an LLM slot", ["endpoint", "role"])
+
+
+class LLMQueueTimeout(Exception):
+    pass
+
+
+def get_max_inflight() -> int:
+    return max(1, int(env_float("LLM_MAX_INFLIGHT", 8)))
+
+
+def get_queue_timeout() -> float:
+    return env_float("LLM_QUEUE_TIMEOUT", 30.0)
+
+
+def endpoint_of(client) -> str:
+    """
+    Key the governor uses for a client: its base URL(s), or the client
+    class for SDK providers with a fixed endpoint.
+    """
+    return getattr(client, "base_url", None) or type(client).__name__
+
+
+class EndpointGovernor:
+    """
+    Slots of one endpoint. Only used from the event loop, so no locking.
+    """
+    def __init__(self, endpoint: str, replicas: int = 1):
+        self.endpoint = endpoint
+        self.replicas = replicas
+        self.inflight = 0
+        self._waiters = []  # heap of [priority, seq, future, role]
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.acquired = {role: 0 for role in ROLE_PRIORITY}
+        self.timeouts = {role: 0 for role in ROLE_PRIORITY}
+        self.wait_total = {role: 0.0 for role in ROLE_PRIORITY}
+        self.wait_max = {role: 0.0 for role in ROLE_PRIORITY}
+        self.queue_peak = 0
+
+    def max_inflight(self) -> int:
+        return get_max_inflight() * self.replicas
+
+    async def acquire(self, role: str):
+        role = role if role in ROLE_PRIORITY else DEFAULT_ROLE
+        start = time.monotonic()
+        if self.inflight < self.max_inflight() and not self._waiters:
+            self.inflight += 1
+            self._record_wait(role, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [ROLE_PRIORITY[role], next(self._seq), future, role]
+        heapq.heappush(self._waiters, entry)
+        self.queue_peak = max(self.queue_peak, len(self._waiters))
+        timeout = get_queue_timeout()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts[role] += 1
+                QUEUE_TIMEOUTS.inc(endpoint=self.endpoint, role=role)
+                raise LLMQueueTimeout(
+                    f"LLM endpoint {self.endpoint} busy: no slot within {timeout:.0f}s "
+                    f"({self.inflight} in flight, {len(self._waiters)} queued)"
+                ) from None
+            raise
+        # release() transferred its slot to us; inflight is unchanged
+        self._record_wait(role, time.monotonic() - start)
+
+    def release(self):
+        # Hand the slot straight to the next waiter so nobody can jump the queue
+        if self.inflight <= self.max_inflight():
+            while self._waiters:
+                _, _, future, _ = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self.inflight -= 1
+
+    def _record_wait(self, role: str, waited: float):
+        self.acquired[role] += 1
+        self.wait_total[role] += waited
+        self.wait_max[role] = max(self.wait_max[role], waited)
+        self._waits.append(waited)
+        QUEUE_WAIT.observe(waited, endpoint=self.endpoint, role=role)
+        record_stage("llm_queue", waited)
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future, _ in self._waiters if not future.done())
+
+    def stats(self) -> dict:
+        queued = {role: 0 for role in ROLE_PRIORITY}
+        for _, _, future, role in self._waiters:
+            if not future.done():
+                queued[role] += 1
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else 0.0
+
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight(),
+            "queue_depth": sum(queued.values()),
+            "queue_depth_by_role": queued,
+            "queue_peak": self.queue_peak,
+            "acquired": dict(self.acquired),
+            "timeouts": dict(self.timeouts),
+            "wait_ms_avg_by_role": {
+                role: round(self.wait_total[role] / self.acquired[role] * 1000, 1) if self.acquired[role] else 0.0
+                for role in ROLE_PRIORITY
+            },
+            "wait_ms_max_by_role": {role: round(v * 1000, 1) for role, v in self.wait_max.items()},
+            "wait_ms_p50": percentile(0.5),
+            "wait_ms_p95": percentile(0.95),
+        }
+
+
+_governors = {}
+
+
+def get_governor(endpoint: str, replicas: int = 1) -> EndpointGovernor:
+    governor = _governors.get(endpoint)
+    if governor is None:
+        governor = _governors.setdefault(endpoint, EndpointGovernor(endpoint, replicas))
+    return governor
+
+
+@asynccontextmanager
+async def llm_slot(client, role: str = DEFAULT_ROLE) -> AsyncIterator[None]:
+    """
+    Hold one of the client's endpoint slots for the duration of the block.
+    Raises LLMQueueTimeout when none frees up within LLM_QUEUE_TIMEOUT.
+    """
+    pool = getattr(client, "pool", None)
+    governor = get_governor(endpoint_of(client), pool.size if pool else 1)
+    await governor.acquire(role)
+    try:
+        yield
+    finally:
+        governor.release()
+
+
+def governor_stats() -> dict:
+    return {endpoint: governor.stats() for endpoint, governor in _governors.items()}
+
+
+CallbackMetric("llm_inflight", "LLM requests holding a slot", ["endpoint"],
+               lambda: [({"endpoint": e}, g.inflight) for e, g in list(_governors.items())])
+CallbackMetric("llm_queue_depth", "LLM requests waiting for a slot", ["endpoint"],
+               lambda: [({"endpoint": e}, g.queue_depth()) for e, g in list(_governors.items())])
@@ -1,18 +1,169 @@
-from typing import List
+"""
+Offline mock backends (LLM_PROVIDER=mock) for development and load tests.
+
+Output is deterministic: the same input always yields the same answer and
+the same vector. Embeddings are feature-hashed (words / identifiers and
+CJK character bigrams), so texts sharing terms are close and retrieval
+behaves sensibly without a model. Latency, jitter and failures can be
+injected; failures are connection errors, so they exercise the retry and
+circuit-breaker path of llm/endpoints.py.
+
+Settings (env):
+    MOCK_EMBEDDING_DIM         vector size, must match documents.embedding (default 1024)
+    MOCK_EMBEDDING_LATENCY_MS  delay per embedding request (default 0)
+    MOCK_LLM_LATENCY_MS        delay before the answer / first token (default 0)
+    MOCK_LLM_TOKEN_MS          delay between streamed tokens (default 0)
+    MOCK_LLM_TOKENS            extra filler words per answer, to size outputs (default 0)
+    MOCK_JITTER_MS             random extra delay added to every wait (default 0)
+    MOCK_ERROR_RATE            probability a request fails, 0..1 (default 0)
+"""
+import asyncio
+import hashlib
+import math
 import random
-from .base import BaseLLM, BaseEmbedding
+import re
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+from .base import BaseLLM, BaseEmbedding, get_embedding_batch_size, iter_batches, record_usage
+from .endpoints import get_pool
+from settings import env_float
+
+MOCK_ENDPOINT = "mock"
+MOCK_ANSWER = "This is a mock response from the Intranet Ops Agent. The LLM is running in fallback mode."
+
+_WORDS = re.compile(r"[a-z0-9_.\-]+")
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def _delay(name: str) -> float:
+    base = max(0.0, env_float(name, 0))
+    jitter = max(0.0, env_float("MOCK_JITTER_MS", 0))
+    return (base + (random.uniform(0, jitter) if jitter else 0.0)) / 1000
+
+
+def _maybe_fail(what: str):
+    if random.random() < env_float("MOCK_ERROR_RATE", 0):
+        raise ConnectionError(f"mock {what}: injected failure")
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _features(text: str) -> List[str]:
+    text = text.lower()
+    features = _WORDS.findall(text)
+    for run in _CJK_RUN.findall(text):
+        features.extend(run[i:i + 2] for i in range(max(1, len(run) - 1)))
+    return features
+
+
+def hashed_embedding(text: str, dim: int) -> List[float]:
+    """
+    Signed feature hashing into dim buckets, L2-normalized.
+    """
+    vector = [0.0] * dim
+    for feature in _features(text) or [text]:
+        h = int.from_bytes(_digest(feature)[:8], "little")
+        vector[h % dim] += 1.0 if (h >> 63) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        # Only features cancelling out exactly; still deterministic
+        vector[int.from_bytes(_digest(text)[:8], "little") % dim] = 1.0
+        return vector
+    return [v / norm for v in vector]
+
 
 class MockLLM(BaseLLM):
     def __init__(self, model: str = "mock"):
         self.model = model
+        self.pool = get_pool(MOCK_ENDPOINT)
+
+    def _answer(self, messages: List[dict]) -> str:
+        extra = int(env_float("MOCK_LLM_TOKENS", 0))
+        answer = MOCK_ANSWER
+        if extra > 0:
+            seed = _digest(str(messages[-1].get("content", "")) if messages else "")
+            words = [f"w{(seed[i % len(seed)] + i) % 97}" for i in range(extra)]
+            answer = f"{MOCK_ANSWER} {' '.join(words)}"
+        # Word counts stand in for the usage a real provider reports
+        record_usage(self.model, prompt_tokens=sum(len(_features(str(m.get("content", "")))) for m in messages),
+                     completion_tokens=len(answer.split()))
+        return answer
+
+    def _tokens(self, messages: List[dict]) -> List[str]:
+        # Word by word, keeping the separating whitespace
+        return re.findall(r"\S+\s*", self._answer(messages))
 
     def chat(self, messages: List[dict], temperature: float = 0.7) -> str:
-        return "This is a mock response from the Intranet Ops Agent. The LLM is running in fallback mode."
+        def request(_url: str) -> str:
+            time.sleep(_delay("MOCK_LLM_LATENCY_MS"))
+            _maybe_fail("chat")
+            return self._answer(messages)
+        return self.pool.call(request)
+
+    def chat_stream(self, messages: List[dict], temperature: float = 0.7) -> Iterator[str]:
+        def request(_url: str) -> Iterator[str]:
+            time.sleep(_delay("MOCK_LLM_LATENCY_MS"))
+            _maybe_fail("chat")
+            for i, token in enumerate(self._tokens(messages)):
+                if i:
+                    time.sleep(_delay("MOCK_LLM_TOKEN_MS"))
+                yield token
+        yield from self.pool.stream(request)
+
+    async def achat(self, messages: List[dict], temperature: float = 0.7) -> str:
+        async def request(_url: str) -> str:
+            await asyncio.sleep(_delay("MOCK_LLM_LATENCY_MS"))
+            _maybe_fail("chat")
+            return self._answer(messages)
+        return await self.pool.acall(request)
+
+    async def achat_stream(self, messages: List[dict], temperature: float = 0.7) -> AsyncIterator[str]:
+        async def request(_url: str) -> AsyncIterator[str]:
+            await asyncio.sleep(_delay("MOCK_LLM_LATENCY_MS"))
+            _maybe_fail("chat")
+            for i, token in enumerate(self._tokens(messages)):
+                if i:
+                    await asyncio.sleep(_delay("MOCK_LLM_TOKEN_MS"))
+                yield token
+        async for token in self.pool.astream(request):
+            yield token
 
 class MockEmbedding(BaseEmbedding):
     def __init__(self, model: str = "mock"):
         self.model = model
+        self.pool = get_pool(MOCK_ENDPOINT)
+
+    @property
+    def dim(self) -> int:
+        return max(1, int(env_float("MOCK_EMBEDDING_DIM", 1024)))
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        _maybe_fail("embedding")
+        return [hashed_embedding(text, self.dim) for text in texts]
 
     def embed_text(self, text: str) -> List[float]:
-        # Return a random vector of dimension 768 (common size) or 1024
-        return [random.random() for _ in range(768)]
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        # One simulated request per batch, like the real list-input backends
+        vectors = []
+        for batch in iter_batches(texts, batch_size or get_embedding_batch_size()):
+            def request(_url: str, batch=batch) -> List[List[float]]:
+                time.sleep(_delay("MOCK_EMBEDDING_LATENCY_MS"))
+                return self._embed(batch)
+            vectors.extend(self.pool.call(request))
+        return vectors
+
+    async def aembed_text(self, text: str) -> List[float]:
+        return (await self.aembed_batch([text]))[0]
+
+    async def aembed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        vectors = []
+        for batch in iter_batches(texts, batch_size or get_embedding_batch_size()):
+            async def request(_url: str, batch=batch) -> List[List[float]]:
+                await asyncio.sleep(_delay("MOCK_EMBEDDING_LATENCY_MS"))
+                return self._embed(batch)
+            vectors.extend(await self.pool.acall(request))
+        return vectors
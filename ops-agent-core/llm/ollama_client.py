@@ -1,47 +1,170 @@
+import json
 import os
-import requests
-from typing import List
-from .base import BaseLLM, BaseEmbedding
+from typing import AsyncIterator, Iterator, List, Optional
+from .base import BaseLLM, BaseEmbedding, get_embedding_batch_size, iter_batches, record_usage
+from .endpoints import get_hedge_delay, get_pool
+from .registry import get_async_httpx_client, get_requests_timeout, get_session
+
+# Ollama servers without the multi-input /api/embed endpoint (< 0.3.4)
+_LEGACY_EMBED_SERVERS = set()
 
 class OllamaLLM(BaseLLM):
+    """
+    base_url may list several Ollama servers (see llm/endpoints.py).
+    Errors are raised (not returned as answer text) so they can be retried.
+    """
     def __init__(self, base_url: str = None, model: str = "qwen:7b"):
-        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.pool = get_pool(base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+        self.base_url = ",".join(self.pool.urls)
         self.model = model
+        self.session = get_session()
 
-    def chat(self, messages: List[dict], temperature: float = 0.7) -> str:
-        # Ollama API: POST /api/chat
-        url = f"{self.base_url}/api/chat"
-        payload = {
+    def _chat_payload(self, messages: List[dict], temperature: float, stream: bool) -> dict:
+        return {
             "model": self.model,
             "messages": messages,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature
             }
         }
-        try:
-            resp = requests.post(url, json=payload)
+
+    def _record_usage(self, data: dict):
+        # Ollama reports prompt_eval_count / eval_count with the final message
+        record_usage(self.model, prompt_tokens=data.get("prompt_eval_count"), completion_tokens=data.get("eval_count"))
+
+    def chat(self, messages: List[dict], temperature: float = 0.7) -> str:
+        # Ollama API: POST /api/chat
+        payload = self._chat_payload(messages, temperature, stream=False)
+
+        def request(url: str) -> str:
+            resp = self.session.post(f"{url}/api/chat", json=payload, timeout=get_requests_timeout())
+            resp.raise_for_status()
+            data = resp.json()
+            self._record_usage(data)
+            return data.get("message", {}).get("content", "")
+        return self.pool.call(request)
+
+    def chat_stream(self, messages: List[dict], temperature: float = 0.7) -> Iterator[str]:
+        # Ollama streams newline-delimited JSON objects when "stream" is true
+        payload = self._chat_payload(messages, temperature, stream=True)
+
+        def request(url: str) -> Iterator[str]:
+            with self.session.post(f"{url}/api/chat", json=payload, stream=True, timeout=get_requests_timeout()) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    content = data.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        self._record_usage(data)
+                        break
+        yield from self.pool.stream(request)
+
+    async def achat(self, messages: List[dict], temperature: float = 0.7) -> str:
+        payload = self._chat_payload(messages, temperature, stream=False)
+
+        async def request(url: str) -> str:
+            resp = await get_async_httpx_client(url).post(f"{url}/api/chat", json=payload)
             resp.raise_for_status()
-            return resp.json().get("message", {}).get("content", "")
-        except Exception as e:
-            return f"Error calling Ollama: {str(e)}"
+            data = resp.json()
+            self._record_usage(data)
+            return data.get("message", {}).get("content", "")
+        return await self.pool.acall(request)
+
+    async def achat_stream(self, messages: List[dict], temperature: float = 0.7) -> AsyncIterator[str]:
+        payload = self._chat_payload(messages, temperature, stream=True)
+
+        async def request(url: str) -> AsyncIterator[str]:
+            async with get_async_httpx_client(url).stream("POST", f"{url}/api/chat", json=payload) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    content = data.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        self._record_usage(data)
+                        break
+        async for token in self.pool.astream(request):
+            yield token
 
 class OllamaEmbedding(BaseEmbedding):
     def __init__(self, base_url: str = None, model: str = "nomic-embed-text"):
-        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.pool = get_pool(base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+        self.base_url = ",".join(self.pool.urls)
         self.model = model
+        self.session = get_session()
+
+    def _post(self, path: str, payload: dict, url: str):
+        resp = self.session.post(f"{url}{path}", json=payload, timeout=get_requests_timeout())
+        if resp.status_code == 404 and path == "/api/embed":
+            raise ValueError("/api/embed not available")
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _apost(self, path: str, payload: dict, url: str):
+        resp = await get_async_httpx_client(url).post(f"{url}{path}", json=payload)
+        if resp.status_code == 404 and path == "/api/embed":
+            raise ValueError("/api/embed not available")
+        resp.raise_for_status()
+        return resp.json()
 
     def embed_text(self, text: str) -> List[float]:
         # Ollama API: POST /api/embeddings
-        url = f"{self.base_url}/api/embeddings"
         payload = {
             "model": self.model,
             "prompt": text
         }
-        try:
-            resp = requests.post(url, json=payload)
-            resp.raise_for_status()
-            return resp.json().get("embedding", [])
-        except Exception as e:
-            print(f"Error calling Ollama embedding: {e}")
-            return []
+        return self.pool.call(lambda url: self._post("/api/embeddings", payload, url)).get("embedding", [])
+
+    def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        # Ollama API: POST /api/embed accepts a list "input" (Ollama >= 0.3.4)
+        batch_size = batch_size or get_embedding_batch_size()
+        vectors = []
+        for batch in iter_batches(texts, batch_size):
+            if self.base_url not in _LEGACY_EMBED_SERVERS:
+                try:
+                    payload = {"model": self.model, "input": batch}
+                    embeddings = self.pool.call(lambda url: self._post("/api/embed", payload, url)).get("embeddings", [])
+                    if len(embeddings) != len(batch):
+                        raise ValueError(f"expected {len(batch)} embeddings, got {len(embeddings)}")
+                    vectors.extend(embeddings)
+                    continue
+                except ValueError as e:
+                    print(f"Ollama batch embedding unavailable, falling back to /api/embeddings: {e}")
+                    _LEGACY_EMBED_SERVERS.add(self.base_url)
+            vectors.extend(self.embed_text(text) for text in batch)
+        return vectors
+
+    async def aembed_text(self, text: str) -> List[float]:
+        payload = {"model": self.model, "prompt": text}
+        data = await self.pool.acall(lambda url: self._apost("/api/embeddings", payload, url),
+                                     hedge_delay=get_hedge_delay())
+        return data.get("embedding", [])
+
+    async def aembed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        batch_size = batch_size or get_embedding_batch_size()
+        vectors = []
+        for batch in iter_batches(texts, batch_size):
+            if self.base_url not in _LEGACY_EMBED_SERVERS:
+                try:
+                    payload = {"model": self.model, "input": batch}
+                    data = await self.pool.acall(lambda url: self._apost("/api/embed", payload, url),
+                                                 hedge_delay=get_hedge_delay())
+                    embeddings = data.get("embeddings", [])
+                    if len(embeddings) != len(batch):
+                        raise ValueError(f"expected {len(batch)} embeddings, got {len(embeddings)}")
+                    vectors.extend(embeddings)
+                    continue
+                except ValueError as e:
+                    print(f"Ollama batch embedding unavailable, falling back to /api/embeddings: {e}")
+                    _LEGACY_EMBED_SERVERS.add(self.base_url)
+            for text in batch:
+                vectors.append(await self.aembed_text(text))
+        return vectors
@@ -1,67 +1,250 @@
-from typing import List
+from typing import AsyncIterator, Iterator, List, Optional
 import os
-import requests
-from openai import OpenAI
-from .base import BaseLLM, BaseEmbedding
+from openai import AsyncOpenAI, OpenAI
+from .base import (
+    BaseLLM, BaseEmbedding, get_embedding_batch_size, iter_batches, record_usage, stream_usage_enabled,
+)
+from .endpoints import get_hedge_delay, get_pool, http_status, parse_urls
+from .registry import (
+    get_async_client, get_async_httpx_client, get_client, get_httpx_client,
+    get_requests_timeout, get_session, get_timeout,
+)
+
+def _default_base_url() -> str:
+    # What the OpenAI SDK uses when it is given no base_url
+    return os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+
+# Services that rejected list input; they get one request per text from then on.
+_SINGLE_INPUT_ENDPOINTS = set()
+
+def _list_input_rejected(error: Exception) -> bool:
+    # A malformed answer or a 4xx means the server does not take list input;
+    # transport failures, 5xx and open circuits say nothing about it.
+    status = http_status(error)
+    if status is not None:
+        return 400 <= status < 500 and status not in (408, 429)
+    return isinstance(error, ValueError)
 
 class OpenAICompatibleLLM(BaseLLM):
+    """
+    base_url may list several replicas (see llm/endpoints.py); retries are
+    done by the endpoint pool, so the SDK's own retries are off.
+    """
     def __init__(self, model: str, base_url: str, api_key: str):
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # No URL configured: the SDK's default endpoint is the only replica
+        self.pool = get_pool(parse_urls(base_url) or _default_base_url())
         self.model = model
+        self.base_url = ",".join(self.pool.urls)
+        self.api_key = api_key
 
-    def chat(self, messages: List[dict], temperature: float = 0.7) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature
+    def _client(self, url: str) -> OpenAI:
+        return get_client(
+            ("openai", url, self.api_key),
+            lambda: OpenAI(api_key=self.api_key, base_url=url, max_retries=0,
+                           http_client=get_httpx_client(url), timeout=get_timeout())
+        )
+
+    def _async_client(self, url: str) -> AsyncOpenAI:
+        return get_async_client(
+            ("async-openai", url, self.api_key),
+            lambda: AsyncOpenAI(api_key=self.api_key, base_url=url, max_retries=0,
+                                http_client=get_async_httpx_client(url), timeout=get_timeout())
         )
-        return response.choices[0].message.content
+
+    @staticmethod
+    def _stream_options() -> dict:
+        return {"stream_options": {"include_usage": True}} if stream_usage_enabled() else {}
+
+    def _record_stream_usage(self, usage, chunks: int):
+        # Without a usage chunk, count content chunks (about one token each)
+        record_usage(self.model, usage, completion_tokens=None if usage else chunks)
+
+    def chat(self, messages: List[dict], temperature: float = 0.7) -> str:
+        def request(url: str) -> str:
+            response = self._client(url).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature
+            )
+            record_usage(self.model, response.usage)
+            return response.choices[0].message.content
+        return self.pool.call(request)
+
+    def chat_stream(self, messages: List[dict], temperature: float = 0.7) -> Iterator[str]:
+        def request(url: str) -> Iterator[str]:
+            stream = self._client(url).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                **self._stream_options()
+            )
+            usage, chunks = None, 0
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks += 1
+                    yield chunk.choices[0].delta.content
+            self._record_stream_usage(usage, chunks)
+        yield from self.pool.stream(request)
+
+    async def achat(self, messages: List[dict], temperature: float = 0.7) -> str:
+        async def request(url: str) -> str:
+            response = await self._async_client(url).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature
+            )
+            record_usage(self.model, response.usage)
+            return response.choices[0].message.content
+        return await self.pool.acall(request)
+
+    async def achat_stream(self, messages: List[dict], temperature: float = 0.7) -> AsyncIterator[str]:
+        async def request(url: str) -> AsyncIterator[str]:
+            stream = await self._async_client(url).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                **self._stream_options()
+            )
+            usage, chunks = None, 0
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks += 1
+                    yield chunk.choices[0].delta.content
+            self._record_stream_usage(usage, chunks)
+        async for token in self.pool.astream(request):
+            yield token
 
 class OpenAICompatibleEmbedding(BaseEmbedding):
     def __init__(self, model: str, base_url: str, api_key: str):
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.pool = get_pool(parse_urls(base_url) or _default_base_url())
         self.model = model
-        self.base_url = base_url
+        self.base_url = ",".join(self.pool.urls)
         self.api_key = api_key
+        self.session = get_session()
 
-    def embed_text(self, text: str) -> List[float]:
-        text = text.replace("\n", " ")
-        
-        # Use direct HTTP request to bypass strict client validation
-        # and handle "str object has no attribute embedding" issues
-        url = f"{self.base_url.rstrip('/')}/embeddings"
-        headers = {
+    @property
+    def headers(self) -> dict:
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
-        # Force input as a single string (not list) for compatibility
+
+    def _counted(self, data):
+        if isinstance(data, dict) and isinstance(data.get("usage"), dict):
+            record_usage(self.model, data["usage"])
+        return data
+
+    def _post_embeddings(self, input):
+        # Use direct HTTP request to bypass strict client validation
+        # and handle "str object has no attribute embedding" issues
         payload = {
-            "input": text,
+            "input": input,
             "model": self.model
         }
-        
-        try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+
+        def request(url: str):
+            response = self.session.post(f"{url}/embeddings", json=payload, headers=self.headers,
+                                         timeout=get_requests_timeout())
+            response.raise_for_status()
+            return self._counted(response.json())
+        return self.pool.call(request)
+
+    async def _apost_embeddings(self, input):
+        payload = {
+            "input": input,
+            "model": self.model
+        }
+
+        async def request(url: str):
+            response = await get_async_httpx_client(url).post(f"{url}/embeddings", json=payload, headers=self.headers)
             response.raise_for_status()
-            data = response.json()
+            return self._counted(response.json())
+        # Hedged: query embeddings sit on the answer latency path
+        return await self.pool.acall(request, hedge_delay=get_hedge_delay())
+
+    @staticmethod
+    def _parse_single(data) -> List[float]:
+        # Handle various response formats
+        if "data" in data:
+            embedding_data = data["data"]
             
-            # Handle various response formats
-            if "data" in data:
-                embedding_data = data["data"]
-                
-                # Case 1: Standard OpenAI format (list of embedding objects)
-                if isinstance(embedding_data, list) and len(embedding_data) > 0:
-                    item = embedding_data[0]
-                    if isinstance(item, dict) and "embedding" in item:
-                        return item["embedding"]
-                
-                # Case 2: Non-standard format (single embedding object directly in 'data')
-                # As seen in your internal API response
-                elif isinstance(embedding_data, dict) and "embedding" in embedding_data:
-                    return embedding_data["embedding"]
-
-            raise ValueError(f"Unexpected response format: {data}")
+            # Case 1: Standard OpenAI format (list of embedding objects)
+            if isinstance(embedding_data, list) and len(embedding_data) > 0:
+                item = embedding_data[0]
+                if isinstance(item, dict) and "embedding" in item:
+                    return item["embedding"]
             
+            # Case 2: Non-standard format (single embedding object directly in 'data')
+            # As seen in your internal API response
+            elif isinstance(embedding_data, dict) and "embedding" in embedding_data:
+                return embedding_data["embedding"]
+
+        raise ValueError(f"Unexpected response format: {data}")
+
+    @staticmethod
+    def _parse_list(data, expected: int) -> List[List[float]]:
+        items = data.get("data") if isinstance(data, dict) else None
+        # Servers that only understand single strings answer with one object
+        # (Case 2 above) or a short list; treat both as "list input unsupported".
+        if not isinstance(items, list) or len(items) != expected:
+            raise ValueError(f"Unexpected batch response format: {str(data)[:200]}")
+        if all(isinstance(item, dict) and "index" in item for item in items):
+            items = sorted(items, key=lambda item: item["index"])
+        return [item["embedding"] for item in items]
+
+    def embed_text(self, text: str) -> List[float]:
+        text = text.replace("\n", " ")
+        
+        try:
+            # Force input as a single string (not list) for compatibility
+            return self._parse_single(self._post_embeddings(text))
+        except Exception as e:
+            print(f"Embedding error: {e}")
+            raise e
+
+    async def aembed_text(self, text: str) -> List[float]:
+        text = text.replace("\n", " ")
+        try:
+            return self._parse_single(await self._apost_embeddings(text))
         except Exception as e:
             print(f"Embedding error: {e}")
             raise e
+
+    def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        batch_size = batch_size or get_embedding_batch_size()
+        vectors = []
+        for batch in iter_batches(texts, batch_size):
+            if self.base_url not in _SINGLE_INPUT_ENDPOINTS:
+                try:
+                    data = self._post_embeddings([t.replace("\n", " ") for t in batch])
+                    vectors.extend(self._parse_list(data, len(batch)))
+                    continue
+                except Exception as e:
+                    if not _list_input_rejected(e):
+                        raise
+                    print(f"Batch embedding not supported by {self.base_url}, falling back to single input: {e}")
+                    _SINGLE_INPUT_ENDPOINTS.add(self.base_url)
+            vectors.extend(self.embed_text(text) for text in batch)
+        return vectors
+
+    async def aembed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        batch_size = batch_size or get_embedding_batch_size()
+        vectors = []
+        for batch in iter_batches(texts, batch_size):
+            if self.base_url not in _SINGLE_INPUT_ENDPOINTS:
+                try:
+                    data = await self._apost_embeddings([t.replace("\n", " ") for t in batch])
+                    vectors.extend(self._parse_list(data, len(batch)))
+                    continue
+                except Exception as e:
+                    if not _list_input_rejected(e):
+                        raise
+                    print(f"Batch embedding not supported by {self.base_url}, falling back to single input: {e}")
+                    _SINGLE_INPUT_ENDPOINTS.add(self.base_url)
+            for text in batch:
+                vectors.append(await self.aembed_text(text))
+        return vectors
@@ -0,0 +1,166 @@
+"""
+Process-wide registry of model clients and their HTTP connection pools.
+
+Clients are built once per (provider config, HTTP settings) and reused, so
+every request rides on keep-alive connections instead of paying TCP/TLS
+setup again. Async clients are additionally keyed on the running event
+loop, since an httpx.AsyncClient cannot be shared across loops. Changing LLM_PROVIDER / model / base URL / key or the pool
+settings yields a new key, and the client is rebuilt on the next call.
+
+Settings (env, or llm.* in config.yaml):
+    LLM_POOL_SIZE        keep-alive connections per model endpoint (default 20)
+    LLM_TIMEOUT          read timeout in seconds (default 120)
+    LLM_CONNECT_TIMEOUT  connect timeout in seconds (default 10)
+    LLM_HTTP2            "true" to negotiate HTTP/2 (needs the h2 package)
+"""
+import asyncio
+import os
+import threading
+from typing import Callable, Hashable
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from settings import env_float
+
+_lock = threading.Lock()
+_clients = {}
+_sessions = {}
+_httpx_clients = {}
+_async_httpx_clients = {}
+
+
+def get_http_settings() -> tuple:
+    """
+    (pool_size, timeout, connect_timeout, http2) as currently configured.
+    """
+    try:
+        pool_size = max(1, int(os.getenv("LLM_POOL_SIZE", "20")))
+    except ValueError:
+        pool_size = 20
+    http2 = os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes")
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            http2 = False
+    return (
+        pool_size,
+        env_float("LLM_TIMEOUT", 120.0),
+        env_float("LLM_CONNECT_TIMEOUT", 10.0),
+        http2,
+    )
+
+
+def get_timeout() -> httpx.Timeout:
+    _, timeout, connect_timeout, _ = get_http_settings()
+    return httpx.Timeout(timeout, connect=connect_timeout)
+
+
+def get_requests_timeout() -> tuple:
+    """
+    (connect, read) timeout tuple for requests.
+    """
+    _, timeout, connect_timeout, _ = get_http_settings()
+    return (connect_timeout, timeout)
+
+
+def get_session() -> requests.Session:
+    """
+    Shared requests.Session with a keep-alive pool of LLM_POOL_SIZE per host.
+    """
+    settings = get_http_settings()
+    with _lock:
+        session = _sessions.get(settings)
+        if session is None:
+            pool_size = settings[0]
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions.clear()
+            _sessions[settings] = session
+        return session
+
+
+def get_httpx_client(base_url: str = None) -> httpx.Client:
+    """
+    Shared httpx.Client for one endpoint, for SDK clients (OpenAI, ZhipuAI)
+    that accept an http_client.
+    """
+    settings = get_http_settings()
+    key = (base_url, settings)
+    with _lock:
+        client = _httpx_clients.get(key)
+        if client is None:
+            pool_size, timeout, connect_timeout, http2 = settings
+            client = httpx.Client(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                http2=http2,
+            )
+            # Drop clients built with outdated settings for this endpoint
+            for stale in [k for k in _httpx_clients if k[0] == base_url]:
+                del _httpx_clients[stale]
+            _httpx_clients[key] = client
+        return client
+
+
+def get_async_httpx_client(base_url: str = None) -> httpx.AsyncClient:
+    """
+    Shared httpx.AsyncClient for one endpoint on the running event loop.
+    """
+    settings = get_http_settings()
+    loop = asyncio.get_running_loop()
+    key = (base_url, settings, loop)
+    with _lock:
+        client = _async_httpx_clients.get(key)
+        if client is None:
+            pool_size, timeout, connect_timeout, http2 = settings
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                http2=http2,
+            )
+            # Clients of closed loops or outdated settings are unusable
+            for stale in [k for k in _async_httpx_clients
+                          if k[2].is_closed() or (k[0] == base_url and k[2] is loop)]:
+                del _async_httpx_clients[stale]
+            _async_httpx_clients[key] = client
+        return client
+
+
+def get_async_client(key: Hashable, factory: Callable):
+    """
+    get_client for async SDK clients: cached per running event loop.
+    """
+    return get_client((key, asyncio.get_running_loop()), factory)
+
+
+def get_client(key: Hashable, factory: Callable):
+    """
+    Return the cached client for key, building it with factory() on first
+    use. key must capture everything the client was configured from; the
+    HTTP settings are folded in here.
+    """
+    full_key = (key, get_http_settings())
+    with _lock:
+        client = _clients.get(full_key)
+    if client is not None:
+        return client
+    client = factory()
+    with _lock:
+        # Another thread may have won the race; keep the first one
+        return _clients.setdefault(full_key, client)
+
+
+def clear():
+    """
+    Forget every cached client (e.g. after editing config at runtime).
+    """
+    with _lock:
+        _clients.clear()
+        _sessions.clear()
+        _httpx_clients.clear()
+        _async_httpx_clients.clear()
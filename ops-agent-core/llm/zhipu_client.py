@@ -1,38 +1,89 @@
 import os
-from typing import List
+from typing import Iterator, List, Optional
 from zhipuai import ZhipuAI
-from .base import BaseLLM, BaseEmbedding
+from .base import BaseLLM, BaseEmbedding, get_embedding_batch_size, iter_batches, record_usage
+from .endpoints import EndpointUnavailable, get_pool, is_retryable
+from .registry import get_httpx_client, get_timeout
+
+# The SDK talks to one fixed endpoint; the pool still provides retries and
+# the circuit breaker. The SDK's own retries are off so they do not stack.
+ZHIPU_ENDPOINT = "zhipuai"
 
 class ZhipuLLM(BaseLLM):
     def __init__(self, api_key: str = None, model: str = "glm-4"):
         self.api_key = api_key or os.getenv("ZHIPUAI_API_KEY")
         if not self.api_key:
             raise ValueError("ZHIPUAI_API_KEY not found")
-        self.client = ZhipuAI(api_key=self.api_key)
+        self.client = ZhipuAI(api_key=self.api_key, http_client=get_httpx_client(ZHIPU_ENDPOINT),
+                              timeout=get_timeout(), max_retries=0)
+        self.pool = get_pool(ZHIPU_ENDPOINT)
         self.model = model
 
     def chat(self, messages: List[dict], temperature: float = 0.7) -> str:
-        try:
+        def request(_url: str) -> str:
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature
             )
+            record_usage(self.model, response.usage)
             return response.choices[0].message.content
-        except Exception as e:
-            return f"Error calling ZhipuAI: {str(e)}"
+        return self.pool.call(request)
+
+    def chat_stream(self, messages: List[dict], temperature: float = 0.7) -> Iterator[str]:
+        def request(_url: str) -> Iterator[str]:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True
+            )
+            usage = None
+            for chunk in stream:
+                # The last chunk carries the usage of the whole answer
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            record_usage(self.model, usage)
+        yield from self.pool.stream(request)
 
 class ZhipuEmbedding(BaseEmbedding):
     def __init__(self, api_key: str = None, model: str = "embedding-2"):
         self.api_key = api_key or os.getenv("ZHIPUAI_API_KEY")
         if not self.api_key:
             raise ValueError("ZHIPUAI_API_KEY not found")
-        self.client = ZhipuAI(api_key=self.api_key)
+        self.client = ZhipuAI(api_key=self.api_key, http_client=get_httpx_client(ZHIPU_ENDPOINT),
+                              timeout=get_timeout(), max_retries=0)
+        self.pool = get_pool(ZHIPU_ENDPOINT)
         self.model = model
 
     def embed_text(self, text: str) -> List[float]:
-        resp = self.client.embeddings.create(
+        resp = self.pool.call(lambda _url: self.client.embeddings.create(
             model=self.model,
             input=text
-        )
+        ))
+        record_usage(self.model, resp.usage)
         return resp.data[0].embedding
+
+    def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        # embedding-3 accepts up to 64 inputs per request; older models may reject lists
+        batch_size = min(batch_size or get_embedding_batch_size(), 64)
+        vectors = []
+        single_input = False
+        for batch in iter_batches(texts, batch_size):
+            if not single_input:
+                try:
+                    resp = self.pool.call(lambda _url: self.client.embeddings.create(model=self.model, input=batch))
+                    record_usage(self.model, resp.usage)
+                    items = sorted(resp.data, key=lambda item: item.index)
+                    if len(items) != len(batch):
+                        raise ValueError(f"expected {len(batch)} embeddings, got {len(items)}")
+                    vectors.extend(item.embedding for item in items)
+                    continue
+                except Exception as e:
+                    if is_retryable(e) or isinstance(e, EndpointUnavailable):
+                        raise
+                    print(f"ZhipuAI batch embedding failed, falling back to single input: {e}")
+                    single_input = True
+            vectors.extend(self.embed_text(text) for text in batch)
+        return vectors
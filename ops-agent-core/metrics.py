@@ -0,0 +1,231 @@
+"""
+In-process metrics in the Prometheus text exposition format, plus
+per-request stage timings for the Server-Timing header.
+
+prometheus_client is not among our dependencies (and the intranet build
+ships a fixed set), so this is a small self-contained registry: Counter,
+Histogram and callback gauges, rendered by render() for GET /metrics.
+
+Stage timings: record_stage() / timed() / atimed() observe the
+rag_stage_seconds histogram and, inside an HTTP request wrapped by
+MetricsMiddleware, add the duration to that request's Server-Timing
+header. The request's timing dict travels in a ContextVar, so stages run
+in worker threads (run_in_threadpool, asyncio.to_thread) or child tasks
+are attributed to the request that started them.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_registry_lock = threading.Lock()
+_metrics = []
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _metrics.append(self)
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    Values read at scrape time from fn() -> [(labels dict, value), ...],
+    for state that already lives elsewhere (queue depths, cache counters).
+    """
+    def __init__(self, name: str, help: str, labelnames: Iterable[str], fn: Callable[[], Iterable[Tuple[dict, float]]],
+                 kind: str = "gauge"):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def _samples(self) -> List[str]:
+        try:
+            items = list(self.fn())
+        except Exception as e:
+            print(f"Metric {self.name} unavailable: {e}")
+            return []
+        return [f"{self.name}{_labels(self.labelnames, self._key(labels))} {_number(value)}" for labels, value in items]
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_metrics)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- shared metrics -----------------------------------------------------------
+
+STAGE_SECONDS = Histogram("rag_stage_seconds", "Duration of answer / ingestion pipeline stages", ["stage"])
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["handler", "method", "status"])
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "HTTP request duration incl. streamed body", ["handler"])
+
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+async def atimed(stage: str, awaitable: Awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def request_timings() -> Dict[str, float]:
+    """
+    Stage durations (ms) recorded so far for the current request.
+    """
+    return dict(_request_timings.get() or {})
+
+
+def server_timing_header(timings: Dict[str, float], total_ms: Optional[float] = None) -> str:
+    parts = [f"{stage};dur={ms:.1f}" for stage, ms in timings.items()]
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: counts requests per handler and status, times them, and
+    adds a Server-Timing header with the stages recorded before the
+    response started (for streamed responses, only those before the first
+    byte; the rest still goes to the histograms).
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing_header(timings, (time.perf_counter() - start) * 1000)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # The router stores the matched endpoint in the scope; its name
+            # keeps the label set small (no raw paths / ids)
+            handler = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            HTTP_REQUESTS.inc(handler=handler, method=scope.get("method", ""), status=status)
+            HTTP_SECONDS.observe(time.perf_counter() - start, handler=handler)
@@ -0,0 +1,144 @@
+"""
+Answer cache for answer_question.
+
+Entries are scoped by kb_type and keyed by the normalized question. With
+ANSWER_CACHE_SEMANTIC_THRESHOLD set (cosine similarity, e.g. 0.95), a
+question that misses the exact key may also reuse the answer of a
+near-duplicate question of the same kb_type. Every entry records the KB
+version it was computed against and is ignored once the KB changes.
+
+Settings (env):
+    ANSWER_CACHE_ENABLED             "false" to disable (default true)
+    ANSWER_CACHE_SIZE                entries kept, LRU (default 1000)
+    ANSWER_CACHE_TTL                 seconds an entry stays valid (default 3600)
+    ANSWER_CACHE_SEMANTIC_THRESHOLD  cosine similarity for near-duplicates (default off)
+"""
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from rag.kb_version import kb_version
+from settings import env_float
+
+_TRAILING_PUNCT = re.compile(r"[\s?？!！。.，,~～…]+$")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    NFKC (full-width -> half-width), lower case, collapsed whitespace and no
+    trailing punctuation, so "系统A无法登录？" and "系统a无法登录 " match.
+    """
+    q = unicodedata.normalize("NFKC", question or "").lower().strip()
+    q = _SPACES.sub(" ", q)
+    return _TRAILING_PUNCT.sub("", q)
+
+
+class AnswerCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    @property
+    def semantic_threshold(self) -> float:
+        return env_float("ANSWER_CACHE_SEMANTIC_THRESHOLD", 0.0)
+
+    def _valid(self, entry: dict) -> bool:
+        ttl = env_float("ANSWER_CACHE_TTL", 3600)
+        return entry["kb_version"] == kb_version() and time.time() - entry["created_at"] <= ttl
+
+    def get(self, question: str, kb_type: str, embedding: Optional[List[float]] = None) -> Optional[Dict]:
+        """
+        Cached {"answer", "sources"} for question, or None.
+        embedding enables the near-duplicate lookup.
+        """
+        key = (kb_type, normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._valid(entry):
+                    self._entries.move_to_end(key)
+                    self.hits_exact += 1
+                    return entry["result"]
+                del self._entries[key]
+                self.stale += 1
+
+            threshold = self.semantic_threshold
+            if embedding is not None and threshold > 0:
+                match = self._nearest(kb_type, embedding, threshold)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.hits_semantic += 1
+                    return self._entries[match]["result"]
+
+            self.misses += 1
+            return None
+
+    def _nearest(self, kb_type: str, embedding: List[float], threshold: float):
+        keys = [k for k, e in self._entries.items()
+                if k[0] == kb_type and e["embedding"] is not None and self._valid(e)]
+        if not keys:
+            return None
+        matrix = np.array([self._entries[k]["embedding"] for k in keys], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        if matrix.shape[1] != query.shape[0]:
+            return None
+        sims = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(sims))
+        return keys[best] if sims[best] >= threshold else None
+
+    def put(self, question: str, kb_type: str, result: Dict, version: int,
+            embedding: Optional[List[float]] = None):
+        """
+        Store result computed against KB version `version` (read before retrieval).
+        """
+        size = max(0, int(env_float("ANSWER_CACHE_SIZE", 1000)))
+        key = (kb_type, normalize_question(question))
+        with self._lock:
+            self._entries[key] = {
+                "result": result,
+                "kb_version": version,
+                "created_at": time.time(),
+                "embedding": embedding,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.hits_exact + self.hits_semantic
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "kb_version": kb_version(),
+                "hits_exact": self.hits_exact,
+                "hits_semantic": self.hits_semantic,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+answer_cache = AnswerCache()
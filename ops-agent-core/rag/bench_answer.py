@@ -0,0 +1,81 @@
+"""
+Load test for the answer pipeline (retrieval + packing + LLM) without the
+HTTP layer. Meant for LLM_PROVIDER=mock against a local Postgres, with the
+mock latencies set to what the real services show (see llm/mock_client.py):
+
+    LLM_PROVIDER=mock ANSWER_CACHE_ENABLED=false MOCK_LLM_LATENCY_MS=800 MOCK_JITTER_MS=200 \\
+    MOCK_EMBEDDING_LATENCY_MS=30 MOCK_ERROR_RATE=0.01 \\
+    python -m rag.bench_answer --requests 500 --concurrency 50 --questions questions.txt
+
+Ingest some documents first (mock embeddings are deterministic, so the
+same corpus always gives the same retrieval). Leave the answer cache on to
+measure a realistic mix of hits and misses instead.
+"""
+import argparse
+import asyncio
+import random
+import time
+from llm.governor import governor_stats
+from rag.qa import answer_question, is_llm_error
+from rag.singleflight import singleflight
+
+DEFAULT_QUESTIONS = [
+    "磁盘使用率告警怎么处理",
+    "数据库连接失败怎么办",
+    "nginx 502 报错如何排查",
+    "基站退服告警处理步骤",
+    "如何重启 kafka 集群节点",
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+async def run(questions, total, concurrency, kb_type, role):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(random.choice(questions))
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            question = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                result = await answer_question(question, kb_type=kb_type, role=role)
+                if is_llm_error(result["answer"]):
+                    errors += 1
+            except Exception as e:
+                print(f"Request failed: {e}")
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent answer_question load test")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--questions", help="File with one question per line")
+    parser.add_argument("--kb-type", default="user")
+    parser.add_argument("--role", default="user")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    elapsed, latencies, errors = asyncio.run(run(questions, args.requests, args.concurrency, args.kb_type, args.role))
+    print(f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / max(elapsed, 1e-6):.1f} req/s), {errors} errors")
+    for p in (0.5, 0.95, 0.99):
+        print(f"p{int(p * 100):<3} {percentile(latencies, p) * 1000:8.1f} ms")
+    print(f"singleflight: {singleflight.stats()}")
+    print(f"governor: {governor_stats()}")
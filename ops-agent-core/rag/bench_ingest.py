@@ -0,0 +1,37 @@
+"""
+Embedding throughput benchmark for ingestion: one request per chunk
+(embed_text, the old load_text_content path) versus embed_batch.
+
+Usage (from ops-agent-core, provider configured via env / config.yaml):
+    python -m rag.bench_ingest ../docs/troubleshooting.md --batch-sizes 8 16 32 64
+"""
+import argparse
+import time
+from llm.factory import get_embedding_client
+from rag.loader import read_file_content
+from rag.splitter import split_ops_doc
+
+
+def bench(label, fn, n_chunks):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.2f}s  {n_chunks / max(elapsed, 1e-6):8.1f} chunks/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure embedding throughput for ingestion")
+    parser.add_argument("file", help="Document to split and embed (txt/md/docx/xlsx/csv)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--max-chunks", type=int, default=300)
+    args = parser.parse_args()
+
+    chunks = split_ops_doc(read_file_content(args.file))[:args.max_chunks]
+    client = get_embedding_client()
+    print(f"{len(chunks)} chunks, client={type(client).__name__}")
+
+    baseline = bench("sequential embed_text", lambda: [client.embed_text(c) for c in chunks], len(chunks))
+    for size in args.batch_sizes:
+        elapsed = bench(f"embed_batch(size={size})", lambda: client.embed_batch(chunks, batch_size=size), len(chunks))
+        print(f"{'':<24} speedup x{baseline / max(elapsed, 1e-6):.1f}")
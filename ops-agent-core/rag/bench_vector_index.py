@@ -0,0 +1,177 @@
+"""
+Latency and recall of the ANN index versus exact search, at growing table
+sizes. Runs on its own table (bench_vectors) in the configured database,
+so documents is not touched; the vectors are generated server-side around
+random cluster centers (real embeddings are clustered too; uniform random
+vectors would understate recall).
+
+    python -m rag.bench_vector_index --sizes 10000 100000 1000000 --method hnsw --ef-search 40 100 200
+    python -m rag.bench_vector_index --sizes 100000 --method ivfflat --probes 1 10 30
+    python -m rag.bench_vector_index --sizes 100000 1000000 --quantization none halfvec binary
+
+For every size: index build time and size, then p50/p95 latency of exact
+search (index scans disabled) and of the index for each ef_search / probes
+value, with recall@k against the exact result. With --quantization, this
+is repeated per index quantization (rag/vector_index.py), the quantized
+runs re-ranking RAG_QUANTIZED_RERANK_FACTOR x k rows exactly. Drop the tables afterwards
+with --cleanup. Generating 1M x 1024 takes several minutes.
+"""
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from db import engine
+from rag.vector_index import index_target, ivfflat_lists, nearest_sql, rerank_factor
+
+TABLE = "bench_vectors"
+CENTERS = "bench_centers"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+def vector_literal(vector) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def setup(dim: int, centers: int):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}, {CENTERS}"))
+        conn.execute(text(f"CREATE TABLE {CENTERS} (id INTEGER PRIMARY KEY, v REAL[] NOT NULL)"))
+        conn.execute(text(f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, embedding vector({dim}))"))
+        # "+ 0 * c" ties the subquery to the row, otherwise it runs once
+        conn.execute(text(f"""
+            INSERT INTO {CENTERS}
+            SELECT c, ARRAY(SELECT (random() * 2 - 1 + 0 * c)::real FROM generate_series(1, :dim))
+            FROM generate_series(0, :centers - 1) c
+        """), {"dim": dim, "centers": centers})
+        rows = conn.execute(text(f"SELECT v FROM {CENTERS} ORDER BY id")).fetchall()
+    return np.array([row[0] for row in rows], dtype=np.float32)
+
+
+def grow(current: int, target: int, dim: int, centers: int, noise: float, step: int = 50000):
+    for start in range(current, target, step):
+        end = min(target, start + step)
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(f"""
+                INSERT INTO {TABLE} (id, embedding)
+                SELECT g, ARRAY(SELECT c.v[d] + :noise * (random() * 2 - 1) FROM generate_series(1, :dim) d)::vector
+                FROM generate_series(:start, :end - 1) g
+                JOIN {CENTERS} c ON c.id = g % :centers
+            """), {"noise": noise, "dim": dim, "start": start, "end": end, "centers": centers})
+        print(f"  rows {end:>9} ({(end - start) / (time.perf_counter() - t0):,.0f} rows/s)")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {TABLE}"))
+
+
+def build_index(method: str, rows: int, m: int, ef_construction: int, lists: int,
+                quantization: str = "none", dim: int = 1024) -> dict:
+    if method == "hnsw":
+        options = f"m = {m}, ef_construction = {ef_construction}"
+    else:
+        options = f"lists = {lists or ivfflat_lists(rows)}"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_embedding_idx"))
+        t0 = time.perf_counter()
+        expression, opclass = index_target(quantization, dim)
+        conn.execute(text(f"CREATE INDEX {TABLE}_embedding_idx ON {TABLE} USING {method} ({expression} {opclass}) WITH ({options})"))
+        seconds = time.perf_counter() - t0
+        size = conn.execute(text(f"SELECT pg_relation_size('{TABLE}_embedding_idx')")).scalar()
+    return {"options": options, "seconds": seconds, "size_mb": size / 2 ** 20}
+
+
+def search(queries, top_k: int, settings: list, quantization: str = "none", dim: int = 1024):
+    """
+    Run every query in its own transaction with the given SET LOCALs;
+    returns (latencies, result ids) and whether the index was used.
+    """
+    latencies, results = [], []
+    sql = text(nearest_sql(limit=":k", table=TABLE, query="(:q)::vector", quantization=quantization, dim=dim))
+    with engine.connect() as conn:
+        for query in queries:
+            with conn.begin():
+                for setting in settings:
+                    conn.execute(text(f"SET LOCAL {setting}"))
+                t0 = time.perf_counter()
+                ids = [row[0] for row in conn.execute(sql, {"q": query, "k": top_k})]
+                latencies.append(time.perf_counter() - t0)
+                results.append(ids)
+        with conn.begin():
+            for setting in settings:
+                conn.execute(text(f"SET LOCAL {setting}"))
+            plan = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql.text}"), {"q": queries[0], "k": top_k}))
+    return latencies, results, "Index Scan" in plan
+
+
+def recall(results, truth, top_k: int) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / (top_k * len(truth))
+
+
+def report(label: str, latencies, value: str = ""):
+    print(f"  {label:<24} p50 {percentile(latencies, 0.5) * 1000:8.2f} ms   "
+          f"p95 {percentile(latencies, 0.95) * 1000:8.2f} ms   {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN index vs exact search on pgvector")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--centers", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 100, 200])
+    parser.add_argument("--lists", type=int, default=0, help="ivfflat lists, 0 = from the row count")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--quantization", nargs="+", choices=["none", "halfvec", "binary"], default=["none"])
+    parser.add_argument("--cleanup", action="store_true", help="Drop the benchmark tables at the end")
+    args = parser.parse_args()
+
+    centers = setup(args.dim, args.centers)
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(centers), args.queries)
+    queries = [vector_literal(centers[c] + args.noise * rng.uniform(-1, 1, args.dim)) for c in picks]
+
+    rows = 0
+    for size in sorted(args.sizes):
+        print(f"\n== {size:,} vectors, dim {args.dim} ==")
+        grow(rows, size, args.dim, args.centers, args.noise)
+        rows = size
+
+        # Exact: without index scans the planner has to scan and sort
+        exact_lat, truth, _ = search(queries, args.top_k, ["enable_indexscan = off"])
+        report("exact (seq scan)", exact_lat, "recall 1.000")
+
+        for quantization in args.quantization:
+            built = build_index(args.method, rows, args.m, args.ef_construction, args.lists, quantization, args.dim)
+            print(f"  {args.method} {quantization} ({built['options']}) built in {built['seconds']:.1f}s, "
+                  f"{built['size_mb']:.0f} MB")
+            # The quantized pass walks the index for factor x k rows
+            fetched = args.top_k * rerank_factor(quantization)
+            if args.method == "hnsw":
+                settings = [(f"ef_search={ef}", [f"hnsw.ef_search = {max(ef, fetched)}"]) for ef in args.ef_search]
+            else:
+                settings = [(f"probes={p}", [f"ivfflat.probes = {p}"]) for p in args.probes]
+            for label, setting in settings:
+                lat, results, used = search(queries, args.top_k, setting, quantization, args.dim)
+                note = "" if used else "  (index NOT used by the planner)"
+                speedup = percentile(exact_lat, 0.5) / max(percentile(lat, 0.5), 1e-9)
+                report(f"{quantization} {label}", lat,
+                       f"recall@{args.top_k} {recall(results, truth, args.top_k):.3f}  x{speedup:.1f}{note}")
+            # The next size is inserted without the index (much faster); it is rebuilt there
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_embedding_idx"))
+
+    if args.cleanup:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}, {CENTERS}"))
@@ -0,0 +1,112 @@
+"""
+pgvector against the numpy vector store (rag/vector_store.py) on the same
+vectors: latency and recall@k of exact pgvector search, the pgvector ANN
+index and the memory-mapped numpy store in float32 / float16.
+
+    python -m rag.bench_vector_store --sizes 10000 100000 --dtypes float32 float16
+
+Vectors come from rag.bench_vector_index (clustered, generated server-side
+in bench_vectors) and are normalized there with l2_normalize (pgvector
+0.7+), as embeddings are, so both sides rank the same neighbours. The
+numpy side reads them back into a store under --dir. Recall is against
+exact pgvector search. Drop the tables afterwards with --cleanup.
+"""
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from db import engine
+from rag.bench_vector_index import (CENTERS, TABLE, build_index, grow, percentile, recall, report, search, setup,
+                                    vector_literal)
+from rag.vector_store import NumpyVectorStore
+
+
+def normalize(start: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE {TABLE} SET embedding = l2_normalize(embedding) WHERE id >= :start"), {"start": start})
+
+
+def load_store(store: NumpyVectorStore, start: int, batch: int = 10000):
+    t0 = time.perf_counter()
+    with engine.connect().execution_options(stream_results=True) as conn:
+        result = conn.execute(text(f"SELECT id, embedding::real[] FROM {TABLE} WHERE id >= :start ORDER BY id"),
+                              {"start": start})
+        while True:
+            rows = result.fetchmany(batch)
+            if not rows:
+                break
+            store.add((row[0], row[1], "user") for row in rows)
+    return time.perf_counter() - t0
+
+
+def search_store(store: NumpyVectorStore, queries, top_k: int):
+    latencies, results = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        results.append([doc_id for doc_id, _ in store.search(query, "all", top_k)])
+        latencies.append(time.perf_counter() - t0)
+    return latencies, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pgvector vs numpy vector store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--centers", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dtypes", nargs="+", choices=["float32", "float16"], default=["float32", "float16"])
+    parser.add_argument("--ef-search", type=int, default=100, help="hnsw.ef_search of the pgvector ANN run")
+    parser.add_argument("--dir", default="bench_vector_store", help="Directory of the numpy store files")
+    parser.add_argument("--cleanup", action="store_true", help="Drop the benchmark tables and files at the end")
+    args = parser.parse_args()
+
+    centers = setup(args.dim, args.centers)
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(centers), args.queries)
+    vectors = [centers[c] + args.noise * rng.uniform(-1, 1, args.dim) for c in picks]
+    vectors = [v / np.linalg.norm(v) for v in vectors]
+    queries = [vector_literal(v) for v in vectors]
+
+    stores = {}
+    for dtype in args.dtypes:
+        directory = os.path.join(args.dir, dtype)
+        shutil.rmtree(directory, ignore_errors=True)
+        stores[dtype] = NumpyVectorStore(directory, dtype)
+
+    rows = 0
+    for size in sorted(args.sizes):
+        print(f"\n== {size:,} vectors, dim {args.dim} ==")
+        grow(rows, size, args.dim, args.centers, args.noise)
+        normalize(rows)
+        for dtype, store in stores.items():
+            seconds = load_store(store, rows)
+            mb = store.vectors[:store.used].nbytes / 2 ** 20
+            print(f"  numpy {dtype}: +{size - rows:,} rows read in {seconds:.1f}s, {mb:.0f} MB")
+        rows = size
+
+        exact_lat, truth, _ = search(queries, args.top_k, ["enable_indexscan = off"])
+        report("pgvector exact", exact_lat, "recall 1.000")
+
+        built = build_index("hnsw", rows, 16, 64, 0)
+        lat, results, used = search(queries, args.top_k, [f"hnsw.ef_search = {max(args.ef_search, args.top_k)}"])
+        note = "" if used else "  (index NOT used by the planner)"
+        report(f"pgvector hnsw ef={args.ef_search}", lat,
+               f"recall@{args.top_k} {recall(results, truth, args.top_k):.3f}  build {built['seconds']:.1f}s{note}")
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_embedding_idx"))
+
+        for dtype, store in stores.items():
+            lat, results = search_store(store, vectors, args.top_k)
+            speedup = percentile(exact_lat, 0.5) / max(percentile(lat, 0.5), 1e-9)
+            report(f"numpy {dtype}", lat, f"recall@{args.top_k} {recall(results, truth, args.top_k):.3f}  x{speedup:.1f} vs exact")
+
+    if args.cleanup:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}, {CENTERS}"))
+        shutil.rmtree(args.dir, ignore_errors=True)
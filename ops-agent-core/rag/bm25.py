@@ -0,0 +1,354 @@
+"""
+In-process BM25 index over documents chunks, the lexical leg of hybrid
+retrieval when RAG_LEXICAL_BACKEND=bm25 (rag/retriever.py). Unlike the
+content_tsv search of rag/fulltext.py it needs no database support and
+ranks by BM25 instead of cover density.
+
+Tokens are those of rag/fulltext.py (ASCII words, CJK bigrams) plus whole
+identifiers, so alarm codes, NE names and error strings also match as one
+term: "ALM-1234 on BJ-OLT-01.hw" adds alm-1234 and bj-olt-01.hw next to
+alm, 1234, bj, olt, 01, hw.
+
+Layout: chunks get dense internal numbers in insertion order; per chunk
+its documents.id, length and kb (array.array), per term a postings list of
+(chunk numbers, term frequencies) as two arrays that only grow at the end,
+so they stay sorted and scoring is a few numpy gathers per query term.
+Deleted chunks are tombstoned and dropped by compact() once they make up
+a quarter of the index. Document frequencies include tombstones until
+then, which slightly underweights terms of deleted chunks.
+
+Updates: rag/loader.py reports inserted chunks (after commit) and deleted
+ids; endpoints delete chunks before the uploaded_files / learned_qa row
+they belong to for that reason. Chunks removed by ON DELETE CASCADE alone
+are not reported; the retriever reads rows by id, so they drop out of
+results, and out of the index at the next sync. start() loads the snapshot, if any, and then syncs with documents
+(adds missing ids, drops vanished ones), so a restart re-reads only what
+changed since the snapshot; without a snapshot the sync is a full build.
+
+Settings (env, or rag.* in config.yaml):
+    RAG_LEXICAL_BACKEND          postgres (content_tsv, default) | bm25
+    RAG_BM25_SNAPSHOT            snapshot file (default bm25_index.pkl)
+    RAG_BM25_SNAPSHOT_INTERVAL   min. seconds between snapshots after updates (default 300)
+    RAG_BM25_K1, RAG_BM25_B      BM25 parameters (default 1.2, 0.75)
+"""
+import math
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from collections import Counter as TermCounter
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from db import engine
+from metrics import CallbackMetric
+from rag.fulltext import query_tokens, tokenize as fulltext_tokenize
+from settings import env_float
+
+SNAPSHOT_VERSION = 1
+SHARED_KB = "shared"
+FETCH_BATCH = 1000
+COMPACT_RATIO = 0.25
+MAX_TF = 65535
+
+_IDENTIFIER = re.compile(r"[a-z0-9]+(?:[-_.:/][a-z0-9]+)+")
+
+
+def lexical_backend() -> str:
+    backend = os.getenv("RAG_LEXICAL_BACKEND", "postgres").lower()
+    return backend if backend in ("postgres", "bm25") else "postgres"
+
+
+def snapshot_path() -> str:
+    return os.getenv("RAG_BM25_SNAPSHOT", "bm25_index.pkl")
+
+
+def identifiers(content: str) -> List[str]:
+    return _IDENTIFIER.findall((content or "").lower())
+
+
+def tokenize(content: str) -> List[str]:
+    return fulltext_tokenize(content) + identifiers(content)
+
+
+def query_terms(query: str) -> List[str]:
+    return list(dict.fromkeys(query_tokens(query) + identifiers(query)))
+
+
+class BM25Index:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.ready = False
+        self.dirty = False
+        self.last_snapshot = 0.0
+        self._snapshotting = False
+
+    def _reset(self):
+        self.doc_ids = array("q")      # chunk number -> documents.id
+        self.doc_lens = array("I")
+        self.doc_kbs = array("B")      # index into kb_names
+        self.alive = bytearray()
+        self.kb_names = []
+        self.postings = {}             # term -> (array("I") chunk numbers, array("H") tf)
+        self.numbers = {}              # documents.id -> chunk number
+        self.live_len = 0
+
+    # --- updates --------------------------------------------------------------
+
+    def _kb_code(self, kb_type: str) -> int:
+        kb_type = kb_type or SHARED_KB
+        if kb_type not in self.kb_names:
+            self.kb_names.append(kb_type)
+        return self.kb_names.index(kb_type)
+
+    def _remove(self, doc_id: int) -> bool:
+        number = self.numbers.pop(doc_id, None)
+        if number is None:
+            return False
+        self.alive[number] = 0
+        self.live_len -= self.doc_lens[number]
+        return True
+
+    def add_documents(self, rows: Iterable[Tuple[int, str, str]]):
+        """
+        rows: (documents.id, content, kb_type); known ids are replaced.
+        """
+        tokenized = [(doc_id, TermCounter(tokenize(content)), kb_type) for doc_id, content, kb_type in rows]
+        with self._lock:
+            for doc_id, counts, kb_type in tokenized:
+                self._remove(doc_id)
+                number = len(self.doc_ids)
+                length = sum(counts.values())
+                self.doc_ids.append(doc_id)
+                self.doc_lens.append(length)
+                self.doc_kbs.append(self._kb_code(kb_type))
+                self.alive.append(1)
+                self.numbers[doc_id] = number
+                self.live_len += length
+                for term, tf in counts.items():
+                    postings = self.postings.get(term)
+                    if postings is None:
+                        postings = self.postings[term] = (array("I"), array("H"))
+                    postings[0].append(number)
+                    postings[1].append(min(tf, MAX_TF))
+            if tokenized:
+                self.dirty = True
+        return len(tokenized)
+
+    def remove_documents(self, doc_ids: Iterable[int]) -> int:
+        with self._lock:
+            removed = sum(1 for doc_id in doc_ids if self._remove(doc_id))
+            if removed:
+                self.dirty = True
+                if len(self.doc_ids) - len(self.numbers) > COMPACT_RATIO * len(self.doc_ids):
+                    self.compact()
+        return removed
+
+    def compact(self):
+        """
+        Drop tombstoned chunks and renumber the rest.
+        """
+        with self._lock:
+            alive = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            keep = np.flatnonzero(alive)
+            self.doc_ids = array("q", np.frombuffer(self.doc_ids, dtype=np.int64)[keep].tobytes())
+            self.doc_lens = array("I", np.frombuffer(self.doc_lens, dtype=np.uint32)[keep].tobytes())
+            self.doc_kbs = array("B", np.frombuffer(self.doc_kbs, dtype=np.uint8)[keep].tobytes())
+            self.alive = bytearray(b"\x01" * len(keep))
+            postings = {}
+            for term, (numbers, tfs) in self.postings.items():
+                numbers = np.frombuffer(numbers, dtype=np.uint32)
+                live = alive[numbers]
+                if live.any():
+                    postings[term] = (array("I", renumber[numbers[live]].astype(np.uint32).tobytes()),
+                                      array("H", np.frombuffer(tfs, dtype=np.uint16)[live].tobytes()))
+            self.postings = postings
+            self.numbers = {int(doc_id): i for i, doc_id in enumerate(self.doc_ids)}
+
+    # --- search ---------------------------------------------------------------
+
+    def search(self, query: str, kb_type: str = "user", limit: int = 20) -> List[Tuple[int, float, float]]:
+        """
+        Best chunks for query as (documents.id, bm25 score, keyword_score),
+        keyword_score being the fraction of the query terms the chunk contains.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        k1 = env_float("RAG_BM25_K1", 1.2)
+        b = env_float("RAG_BM25_B", 0.75)
+        with self._lock:
+            total = len(self.doc_ids)
+            live = len(self.numbers)
+            if not live:
+                return []
+            avg_len = max(self.live_len / live, 1e-9)
+            lens = np.frombuffer(self.doc_lens, dtype=np.uint32)
+            scores = np.zeros(total, dtype=np.float32)
+            matched = np.zeros(total, dtype=np.int16)
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                numbers = np.frombuffer(postings[0], dtype=np.uint32)
+                tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+                idf = math.log(1 + (total - len(numbers) + 0.5) / (len(numbers) + 0.5))
+                norm = k1 * (1 - b + b * lens[numbers] / avg_len)
+                # A term occurs once per postings list, so no duplicate indices
+                scores[numbers] += idf * tfs * (k1 + 1) / (tfs + norm)
+                matched[numbers] += 1
+            mask = (matched > 0) & np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+            if kb_type != "all":
+                kbs = np.frombuffer(self.doc_kbs, dtype=np.uint8)
+                allowed = [self.kb_names.index(kb) for kb in (kb_type, SHARED_KB) if kb in self.kb_names]
+                mask &= np.isin(kbs, allowed)
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(int(self.doc_ids[i]), float(scores[i]), float(matched[i]) / len(terms)) for i in candidates]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ready": self.ready, "documents": len(self.numbers), "tombstones": len(self.doc_ids) - len(self.numbers),
+                    "terms": len(self.postings)}
+
+    # --- persistence ----------------------------------------------------------
+
+    def save(self, path: Optional[str] = None):
+        path = path or snapshot_path()
+        start = time.perf_counter()
+        with self._lock:
+            if len(self.doc_ids) != len(self.numbers):
+                self.compact()
+            state = pickle.dumps({
+                "version": SNAPSHOT_VERSION,
+                "doc_ids": self.doc_ids, "doc_lens": self.doc_lens, "doc_kbs": self.doc_kbs,
+                "kb_names": self.kb_names, "postings": self.postings, "live_len": self.live_len,
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+            self.dirty = False
+            self.last_snapshot = time.time()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(state)
+        os.replace(tmp, path)
+        print(f"BM25 snapshot written to {path} ({len(state) / 2 ** 20:.1f} MB, {time.perf_counter() - start:.2f}s)")
+
+    def load(self, path: Optional[str] = None) -> bool:
+        path = path or snapshot_path()
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            if state.get("version") != SNAPSHOT_VERSION:
+                print(f"Ignoring BM25 snapshot {path}: version {state.get('version')}")
+                return False
+        except Exception as e:
+            print(f"Ignoring BM25 snapshot {path}: {e}")
+            return False
+        with self._lock:
+            self.doc_ids, self.doc_lens, self.doc_kbs = state["doc_ids"], state["doc_lens"], state["doc_kbs"]
+            self.kb_names, self.postings, self.live_len = state["kb_names"], state["postings"], state["live_len"]
+            self.alive = bytearray(b"\x01" * len(self.doc_ids))
+            self.numbers = {int(doc_id): i for i, doc_id in enumerate(self.doc_ids)}
+        print(f"BM25 snapshot loaded from {path}: {len(self.numbers)} chunks")
+        return True
+
+    def maybe_snapshot(self):
+        """
+        Snapshot in the background if there are unsaved updates and the
+        last snapshot is older than RAG_BM25_SNAPSHOT_INTERVAL.
+        """
+        interval = env_float("RAG_BM25_SNAPSHOT_INTERVAL", 300)
+        with self._lock:
+            if not (self.ready and self.dirty) or self._snapshotting or time.time() - self.last_snapshot < interval:
+                return
+            self._snapshotting = True
+
+        def run():
+            try:
+                self.save()
+            except Exception as e:
+                print(f"BM25 snapshot failed: {e}")
+            finally:
+                self._snapshotting = False
+        threading.Thread(target=run, daemon=True).start()
+
+    # --- database sync --------------------------------------------------------
+
+    def sync(self) -> Tuple[int, int]:
+        """
+        Make the index match documents: drop ids that no longer exist and
+        read the ones missing. Returns (added, removed).
+        """
+        with engine.connect() as conn:
+            db_ids = {row[0] for row in conn.execute(text("SELECT id FROM documents"))}
+        with self._lock:
+            indexed = set(self.numbers)
+        removed = self.remove_documents(indexed - db_ids)
+        missing = sorted(db_ids - indexed)
+        added = 0
+        for i in range(0, len(missing), FETCH_BATCH):
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    text("SELECT id, content, kb_type FROM documents WHERE id = ANY(:ids)"),
+                    {"ids": missing[i:i + FETCH_BATCH]}
+                ).fetchall()
+            added += self.add_documents((row[0], row[1], row[2]) for row in rows)
+        return added, removed
+
+    def start(self):
+        """
+        Load the snapshot and catch up with documents (lifespan thread).
+        """
+        if lexical_backend() != "bm25":
+            return
+        start = time.perf_counter()
+        try:
+            self.load()
+            added, removed = self.sync()
+            self.ready = True
+            print(f"BM25 index ready in {time.perf_counter() - start:.1f}s: {self.stats()} (+{added} / -{removed} since snapshot)")
+            if added or removed or not os.path.exists(snapshot_path()):
+                self.save()
+        except Exception as e:
+            print(f"BM25 index unavailable, using Postgres full-text search: {e}")
+
+
+bm25_index = BM25Index()
+
+CallbackMetric("bm25_index_documents", "Chunks in the in-process BM25 index", [],
+               lambda: [({}, bm25_index.stats()["documents"])] if bm25_index.ready else [])
+
+
+def on_documents_added(rows: List[Tuple[int, str, str]]):
+    """
+    Called by rag/loader.py with (id, content, kb_type) of committed chunks.
+    """
+    if lexical_backend() != "bm25" or not rows:
+        return
+    bm25_index.add_documents(rows)
+    bm25_index.maybe_snapshot()
+
+
+def on_documents_deleted(doc_ids: List[int]):
+    if lexical_backend() != "bm25" or not doc_ids:
+        return
+    bm25_index.remove_documents(doc_ids)
+    bm25_index.maybe_snapshot()
+
+
+if __name__ == "__main__":
+    import sys
+    os.environ["RAG_LEXICAL_BACKEND"] = "bm25"
+    bm25_index.start()
+    if len(sys.argv) > 1:
+        for doc_id, score, coverage in bm25_index.search(" ".join(sys.argv[1:]), kb_type="all", limit=10):
+            print(f"{doc_id:>8} {score:8.3f} {coverage:5.2f}")
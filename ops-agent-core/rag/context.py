@@ -0,0 +1,151 @@
+"""
+Token-budgeted packing of retrieved chunks into the prompt context.
+
+Chunks are taken best score first until RAG_CONTEXT_TOKENS is used up; the
+first chunk that no longer fits is trimmed to the remaining budget (if at
+least MIN_TRIM_TOKENS are left) and the rest is dropped. Each chunk only
+carries the citation fields SYSTEM_PROMPT asks for (document name, upload
+date) instead of the raw metadata.
+
+Token counts come from tiktoken (cl100k_base). The BPE file is downloaded
+on first use; on an intranet without access, pre-seed TIKTOKEN_CACHE_DIR or
+counts fall back to an estimate (one token per CJK character, four
+characters per token otherwise). documents.token_count is filled at
+ingestion, so packing only counts tokens for rows ingested before that
+column existed.
+
+Settings (env, or rag.* in config.yaml):
+    RAG_CONTEXT_TOKENS  token budget for the reference documents (default 3000)
+"""
+import math
+import os
+import re
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+ENCODING_NAME = "cl100k_base"
+MIN_TRIM_TOKENS = 64
+TRIM_MARK = "……"
+
+_CJK = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+_lock = threading.Lock()
+_encoding = None
+_encoding_failed = False
+
+QA_TYPES = {"learned_qa": "运维问答库", "manual_qa": "运维问答库"}
+
+
+def get_context_budget() -> int:
+    try:
+        return max(0, int(os.getenv("RAG_CONTEXT_TOKENS", "3000")))
+    except ValueError:
+        return 3000
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                print(f"tiktoken unavailable, estimating token counts: {e}")
+                _encoding_failed = True
+    return _encoding
+
+
+def _estimate_tokens(text: str) -> int:
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return _estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of text with at most max_tokens tokens.
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # A cut inside a multi-byte character decodes to U+FFFD
+        return encoding.decode(tokens[:max_tokens]).rstrip("\ufffd")
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def citation(metadata: Optional[dict]) -> Tuple[str, str]:
+    """
+    (document name, upload date) for the citation format of SYSTEM_PROMPT.
+    """
+    metadata = metadata or {}
+    name = metadata.get("filename") or QA_TYPES.get(metadata.get("type"), "")
+    uploaded = str(metadata.get("upload_time") or metadata.get("created_at") or "")[:10]
+    return name, uploaded
+
+
+def _header(index: int, metadata: Optional[dict]) -> str:
+    name, uploaded = citation(metadata)
+    fields = [f"【文档 {index}】"]
+    if name:
+        fields.append(f"《{name}》")
+    if uploaded:
+        fields.append(f"（上传时间：{uploaded}）")
+    return "".join(fields) + "\n"
+
+
+def chunk_tokens(doc: Sequence) -> int:
+    """
+    Stored token count of a retrieved row (id, content, metadata, distance,
+    token_count), counted now for rows ingested without one.
+    """
+    stored = doc[4] if len(doc) > 4 else None
+    return stored if stored is not None else count_tokens(doc[1])
+
+
+def pack_context(docs: List[Sequence], budget: Optional[int] = None) -> Tuple[str, List[Sequence]]:
+    """
+    docs must be ordered best first. Returns (context, packed docs).
+    """
+    budget = get_context_budget() if budget is None else budget
+    parts = []
+    packed = []
+    remaining = budget
+    for doc in docs:
+        header = _header(len(packed) + 1, doc[2])
+        header_tokens = count_tokens(header)
+        content_tokens = chunk_tokens(doc)
+        if header_tokens + content_tokens <= remaining:
+            parts.append(header + doc[1])
+            remaining -= header_tokens + content_tokens
+            packed.append(doc)
+            continue
+        room = remaining - header_tokens - count_tokens(TRIM_MARK)
+        if room >= MIN_TRIM_TOKENS:
+            parts.append(header + truncate_tokens(doc[1], room) + TRIM_MARK)
+            packed.append(doc)
+        break
+    if len(packed) < len(docs):
+        print(f"Context packing: kept {len(packed)}/{len(docs)} chunks within {budget} tokens")
+    return "\n\n".join(parts), packed
@@ -0,0 +1,202 @@
+"""
+Indexed full-text search over documents.content, for Chinese and mixed
+Chinese / English ops docs without an external word segmenter.
+
+Text is tokenized into lowercased ASCII words (nginx, 502, kafka_broker)
+and CJK character bigrams (磁盘使用率 -> 磁盘 盘使 使用 用率). Postgres'
+text search parser does not split CJK and depends on the database locale,
+so the tokens are produced here and stored verbatim: documents.content_tsv
+is a tsvector literal with positions (GIN indexed), and queries are OR-ed
+tsquery literals cast with ::tsquery, which skips the parser too.
+
+Matching is ranked with ts_rank_cd (cover density, so adjacent bigrams of
+a phrase rank higher). keyword_score is calibrated instead: the fraction of
+the query's distinct tokens found in the chunk (0..1).
+
+Rows ingested before content_tsv existed are filled in the background at
+startup (backfill_content_tsv), or with
+
+    python -m rag.fulltext backfill
+"""
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from db import engine
+
+_ASCII_WORD = re.compile(r"[a-z0-9_]+")
+_TOKEN = re.compile(r"[a-z0-9_]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+# Question phrasing that would otherwise match half the corpus: query
+# bigrams containing one of STOP_CHARS, or listed in STOP_BIGRAMS
+STOP_CHARS = set("怎么吗呢吧啊请")
+STOP_BIGRAMS = {"如何", "什么", "为什", "一下", "是否", "可以", "哪些", "回事"}
+MAX_POSITION = 16383       # tsvector position limit
+MAX_POSITIONS_PER_TOKEN = 256
+SNIPPET_CHARS = 80
+
+
+def tokenize(content: str) -> List[str]:
+    """
+    Tokens in text order: ASCII words (at least 2 characters or a number)
+    and CJK bigrams; a lone CJK character is kept as a unigram.
+    """
+    tokens = []
+    for run in _TOKEN.findall((content or "").lower()):
+        if _ASCII_WORD.fullmatch(run):
+            if len(run) > 1 or run.isdigit():
+                tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_tokens(query: str) -> List[str]:
+    """
+    Distinct tokens of a question, question-phrasing bigrams removed
+    (unless nothing else is left).
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    content = [t for t in tokens if t not in STOP_BIGRAMS and not STOP_CHARS.intersection(t)]
+    return content or tokens
+
+
+def _quote(token: str) -> str:
+    return "'" + token.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def tsvector_literal(content: str) -> str:
+    """
+    tsvector text for documents.content_tsv, insert as (:value)::tsvector.
+    """
+    positions: Dict[str, List[int]] = {}
+    for i, token in enumerate(tokenize(content), start=1):
+        hits = positions.setdefault(token, [])
+        if len(hits) < MAX_POSITIONS_PER_TOKEN:
+            hits.append(min(i, MAX_POSITION))
+    return " ".join(f"{_quote(t)}:{','.join(map(str, sorted(set(p))))}" for t, p in positions.items())
+
+
+def tsquery_literal(tokens: List[str]) -> Optional[str]:
+    """
+    OR of the tokens, for (:value)::tsquery; None (matches nothing) when empty.
+    """
+    return " | ".join(_quote(t) for t in tokens) or None
+
+
+def match_params(query: str) -> dict:
+    """
+    Bind parameters used by the SQL of this module and rag/retriever.py:
+    tsquery, query_tokens (text[]) and n_tokens.
+    """
+    tokens = query_tokens(query)
+    return {"tsquery": tsquery_literal(tokens), "query_tokens": tokens, "n_tokens": max(1, len(tokens))}
+
+
+# Fraction of the query tokens present in the chunk d.content_tsv
+KEYWORD_SCORE_SQL = """
+    (SELECT count(*) FROM unnest(tsvector_to_array(d.content_tsv)) lexeme
+     WHERE lexeme = ANY(CAST(:query_tokens AS text[])))::float / :n_tokens
+"""
+
+
+def snippet(content: str, tokens: List[str], width: int = SNIPPET_CHARS) -> str:
+    """
+    Excerpt of content around the first query token it contains.
+    """
+    lowered = content.lower()
+    hits = [i for i in (lowered.find(t) for t in tokens) if i >= 0]
+    start = max(0, min(hits) - width // 4) if hits else 0
+    excerpt = content[start:start + width].replace("\n", " ").strip()
+    return ("…" if start > 0 else "") + excerpt + ("…" if start + width < len(content) else "")
+
+
+def search_content(query: str, kb_type: Optional[str] = None, limit: int = 20, offset: int = 0) -> Tuple[int, List[dict]]:
+    """
+    Approved uploaded files whose chunks match query, best matching chunk
+    first. Returns (total files, page of file rows with snippet and score).
+    """
+    params = {**match_params(query), "limit": limit, "offset": offset}
+    if params["tsquery"] is None:
+        return 0, []
+    kb_filter = ""
+    if kb_type and kb_type != "all":
+        kb_filter = "AND d.kb_type IN (:kb_type, 'shared')"
+        params["kb_type"] = kb_type
+    matches = f"""
+        SELECT DISTINCT ON (d.file_id) d.file_id, d.content,
+               ts_rank_cd(d.content_tsv, (:tsquery)::tsquery, 1) AS rank,
+               {KEYWORD_SCORE_SQL} AS keyword_score
+        FROM documents d
+        JOIN uploaded_files f ON f.id = d.file_id AND f.status = 'approved'
+        WHERE d.content_tsv @@ (:tsquery)::tsquery {kb_filter}
+        ORDER BY d.file_id, rank DESC
+    """
+    with engine.connect() as conn:
+        total = conn.execute(text(f"SELECT COUNT(*) FROM ({matches}) m"), params).scalar()
+        rows = conn.execute(text(f"""
+            SELECT f.id, f.filename, f.uploader, f.created_at, f.file_size, f.download_count, f.kb_type,
+                   m.content, m.rank, m.keyword_score
+            FROM ({matches}) m
+            JOIN uploaded_files f ON f.id = m.file_id
+            ORDER BY m.keyword_score DESC, m.rank DESC, f.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """), params).fetchall()
+    docs = []
+    for row in rows:
+        docs.append({
+            "id": row[0],
+            "filename": row[1],
+            "uploader": row[2],
+            "created_at": str(row[3]),
+            "file_size": row[4] if row[4] is not None else 0,
+            "download_count": row[5] if row[5] is not None else 0,
+            "kb_type": row[6] if row[6] else "user",
+            "snippet": snippet(row[7], params["query_tokens"]),
+            "score": round(float(row[9]), 4),
+        })
+    return int(total or 0), docs
+
+
+def backfill_content_tsv(batch_size: int = 500) -> int:
+    """
+    Fill content_tsv for rows ingested before the column existed.
+    """
+    filled = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    text("SELECT id, content FROM documents WHERE content_tsv IS NULL ORDER BY id LIMIT :n"),
+                    {"n": batch_size}
+                ).fetchall()
+                if not rows:
+                    break
+                conn.execute(
+                    text("UPDATE documents SET content_tsv = (:tsv)::tsvector WHERE id = :id"),
+                    [{"id": row[0], "tsv": tsvector_literal(row[1])} for row in rows]
+                )
+            filled += len(rows)
+    except Exception as e:
+        print(f"content_tsv backfill stopped after {filled} rows: {e}")
+        return filled
+    if filled:
+        print(f"content_tsv backfilled for {filled} chunks in {time.perf_counter() - start:.1f}s")
+    return filled
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "backfill":
+        backfill_content_tsv()
+    elif command == "tokenize":
+        print(" ".join(tokenize(" ".join(sys.argv[2:]))))
+    else:
+        print("usage: python -m rag.fulltext backfill | tokenize <text>")
+        sys.exit(2)
@@ -0,0 +1,257 @@
+"""
+Document ingestion as queued jobs, so uploads return at once instead of
+holding a request thread (and, for approvals, a transaction) while a large
+file is split and embedded.
+
+Endpoints insert a row into ingest_jobs (enqueue, in the same transaction
+as the uploaded_files change) and return its id. Workers claim the oldest
+queued job with FOR UPDATE SKIP LOCKED, so any number of them, in any
+number of processes or nodes, never take the same job; the claim is its
+own short transaction and the job is then marked running. While it runs,
+the worker writes its stage and progress (chunks embedded / total) to the
+row, which is also its heartbeat: a running job whose heartbeat is older
+than RAG_INGEST_JOB_TIMEOUT seconds (worker killed, node lost) is queued
+again, or failed after RAG_INGEST_MAX_ATTEMPTS claims. A job that raises
+is failed with its error and not retried.
+
+Workers run as threads of the API process (RAG_INGEST_WORKERS, default 1;
+set 0 when dedicated workers run) and/or as a separate process:
+
+    python ingest_worker.py --threads 2      (from ops-agent-biz)
+
+Workers need the uploaded files at the same path as the API (shared
+uploads volume). A separate worker process leaves the in-process indexes
+alone; the API picks its changes up through the shared KB version
+(rag/kb_version.py).
+
+Settings (env, or rag.* in config.yaml):
+    RAG_INGEST_WORKERS        worker threads in the API process (default 1)
+    RAG_INGEST_POLL_INTERVAL  seconds between polls of an idle worker (default 2)
+    RAG_INGEST_JOB_TIMEOUT    heartbeat age after which a running job is re-queued (default 600)
+    RAG_INGEST_MAX_ATTEMPTS   claims before a lost job is failed (default 3)
+"""
+import json
+import os
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from db import engine
+from metrics import CallbackMetric
+from rag.loader import load_document
+from settings import env_float
+
+STATUSES = ("queued", "running", "done", "failed")
+
+JOB_COLUMNS = """id, kind, file_id, status, stage, progress_done, progress_total, attempts, error, result,
+                 worker, created_by, created_at, started_at, heartbeat_at, finished_at"""
+
+
+def enqueue(conn, file_id: int, file_path: str, metadata: dict, kb_type: str = "user",
+            approve: bool = False, created_by: Optional[str] = None) -> int:
+    """
+    Queue the ingestion of an uploaded file in the caller's transaction.
+    With approve, the worker sets uploaded_files.status to 'approved' once
+    the chunks are stored (and back to 'pending' if ingestion fails).
+    """
+    if not approve:
+        # A queued job reads the file when it runs, so it covers this request too
+        queued = conn.execute(
+            text("SELECT id FROM ingest_jobs WHERE file_id = :file_id AND status = 'queued' ORDER BY id LIMIT 1"),
+            {"file_id": file_id}
+        ).scalar()
+        if queued is not None:
+            return queued
+    payload = {"file_path": file_path, "metadata": metadata, "kb_type": kb_type, "approve": approve}
+    return conn.execute(
+        text("""
+            INSERT INTO ingest_jobs (kind, file_id, payload, created_by)
+            VALUES ('document', :file_id, CAST(:payload AS JSONB), :created_by)
+            RETURNING id
+        """),
+        {"file_id": file_id, "payload": json.dumps(payload, ensure_ascii=False), "created_by": created_by}
+    ).scalar()
+
+
+def _job_dict(row) -> dict:
+    (job_id, kind, file_id, status, stage, done, total, attempts, error, result,
+     worker, created_by, created_at, started_at, heartbeat_at, finished_at) = row
+    return {
+        "id": job_id,
+        "kind": kind,
+        "file_id": file_id,
+        "status": status,
+        "stage": stage,
+        "progress": {
+            "done": done or 0,
+            "total": total or 0,
+            "percent": round(100.0 * (done or 0) / total, 1) if total else (100.0 if status == "done" else 0.0),
+        },
+        "attempts": attempts,
+        "error": error,
+        "result": result,
+        "worker": worker,
+        "created_by": created_by,
+        "created_at": str(created_at) if created_at else None,
+        "started_at": str(started_at) if started_at else None,
+        "heartbeat_at": str(heartbeat_at) if heartbeat_at else None,
+        "finished_at": str(finished_at) if finished_at else None,
+    }
+
+
+def get_job(job_id: int) -> Optional[dict]:
+    with engine.connect() as conn:
+        row = conn.execute(text(f"SELECT {JOB_COLUMNS} FROM ingest_jobs WHERE id = :id"), {"id": job_id}).fetchone()
+    return _job_dict(row) if row else None
+
+
+def list_jobs(status: Optional[str] = None, file_id: Optional[int] = None, limit: int = 50) -> List[dict]:
+    conditions, params = [], {"limit": limit}
+    if status:
+        conditions.append("status = :status")
+        params["status"] = status
+    if file_id is not None:
+        conditions.append("file_id = :file_id")
+        params["file_id"] = file_id
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT {JOB_COLUMNS} FROM ingest_jobs {where} ORDER BY id DESC LIMIT :limit"),
+                            params).fetchall()
+    return [_job_dict(row) for row in rows]
+
+
+def queue_counts() -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT status, COUNT(*) FROM ingest_jobs WHERE status IN ('queued', 'running') GROUP BY status
+        """)).fetchall()
+    counts = {"queued": 0, "running": 0}
+    counts.update({row[0]: row[1] for row in rows})
+    return counts
+
+
+def requeue_stale() -> int:
+    """
+    Give running jobs with a stale heartbeat back to the queue (failed
+    once they have been claimed RAG_INGEST_MAX_ATTEMPTS times).
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(text("""
+            UPDATE ingest_jobs SET
+                status = CASE WHEN attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+                error = 'worker ' || COALESCE(worker, '?') || ' stopped sending heartbeats',
+                finished_at = CASE WHEN attempts < :max_attempts THEN NULL ELSE NOW() END,
+                worker = NULL
+            WHERE status = 'running' AND heartbeat_at < NOW() - :timeout * INTERVAL '1 second'
+            RETURNING id, status, file_id, payload
+        """), {
+            "timeout": env_float("RAG_INGEST_JOB_TIMEOUT", 600),
+            "max_attempts": int(env_float("RAG_INGEST_MAX_ATTEMPTS", 3)),
+        }).fetchall()
+        for row in rows:
+            if row[1] == "failed":
+                _release_approval(conn, row[2], row[3])
+    for row in rows:
+        print(f"Ingest job {row[0]} lost its worker, now {row[1]}")
+    return len(rows)
+
+
+def claim_job(worker: str) -> Optional[tuple]:
+    """
+    (id, file_id, payload) of the oldest queued job, now running on worker;
+    None when the queue is empty.
+    """
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE ingest_jobs SET status = 'running', worker = :worker, attempts = attempts + 1,
+                                   stage = 'claimed', error = NULL, started_at = NOW(), heartbeat_at = NOW()
+            WHERE id = (
+                SELECT id FROM ingest_jobs WHERE status = 'queued'
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, file_id, payload
+        """), {"worker": worker}).fetchone()
+
+
+def _report(job_id: int, worker: str, stage: str, done: int = 0, total: int = 0):
+    # Also the heartbeat; ignored once the job was taken away from this worker
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE ingest_jobs SET stage = :stage, progress_done = :done, progress_total = :total, heartbeat_at = NOW()
+            WHERE id = :id AND worker = :worker AND status = 'running'
+        """), {"id": job_id, "worker": worker, "stage": stage, "done": done, "total": total})
+
+
+def _release_approval(conn, file_id: Optional[int], payload: dict):
+    if payload.get("approve") and file_id is not None:
+        conn.execute(text("UPDATE uploaded_files SET status = 'pending' WHERE id = :id AND status = 'ingesting'"),
+                     {"id": file_id})
+
+
+def run_job(job_id: int, file_id: Optional[int], payload: dict, worker: str):
+    start = time.perf_counter()
+    try:
+        _report(job_id, worker, "reading")
+        result = load_document(payload["file_path"], dict(payload["metadata"]), kb_type=payload["kb_type"],
+                               file_id=file_id, progress=lambda stage, done, total: _report(job_id, worker, stage, done, total))
+        if result is None:
+            raise ValueError(f"{payload['file_path']} is unreadable or empty")
+    except Exception as e:
+        print(f"Ingest job {job_id} failed: {e}")
+        with engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE ingest_jobs SET status = 'failed', error = :error, finished_at = NOW()
+                WHERE id = :id AND worker = :worker
+            """), {"id": job_id, "worker": worker, "error": str(e)[:2000]})
+            _release_approval(conn, file_id, payload)
+        return
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE ingest_jobs SET status = 'done', stage = 'done', result = CAST(:result AS JSONB),
+                                   progress_done = progress_total, finished_at = NOW()
+            WHERE id = :id AND worker = :worker
+        """), {"id": job_id, "worker": worker, "result": json.dumps(result)})
+        if payload.get("approve") and file_id is not None:
+            conn.execute(text("UPDATE uploaded_files SET status = 'approved' WHERE id = :id"), {"id": file_id})
+    print(f"Ingest job {job_id} done in {time.perf_counter() - start:.1f}s: {result}")
+
+
+def run_worker(stop: Optional[threading.Event] = None, name: Optional[str] = None):
+    """
+    Claim and run jobs until stop is set.
+    """
+    stop = stop or threading.Event()
+    name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+    poll_interval = max(0.1, env_float("RAG_INGEST_POLL_INTERVAL", 2))
+    print(f"Ingest worker {name} started")
+    while not stop.is_set():
+        try:
+            requeue_stale()
+            job = claim_job(name)
+        except Exception as e:
+            print(f"Ingest worker {name}: cannot poll the queue: {e}")
+            job = None
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        run_job(job[0], job[1], job[2], name)
+
+
+def start_workers(count: Optional[int] = None, stop: Optional[threading.Event] = None) -> List[threading.Thread]:
+    if count is None:
+        count = int(env_float("RAG_INGEST_WORKERS", 1))
+    threads = []
+    for i in range(max(0, count)):
+        thread = threading.Thread(target=run_worker, args=(stop,), name=f"ingest-worker-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+CallbackMetric("ingest_jobs", "Ingest jobs waiting or running", ["status"],
+               lambda: [({"status": status}, count) for status, count in queue_counts().items()])
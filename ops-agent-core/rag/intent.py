@@ -0,0 +1,173 @@
+"""
+In-process intent classifier ("chitchat" vs "technical").
+
+Decides without an LLM round trip when it can:
+1. rules   - keyword/regex patterns for greetings and for ops vocabulary
+2. centroid - nearest centroid of the query embedding (already needed for
+              retrieval, so it is an embedding-cache hit), trained from
+              chat_logs rows whose intent was labelled by rules or the LLM
+3. llm     - CLASSIFY_PROMPT, only when the first two are not confident
+              ("fallback" when that call fails and "technical" is assumed)
+
+Settings (env):
+    INTENT_CENTROID_MARGIN  min. cosine gap between the two centroids (default 0.05)
+    INTENT_MIN_SAMPLES      labelled questions needed per class (default 20)
+    INTENT_TRAIN_LIMIT      most recent labelled questions used (default 2000)
+"""
+import re
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from llm.embedding_cache import current_model_id
+from settings import env_float
+
+CHITCHAT = "chitchat"
+TECHNICAL = "technical"
+
+# Only short inputs can be decided as chitchat by rules alone
+CHITCHAT_MAX_LEN = 20
+
+CHITCHAT_PATTERN = re.compile(
+    r"^(你好|您好|hi|hello|hey|嗨|哈喽|在吗|在不在|早上好|上午好|中午好|下午好|晚上好|晚安|早安"
+    r"|谢谢|多谢|感谢|辛苦了|再见|拜拜|bye|好的|ok|收到|嗯+|哈+|呵呵"
+    r"|你是谁|你叫什么|你是什么|你会什么|你能做什么|介绍一下你自己"
+    r"|今天天气|天气怎么样|你真棒|太棒了|厉害)",
+    re.IGNORECASE,
+)
+
+# Identifiers count only in forms that are technical on their own: error
+# codes after a code keyword or with a known prefix, NE / host names with a
+# known prefix, IPv4 addresses. A bare number or word+digits ("hi2", "v2",
+# "2024") is left to the centroid / LLM.
+TECHNICAL_PATTERN = re.compile(
+    r"告警|故障|报错|错误|失败|异常|无法|不能|超时|宕机|中断|卡顿|延迟|丢包|重启|排查|处理|怎么办|如何|步骤"
+    r"|配置|部署|安装|升级|回退|日志|监控|指标|阈值|巡检|备份|恢复|权限|账号|密码|登录|登陆"
+    r"|数据库|服务器|主机|容器|集群|节点|磁盘|内存|cpu|网络|端口|防火墙|nginx|redis|kafka|mysql|postgres|oracle|linux"
+    r"|基站|小区|天线|铁塔|网元|网管|5g|4g|lte|nr|gnb|enb|经纬度|资源|工单"
+    r"|error|fail|exception|timeout|refused|denied"
+    r"|(?:错误码|错误号|告警码|告警号|返回码|状态码|code|errno|alarm)\s*[:：=#]?\s*-?\d+"
+    r"|(?<![a-z])(?:ora|tns|err|http)[-_ ]?\d{3,5}"
+    r"|(?<![a-z])(?:bbu|rru|aau|bts|olt|onu|otn|ptn|spn|rnc|bsc|msc|sw|srv|host|node|vm)[-_]?\d+"
+    r"|(?<![\d.])\d{1,3}(?:\.\d{1,3}){3}(?![\d.])",
+    re.IGNORECASE,
+)
+
+
+def classify_by_rules(question: str) -> Optional[str]:
+    q = question.strip()
+    if TECHNICAL_PATTERN.search(q):
+        return TECHNICAL
+    if len(q) <= CHITCHAT_MAX_LEN and CHITCHAT_PATTERN.search(q):
+        return CHITCHAT
+    return None
+
+
+class CentroidClassifier:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.model = None
+        self.centroids = None  # {label: unit vector}
+        self.samples = {}
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None and self.model == current_model_id()
+
+    def fit(self, embeddings: List[List[float]], labels: List[str]) -> bool:
+        min_samples = int(env_float("INTENT_MIN_SAMPLES", 20))
+        centroids = {}
+        samples = {}
+        for label in (CHITCHAT, TECHNICAL):
+            vectors = [e for e, l in zip(embeddings, labels) if l == label and e]
+            samples[label] = len(vectors)
+            if len(vectors) < min_samples:
+                with self._lock:
+                    self.samples = samples
+                return False
+            matrix = np.asarray(vectors, dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+            centroid = matrix.mean(axis=0)
+            centroids[label] = centroid / (np.linalg.norm(centroid) + 1e-12)
+        with self._lock:
+            self.model = current_model_id()
+            self.centroids = centroids
+            self.samples = samples
+        return True
+
+    def predict(self, embedding: List[float]) -> Tuple[Optional[str], float]:
+        """
+        (label, margin); label is None when the margin is below INTENT_CENTROID_MARGIN.
+        """
+        if not self.trained or not embedding:
+            return None, 0.0
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+        chitchat = float(self.centroids[CHITCHAT] @ query)
+        technical = float(self.centroids[TECHNICAL] @ query)
+        margin = abs(technical - chitchat)
+        if margin < env_float("INTENT_CENTROID_MARGIN", 0.05):
+            return None, margin
+        return (TECHNICAL if technical > chitchat else CHITCHAT), margin
+
+
+class IntentStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"rule": 0, "centroid": 0, "llm": 0, "fallback": 0}
+
+    def record(self, method: str):
+        with self._lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = sum(self.counts.values())
+            local = self.counts["rule"] + self.counts["centroid"]
+            return {
+                "by_method": dict(self.counts),
+                "total": total,
+                "llm_skipped_ratio": round(local / total, 4) if total else 0.0,
+            }
+
+
+centroid_classifier = CentroidClassifier()
+intent_stats = IntentStats()
+
+
+def train_from_chat_logs() -> dict:
+    """
+    Fit the centroids on recent chat_logs questions labelled by rules or
+    the LLM (never on the classifier's own centroid decisions).
+    """
+    from db import engine
+    from llm.embedding import embed_batch
+
+    limit = int(env_float("INTENT_TRAIN_LIMIT", 2000))
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT question, intent FROM chat_logs
+                WHERE intent IN ('chitchat', 'technical') AND intent_source IN ('rule', 'llm')
+                  AND image_path IS NULL
+                ORDER BY id DESC
+                LIMIT :limit
+            """),
+            {"limit": limit}
+        ).fetchall()
+    questions = [row[0] for row in rows]
+    labels = [row[1] for row in rows]
+    trained = centroid_classifier.fit(embed_batch(questions), labels) if questions else False
+    result = {"trained": trained, "samples": centroid_classifier.samples}
+    print(f"Intent centroids: {result}")
+    return result
+
+
+def intent_status() -> dict:
+    return {
+        "centroid_trained": centroid_classifier.trained,
+        "centroid_samples": centroid_classifier.samples,
+        **intent_stats.snapshot(),
+    }
@@ -0,0 +1,103 @@
+"""
+Knowledge-base version counter.
+
+Bumped after every ingest into or delete from the documents table, so
+caches derived from retrieval results (see rag/answer_cache.py) can tell
+that their entries are stale.
+
+kb_version() is a local counter, cheap enough for every question. The
+documents table is also written by other processes (ingest_worker.py,
+other API nodes), so each bump also increments a shared counter in
+Postgres (table kb_version, one row). The API polls it
+(start_kb_version_poller, every RAG_KB_VERSION_POLL_INTERVAL seconds,
+default 2): when another process changed it, the local version is bumped
+and the on_kb_change listeners run, which resync the in-process indexes.
+"""
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+
+from db import engine
+from settings import env_float
+
+_lock = threading.Lock()
+_version = 0
+# Last shared counter value whose changes this process has accounted for
+_seen = None
+_listeners: List[Callable[[], None]] = []
+
+
+def kb_version() -> int:
+    return _version
+
+
+def bump_kb_version() -> int:
+    """
+    Call after the transaction that changed documents has committed.
+    """
+    global _version, _seen
+    try:
+        with engine.begin() as conn:
+            shared = conn.execute(
+                text("UPDATE kb_version SET version = version + 1 WHERE id = 1 RETURNING version")
+            ).scalar()
+    except Exception as e:
+        print(f"Shared KB version not updated, other processes will miss this change: {e}")
+        shared = None
+    with _lock:
+        _version += 1
+        # A gap means another process bumped in between; left for the poller
+        if shared is not None and (_seen is None or shared == _seen + 1):
+            _seen = shared
+        return _version
+
+
+def on_kb_change(listener: Callable[[], None]):
+    """
+    Run listener (in the poller thread) when another process changed documents.
+    """
+    _listeners.append(listener)
+
+
+def poll_kb_version() -> bool:
+    """
+    Compare the shared counter with the last value seen; True (after
+    bumping the local version and running the listeners) if it changed.
+    """
+    global _version, _seen
+    with engine.connect() as conn:
+        shared = conn.execute(text("SELECT version FROM kb_version WHERE id = 1")).scalar()
+    if shared is None:
+        return False
+    with _lock:
+        if _seen is None or shared == _seen:
+            _seen = shared
+            return False
+        _seen = shared
+        _version += 1
+    for listener in list(_listeners):
+        try:
+            listener()
+        except Exception as e:
+            print(f"KB change listener {getattr(listener, '__name__', listener)} failed: {e}")
+    return True
+
+
+def start_kb_version_poller(stop: Optional[threading.Event] = None) -> threading.Thread:
+    stop = stop or threading.Event()
+    interval = max(0.1, env_float("RAG_KB_VERSION_POLL_INTERVAL", 2))
+
+    def run():
+        # The first poll only records the current value
+        while True:
+            try:
+                poll_kb_version()
+            except Exception as e:
+                print(f"KB version poll failed: {e}")
+            if stop.wait(interval):
+                return
+
+    thread = threading.Thread(target=run, name="kb-version-poller", daemon=True)
+    thread.start()
+    return thread
@@ -1,9 +1,24 @@
+import hashlib
 import json
 import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from psycopg2.extras import execute_values
 from sqlalchemy import text
 from db import engine
-from llm.embedding import embed_text
+from llm.base import get_embedding_batch_size
+from llm.embedding import embed_batch
+from llm.embedding_cache import current_model_id
+from metrics import Counter, timed
+from rag.bm25 import on_documents_added, on_documents_deleted
+from rag.context import count_tokens
+from rag.fulltext import tsvector_literal
+from rag.kb_version import bump_kb_version
 from rag.splitter import split_ops_doc
+from rag.vector_store import get_vector_store
+
+INGESTED_CHUNKS = Counter("ingest_chunks_total", "Chunks embedded and stored")
+REUSED_CHUNKS = Counter("ingest_chunks_reused_total", "Chunks kept unchanged on re-ingestion")
 
 try:
     from docx import Document
@@ -48,21 +63,64 @@ def read_file_content(file_path: str) -> str:
         with open(file_path, "r", encoding="utf-8") as f:
             return f.read()
 
-def delete_document_by_source(source: str):
+SHARED_KB = "shared"
+
+def documents_deleted(ids: List[int]):
+    """
+    Drop deleted chunks from the in-process indexes (vector store, BM25).
+    After a delete that joined a caller's transaction, call it once that
+    transaction has committed, so a rollback leaves the indexes intact.
+    """
+    if ids:
+        get_vector_store().delete(ids)
+        on_documents_deleted(ids)
+
+def _delete_documents(where: str, params: dict, conn=None) -> List[int]:
+    """
+    Returns the deleted ids. With conn the delete joins the caller's
+    transaction, and the caller bumps the KB version and calls
+    documents_deleted after commit; otherwise it commits and does both here.
+    """
+    sql = text(f"DELETE FROM documents WHERE {where} RETURNING id")
+    if conn is not None:
+        return [row[0] for row in conn.execute(sql, params)]
+    try:
+        with engine.begin() as own:
+            ids = [row[0] for row in own.execute(sql, params)]
+    finally:
+        bump_kb_version()
+    documents_deleted(ids)
+    return ids
+
+def delete_document_by_source(source: str, conn=None) -> List[int]:
     """
     Delete existing documents with the same source to avoid duplication.
+    Returns the deleted ids (see _delete_documents when passing conn).
     """
     try:
-        with engine.begin() as conn:
-            conn.execute(
-                text("DELETE FROM documents WHERE metadata->>'source' = :source"),
-                {"source": source}
-            )
-            print(f"Deleted existing documents for source: {source}")
+        ids = _delete_documents("source = :source", {"source": source}, conn)
+        print(f"Deleted {len(ids)} existing chunks for source: {source}")
+        return ids
     except Exception as e:
         print(f"Error deleting existing documents: {e}")
+        if conn is not None:
+            raise
+        return []
 
-def load_document(file_path: str, metadata: dict, kb_type: str = "user"):
+def delete_documents_by_qa(qa_id: int, conn=None) -> List[int]:
+    """
+    Delete the chunks ingested for a learned_qa row. Returns the deleted
+    ids (see _delete_documents when passing conn).
+    """
+    return _delete_documents("qa_id = :qa_id", {"qa_id": qa_id}, conn)
+
+def load_document(file_path: str, metadata: dict, kb_type: str = "user", file_id: int = None,
+                  progress: Optional[Callable[[str, int, int], None]] = None) -> Optional[dict]:
+    """
+    Ingest a file, replacing the chunks of an earlier version (only the
+    chunks that changed, see load_text_content). Returns the
+    load_text_content stats, None when the file is unreadable or empty.
+    """
     try:
         content = read_file_content(file_path)
     except Exception as e:
@@ -76,27 +134,173 @@ def load_document(file_path: str, metadata: dict, kb_type: str = "user"):
     # Add kb_type to metadata
     metadata["kb_type"] = kb_type
 
-    # Deduplicate before inserting
-    if "source" in metadata:
-        delete_document_by_source(metadata["source"])
-
-    load_text_content(content, metadata)
-
-def load_text_content(content: str, metadata: dict):
-    chunks = split_ops_doc(content)
-
-    with engine.begin() as conn:
-
-        for chunk in chunks:
-            vector = embed_text(chunk)
-            conn.execute(
-                text("""
-                    INSERT INTO documents (content, metadata, embedding)
-                    VALUES (:content, :metadata, :embedding)
-                """),
-                {
-                    "content": chunk,
-                    "metadata": json.dumps(metadata),
-                    "embedding": vector
-                }
-            )
+    return load_text_content(content, metadata, file_id=file_id, progress=progress,
+                             replace_source=metadata.get("source"))
+
+# Rows per INSERT statement of _insert_documents
+INSERT_PAGE_SIZE = 500
+
+INSERT_DOCUMENTS_SQL = """
+    INSERT INTO documents (id, content, metadata, embedding, token_count, content_tsv, content_hash,
+                           kb_type, source, doc_type, file_id, qa_id)
+    VALUES %s
+"""
+INSERT_DOCUMENTS_TEMPLATE = "(%s, %s, %s, %s::vector, %s, %s::tsvector, %s, %s, %s, %s, %s, %s)"
+
+def content_hash(chunk: str) -> str:
+    """
+    Identity of a stored chunk: its text and the embedding model that
+    embedded it, so a model change re-embeds instead of reusing.
+    """
+    return hashlib.sha256(f"{current_model_id()}\0{chunk}".encode("utf-8")).hexdigest()
+
+def _existing_chunks(conn, source: str) -> list:
+    return conn.execute(
+        text("SELECT id, content_hash, kb_type FROM documents WHERE source = :source"), {"source": source}
+    ).fetchall()
+
+def _diff_chunks(existing: list, hashes: List[str], kb_type: str) -> Tuple[Dict[int, int], List[int]]:
+    """
+    Match the new chunks against the stored (id, content_hash, kb_type)
+    rows of their source, as multisets (a chunk repeated in the document is
+    matched as many times). Returns ({chunk index: reused id}, ids to remove).
+    Rows of another kb_type or without a hash are never reused.
+    """
+    available: Dict[str, List[int]] = {}
+    removed = []
+    for doc_id, digest, kb in existing:
+        if digest and kb == kb_type:
+            available.setdefault(digest, []).append(doc_id)
+        else:
+            removed.append(doc_id)
+    reused = {}
+    for i, digest in enumerate(hashes):
+        ids = available.get(digest)
+        if ids:
+            reused[i] = ids.pop()
+    removed.extend(doc_id for ids in available.values() for doc_id in ids)
+    return reused, removed
+
+def _vector_literal(vector) -> str:
+    # pgvector text format, parsed server-side without a numeric[] detour
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+def _insert_documents(conn, rows: list) -> List[int]:
+    """
+    Insert prepared rows (everything but the id) with multi-row INSERTs of
+    INSERT_PAGE_SIZE rows. Ids are drawn from the sequence first, so they
+    map back to the rows without relying on RETURNING order.
+    """
+    ids = [row[0] for row in conn.execute(
+        text("SELECT nextval(pg_get_serial_sequence('documents', 'id')) FROM generate_series(1, :n)"),
+        {"n": len(rows)}
+    )]
+    cursor = conn.connection.cursor()
+    try:
+        execute_values(cursor, INSERT_DOCUMENTS_SQL, [(doc_id, *row) for doc_id, row in zip(ids, rows)],
+                       template=INSERT_DOCUMENTS_TEMPLATE, page_size=INSERT_PAGE_SIZE)
+    finally:
+        cursor.close()
+    return ids
+
+def _embed(chunks: List[str], progress: Optional[Callable[[str, int, int], None]] = None) -> list:
+    # One embedding request per batch instead of one per chunk
+    batch_size = get_embedding_batch_size()
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        with timed("ingest_embed"):
+            vectors.extend(embed_batch(chunks[i:i + batch_size], batch_size=batch_size))
+        if progress:
+            progress("embed", len(vectors), len(chunks))
+    return vectors
+
+def load_text_content(content: str, metadata: dict, file_id: int = None, qa_id: int = None,
+                      progress: Optional[Callable[[str, int, int], None]] = None,
+                      replace_source: Optional[str] = None) -> dict:
+    """
+    Split, embed and store content. kb_type / source / type are also
+    written to their own (indexed) columns; chunks without a kb_type are
+    shared by all knowledge bases. file_id / qa_id link the chunks to
+    uploaded_files / learned_qa, which delete them on cascade.
+
+    With replace_source, the chunks already stored for that source are
+    diffed against the new ones by content_hash: unchanged chunks are kept
+    (only their metadata is updated), only new chunks are embedded and
+    inserted, and only vanished ones are deleted, in one transaction.
+
+    New chunks are embedded before the write transaction opens, so a slow
+    embedding service does not keep it (and its locks and snapshot) open;
+    the rows then go in with a few multi-row INSERTs.
+
+    progress(stage, done, total) is called per embedding batch ("embed")
+    and before the write ("insert"); ingest jobs report it. Returns
+    {"chunks", "reused", "added", "removed"} counts.
+    """
+    kb_type = metadata.get("kb_type") or SHARED_KB
+    columns = (kb_type, metadata.get("source"), metadata.get("type"), file_id, qa_id)
+    with timed("ingest_split"):
+        chunks = split_ops_doc(content)
+    hashes = [content_hash(chunk) for chunk in chunks]
+    start = time.perf_counter()
+
+    # First diff, outside the transaction: decides what to embed
+    reused = {}
+    if replace_source:
+        with timed("ingest_diff"):
+            with engine.connect() as conn:
+                reused, _ = _diff_chunks(_existing_chunks(conn, replace_source), hashes, kb_type)
+    todo = [i for i in range(len(chunks)) if i not in reused]
+    vectors = dict(zip(todo, _embed([chunks[i] for i in todo], progress)))
+    metadata_json = json.dumps(metadata)
+
+    def prepare(i: int) -> tuple:
+        # token_count is stored so context packing needs no re-tokenizing
+        return (chunks[i], metadata_json, _vector_literal(vectors[i]), count_tokens(chunks[i]),
+                tsvector_literal(chunks[i]), hashes[i], *columns)
+
+    with timed("ingest_prepare"):
+        prepared = {i: prepare(i) for i in todo}
+
+    if progress:
+        progress("insert", len(todo), len(todo))
+    removed = []
+    with timed("ingest_insert"):
+        with engine.begin() as conn:
+            if replace_source:
+                # Serializes writers of one source; the diff is redone on the
+                # rows as they are now, in case they changed since the first one
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:source))"), {"source": replace_source})
+                reused, removed = _diff_chunks(_existing_chunks(conn, replace_source), hashes, kb_type)
+                todo = [i for i in range(len(chunks)) if i not in reused]
+                late = [i for i in todo if i not in vectors]
+                if late:
+                    vectors.update(zip(late, _embed([chunks[i] for i in late])))
+                if removed:
+                    removed = _delete_documents("id = ANY(:ids)", {"ids": removed}, conn)
+                if reused:
+                    conn.execute(
+                        text("""
+                            UPDATE documents SET metadata = CAST(:metadata AS JSONB), doc_type = :doc_type,
+                                                 file_id = :file_id, qa_id = :qa_id
+                            WHERE id = ANY(:ids)
+                        """),
+                        {"metadata": metadata_json, "doc_type": columns[2], "file_id": file_id, "qa_id": qa_id,
+                         "ids": list(reused.values())}
+                    )
+            rows = [prepared[i] if i in prepared else prepare(i) for i in todo]
+            ids = _insert_documents(conn, rows) if rows else []
+    INGESTED_CHUNKS.inc(len(todo))
+    REUSED_CHUNKS.inc(len(reused))
+
+    stats = {"chunks": len(chunks), "reused": len(reused), "added": len(todo), "removed": len(removed)}
+    if rows or removed or reused:
+        bump_kb_version()
+    # Only now that the transaction has committed
+    documents_deleted(removed)
+    get_vector_store().add((doc_id, vectors[i], kb_type) for doc_id, i in zip(ids, todo))
+    on_documents_added([(doc_id, chunks[i], kb_type) for doc_id, i in zip(ids, todo)])
+    elapsed = time.perf_counter() - start
+    if chunks or removed:
+        print(f"Ingested {len(chunks)} chunks in {elapsed:.2f}s: {stats['reused']} reused, "
+              f"{stats['added']} added, {stats['removed']} removed")
+    return stats
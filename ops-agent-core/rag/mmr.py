@@ -0,0 +1,102 @@
+"""
+Diversification of retrieval results: exact re-scoring and Maximal
+Marginal Relevance (MMR) over an over-fetched candidate set.
+
+split_ops_doc overlaps neighbouring chunks, so the best candidates are
+often near-copies from the same file that spend the prompt budget twice.
+The retriever fetches `fetch` fused candidates with their embeddings;
+rescore() computes cosine similarity and L2 distance to the query with
+numpy (exact, whatever the ANN index or a float16 store returned), and
+mmr_select() then picks, one at a time, the candidate maximizing
+
+    lambda * relevance - (1 - lambda) * max cosine to the chunks already picked
+
+with at most per_file chunks per file. relevance is the candidate's RRF
+value scaled to 0..1, so lambda = 1 keeps the fused order (only the cap
+applies).
+
+Settings: rag.mmr in config.yaml, passed as JSON in RAG_MMR, e.g.
+    {"lambda": 0.7, "per_file": 2, "fetch": 0, "kb": {"admin": {"lambda": 0.9, "per_file": 3}}}
+    lambda    relevance vs diversity, 0..1 (default 0.7)
+    per_file  chunks per file / QA entry, 0 = no cap (default 2)
+    fetch     candidates fetched and diversified, 0 = the retriever's candidate count
+    kb        overrides of the above per kb_type
+"""
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULTS = {"lambda": 0.7, "per_file": 2, "fetch": 0}
+
+
+def mmr_settings(kb_type: str) -> dict:
+    settings = dict(DEFAULTS)
+    raw = os.getenv("RAG_MMR", "")
+    if not raw:
+        return settings
+    try:
+        config = json.loads(raw)
+    except ValueError as e:
+        print(f"Ignoring invalid RAG_MMR: {e}")
+        return settings
+    settings.update({k: v for k, v in config.items() if k in DEFAULTS})
+    settings.update({k: v for k, v in (config.get("kb") or {}).get(kb_type, {}).items() if k in DEFAULTS})
+    try:
+        settings["lambda"] = min(1.0, max(0.0, float(settings["lambda"])))
+        settings["per_file"] = max(0, int(settings["per_file"]))
+        settings["fetch"] = max(0, int(settings["fetch"]))
+    except (TypeError, ValueError) as e:
+        print(f"Ignoring invalid RAG_MMR values for {kb_type}: {e}")
+        settings = dict(DEFAULTS)
+    return settings
+
+
+def rescore(query_embedding: Sequence[float], embeddings: List[Sequence[float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (cosine similarities, L2 distances, unit-length candidate matrix).
+    """
+    query = np.asarray(query_embedding, dtype=np.float32)
+    if len(embeddings) == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return empty, empty, np.zeros((0, len(query)), dtype=np.float32)
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    distances = np.linalg.norm(matrix - query, axis=1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    unit = matrix / np.where(norms == 0, 1, norms)
+    query_norm = np.linalg.norm(query)
+    similarities = unit @ (query / query_norm) if query_norm else np.zeros(len(embeddings), dtype=np.float32)
+    return similarities, distances, unit
+
+
+def mmr_select(relevance: Sequence[float], unit: np.ndarray, keys: Sequence[Optional[str]], limit: int,
+               lam: float = DEFAULTS["lambda"], per_file: int = DEFAULTS["per_file"]) -> List[int]:
+    """
+    Indices of the picked candidates, in pick order. keys groups
+    candidates for the per_file cap (None: no group).
+    """
+    n = len(relevance)
+    if n == 0 or limit <= 0:
+        return []
+    relevance = np.asarray(relevance, dtype=np.float32)
+    top = relevance.max()
+    relevance = relevance / top if top > 0 else relevance
+    pairwise = unit @ unit.T
+    redundancy = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    per_key = {}
+    picked = []
+    while len(picked) < limit and available.any():
+        gain = lam * relevance - (1 - lam) * redundancy
+        gain[~available] = -np.inf
+        i = int(np.argmax(gain))
+        picked.append(i)
+        available[i] = False
+        redundancy = np.maximum(redundancy, pairwise[i])
+        key = keys[i]
+        if per_file and key is not None:
+            per_key[key] = per_key.get(key, 0) + 1
+            if per_key[key] >= per_file:
+                available &= np.array([k != key for k in keys])
+    return picked
@@ -1,52 +1,124 @@
 # rag/qa.py
-from typing import List, Dict, Optional
+from typing import Awaitable, List, Dict, AsyncIterator, Optional, Tuple
+import asyncio
 import os
-from rag.retriever import retrieve_similar_documents
+import time
+from rag.retriever import aretrieve_similar_documents
+from rag.answer_cache import answer_cache
+from rag.context import pack_context
+from rag.kb_version import kb_version
+from rag.singleflight import question_key, singleflight
+from rag.intent import CHITCHAT, TECHNICAL, centroid_classifier, classify_by_rules, intent_stats
+from llm.embedding import aembed_text
 
 from llm.factory import get_llm_client
+from llm.governor import DEFAULT_ROLE, LLMQueueTimeout, llm_slot
+from metrics import Counter, record_stage, timed
+from settings import env_float
 
-def call_llm(prompt: str, image: Optional[str] = None) -> str:
+ANSWERS = Counter("rag_answers_total", "Answers by how they were produced", ["path"])
+
+class StageTimer:
+    """
+    记录问答各阶段耗时 (ms)；并发执行的阶段各自计时，因此各阶段之和可能大于总耗时
+    各阶段同时计入 /metrics 的 rag_stage_seconds 与响应头 Server-Timing
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = seconds * 1000
+        record_stage(name, seconds)
+
+    async def measure(self, name: str, awaitable: Awaitable):
+        t0 = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def log(self, question: str):
+        total = (time.perf_counter() - self.start) * 1000
+        stages = " ".join(f"{name}={ms:.0f}ms" for name, ms in self.stages.items())
+        print(f"[answer timings] {stages} total={total:.0f}ms question={question[:30]!r}")
+
+def _prepare_llm_call(prompt: str, image: Optional[str] = None):
+    """
+    选择模型并构造对话消息，返回 (client, messages)
     """
-    调用统一 LLM 接口生成回答
+    provider = os.getenv("LLM_PROVIDER", "zhipu").lower()
+    
+    # 如果有图片，强制使用支持视觉的模型
+    model = None
+    if image:
+        if provider == "zhipu":
+            model = "glm-4v"
+        elif provider == "ollama":
+            model = "llava" # 假设 ollama 使用 llava
+    
+    client = get_llm_client(model=model)
+    
+    # 构造对话历史
+    messages = []
+    if image:
+        if provider == "zhipu":
+            messages = [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": image}}
+                ]
+            }]
+        else:
+            # Ollama vision format might vary, simple fallback or standard
+            # 假设 Ollama 客户端能处理 content list 或者我们需要在这里适配
+            # 这里暂时假设 OllamaClient 需要适配，或者简单处理
+            # 目前主要支持 Zhipu GLM-4V
+            messages = [{"role": "user", "content": prompt, "images": [image]}] # Ollama often uses 'images' field
+    else:
+        messages = [{"role": "user", "content": prompt}]
+    return client, messages
+
+LLM_BUSY_ANSWER = "当前咨询人数较多，请稍后再试。"
+
+async def call_llm(prompt: str, image: Optional[str] = None, role: str = DEFAULT_ROLE) -> str:
+    """
+    调用统一 LLM 接口生成回答 (异步，不占用线程池)
     支持 ZhipuAI 和 Ollama (通过 LLM_PROVIDER 环境变量切换)
+    role: 当前用户角色，决定排队优先级 (见 llm/governor.py)
     """
     try:
-        provider = os.getenv("LLM_PROVIDER", "zhipu").lower()
-        
-        # 如果有图片，强制使用支持视觉的模型
-        model = None
-        if image:
-            if provider == "zhipu":
-                model = "glm-4v"
-            elif provider == "ollama":
-                model = "llava" # 假设 ollama 使用 llava
-        
-        client = get_llm_client(model=model)
-        
-        # 构造对话历史
-        messages = []
-        if image:
-            if provider == "zhipu":
-                messages = [{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": image}}
-                    ]
-                }]
-            else:
-                # Ollama vision format might vary, simple fallback or standard
-                # 假设 Ollama 客户端能处理 content list 或者我们需要在这里适配
-                # 这里暂时假设 OllamaClient 需要适配，或者简单处理
-                # 目前主要支持 Zhipu GLM-4V
-                messages = [{"role": "user", "content": prompt, "images": [image]}] # Ollama often uses 'images' field
-        else:
-            messages = [{"role": "user", "content": prompt}]
-            
-        return client.chat(messages)
+        client, messages = _prepare_llm_call(prompt, image)
+        async with llm_slot(client, role):
+            return await client.achat(messages)
+    except LLMQueueTimeout as e:
+        print(f"LLM queue timeout ({role}): {e}")
+        return LLM_BUSY_ANSWER
     except Exception as e:
         return f"调用 LLM 失败: {str(e)}"
 
+async def call_llm_stream(prompt: str, image: Optional[str] = None, role: str = DEFAULT_ROLE,
+                          status: Optional[Dict] = None) -> AsyncIterator[str]:
+    """
+    流式调用 LLM，逐段返回生成的文本 (排队名额保持到流结束)
+    失败时最后一段为错误信息 (可能跟在已输出的部分文本之后)；传入 status 时同时设置 status["failed"] = True
+    """
+    try:
+        client, messages = _prepare_llm_call(prompt, image)
+        async with llm_slot(client, role):
+            async for token in client.achat_stream(messages):
+                yield token
+    except LLMQueueTimeout as e:
+        print(f"LLM queue timeout ({role}): {e}")
+        if status is not None:
+            status["failed"] = True
+        yield LLM_BUSY_ANSWER
+    except Exception as e:
+        if status is not None:
+            status["failed"] = True
+        yield f"调用 LLM 失败: {str(e)}"
+
 
 SYSTEM_PROMPT = """你是一名资深运维工程师助手。
 
@@ -87,38 +159,67 @@ CLASSIFY_PROMPT = """你是一个意图识别助手。
 请仅输出类别名称（“闲聊”或“专业问题”），不要包含其他文字。"""
 
 
-def classify_intent(question: str) -> str:
+async def _llm_classify(question: str, role: str = DEFAULT_ROLE) -> Optional[str]:
     """
-    判断用户意图
+    LLM 意图识别，调用失败 (含排队超时) 时返回 None
     """
     try:
         prompt = CLASSIFY_PROMPT.format(question=question)
-        response = call_llm(prompt)
+        response = await call_llm(prompt, role=role)
+        if is_llm_error(response):
+            return None
         if "闲聊" in response:
-            return "chitchat"
-        return "technical"
+            return CHITCHAT
+        return TECHNICAL
     except Exception:
-        # Fallback to technical if classification fails
-        return "technical"
+        return None
+
+async def detect_intent(question: str, embedding_task: Optional[asyncio.Future] = None,
+                        role: str = DEFAULT_ROLE) -> Tuple[str, str]:
+    """
+    本地优先的意图识别，返回 (intent, method)
+    method: rule / centroid (无需调用 LLM), llm, fallback (LLM 失败，按专业问题处理)
+    embedding_task: 已在进行中的查询向量计算 (与检索共用)，为空时自行计算
+    """
+    intent = classify_by_rules(question)
+    if intent:
+        method = "rule"
+    else:
+        if centroid_classifier.trained:
+            try:
+                # Same embedding retrieval needs; served from the embedding cache afterwards
+                embedding = await asyncio.shield(embedding_task) if embedding_task else await aembed_text(question)
+                intent, _ = centroid_classifier.predict(embedding)
+            except Exception as e:
+                print(f"Centroid intent classification failed: {e}")
+        if intent:
+            method = "centroid"
+        else:
+            intent = await _llm_classify(question, role)
+            method = "llm" if intent else "fallback"
+            intent = intent or TECHNICAL
+    intent_stats.record(method)
+    return intent, method
+
+
+def get_min_similarity() -> float:
+    """
+    检索结果的余弦相似度下限 (RAG_MIN_SIMILARITY)
+    """
+    return env_float("RAG_MIN_SIMILARITY", 0.25)
+
+
+def get_min_keyword_score() -> float:
+    """
+    关键词覆盖率下限 (RAG_MIN_KEYWORD_SCORE)：问题词元中出现在文档里的比例，达到即保留
+    """
+    return env_float("RAG_MIN_KEYWORD_SCORE", 0.6)
 
 
 def build_context(docs):
-    context_parts = []
-    for i, doc in enumerate(docs, 1):
-        # doc structure: (id, content, metadata, distance)
-        content = doc[1]
-        metadata = doc[2]
-        
-        context_parts.append(
-            f"""【文档 {i}】
-内容：
-{content}
-
-元数据：
-{metadata}
-"""
-        )
-    return "\n".join(context_parts)
+    # doc structure: (id, content, metadata, distance, token_count, score, keyword_score), best first
+    context, _ = pack_context(docs)
+    return context
 
 
 def build_prompt(question: str, context: str) -> str:
@@ -130,55 +231,66 @@ def build_prompt(question: str, context: str) -> str:
 {question}
 """
 
-def answer_question(question: str, image: Optional[str] = None, kb_type: str = "user") -> Dict:
+async def prepare_answer(question: str, image: Optional[str] = None, kb_type: str = "user",
+                         timer: Optional[StageTimer] = None, role: str = DEFAULT_ROLE) -> Tuple[str, List[Dict], Dict]:
+    """
+    意图识别 + 检索 + 构建 Prompt，返回 (prompt, sources, intent_info)
+    intent_info: {"intent": ..., "intent_source": ...}，含图片时两者均为 None
+
+    规则能直接判定的问题不做多余工作；规则无法判定时，查询向量与检索
+    在意图识别 (质心 / LLM) 进行的同时被推测性地启动，判定为闲聊则取消检索。
+    """
+    timer = timer or StageTimer()
+    intent_info = {"intent": None, "intent_source": None}
+    chat_prompt = f"用户输入：{question}\n\n请自然、友好地回应用户。不要提及知识库或文档。"
+
     # 0. Intent Classification
     # Skip classification if image is present (usually technical) or if explicitly technical
-    if not image:
-        intent = classify_intent(question)
-        if intent == "chitchat":
-            # Direct chat without retrieval
-            chat_prompt = f"用户输入：{question}\n\n请自然、友好地回应用户。不要提及知识库或文档。"
-            answer = call_llm(chat_prompt, image=image)
-            return {
-                "answer": answer,
-                "sources": []
-            }
-
-    # 1. 检索 (传入 kb_type)
-    # Define threshold for similarity distance (lower is better for cosine distance in pgvector)
-    # Using L2 distance (<->): 
-    # 0.8 ~= Cosine Sim 0.68 (Too strict)
-    # 1.2 ~= Cosine Sim 0.28 (Reasonable for retrieval)
-    # 1.4 ~= Relaxed for broader recall
-    SIMILARITY_THRESHOLD = 1.45
-    
-    docs = retrieve_similar_documents(question, kb_type=kb_type, top_k=5)
-
-    # Dynamic Thresholding Strategy:
-    # If we find a very high-quality match (e.g., keyword match with distance 0.0 or very close vector match),
-    # we should significantly tighten the threshold to exclude irrelevant "noise" documents.
-    current_threshold = SIMILARITY_THRESHOLD
-    if docs:
-        # Get the best (minimum) distance
-        min_dist = min([d[3] if len(d) > 3 else 1.0 for d in docs])
-        
-        # If best match is extremely close (e.g. < 0.2, likely a keyword match or perfect vector match)
-        if min_dist < 0.2:
-             # Tighten threshold to only include other very strong matches.
-             # 0.5 allows for some variation but cuts off the ~1.2 noise.
-             current_threshold = 0.5 
+    if not image and classify_by_rules(question) == CHITCHAT:
+        intent, method = await timer.measure("classify", detect_intent(question))
+        intent_info = {"intent": intent, "intent_source": method}
+        # Direct chat without retrieval
+        return chat_prompt, [], intent_info
+
+    embedding_task = asyncio.ensure_future(timer.measure("embed", aembed_text(question)))
+
+    async def retrieve():
+        query_embedding = await asyncio.shield(embedding_task)
+        return await aretrieve_similar_documents(question, kb_type=kb_type, top_k=5,
+                                                 query_embedding=query_embedding)
+
+    retrieval_task = asyncio.ensure_future(timer.measure("retrieve", retrieve()))
+    try:
+        if not image:
+            intent, method = await timer.measure("classify", detect_intent(question, embedding_task, role))
+            intent_info = {"intent": intent, "intent_source": method}
+            if intent == CHITCHAT:
+                # Chitchat: the speculative retrieval is not needed
+                retrieval_task.cancel()
+                return chat_prompt, [], intent_info
+
+        docs = await retrieval_task
+    finally:
+        if not retrieval_task.done():
+            retrieval_task.cancel()
+        if not embedding_task.done():
+            embedding_task.cancel()
+
+    # Retrieval rows come in MMR order (RRF over vector + keyword ranks,
+    # near-duplicates and surplus chunks of one file pushed out); keep
+    # rows whose cosine similarity or keyword coverage clears its floor
+    min_similarity, min_keyword = get_min_similarity(), get_min_keyword_score()
+    valid_docs = [d for d in docs if d[5] >= min_similarity or d[6] >= min_keyword]
+
+    # 2. 构建 Prompt (按 token 预算装填，未装入的文档不作为来源)
+    with timed("pack_context"):
+        context, packed_docs = pack_context(valid_docs)
 
     sources = []
     seen_filenames = set()
-    if docs:
-        for doc in docs:
-            # doc structure: (id, content, metadata, distance)
-            distance = doc[3] if len(doc) > 3 else 1.0
-            
-            # Filter by dynamic threshold
-            if distance > current_threshold:
-                continue
-                
+    if packed_docs:
+        for doc in packed_docs:
+            # doc structure: (id, content, metadata, distance, token_count, score, keyword_score)
             meta = doc[2]
             if meta and "filename" in meta:
                 filename = meta.get("filename")
@@ -187,23 +299,118 @@ def answer_question(question: str, image: Optional[str] = None, kb_type: str = "
                         "id": doc[0],
                         "filename": filename,
                         "source": meta.get("source"),
-                        "score": distance
+                        "score": round(float(doc[5]), 4)
                     })
                     seen_filenames.add(filename)
     
-    # Re-check docs after filtering using the dynamic threshold
-    valid_docs = [d for d in docs if (d[3] if len(d) > 3 else 1.0) <= current_threshold]
-
-    # 2. 构建 Prompt
-    context = build_context(valid_docs) if valid_docs else "（未检索到相关文档）"
+    context = context or "（未检索到相关文档）"
     
     # 组合 System Prompt 和 User Prompt
     full_prompt = f"{SYSTEM_PROMPT}\n\n{build_prompt(question, context)}"
+    return full_prompt, sources, intent_info
+
+LLM_ERROR_PREFIXES = ("调用 LLM 失败", "Error calling", LLM_BUSY_ANSWER)
+
+def is_llm_error(answer: str) -> bool:
+    return not answer or answer.startswith(LLM_ERROR_PREFIXES)
+
+async def _check_answer_cache(question: str, image: Optional[str], kb_type: str):
+    """
+    返回 (cache_key, cached_result)；cache_key 为 None 表示本次不走缓存 (含图片或缓存关闭)
+    """
+    if image or not answer_cache.enabled:
+        return None, None
+    # Read the KB version before retrieval so a concurrent ingest invalidates this answer
+    version = kb_version()
+    embedding = None
+    if answer_cache.semantic_threshold > 0:
+        try:
+            embedding = await aembed_text(question)
+        except Exception as e:
+            print(f"Answer cache: embedding failed, exact match only: {e}")
+    cached = answer_cache.get(question, kb_type, embedding)
+    return (version, embedding), cached
+
+def _store_answer(question: str, kb_type: str, cache_key, result: Dict):
+    if cache_key is None or is_llm_error(result["answer"]):
+        return
+    version, embedding = cache_key
+    answer_cache.put(question, kb_type, result, version, embedding)
+
+async def answer_question(question: str, image: Optional[str] = None, kb_type: str = "user",
+                          role: str = DEFAULT_ROLE) -> Dict:
+    """
+    返回 {"answer", "sources", "intent", "intent_source"}
+    同一问题 (归一化后) + kb_type 的并发请求合并为一次执行 (rag/singleflight.py)
+    """
+    if image or not singleflight.enabled:
+        return await _answer_question(question, image, kb_type, role)
+    result, shared = await singleflight.do(
+        question_key(question, kb_type),
+        lambda: _answer_question(question, None, kb_type, role)
+    )
+    if shared:
+        ANSWERS.inc(path="coalesced")
+        # Not a fresh classification: keep coalesced copies out of intent training data
+        return {**result, "sources": list(result["sources"]), "intent_source": "coalesced"}
+    return dict(result)
+
+async def _answer_question(question: str, image: Optional[str], kb_type: str, role: str) -> Dict:
+    with timed("answer_cache"):
+        cache_key, cached = await _check_answer_cache(question, image, kb_type)
+    if cached is not None:
+        ANSWERS.inc(path="cache")
+        # Not a fresh classification: keep cache hits out of intent training data
+        return {**cached, "intent_source": "cache"}
+
+    timer = StageTimer()
+    prompt, sources, intent_info = await prepare_answer(question, image=image, kb_type=kb_type, timer=timer, role=role)
 
     # 3. 调用 LLM
-    answer = call_llm(full_prompt, image=image)
+    answer = await timer.measure("llm", call_llm(prompt, image=image, role=role))
+    timer.log(question)
+    ANSWERS.inc(path="llm_error" if is_llm_error(answer) else "llm")
     
-    return {
+    result = {
         "answer": answer,
-        "sources": sources
+        "sources": sources,
+        **intent_info
     }
+    _store_answer(question, kb_type, cache_key, result)
+    return dict(result)
+
+async def answer_question_stream(question: str, image: Optional[str] = None, kb_type: str = "user",
+                                 role: str = DEFAULT_ROLE) -> AsyncIterator[Dict]:
+    """
+    answer_question 的流式版本：先产出 {"type": "sources"}，再逐段产出 {"type": "token"}，
+    最后产出 {"type": "intent"} (意图识别结果，供记录 chat_logs)
+    """
+    with timed("answer_cache"):
+        cache_key, cached = await _check_answer_cache(question, image, kb_type)
+    if cached is not None:
+        ANSWERS.inc(path="cache")
+        yield {"type": "sources", "sources": cached["sources"]}
+        yield {"type": "token", "content": cached["answer"]}
+        yield {"type": "intent", "intent": cached.get("intent"), "intent_source": "cache"}
+        return
+
+    timer = StageTimer()
+    prompt, sources, intent_info = await prepare_answer(question, image=image, kb_type=kb_type, timer=timer, role=role)
+    yield {"type": "sources", "sources": sources}
+
+    parts = []
+    status = {"failed": False}
+    llm_start = time.perf_counter()
+    async for token in call_llm_stream(prompt, image=image, role=role, status=status):
+        if not parts:
+            timer.record("llm_first_token", time.perf_counter() - llm_start)
+        parts.append(token)
+        yield {"type": "token", "content": token}
+    timer.record("llm", time.perf_counter() - llm_start)
+    timer.log(question)
+    # A stream that failed midway ends with the error after the partial text, which is_llm_error misses
+    failed = status["failed"] or is_llm_error("".join(parts))
+    ANSWERS.inc(path="llm_error" if failed else "llm")
+    yield {"type": "intent", **intent_info}
+    if not failed:
+        _store_answer(question, kb_type, cache_key, {"answer": "".join(parts), "sources": sources, **intent_info})
@@ -1,88 +1,181 @@
+"""
+Hybrid retrieval: vector and keyword candidates in one SQL statement,
+fused with weighted reciprocal rank fusion (RRF). With an in-process
+vector store (RAG_VECTOR_STORE=numpy) or BM25 index, that leg's ranking
+is computed first and handed to the statement as an id array.
+
+Each retriever ranks up to RAG_CANDIDATES rows; a row's fused rank is
+    rrf = vector_weight / (rrf_k + vector_rank) + keyword_weight / (rrf_k + keyword_rank)
+(a missing rank contributes 0). RRF only orders rows; its value says
+nothing about relevance, so every row also carries calibrated scores: the
+cosine similarity of its embedding to the query (-1..1) and the fraction of
+the query's tokens it contains (0..1, see rag/fulltext.py), which is what
+RAG_MIN_SIMILARITY / RAG_MIN_KEYWORD_SCORE in qa.py are compared against.
+The keyword ranking is the GIN-indexed content_tsv match of rag/fulltext.py,
+or the in-process BM25 index of rag/bm25.py with RAG_LEXICAL_BACKEND=bm25.
+
+The fused candidates (with their embeddings) are then re-scored exactly and
+diversified with MMR and a per-file cap (rag/mmr.py). Rows are
+(id, content, metadata, distance, token_count, score, keyword_score) in
+that order; distance is the exact L2 distance to the full-precision
+embedding, also when the ANN index is quantized.
+
+Settings (env, or rag.* in config.yaml):
+    RAG_RRF_K           RRF rank constant, larger flattens rank differences (default 60)
+    RAG_VECTOR_WEIGHT   weight of the vector ranking (default 1.0)
+    RAG_KEYWORD_WEIGHT  weight of the keyword ranking (default 1.0)
+    RAG_CANDIDATES      candidates per retriever before fusion (default 4 * top_k, at least 20)
+"""
+import asyncio
+import os
 from sqlalchemy import text
 from db import engine
-from llm.embedding import embed_text
+from llm.embedding import aembed_text, embed_text
+from metrics import timed
+from rag.bm25 import bm25_index, lexical_backend
+from rag.fulltext import KEYWORD_SCORE_SQL, match_params
+from rag.mmr import mmr_select, mmr_settings, rescore
+from rag.vector_index import apply_search_settings, nearest_sql
+from rag.vector_store import get_vector_store
+from settings import env_float
+
+HYBRID_SQL = """
+WITH {vector_hits}
+{keyword_hits}
+fused AS (
+    SELECT id, SUM(weight / (:rrf_k + rank)) AS rrf
+    FROM (
+        SELECT id, rank, (:vector_weight)::float AS weight FROM vector_hits
+        UNION ALL
+        SELECT id, rank, (:keyword_weight)::float AS weight FROM keyword_hits
+    ) ranked
+    GROUP BY id
+)
+SELECT d.id, d.content, d.metadata, d.token_count,
+       {keyword_score} AS keyword_score,
+       f.rrf,
+       d.embedding::real[] AS embedding,
+       COALESCE('file:' || d.file_id, 'qa:' || d.qa_id, d.source) AS file_key
+FROM fused f
+JOIN documents d ON d.id = f.id
+ORDER BY f.rrf DESC, d.id
+LIMIT :limit
+"""
+
+# Vector leg: pgvector search on documents.embedding (through a quantized
+# index and an exact re-rank, see nearest_sql in rag/vector_index.py) ...
+PG_VECTOR_HITS = """vector_hits AS (
+    SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+    FROM ({nearest}) nearest
+),"""
+
+# ... or the ranking of an in-process vector store (rag/vector_store.py)
+STORE_VECTOR_HITS = """vector_hits AS (
+    SELECT id, rank
+    FROM unnest(CAST(:vector_ids AS bigint[])) WITH ORDINALITY AS hits(id, rank)
+),"""
+
+# Lexical leg: content_tsv full-text search (rag/fulltext.py) ...
+POSTGRES_KEYWORD_HITS = """keyword_hits AS (
+    SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC, id) AS rank
+    FROM (
+        SELECT id, ts_rank_cd(content_tsv, (:tsquery)::tsquery, 1) AS rank
+        FROM documents
+        WHERE content_tsv @@ (:tsquery)::tsquery {and_filter}
+        ORDER BY rank DESC, id
+        LIMIT :candidates
+    ) matching
+),"""
+
+# ... or the ranking of the in-process BM25 index (rag/bm25.py), passed in
+# as arrays; kb filtering already happened there
+BM25_KEYWORD_HITS = """keyword_hits AS (
+    SELECT id, rank, keyword_score
+    FROM unnest(CAST(:lexical_ids AS bigint[]), CAST(:lexical_scores AS float8[]))
+         WITH ORDINALITY AS hits(id, keyword_score, rank)
+),"""
+BM25_KEYWORD_SCORE_SQL = "COALESCE((SELECT k.keyword_score FROM keyword_hits k WHERE k.id = d.id), 0)"
+
+
+def get_candidates(top_k: int) -> int:
+    try:
+        configured = int(os.getenv("RAG_CANDIDATES", "0"))
+    except ValueError:
+        configured = 0
+    return max(top_k, configured) if configured > 0 else max(4 * top_k, 20)
+
 
 def retrieve_similar_documents(query: str, kb_type: str = "user", top_k: int = 3):
     query_embedding = embed_text(query)
+    return search_documents(query, query_embedding, kb_type=kb_type, top_k=top_k)
+
+async def aretrieve_similar_documents(query: str, kb_type: str = "user", top_k: int = 3, query_embedding: list = None):
+    """
+    Async retrieve_similar_documents: the query is embedded on the event loop
+    (unless query_embedding is given), the SQL runs in a worker thread.
+    """
+    if query_embedding is None:
+        query_embedding = await aembed_text(query)
+    return await asyncio.to_thread(search_documents, query, query_embedding, kb_type, top_k)
+
+def search_documents(query: str, query_embedding: list, kb_type: str = "user", top_k: int = 3):
+    """
+    Vector + keyword search for an already embedded query, one round trip,
+    then exact re-scoring and MMR over the fetched candidates. Returns up to
+    top_k * 2 rows to leave room for the score filters.
+    """
+    candidates = get_candidates(top_k)
+    settings = mmr_settings(kb_type)
+    params = {
+        "query_embedding": query_embedding,
+        **match_params(query),
+        "candidates": candidates,
+        "limit": max(top_k * 2, settings["fetch"] or candidates),
+        "rrf_k": max(1.0, env_float("RAG_RRF_K", 60)),
+        "vector_weight": max(0.0, env_float("RAG_VECTOR_WEIGHT", 1.0)),
+        "keyword_weight": max(0.0, env_float("RAG_KEYWORD_WEIGHT", 1.0)),
+    }
+    where = and_filter = ""
+    # kb_type is a column matching the predicate of the per-kb partial
+    # ANN indexes (rag/vector_index.py), so filtered search stays on them
+    if kb_type != "all":
+        where = "WHERE kb_type IN (:kb_type, 'shared')"
+        and_filter = "AND kb_type IN (:kb_type, 'shared')"
+        params["kb_type"] = kb_type
+
+    # Until the in-process indexes have finished loading, Postgres stands in
+    store = get_vector_store()
+    if store.in_database or not store.ready:
+        vector_hits = PG_VECTOR_HITS.format(nearest=nearest_sql(where))
+    else:
+        with timed("retrieve_vector_store"):
+            params["vector_ids"] = [doc_id for doc_id, _ in store.search(query_embedding, kb_type, candidates)]
+        vector_hits = STORE_VECTOR_HITS
+    if lexical_backend() == "bm25" and bm25_index.ready:
+        with timed("retrieve_bm25"):
+            hits = bm25_index.search(query, kb_type=kb_type, limit=candidates)
+        params["lexical_ids"] = [doc_id for doc_id, _, _ in hits]
+        params["lexical_scores"] = [coverage for _, _, coverage in hits]
+        keyword_hits, keyword_score = BM25_KEYWORD_HITS, BM25_KEYWORD_SCORE_SQL
+    else:
+        keyword_hits, keyword_score = POSTGRES_KEYWORD_HITS.format(and_filter=and_filter), KEYWORD_SCORE_SQL
+    sql = HYBRID_SQL.format(vector_hits=vector_hits, keyword_hits=keyword_hits, keyword_score=keyword_score)
 
     with engine.connect() as connection:
-        # Construct SQL based on kb_type
-        if kb_type == "all":
-             sql = """
-            SELECT id, content, metadata, embedding <-> (:query_embedding)::vector AS distance
-            FROM documents
-            ORDER BY distance ASC
-            LIMIT :top_k;
-            """
-             params = {
-                "query_embedding": query_embedding,
-                "top_k": top_k
-            }
-        else:
-             sql = """
-            SELECT id, content, metadata, embedding <-> (:query_embedding)::vector AS distance
-            FROM documents
-            WHERE metadata->>'kb_type' = :kb_type OR metadata->>'kb_type' IS NULL
-            ORDER BY distance ASC
-            LIMIT :top_k;
-            """
-             params = {
-                "query_embedding": query_embedding,
-                "top_k": top_k,
-                "kb_type": kb_type
-            }
-
-        # Use JSONB operator ->> to extract text value from metadata
-        result = connection.execute(
-            text(sql),
-            params
-        )
-        
-        vector_docs = result.fetchall()
-
-    # 2. Keyword Search (Fallback/Supplement)
-    # Using simple ILIKE for robustness on exact phrases
-    keyword_docs = []
-    try:
-        with engine.connect() as connection:
-            if kb_type == "all":
-                sql_kw = """
-                SELECT id, content, metadata, 0.0::float AS distance
-                FROM documents
-                WHERE content ILIKE :query
-                LIMIT :top_k;
-                """
-                params_kw = {"query": f"%{query}%", "top_k": top_k}
-            else:
-                sql_kw = """
-                SELECT id, content, metadata, 0.0::float AS distance
-                FROM documents
-                WHERE content ILIKE :query 
-                AND (metadata->>'kb_type' = :kb_type OR metadata->>'kb_type' IS NULL)
-                LIMIT :top_k;
-                """
-                params_kw = {"query": f"%{query}%", "top_k": top_k, "kb_type": kb_type}
-            
-            res_kw = connection.execute(text(sql_kw), params_kw).fetchall()
-            keyword_docs = res_kw
-    except Exception as e:
-        print(f"Keyword search failed: {e}")
-
-    # 3. Merge and Deduplicate
-    # Priority: Keyword match (distance=0) > Vector match
-    seen_ids = set()
-    final_docs = []
-    
-    # Add keyword docs first (they are "exact matches")
-    for doc in keyword_docs:
-        if doc[0] not in seen_ids:
-            final_docs.append(doc)
-            seen_ids.add(doc[0])
-            
-    # Add vector docs
-    for doc in vector_docs:
-        if doc[0] not in seen_ids:
-            final_docs.append(doc)
-            seen_ids.add(doc[0])
-            
-    return final_docs[:top_k * 2] # Return slightly more to allow filtering
+        with timed("retrieve_hybrid_sql"):
+            if "vector_ids" not in params:
+                # ef_search / probes of the ANN index, for this transaction only
+                apply_search_settings(connection, candidates)
+            rows = connection.execute(text(sql), params).fetchall()
+    if not rows:
+        # Empty KB, or nothing visible to this kb_type
+        return []
+
+    # Exact scores and MMR over the over-fetched candidates (rag/mmr.py)
+    with timed("retrieve_mmr"):
+        missing = [0.0] * len(query_embedding)
+        similarities, distances, unit = rescore(query_embedding, [r[6] if r[6] is not None else missing for r in rows])
+        picked = mmr_select([r[5] for r in rows], unit, [r[7] for r in rows], top_k * 2,
+                            lam=settings["lambda"], per_file=settings["per_file"])
+    return [(rows[i][0], rows[i][1], rows[i][2], float(distances[i]), rows[i][3], float(similarities[i]), rows[i][4])
+            for i in picked]
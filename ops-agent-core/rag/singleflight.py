@@ -0,0 +1,68 @@
+"""
+Request coalescing ("singleflight") for answer_question.
+
+While an answer for (normalized question, kb_type) is being computed,
+identical questions wait for that execution instead of starting their own
+retrieval and LLM call. The shared execution runs as its own task, so a
+caller that goes away does not cancel it for the others. Each caller still
+gets its own copy of the result (and its own chat_logs row in main.py).
+
+Settings (env):
+    SINGLEFLIGHT_ENABLED  "false" to run every request on its own (default true)
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from rag.answer_cache import normalize_question
+
+
+def question_key(question: str, kb_type: str) -> Tuple[str, str]:
+    return normalize_question(question), kb_type
+
+
+class SingleFlight:
+    """
+    Only used from the event loop, so no locking.
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.collapsed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        Run fn() unless an execution for key is already in flight; returns
+        (result, shared) where shared is True for callers that joined one.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.collapsed += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        calls = self.executions + self.collapsed
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "collapse_rate": round(self.collapsed / calls, 4) if calls else 0.0,
+        }
+
+
+singleflight = SingleFlight()
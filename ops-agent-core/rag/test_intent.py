@@ -0,0 +1,26 @@
+"""
+Checks of the intent rules in rag/intent.py, without a database:
+    python -m rag.test_intent
+"""
+from rag.intent import CHITCHAT, TECHNICAL, classify_by_rules
+
+# Greetings with a number or version stay chitchat
+for question in ("hi2", "hello", "早上好 v2", "谢谢你 2024", "你好啊", "在吗 123"):
+    assert classify_by_rules(question) in (CHITCHAT, None), question
+assert classify_by_rules("hi2") == CHITCHAT
+assert classify_by_rules("谢谢你 2024") == CHITCHAT
+
+# Anything else without a keyword or real identifier is left undecided
+for question in ("第2季度的安排", "v2 版本说明", "2024 年计划"):
+    assert classify_by_rules(question) is None, question
+
+# Identifiers that are technical on their own
+for question in ("错误码 10086", "告警码:2001", "ORA-12541", "http 502", "bj-olt-01 怎么看",
+                 "查看bbu3的状态", "host01 连不上", "10.1.2.3 ping 不通", "gnb 123"):
+    assert classify_by_rules(question) == TECHNICAL, question
+
+# Plain ops vocabulary
+assert classify_by_rules("基站退服告警怎么处理") == TECHNICAL
+assert classify_by_rules("你好，数据库连接超时") == TECHNICAL
+
+print("intent ok")
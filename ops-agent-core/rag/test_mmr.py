@@ -0,0 +1,22 @@
+"""
+Checks of rag/mmr.py without a database:
+    python -m rag.test_mmr
+"""
+import numpy as np
+
+from rag.mmr import mmr_select, rescore
+
+# No candidates (empty KB / kb filter matching nothing)
+similarities, distances, unit = rescore([0.1, 0.2], [])
+assert similarities.shape == (0,) and distances.shape == (0,) and unit.shape == (0, 2)
+assert mmr_select([], unit, [], 5) == []
+
+# Exact scores
+similarities, distances, unit = rescore([1.0, 0.0], [[1.0, 0.0], [0.0, 2.0]])
+assert np.allclose(similarities, [1.0, 0.0]) and np.allclose(distances, [0.0, np.sqrt(5)])
+
+# Near-duplicates of one file: the per-file cap lets the other file in
+unit = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+assert mmr_select([1.0, 0.9, 0.5], unit, ["file:1", "file:1", "file:2"], 2, lam=1.0, per_file=1) == [0, 2]
+
+print("mmr ok")
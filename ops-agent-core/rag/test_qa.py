@@ -1,7 +1,8 @@
 # rag/test_qa.py
+import asyncio
 from rag.qa import answer_question
 
 if __name__ == "__main__":
     question = "系统A无法登录怎么办？"
-    prompt = answer_question(question)
+    prompt = asyncio.run(answer_question(question))
     print(prompt)
@@ -0,0 +1,102 @@
+"""
+Checks of NumpyVectorStore (rag/vector_store.py) against brute-force numpy,
+without a database (db settings still come from .env / the environment):
+    python -m rag.test_vector_store
+"""
+import tempfile
+
+import numpy as np
+
+from rag.vector_store import MIN_CAPACITY, NumpyVectorStore
+
+
+def brute_force(vectors: dict, kbs: dict, query, kb_type: str, top_k: int):
+    query = np.asarray(query, dtype=np.float64)
+    query /= np.linalg.norm(query)
+    scored = []
+    for doc_id, vector in vectors.items():
+        if kb_type == "all" or kbs[doc_id] in (kb_type, "shared"):
+            unit = np.asarray(vector, dtype=np.float64) / np.linalg.norm(vector)
+            scored.append((-float(unit @ query), doc_id))
+    return [doc_id for _, doc_id in sorted(scored)[:top_k]]
+
+
+def check(store, vectors, kbs, queries):
+    for query in queries:
+        for kb_type in ("user", "admin", "all"):
+            got = store.search(query, kb_type=kb_type, top_k=10)
+            assert [doc_id for doc_id, _ in got] == brute_force(vectors, kbs, query, kb_type, 10), kb_type
+            for doc_id, distance in got:
+                unit = vectors[doc_id] / np.linalg.norm(vectors[doc_id])
+                assert abs(distance - np.linalg.norm(unit - query / np.linalg.norm(query))) < 1e-4
+    assert store.count() == len(vectors)
+    for kb_type in ("user", "admin"):
+        assert store.count(kb_type) == sum(1 for doc_id in vectors if kbs[doc_id] in (kb_type, "shared"))
+
+
+rng = np.random.default_rng(0)
+dim = 16
+queries = rng.standard_normal((5, dim))
+
+with tempfile.TemporaryDirectory() as directory:
+    # Fresh store: nothing added, no files yet
+    store = NumpyVectorStore(directory=directory)
+    assert store.count() == 0 and store.count("user") == 0
+    assert store.search(queries[0]) == []
+    assert store.delete([1, 2]) == 0
+
+    # More rows than the initial capacity, so the files double at least once
+    count = 3 * MIN_CAPACITY
+    vectors = {doc_id: rng.standard_normal(dim) for doc_id in range(1, count + 1)}
+    kbs = {doc_id: ("user", "admin", "shared")[doc_id % 3] for doc_id in vectors}
+    for start in range(1, count + 1, 500):
+        batch = range(start, min(count + 1, start + 500))
+        assert store.add((doc_id, vectors[doc_id], kbs[doc_id]) for doc_id in batch) == len(batch)
+    assert len(store.ids) >= count
+    check(store, vectors, kbs, queries)
+
+    # Replacing a known id keeps one row for it
+    vectors[7] = rng.standard_normal(dim)
+    store.add([(7, vectors[7], kbs[7])])
+    check(store, vectors, kbs, queries)
+
+    # A few deletes only tombstone; unknown ids are ignored
+    assert store.delete([2, 3, 4, count + 100]) == 3
+    for doc_id in (2, 3, 4):
+        del vectors[doc_id]
+    assert store.used > len(store.rows)
+    check(store, vectors, kbs, queries)
+
+    # Deleting most rows compacts: no tombstones left, capacity shrinks
+    doomed = [doc_id for doc_id in vectors if doc_id % 4]
+    assert store.delete(doomed) == len(doomed)
+    for doc_id in doomed:
+        del vectors[doc_id]
+    assert store.used == len(store.rows) == len(vectors)
+    assert len(store.ids) < count
+    check(store, vectors, kbs, queries)
+
+    # Tombstones written after the compaction must survive the reload too
+    assert store.delete([8]) == 1
+    del vectors[8]
+
+    # Reload from the files into a new instance
+    reloaded = NumpyVectorStore(directory=directory)
+    assert reloaded.load()
+    check(reloaded, vectors, kbs, queries)
+
+    # Search after more adds on the reloaded store
+    vectors[count + 1] = rng.standard_normal(dim)
+    kbs[count + 1] = "admin"
+    reloaded.add([(count + 1, vectors[count + 1], "admin")])
+    check(reloaded, vectors, kbs, queries)
+
+    # float16 store: same ranking on well-separated data
+    with tempfile.TemporaryDirectory() as half_directory:
+        half = NumpyVectorStore(directory=half_directory, dtype="float16")
+        half.add((doc_id, vector, kbs[doc_id]) for doc_id, vector in vectors.items())
+        for query in queries:
+            got = [doc_id for doc_id, _ in half.search(query, kb_type="all", top_k=1)]
+            assert got == brute_force(vectors, kbs, query, "all", 1)
+
+print("vector store ok")
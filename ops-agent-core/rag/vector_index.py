@@ -0,0 +1,490 @@
+"""
+ANN index on documents.embedding.
+
+Without an index every retrieval is an exact scan over all chunks. The
+index is built with the opclass of the distance operator the retriever
+orders by (<-> = L2, vector_l2_ops); an index on another opclass would
+never be used.
+
+- hnsw (default): best recall/latency, slower to build. m and
+  ef_construction are fixed at build time, ef_search is set per query
+  (SET LOCAL, at least top_k).
+- ivfflat: quicker to build, but its lists are trained on the rows
+  present at build time, so build it after the bulk load and rebuild when
+  the KB has grown a lot (lists 0 = rows/1000, sqrt(rows) above 1M rows).
+- none: exact search only.
+
+Quantization (RAG_VECTOR_QUANTIZATION) shrinks the index, not the table:
+- none: the index holds the float32 vectors (4 KB per 1024-dim row).
+- halfvec: an expression index on embedding::halfvec(dim) (half the size).
+- binary: an expression index on binary_quantize(embedding)::bit(dim),
+  Hamming distance (1/32 of the size), a coarse first pass only.
+With either, the search takes RAG_QUANTIZED_RERANK_FACTOR x the wanted
+candidates from the quantized index and re-ranks them by the exact L2
+distance of the full-precision embedding column, which stays as it is.
+Switching is a rebuild (the new index is built next to the old one); until
+the swap, queries keep the form of the index in place. Needs pgvector
+>= 0.7 for halfvec / binary_quantize.
+
+Besides the index over all chunks (kb_type "all"), each kb listed in
+RAG_PARTIAL_INDEX_KBS gets a partial index on kb_type IN (kb, 'shared'),
+the retriever's filter, so the filtered search walks only that kb's
+graph instead of post-filtering the global one (where a small kb could
+come back with fewer than top_k rows). Other kbs still use the global
+index with post-filtering; raise ef_search / probes for them, or enable
+RAG_HNSW_ITERATIVE_SCAN on pgvector >= 0.8.
+
+ensure_index() runs at startup and builds missing indexes with CREATE
+INDEX CONCURRENTLY, so ingestion and questions continue meanwhile. Changed
+build parameters only take effect after rebuild_index(), which builds each
+new index next to the old one and swaps them. Both ANALYZE documents.
+
+Usage (from ops-agent-core):
+    python -m rag.vector_index status|ensure|rebuild|analyze
+
+Settings (env, or rag.* in config.yaml):
+    RAG_VECTOR_INDEX               hnsw | ivfflat | none (default hnsw)
+    RAG_VECTOR_QUANTIZATION        none | halfvec | binary (default none)
+    RAG_QUANTIZED_RERANK_FACTOR    over-fetch of the quantized pass, 0 = 2 halfvec / 4 binary
+    RAG_PARTIAL_INDEX_KBS          kbs with their own partial index, comma-separated (default user)
+    RAG_HNSW_M                     links per node (default 16)
+    RAG_HNSW_EF_CONSTRUCTION       candidate list while building (default 64)
+    RAG_HNSW_EF_SEARCH             candidate list per query (default 100)
+    RAG_HNSW_ITERATIVE_SCAN        off | relaxed_order | strict_order, pgvector >= 0.8 (default off)
+    RAG_IVFFLAT_LISTS              inverted lists, 0 = from the row count (default 0)
+    RAG_IVFFLAT_PROBES             lists searched per query, 0 = sqrt(lists) (default 0)
+    RAG_INDEX_MAINTENANCE_WORK_MEM maintenance_work_mem for builds, e.g. 1GB (default: server setting)
+"""
+import math
+import os
+import re
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from settings import env_int
+
+INDEX_NAME = "documents_embedding_idx"
+TABLE = "documents"
+METHODS = ("hnsw", "ivfflat", "none")
+QUANTIZATIONS = ("none", "halfvec", "binary")
+OPCLASS = "vector_l2_ops"
+QUERY_VECTOR = "(:query_embedding)::vector"
+DEFAULT_DIM = 1024
+
+_build_lock = threading.Lock()
+_last_build = {}
+# Options of the index in place, as last seen by ensure / rebuild / status
+_index_options = {}
+# Quantization of the index in place and the embedding column's dimension
+_index_state = {}
+
+
+def get_index_method() -> str:
+    method = os.getenv("RAG_VECTOR_INDEX", "hnsw").lower()
+    if method not in METHODS:
+        print(f"Unknown RAG_VECTOR_INDEX {method!r}, using hnsw")
+        return "hnsw"
+    return method
+
+
+def get_quantization() -> str:
+    quantization = os.getenv("RAG_VECTOR_QUANTIZATION", "none").lower()
+    if quantization not in QUANTIZATIONS:
+        print(f"Unknown RAG_VECTOR_QUANTIZATION {quantization!r}, using none")
+        return "none"
+    return quantization
+
+
+def active_quantization() -> str:
+    """
+    Quantization of the built index (queries must match its expression to
+    use it); the configured one until an index has been seen.
+    """
+    return _index_state.get("quantization") or get_quantization()
+
+
+def rerank_factor(quantization: str) -> int:
+    if quantization == "none":
+        return 1
+    configured = env_int("RAG_QUANTIZED_RERANK_FACTOR", 0)
+    return configured if configured > 0 else {"halfvec": 2, "binary": 4}[quantization]
+
+
+def embedding_dim(connection=None) -> int:
+    """
+    Dimension of documents.embedding (its typmod), needed in the casts of
+    quantized expressions.
+    """
+    if "dim" not in _index_state:
+        try:
+            if connection is None:
+                from db import engine
+                with engine.connect() as conn:
+                    return embedding_dim(conn)
+            dim = connection.execute(text("""
+                SELECT atttypmod FROM pg_attribute
+                WHERE attrelid = CAST(:table AS regclass) AND attname = 'embedding'
+            """), {"table": TABLE}).scalar()
+            _index_state["dim"] = int(dim) if dim and dim > 0 else DEFAULT_DIM
+        except Exception as e:
+            print(f"Could not read the embedding dimension, assuming {DEFAULT_DIM}: {e}")
+            return DEFAULT_DIM
+    return _index_state["dim"]
+
+
+def index_target(quantization: str, dim: int) -> Tuple[str, str]:
+    """
+    (indexed expression, opclass) for a quantization.
+    """
+    if quantization == "halfvec":
+        return f"(embedding::halfvec({dim}))", "halfvec_l2_ops"
+    if quantization == "binary":
+        return f"(binary_quantize(embedding)::bit({dim}))", "bit_hamming_ops"
+    return "embedding", OPCLASS
+
+
+def order_expression(quantization: str, dim: int, query: str = QUERY_VECTOR) -> str:
+    """
+    Distance expression matching index_target, for ORDER BY.
+    """
+    if quantization == "halfvec":
+        return f"embedding::halfvec({dim}) <-> {query}::halfvec({dim})"
+    if quantization == "binary":
+        return f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize({query})"
+    return f"embedding <-> {query}"
+
+
+def nearest_sql(where: str = "", limit: str = ":candidates", table: str = TABLE, query: str = QUERY_VECTOR,
+                quantization: Optional[str] = None, dim: Optional[int] = None) -> str:
+    """
+    SELECT id, distance of the nearest rows by exact L2 distance. Quantized,
+    the index is walked for limit * rerank_factor rows first and those are
+    re-ranked with the full-precision embedding.
+    """
+    quantization = quantization or active_quantization()
+    exact = f"embedding <-> {query}"
+    if quantization == "none":
+        return f"SELECT id, {exact} AS distance FROM {table} {where} ORDER BY distance LIMIT {limit}"
+    dim = dim or embedding_dim()
+    return (
+        f"SELECT id, {exact} AS distance FROM ("
+        f"SELECT id, embedding FROM {table} {where} "
+        f"ORDER BY {order_expression(quantization, dim, query)} LIMIT {limit} * {rerank_factor(quantization)}"
+        f") coarse ORDER BY distance LIMIT {limit}"
+    )
+
+
+def get_partial_kbs() -> List[str]:
+    kbs = []
+    for kb in os.getenv("RAG_PARTIAL_INDEX_KBS", "user").split(","):
+        kb = kb.strip().lower()
+        if not kb or kb in ("all", "shared"):
+            continue
+        if not re.fullmatch(r"[a-z0-9_]+", kb):
+            print(f"Ignoring kb {kb!r} in RAG_PARTIAL_INDEX_KBS (letters, digits, _ only)")
+            continue
+        kbs.append(kb)
+    return kbs
+
+
+def index_specs() -> List[Tuple[str, Optional[str]]]:
+    """
+    (index name, kb) of the configured indexes; kb None = all chunks.
+    """
+    return [(INDEX_NAME, None)] + [(f"documents_embedding_{kb}_idx", kb) for kb in get_partial_kbs()]
+
+
+def ivfflat_lists(rows: int) -> int:
+    configured = env_int("RAG_IVFFLAT_LISTS", 0)
+    if configured > 0:
+        return configured
+    # pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) above
+    return max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows)))
+
+
+def build_options(method: str, rows: int = 0) -> dict:
+    if method == "hnsw":
+        return {"m": env_int("RAG_HNSW_M", 16), "ef_construction": env_int("RAG_HNSW_EF_CONSTRUCTION", 64)}
+    if method == "ivfflat":
+        return {"lists": ivfflat_lists(rows)}
+    return {}
+
+
+def _kb_predicate(kb: str) -> str:
+    # Same form as the retriever's filter, so the planner can match it
+    return f"kb_type IN ('{kb}', 'shared')"
+
+
+def _create_sql(name: str, method: str, options: dict, concurrently: bool, kb: Optional[str] = None,
+                quantization: str = "none", dim: int = DEFAULT_DIM) -> str:
+    with_clause = ", ".join(f"{key} = {int(value)}" for key, value in options.items())
+    where = f" WHERE {_kb_predicate(kb)}" if kb else ""
+    expression, opclass = index_target(quantization, dim)
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} ON {TABLE} "
+        f"USING {method} ({expression} {opclass}) WITH ({with_clause}){where}"
+    )
+
+
+def apply_search_settings(connection, top_k: int):
+    """
+    Per-query index settings. SET LOCAL only lasts for the current
+    transaction, so call it on the connection that runs the search.
+    """
+    method = get_index_method()
+    # The quantized pass fetches rerank_factor x top_k rows from the index
+    top_k *= rerank_factor(active_quantization())
+    if method == "hnsw":
+        ef_search = max(env_int("RAG_HNSW_EF_SEARCH", 100), top_k)
+        connection.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        iterative = os.getenv("RAG_HNSW_ITERATIVE_SCAN", "off").lower()
+        if iterative in ("relaxed_order", "strict_order"):
+            connection.execute(text(f"SET LOCAL hnsw.iterative_scan = {iterative}"))
+    elif method == "ivfflat":
+        probes = env_int("RAG_IVFFLAT_PROBES", 0)
+        if probes <= 0:
+            # Lists of the built index; before it was seen, assume 100
+            lists = _index_options.get("lists") or env_int("RAG_IVFFLAT_LISTS", 0) or 100
+            probes = max(1, int(math.sqrt(lists)))
+        connection.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+
+
+def describe_index(connection, name: str = INDEX_NAME) -> Optional[dict]:
+    row = connection.execute(text("""
+        SELECT am.amname, c.reloptions, i.indisvalid, pg_relation_size(c.oid), pg_get_indexdef(c.oid)
+        FROM pg_class c
+        JOIN pg_index i ON i.indexrelid = c.oid
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE c.relname = :name
+    """), {"name": name}).fetchone()
+    if row is None:
+        return None
+    options = {}
+    for item in row[1] or []:
+        key, _, value = item.partition("=")
+        options[key] = int(value) if value.isdigit() else value
+    quantization = _quantization_of(row[4])
+    if name == INDEX_NAME:
+        _index_options.clear()
+        _index_options.update(options)
+        _index_state["quantization"] = quantization
+    return {"method": row[0], "options": options, "quantization": quantization, "valid": row[2], "size_bytes": row[3]}
+
+
+def _quantization_of(indexdef: str) -> str:
+    if "binary_quantize" in indexdef:
+        return "binary"
+    if "halfvec" in indexdef:
+        return "halfvec"
+    return "none"
+
+
+def _count_rows(connection, kb: Optional[str] = None) -> int:
+    where = f" AND {_kb_predicate(kb)}" if kb else ""
+    return connection.execute(text(f"SELECT COUNT(*) FROM {TABLE} WHERE embedding IS NOT NULL{where}")).scalar() or 0
+
+
+def _stale_indexes(connection) -> List[str]:
+    # Partial indexes of kbs no longer in RAG_PARTIAL_INDEX_KBS
+    names = {name for name, _ in index_specs()}
+    rows = connection.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE 'documents\\_embedding\\_%\\_idx'"
+    ), {"table": TABLE}).fetchall()
+    return [row[0] for row in rows if row[0] not in names]
+
+
+def _matches(current: dict, method: str, options: dict) -> bool:
+    if current["method"] != method or current["quantization"] != get_quantization() or not current["valid"]:
+        return False
+    # ivfflat lists derived from the row count drift as the KB grows; that
+    # alone is no reason to rebuild
+    if method == "ivfflat" and env_int("RAG_IVFFLAT_LISTS", 0) <= 0:
+        return True
+    return all(current["options"].get(key) == value for key, value in options.items())
+
+
+def _autocommit_connection():
+    from db import engine
+    # CREATE / DROP INDEX CONCURRENTLY cannot run inside a transaction
+    return engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def _set_work_mem(connection):
+    work_mem = os.getenv("RAG_INDEX_MAINTENANCE_WORK_MEM", "")
+    if re.fullmatch(r"\d+\s*(kB|MB|GB)?", work_mem.strip()):
+        connection.execute(text(f"SET maintenance_work_mem = '{work_mem.strip()}'"))
+
+
+def analyze_documents():
+    """
+    Refresh planner statistics after bulk ingestion or deletion, so the
+    planner's row estimates (and its choice of the ANN index) stay right.
+    """
+    try:
+        with _autocommit_connection() as conn:
+            start = time.perf_counter()
+            conn.execute(text(f"ANALYZE {TABLE}"))
+            print(f"ANALYZE {TABLE} took {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"ANALYZE {TABLE} failed: {e}")
+
+
+def _build(conn, name: str, method: str, rows: int, kb: Optional[str] = None) -> dict:
+    options = build_options(method, rows)
+    quantization = get_quantization()
+    _set_work_mem(conn)
+    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    start = time.perf_counter()
+    conn.execute(text(_create_sql(name, method, options, concurrently=True, kb=kb,
+                                  quantization=quantization, dim=embedding_dim(conn))))
+    elapsed = time.perf_counter() - start
+    print(f"Built {method} index {name} {options} ({quantization}) over {rows} rows in {elapsed:.1f}s")
+    return {"method": method, "options": options, "quantization": quantization, "rows": rows,
+            "seconds": round(elapsed, 1)}
+
+
+def _index_in_place(options: dict, quantization: str):
+    # Queries switch to the new index's form once it carries INDEX_NAME
+    _index_options.clear()
+    _index_options.update(options)
+    _index_state["quantization"] = quantization
+
+
+def ensure_index() -> dict:
+    """
+    Build the configured indexes that do not exist; report (not fix) an
+    index built with other parameters. Returns the status per index.
+    """
+    method = get_index_method()
+    if method == "none":
+        return {"status": "disabled"}
+    if not _build_lock.acquire(blocking=False):
+        return {"status": "busy"}
+    results = {}
+    try:
+        with _autocommit_connection() as conn:
+            for name, kb in index_specs():
+                current = describe_index(conn, name)
+                rows = _count_rows(conn, kb)
+                if current is not None and current["valid"]:
+                    if not _matches(current, method, build_options(method, rows)):
+                        print(f"Vector index {name} is {current['method']} {current['options']} ({current['quantization']}), "
+                              f"configured {method} {build_options(method, rows)} ({get_quantization()}); "
+                              f"run a rebuild to apply")
+                    results[name] = {"status": "exists", **current}
+                elif method == "ivfflat" and rows < 1000:
+                    # Lists trained on a near-empty table give poor recall
+                    print(f"Vector index {name}: only {rows} rows, ivfflat is built once the KB has data (run a rebuild)")
+                    results[name] = {"status": "deferred", "rows": rows}
+                else:
+                    # Also replaces an invalid index left by an interrupted build
+                    results[name] = {"status": "built", **_build(conn, name, method, rows, kb)}
+                    if kb is None:
+                        _index_in_place(results[name]["options"], results[name]["quantization"])
+            if any(r["status"] == "built" for r in results.values()):
+                conn.execute(text(f"ANALYZE {TABLE}"))
+                _last_build.update(status="done", indexes=results, finished_at=time.time())
+        return results
+    except Exception as e:
+        # Startup goes on without the index; retrieval falls back to exact scans
+        print(f"Vector index check failed: {e}")
+        return {**results, "status": "failed", "error": str(e)}
+    finally:
+        _build_lock.release()
+
+
+def rebuild_index() -> dict:
+    """
+    Build fresh indexes with the current settings next to the old ones, then
+    swap them; retrieval keeps using the old index until each swap.
+    """
+    method = get_index_method()
+    if not _build_lock.acquire(blocking=False):
+        raise RuntimeError("an index build is already running")
+    results = {}
+    try:
+        _last_build.clear()
+        _last_build.update(status="running", started_at=time.time(), indexes=results)
+        with _autocommit_connection() as conn:
+            conn.execute(text(f"ANALYZE {TABLE}"))
+            for name in _stale_indexes(conn):
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                results[name] = {"method": "dropped"}
+            for name, kb in index_specs():
+                if method == "none":
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                    results[name] = {"method": "none"}
+                    if kb is None:
+                        # Exact scans: the query form follows the configuration
+                        _index_state.pop("quantization", None)
+                    continue
+                new_name = f"{name}_new"
+                results[name] = _build(conn, new_name, method, _count_rows(conn, kb), kb)
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(f"ALTER INDEX {new_name} RENAME TO {name}"))
+                if kb is None:
+                    _index_in_place(results[name]["options"], results[name]["quantization"])
+        _last_build.update(status="done", finished_at=time.time())
+        return results
+    except Exception as e:
+        _last_build.update(status="failed", error=str(e), finished_at=time.time())
+        raise
+    finally:
+        _build_lock.release()
+
+
+def start_rebuild() -> bool:
+    """
+    rebuild_index() in a background thread; False if a build is running.
+    """
+    if _build_lock.locked():
+        return False
+
+    def run():
+        try:
+            rebuild_index()
+        except Exception as e:
+            print(f"Vector index rebuild failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def index_status() -> dict:
+    from db import engine
+    method = get_index_method()
+    indexes = {}
+    with engine.connect() as conn:
+        for name, kb in index_specs():
+            rows = _count_rows(conn, kb)
+            indexes[name] = {
+                "kb_type": kb or "all",
+                "rows": rows,
+                "configured": {"method": method, "quantization": get_quantization(), **build_options(method, rows)},
+                "built": describe_index(conn, name),
+            }
+        stale = _stale_indexes(conn)
+    return {
+        "indexes": indexes,
+        "stale": stale,
+        "building": _build_lock.locked(),
+        "last_build": dict(_last_build),
+    }
+
+
+if __name__ == "__main__":
+    commands = {
+        "status": index_status,
+        "ensure": ensure_index,
+        "rebuild": rebuild_index,
+        "analyze": analyze_documents,
+    }
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command not in commands:
+        print(f"Usage: python -m rag.vector_index {'|'.join(commands)}")
+        sys.exit(2)
+    print(commands[command]())
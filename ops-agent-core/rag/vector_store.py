@@ -0,0 +1,372 @@
+"""
+Where the nearest-neighbour search over chunk embeddings runs.
+
+documents stays the system of record (content, metadata and the embedding
+column, written by rag/loader.py); a VectorStore answers "which chunk ids
+are closest to this query vector, within this kb". Two backends:
+
+pgvector  (default) the embedding column itself, searched by SQL with the
+          ANN index of rag/vector_index.py. The retriever inlines this
+          search into its hybrid statement, so it costs no extra round trip.
+numpy     an in-process replica for single-box deployments: unit-length
+          float32 or float16 rows in memory-mapped .npy files, exact top-k
+          by blockwise matrix products, kb_type filtering with cached
+          boolean masks. Deleted rows are tombstoned and compacted away.
+          At startup it syncs ids with documents (reads missing embeddings,
+          drops vanished ids), so the files can be deleted at any time.
+
+Compare the two on your hardware with python -m rag.bench_vector_store.
+
+Settings (env, or rag.* in config.yaml):
+    RAG_VECTOR_STORE        pgvector (default) | numpy
+    RAG_NUMPY_STORE_DIR     directory of the .npy files (default vector_store)
+    RAG_NUMPY_STORE_DTYPE   float32 (default) | float16 (half the memory, ~exact ranking)
+"""
+import json
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from db import engine
+from rag.vector_index import apply_search_settings, nearest_sql
+
+SHARED_KB = "shared"
+FETCH_BATCH = 1000
+SEARCH_BLOCK = 65536
+COMPACT_RATIO = 0.25
+MIN_CAPACITY = 1024
+
+
+def allowed_kbs(kb_type: str) -> Optional[Tuple[str, ...]]:
+    """
+    kb_type values a search for kb_type may return; None means all.
+    """
+    return None if kb_type == "all" else (kb_type, SHARED_KB)
+
+
+class VectorStore(ABC):
+    name = ""
+    # True when search runs in Postgres and can be inlined into SQL
+    in_database = False
+    ready = False
+
+    def start(self):
+        """
+        Load and catch up with documents (lifespan thread).
+        """
+
+    @abstractmethod
+    def add(self, rows: Iterable[Tuple[int, Sequence[float], str]]) -> int:
+        """
+        rows: (documents.id, embedding, kb_type); known ids are replaced.
+        """
+
+    @abstractmethod
+    def delete(self, ids: Iterable[int]) -> int:
+        ...
+
+    @abstractmethod
+    def search(self, query_embedding: Sequence[float], kb_type: str = "user", top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        (documents.id, L2 distance) of the top_k nearest chunks, best first.
+        """
+
+    @abstractmethod
+    def count(self, kb_type: Optional[str] = None) -> int:
+        """
+        Chunks searchable with kb_type (all chunks when None).
+        """
+
+
+class PgVectorStore(VectorStore):
+    """
+    documents.embedding is written by the loader's INSERT, in the same
+    transaction as the chunk, and removed with the row, so add / delete
+    have nothing left to do.
+    """
+    name = "pgvector"
+    in_database = True
+    ready = True
+
+    def add(self, rows) -> int:
+        return len(list(rows))
+
+    def delete(self, ids) -> int:
+        return len(list(ids))
+
+    def search(self, query_embedding, kb_type="user", top_k=5):
+        kbs = allowed_kbs(kb_type)
+        where = "WHERE kb_type IN :kbs" if kbs else ""
+        sql = text(nearest_sql(where, limit=":top_k"))
+        params = {"query_embedding": list(query_embedding), "top_k": top_k}
+        if kbs:
+            params["kbs"] = kbs
+        with engine.connect() as conn:
+            apply_search_settings(conn, top_k)
+            return [(row[0], float(row[1])) for row in conn.execute(sql, params)]
+
+    def count(self, kb_type=None) -> int:
+        kbs = allowed_kbs(kb_type) if kb_type else None
+        sql = "SELECT COUNT(*) FROM documents WHERE embedding IS NOT NULL" + (" AND kb_type IN :kbs" if kbs else "")
+        with engine.connect() as conn:
+            return int(conn.execute(text(sql), {"kbs": kbs} if kbs else {}).scalar() or 0)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Files in directory: vectors.npy (capacity x dim), ids.npy, kbs.npy
+    (index into meta.kb_names), alive.npy, and meta.json with the number
+    of used rows. Rows only append; capacity doubles when full.
+    """
+    name = "numpy"
+
+    def __init__(self, directory: Optional[str] = None, dtype: Optional[str] = None):
+        self.directory = directory or os.getenv("RAG_NUMPY_STORE_DIR", "vector_store")
+        dtype = (dtype or os.getenv("RAG_NUMPY_STORE_DTYPE", "float32")).lower()
+        self.dtype = np.float16 if dtype == "float16" else np.float32
+        self._lock = threading.RLock()
+        self.ready = False
+        self._reset(dim=0)
+
+    # --- files ----------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _reset(self, dim: int):
+        self.dim = dim
+        self.used = 0
+        self.kb_names = []
+        self.rows = {}          # documents.id -> row
+        self._masks = {}
+        self.vectors = self.ids = self.kbs = self.alive = None
+
+    def _allocate(self, capacity: int, suffix: str = ""):
+        from numpy.lib.format import open_memmap
+        os.makedirs(self.directory, exist_ok=True)
+        return (open_memmap(self._path(f"vectors{suffix}.npy"), mode="w+", dtype=self.dtype, shape=(capacity, self.dim)),
+                open_memmap(self._path(f"ids{suffix}.npy"), mode="w+", dtype=np.int64, shape=(capacity,)),
+                open_memmap(self._path(f"kbs{suffix}.npy"), mode="w+", dtype=np.uint8, shape=(capacity,)),
+                open_memmap(self._path(f"alive{suffix}.npy"), mode="w+", dtype=np.bool_, shape=(capacity,)))
+
+    def _rewrite(self, capacity: int, keep: np.ndarray):
+        """
+        Copy the rows in keep into files of the given capacity and swap them in.
+        """
+        arrays = self._allocate(capacity, suffix=".new")
+        for new, old in zip(arrays, (self.vectors, self.ids, self.kbs, self.alive)):
+            if old is not None and len(keep):
+                new[:len(keep)] = old[keep]
+            new.flush()
+        del arrays
+        for name in ("vectors", "ids", "kbs", "alive"):
+            os.replace(self._path(f"{name}.new.npy"), self._path(f"{name}.npy"))
+        self.used = len(keep)
+        self._open_files()
+        self.rows = {int(doc_id): i for i, doc_id in enumerate(self.ids[:self.used])}
+        self._masks = {}
+        self._write_meta()
+
+    def _open_files(self):
+        self.vectors = np.load(self._path("vectors.npy"), mmap_mode="r+")
+        self.ids = np.load(self._path("ids.npy"), mmap_mode="r+")
+        self.kbs = np.load(self._path("kbs.npy"), mmap_mode="r+")
+        self.alive = np.load(self._path("alive.npy"), mmap_mode="r+")
+
+    def _write_meta(self):
+        meta = {"used": self.used, "dim": self.dim, "dtype": np.dtype(self.dtype).name, "kb_names": self.kb_names}
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _flush(self):
+        for array in (self.vectors, self.ids, self.kbs, self.alive):
+            array.flush()
+        self._write_meta()
+
+    def load(self) -> bool:
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dtype"] != np.dtype(self.dtype).name:
+                print(f"Vector store {self.directory} is {meta['dtype']}, rebuilding as {np.dtype(self.dtype).name}")
+                return False
+            with self._lock:
+                self._reset(meta["dim"])
+                self.kb_names = meta["kb_names"]
+                self._open_files()
+                self.used = min(meta["used"], len(self.ids))
+                alive = self.alive[:self.used]
+                self.rows = {int(doc_id): i for i, doc_id in enumerate(self.ids[:self.used]) if alive[i]}
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Vector store {self.directory} unreadable, rebuilding: {e}")
+            return False
+
+    # --- updates --------------------------------------------------------------
+
+    def _kb_code(self, kb_type: str) -> int:
+        kb_type = kb_type or SHARED_KB
+        if kb_type not in self.kb_names:
+            self.kb_names.append(kb_type)
+        return self.kb_names.index(kb_type)
+
+    def add(self, rows) -> int:
+        rows = list(rows)
+        if not rows:
+            return 0
+        matrix = np.asarray([r[1] for r in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        with self._lock:
+            if self.dim != matrix.shape[1]:
+                if self.rows:
+                    print(f"Vector store: embedding size changed {self.dim} -> {matrix.shape[1]}, starting over")
+                self._reset(matrix.shape[1])
+                self.vectors = None
+                self._rewrite(MIN_CAPACITY, np.arange(0))
+            for doc_id, _, _ in rows:
+                self._delete_row(doc_id)
+            needed = self.used + len(rows)
+            if needed > len(self.ids):
+                self._rewrite(max(2 * len(self.ids), needed), np.arange(self.used))
+            start, end = self.used, needed
+            self.vectors[start:end] = matrix.astype(self.dtype)
+            self.ids[start:end] = [r[0] for r in rows]
+            self.kbs[start:end] = [self._kb_code(r[2]) for r in rows]
+            self.alive[start:end] = True
+            for i, (doc_id, _, _) in enumerate(rows):
+                self.rows[doc_id] = start + i
+            self.used = end
+            self._masks = {}
+            self._flush()
+        return len(rows)
+
+    def _delete_row(self, doc_id: int) -> bool:
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        return True
+
+    def delete(self, ids) -> int:
+        with self._lock:
+            deleted = sum(1 for doc_id in ids if self._delete_row(doc_id))
+            if deleted:
+                self._masks = {}
+                tombstones = self.used - len(self.rows)
+                if tombstones > max(MIN_CAPACITY, COMPACT_RATIO * self.used):
+                    self._rewrite(max(MIN_CAPACITY, 2 * len(self.rows)), np.flatnonzero(self.alive[:self.used]))
+                else:
+                    self._flush()
+        return deleted
+
+    # --- search ---------------------------------------------------------------
+
+    def _mask(self, kb_type: str) -> np.ndarray:
+        """
+        Live rows searchable with kb_type, cached until the next update.
+        """
+        if self.alive is None:
+            # Nothing added yet, no files open
+            return np.zeros(0, dtype=bool)
+        mask = self._masks.get(kb_type)
+        if mask is None:
+            mask = np.array(self.alive[:self.used], dtype=bool)
+            kbs = allowed_kbs(kb_type)
+            if kbs:
+                codes = [self.kb_names.index(kb) for kb in kbs if kb in self.kb_names]
+                mask &= np.isin(self.kbs[:self.used], codes)
+            self._masks[kb_type] = mask
+        return mask
+
+    def search(self, query_embedding, kb_type="user", top_k=5):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or top_k <= 0:
+            return []
+        query /= norm
+        with self._lock:
+            if not self.rows or query.shape[0] != self.dim:
+                return []
+            mask = self._mask(kb_type)
+            best_rows, best_sims = [], []
+            for start in range(0, self.used, SEARCH_BLOCK):
+                end = min(self.used, start + SEARCH_BLOCK)
+                sims = np.asarray(self.vectors[start:end], dtype=np.float32) @ query
+                sims[~mask[start:end]] = -np.inf
+                k = min(top_k, end - start)
+                top = np.argpartition(-sims, k - 1)[:k]
+                best_rows.append(top + start)
+                best_sims.append(sims[top])
+            rows = np.concatenate(best_rows)
+            sims = np.concatenate(best_sims)
+            order = np.argsort(-sims, kind="stable")[:top_k]
+            ids = self.ids[rows[order]]
+        # Unit vectors: |a - b| = sqrt(2 - 2 cos)
+        return [(int(doc_id), math.sqrt(max(0.0, 2 - 2 * float(sim))))
+                for doc_id, sim in zip(ids, sims[order]) if sim > -np.inf]
+
+    def count(self, kb_type=None) -> int:
+        with self._lock:
+            return len(self.rows) if not kb_type else int(self._mask(kb_type).sum())
+
+    # --- database sync --------------------------------------------------------
+
+    def sync(self) -> Tuple[int, int]:
+        """
+        Make the replica match documents. Returns (added, removed).
+        """
+        with engine.connect() as conn:
+            db_ids = {row[0] for row in conn.execute(text("SELECT id FROM documents WHERE embedding IS NOT NULL"))}
+        with self._lock:
+            stored = set(self.rows)
+        removed = self.delete(stored - db_ids)
+        missing = sorted(db_ids - stored)
+        added = 0
+        for i in range(0, len(missing), FETCH_BATCH):
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    text("SELECT id, embedding::real[], kb_type FROM documents WHERE id = ANY(:ids)"),
+                    {"ids": missing[i:i + FETCH_BATCH]}
+                ).fetchall()
+            added += self.add((row[0], row[1], row[2]) for row in rows)
+        return added, removed
+
+    def start(self):
+        start = time.perf_counter()
+        try:
+            self.load()
+            added, removed = self.sync()
+            self.ready = True
+            print(f"Numpy vector store ready in {time.perf_counter() - start:.1f}s: {self.count()} vectors "
+                  f"({np.dtype(self.dtype).name}, +{added} / -{removed} since last run)")
+        except Exception as e:
+            print(f"Numpy vector store unavailable, searching with pgvector: {e}")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def vector_store_backend() -> str:
+    backend = os.getenv("RAG_VECTOR_STORE", "pgvector").lower()
+    return backend if backend in ("pgvector", "numpy") else "pgvector"
+
+
+def get_vector_store() -> VectorStore:
+    backend = vector_store_backend()
+    with _stores_lock:
+        store = _stores.get(backend)
+        if store is None:
+            store = _stores[backend] = NumpyVectorStore() if backend == "numpy" else PgVectorStore()
+        return store
@@ -0,0 +1,19 @@
+"""
+Numeric settings from the environment (set directly, or from config.yaml
+by ops-agent-biz/config_env.py); an invalid value falls back to the default.
+"""
+import os
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
@@ -1623,6 +1623,16 @@ function UnknownQuestionsView({ userRole }) {
     );
 }
 
+// 轮询入库任务 (/ingest_jobs/{id})，直到完成或失败，返回任务
+const waitForIngestJob = async (jobId, onProgress) => {
+  while (true) {
+    const { data: job } = await axios.get(`/ingest_jobs/${jobId}`);
+    if (job.status === 'done' || job.status === 'failed') return job;
+    if (onProgress) onProgress(job);
+    await new Promise(resolve => setTimeout(resolve, 2000));
+  }
+};
+
 // 上传模态框组件
 function UploadModal({ isOpen, onClose, onUpload, userRole }) {
   const [files, setFiles] = useState([]);
@@ -1674,9 +1684,24 @@ function UploadModal({ isOpen, onClose, onUpload, userRole }) {
       const results = response.data.results;
       const errors = results.filter(r => r.status === 'error');
       const pending = results.filter(r => r.status === 'pending');
-      
+      const queued = results.filter(r => r.status === 'queued');
+
+      // 管理员上传：文件已加入入库队列，等待解析入库完成
+      if (errors.length === 0 && queued.length > 0) {
+        const percents = {};
+        setMessage(`⏳ ${queued.length} 个文件已加入入库队列，正在解析...`);
+        const jobs = await Promise.all(queued.map(r => waitForIngestJob(r.job_id, job => {
+          percents[r.job_id] = job.progress.percent;
+          const total = queued.reduce((sum, q) => sum + (percents[q.job_id] || 0), 0);
+          setMessage(`⏳ 正在解析入库 ${queued.length} 个文件：${Math.round(total / queued.length)}%`);
+        })));
+        queued.forEach((r, i) => {
+          if (jobs[i].status === 'failed') errors.push({ ...r, message: jobs[i].error });
+        });
+      }
+
       if (errors.length > 0) {
-        setMessage(`❌ 部分文件上传失败: ${errors.map(e => e.filename).join(', ')}`);
+        setMessage(`❌ 部分文件上传失败: ${errors.map(e => e.message ? `${e.filename} (${e.message})` : e.filename).join(', ')}`);
       } else if (pending.length > 0) {
         setMessage(`⏳ ${pending.length} 个文件已提交，等待管理员审批`);
         setTimeout(() => {
@@ -1914,7 +1939,7 @@ function ChatInterface({ auth, onLogout, isUserMode }) {
 
     // 创建 FormData
     const formData = new FormData();
-    formData.append('file', file);
+    formData.append('files', file);
 
     // 添加一个临时消息表示正在上传
     const uploadMsgId = Date.now().toString();
@@ -1935,12 +1960,28 @@ function ChatInterface({ auth, onLogout, isUserMode }) {
       if (response.data.error) {
          throw new Error(response.data.error);
       }
-      
-      setMessages((prev) => prev.map(msg => 
-        msg.id === uploadMsgId 
-        ? { ...msg, content: `✅ 文档 **${file.name}** 已成功上传并加入知识库！` }
-        : msg
+      const result = response.data.results[0];
+      if (result.status === 'error') {
+         throw new Error(result.message);
+      }
+      const setUploadMsg = (content) => setMessages((prev) => prev.map(msg => 
+        msg.id === uploadMsgId ? { ...msg, content } : msg
       ));
+
+      if (result.status === 'pending') {
+        setUploadMsg(`✅ 文件 **${file.name}** 已上传，等待管理员审批通过后生效。`);
+      } else {
+        if (result.status === 'queued') {
+          setUploadMsg(`📄 文档 **${file.name}** 已加入入库队列，正在解析...`);
+          const job = await waitForIngestJob(result.job_id, running => {
+            setUploadMsg(`📄 正在解析入库文档：${file.name}（${running.progress.percent}%）`);
+          });
+          if (job.status === 'failed') {
+            throw new Error(`入库失败：${job.error || '未知错误'}`);
+          }
+        }
+        setUploadMsg(`✅ 文档 **${file.name}** 已成功上传并加入知识库！`);
+      }
     } catch (error) {
       console.error('Upload Error:', error);
       setMessages((prev) => prev.map(msg => 
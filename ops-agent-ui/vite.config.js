@@ -15,6 +15,7 @@ export default defineConfig({
       '/guest-token': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true },
       '/get_answer': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true, timeout: 60000, proxyTimeout: 60000 },
       '/upload_doc': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true },
+      '/ingest_jobs': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true },
       '/hot_questions': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true },
       '/feedback': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true },
       '/reprocess_docs': { target: process.env.VITE_API_TARGET || 'http://127.0.0.1:8000', changeOrigin: true },